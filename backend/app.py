@@ -4,8 +4,19 @@
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import get_config
-from utils.db import init_db
+from utils.db import init_connection_cleanup, init_db
+from utils.instrumentation import init_instrumentation, init_request_profiling
+from utils.metrics import init_metrics
+from utils.rate_limit import init_rate_limiting
+from utils.sqlite_tuning import init_sqlite_tuning, sqlite_stats
+from services.password_hasher import password_hasher
+from services.overdue_sweeper import init_overdue_sweeper, overdue_sweeper
+from services.finance_analytics import init_finance_analytics
+from services.reminder_dispatcher import init_reminder_dispatcher, reminder_dispatcher
+from services.pdf_renderer import pdf_renderer
+from services.post_dispatcher import init_post_dispatcher, post_dispatcher
 import os
 
 # Initialize Flask app
@@ -17,12 +28,29 @@ app = Flask(__name__,
 config = get_config()
 app.config.from_object(config)
 
+# Take the client address from X-Forwarded-For when running behind trusted proxies
+if config.PROXY_FIX_X_FOR:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.PROXY_FIX_X_FOR,
+                            x_proto=config.PROXY_FIX_X_FOR, x_host=config.PROXY_FIX_X_FOR)
+
 # Enable CORS for frontend communication
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # Initialize JWT for authentication
 jwt = JWTManager(app)
 
+# Record per-request timings (Server-Timing headers and performance logs)
+init_instrumentation(app)
+
+# Admin-only cProfile of single requests (X-Profile header)
+init_request_profiling(app)
+
+# Export Prometheus metrics at /metrics
+init_metrics(app)
+
+# Enforce per-tier API rate limits
+init_rate_limiting(app)
+
 # Initialize database connection
 print("Initializing database connection...")
 if init_db():
@@ -30,10 +58,28 @@ if init_db():
 else:
     print("✗ Database connection failed - check your configuration")
 
+# Close connections (and end their write transactions) that a request left open
+init_connection_cleanup(app)
+
+# Checkpoint the SQLite WAL in the background
+init_sqlite_tuning(app)
+
+# Backfill the invoice aggregates behind finance analytics
+init_finance_analytics(app)
+
+# Mark invoices past their due date as overdue in the background
+init_overdue_sweeper(app)
+
+# Deliver event reminders when they fall due
+init_reminder_dispatcher(app)
+
+# Publish scheduled marketing posts when they fall due
+init_post_dispatcher(app)
+
 # Import and register route blueprints
 from routes import auth_routes, client_routes, project_routes, design_routes
 from routes import product_routes, invoice_routes, marketing_routes, calendar_routes
-from routes import dashboard_routes
+from routes import dashboard_routes, admin_routes
 
 # Register all API route blueprints with /api prefix
 app.register_blueprint(auth_routes.bp, url_prefix='/api/auth')
@@ -45,6 +91,7 @@ app.register_blueprint(invoice_routes.bp, url_prefix='/api/invoices')
 app.register_blueprint(marketing_routes.bp, url_prefix='/api/marketing')
 app.register_blueprint(calendar_routes.bp, url_prefix='/api/calendar')
 app.register_blueprint(dashboard_routes.bp, url_prefix='/api/dashboard')
+app.register_blueprint(admin_routes.bp, url_prefix='/api/admin')
 
 
 # Root route - serves landing page
@@ -76,7 +123,13 @@ def health_check():
         'status': 'healthy',
         'message': 'AI Studio API is running',
         'version': '1.0.0',
-        'environment': app.config['FLASK_ENV']
+        'environment': app.config['FLASK_ENV'],
+        'password_hasher': password_hasher.stats(),
+        'sqlite': sqlite_stats(),
+        'overdue_sweeper': overdue_sweeper.stats(),
+        'pdf_renderer': pdf_renderer.stats(),
+        'reminders': reminder_dispatcher.stats(),
+        'marketing_posts': post_dispatcher.stats()
     }), 200
 
 
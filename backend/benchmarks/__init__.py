@@ -0,0 +1,2 @@
+# Benchmarks package
+# Offline benchmark scripts for the AI Studio backend (run from the backend directory)
@@ -0,0 +1,216 @@
+# Calendar query benchmarks
+# Compares the interval-indexed calendar queries (range, conflicts, free/busy)
+# with the same predicates evaluated by scanning a designer's events, for
+# calendars of 1k to 100k events per designer
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.calendar_queries --events 1000 10000 100000
+#     python -m benchmarks.calendar_queries --events 100000 --users 3 --output results/calendar.json
+#
+# The indexed queries should stay roughly flat as calendars grow, while the
+# scans grow linearly with the number of events per designer.
+
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.common import SCHEMA_PATH, measure
+from models.calendar import CalendarEvent
+from utils.db import wrap_connection
+
+# The designer whose calendar the benchmarks read
+TARGET_USER = 1
+
+# VM instructions between progress handler calls when counting steps
+STEP_GRANULARITY = 100
+
+# Same predicates as CalendarEvent's indexed queries, without the interval index
+SCAN_RANGE_SQL = """
+    SELECT e.* FROM calendar_events e
+    WHERE e.user_id = %s
+    AND datetime(e.start_time) <= datetime(%s)
+    AND MAX(datetime(e.start_time), COALESCE(datetime(e.end_time), datetime(e.start_time))) >= datetime(%s)
+    ORDER BY e.start_time ASC
+"""
+
+SCAN_BUSY_SQL = """
+    SELECT e.* FROM calendar_events e
+    WHERE e.user_id = %s
+    AND e.end_time IS NOT NULL
+    AND datetime(e.start_time) < datetime(%s)
+    AND datetime(e.end_time) > datetime(%s)
+    ORDER BY e.start_time ASC
+"""
+
+
+def seed(db_path, events_per_user, users, seed_value=42, chunk_size=20000):
+    """
+    Create a database where every designer has events_per_user events
+    
+    Events are spread over two years around today; most last 15 minutes to
+    4 hours, a fifth are deadlines or reminders without an end time.
+    
+    Args:
+        db_path: Database file to create
+        events_per_user: Events per designer
+        users: Number of designers
+        seed_value: Random seed
+        chunk_size: Rows per executemany batch
+    """
+    rng = random.Random(seed_value)
+    origin = datetime.now().replace(second=0, microsecond=0) - timedelta(days=365)
+    total = events_per_user * users
+    
+    def row(index):
+        start = origin + timedelta(minutes=rng.randrange(0, 730 * 1440, 15))
+        if rng.random() < 0.2:
+            return (index % users + 1, f'Deadline {index}', rng.choice(('deadline', 'reminder')),
+                    start.strftime('%Y-%m-%dT%H:%M:%S'), None)
+        end = start + timedelta(minutes=rng.choice((15, 30, 45, 60, 90, 120, 240)))
+        return (index % users + 1, f'Meeting {index}', 'meeting',
+                start.strftime('%Y-%m-%dT%H:%M:%S'), end.strftime('%Y-%m-%dT%H:%M:%S'))
+    
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(SCHEMA_PATH.read_text())
+        connection.executemany(
+            "INSERT OR IGNORE INTO users (id, name, email, password_hash) VALUES (?, ?, ?, 'x')",
+            [(user_id, f'Designer {user_id}', f'designer{user_id}@bench.local') for user_id in range(1, users + 1)]
+        )
+        for start in range(0, total, chunk_size):
+            connection.executemany(
+                'INSERT INTO calendar_events (user_id, title, event_type, start_time, end_time) VALUES (?, ?, ?, ?, ?)',
+                (row(i) for i in range(start, min(start + chunk_size, total)))
+            )
+        connection.commit()
+        connection.execute('ANALYZE')
+    finally:
+        connection.close()
+
+
+def scan(connection, sql, user_id, start, end):
+    """Run one of the scan queries (the baseline)"""
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (user_id, end, start))
+        return cursor.fetchall()
+
+
+def cases():
+    """
+    Benchmarked queries as (name, indexed function, scan function or None)
+    
+    Returns:
+        List of tuples; functions take a connection and return the result rows
+    """
+    now = datetime.now().replace(second=0, microsecond=0)
+    week_start, week_end = now.isoformat(), (now + timedelta(days=7)).isoformat()
+    slot_start, slot_end = (now + timedelta(days=2, hours=10)).isoformat(), (now + timedelta(days=2, hours=11)).isoformat()
+    month_start, month_end = (now - timedelta(days=15)).isoformat(), (now + timedelta(days=15)).isoformat()
+    
+    return [
+        ('range (7 days)',
+         lambda c: CalendarEvent(c)._overlapping(TARGET_USER, week_start, week_end),
+         lambda c: scan(c, SCAN_RANGE_SQL, TARGET_USER, week_start, week_end)),
+        ('range (30 days)',
+         lambda c: CalendarEvent(c)._overlapping(TARGET_USER, month_start, month_end),
+         lambda c: scan(c, SCAN_RANGE_SQL, TARGET_USER, month_start, month_end)),
+        ('conflicts (1 hour slot)',
+         lambda c: CalendarEvent(c).find_conflicts(TARGET_USER, slot_start, slot_end),
+         lambda c: scan(c, SCAN_BUSY_SQL, TARGET_USER, slot_start, slot_end)),
+        ('free/busy (7 days)',
+         lambda c: CalendarEvent(c).get_free_busy(TARGET_USER, week_start, week_end)['busy'],
+         lambda c: scan(c, SCAN_BUSY_SQL, TARGET_USER, week_start, week_end)),
+        ('upcoming (20 events)',
+         lambda c: CalendarEvent(c).get_upcoming(TARGET_USER, limit=20),
+         None)
+    ]
+
+
+def profile(raw, func, repeat):
+    """
+    Time a query function and count the SQLite VM steps of one call
+    
+    Returns:
+        Dictionary of timings, rows returned and VM steps
+    """
+    connection = wrap_connection(raw)
+    timings = measure(lambda: func(connection), repeat=repeat, warmup=1)
+    
+    steps = 0
+    
+    def count_steps():
+        nonlocal steps
+        steps += STEP_GRANULARITY
+        return 0
+    
+    raw.set_progress_handler(count_steps, STEP_GRANULARITY)
+    rows = func(connection)
+    raw.set_progress_handler(None, 0)
+    return {**timings, 'rows': len(rows), 'vm_steps': steps}
+
+
+def run(event_counts, users, repeat, output):
+    """Seed each calendar size, benchmark every query and print the report"""
+    # The scans are slow on purpose
+    logging.getLogger('ai_studio.slow_query').disabled = True
+    
+    results = {'meta': {'started_at': datetime.now().isoformat(timespec='seconds'),
+                        'users': users, 'repeat': repeat}, 'cases': []}
+    
+    print(f"{'query':<26} {'events':>8} {'rows':>6} {'indexed_ms':>11} {'scan_ms':>9} {'speedup':>8} "
+          f"{'indexed_steps':>14} {'scan_steps':>11}")
+    for events in event_counts:
+        workdir = tempfile.mkdtemp(prefix='ai_studio_calendar_')
+        db_path = os.path.join(workdir, f'calendar_{events}.db')
+        
+        started = time.perf_counter()
+        seed(db_path, events, users)
+        print(f"-- {events} events per designer, {users} designers (seeded in {time.perf_counter() - started:.1f}s)")
+        
+        raw = sqlite3.connect(db_path, check_same_thread=False)
+        try:
+            for name, indexed, baseline in cases():
+                result = {'query': name, 'events_per_user': events, 'indexed': profile(raw, indexed, repeat)}
+                if baseline:
+                    result['scan'] = profile(raw, baseline, repeat)
+                    if result['scan']['rows'] != result['indexed']['rows'] and name.startswith(('range', 'conflicts')):
+                        raise AssertionError(f"{name}: indexed query returned {result['indexed']['rows']} rows, "
+                                             f"scan returned {result['scan']['rows']}")
+                results['cases'].append(result)
+                
+                indexed_result, scan_result = result['indexed'], result.get('scan')
+                scan_ms = f"{scan_result['median_ms']:>9.3f}" if scan_result else f"{'-':>9}"
+                speedup = (f"{scan_result['median_ms'] / max(indexed_result['median_ms'], 0.001):>7.1f}x"
+                           if scan_result else f"{'-':>8}")
+                scan_steps = f"{scan_result['vm_steps']:>11}" if scan_result else f"{'-':>11}"
+                print(f"{name:<26} {events:>8} {indexed_result['rows']:>6} {indexed_result['median_ms']:>11.3f} "
+                      f"{scan_ms} {speedup} {indexed_result['vm_steps']:>14} {scan_steps}")
+        finally:
+            raw.close()
+            os.remove(db_path)
+            os.rmdir(workdir)
+    
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark interval-indexed calendar queries against scans')
+    parser.add_argument('--events', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Events per designer')
+    parser.add_argument('--users', type=int, default=2, help='Designers sharing the table')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed calls per query and size')
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args()
+    
+    run(args.events, args.users, args.repeat, args.output)
@@ -0,0 +1,133 @@
+# Benchmark helpers
+# Shared SQLite setup and timing utilities for the benchmark scripts
+
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+
+# SQLite schema used to create benchmark databases
+SCHEMA_PATH = Path(__file__).resolve().parent.parent.parent / 'database' / 'schema_sqlite.sql'
+
+
+class BenchmarkCursor:
+    """Cursor adapter giving sqlite3 the interface the models expect"""
+    
+    def __init__(self, cursor):
+        """Initialize with a raw sqlite3 cursor"""
+        self.cursor = cursor
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cursor.close()
+        return False
+    
+    def execute(self, sql, params=()):
+        """Execute a query written with %s placeholders"""
+        return self.cursor.execute(sql.replace('%s', '?'), tuple(params))
+    
+    def executemany(self, sql, seq_of_params):
+        """Execute a query once for each parameter tuple"""
+        return self.cursor.executemany(sql.replace('%s', '?'), seq_of_params)
+    
+    def fetchone(self):
+        """Fetch one row as a dictionary"""
+        row = self.cursor.fetchone()
+        return dict(row) if row is not None else None
+    
+    def fetchmany(self, size):
+        """Fetch up to size rows as dictionaries"""
+        return [dict(row) for row in self.cursor.fetchmany(size)]
+    
+    def fetchall(self):
+        """Fetch all rows as dictionaries"""
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+    
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+
+class BenchmarkConnection:
+    """Connection adapter returning BenchmarkCursor objects"""
+    
+    def __init__(self, connection):
+        """Initialize with a raw sqlite3 connection"""
+        self.raw = connection
+    
+    def cursor(self):
+        return BenchmarkCursor(self.raw.cursor())
+    
+    def commit(self):
+        self.raw.commit()
+    
+    def rollback(self):
+        self.raw.rollback()
+    
+    def close(self):
+        self.raw.close()
+
+
+def connect(db_path=':memory:'):
+    """
+    Create a SQLite benchmark database with the application schema
+    
+    Args:
+        db_path: Database file path (defaults to an in-memory database)
+    
+    Returns:
+        BenchmarkConnection ready for use with the models
+    """
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA_PATH.read_text())
+    return BenchmarkConnection(connection)
+
+
+def measure(func, repeat=5, warmup=1):
+    """
+    Time repeated calls of a function
+    
+    Args:
+        func: Zero-argument callable to benchmark
+        repeat: Number of timed calls
+        warmup: Number of untimed calls made first
+    
+    Returns:
+        Dictionary with min, median and max timings in milliseconds
+    """
+    for _ in range(warmup):
+        func()
+    
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3)
+    }
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile
+    
+    Args:
+        values: Sequence of numbers
+        fraction: Percentile as a fraction (0.95 for p95)
+    
+    Returns:
+        Value at the given fraction of the sorted values
+    """
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
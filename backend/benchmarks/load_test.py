@@ -0,0 +1,297 @@
+# API load test runner
+# Seeds a SQLite database, replays a weighted mix of real API calls against the
+# app (in-process, or a running server with --base-url) and reports throughput
+# and latency percentiles per endpoint
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.load_test --scale 2 --requests 3000 --concurrency 8
+#     python -m benchmarks.load_test --output results/after.json --compare results/before.json
+#
+# Runs fully offline: the database is SQLite and AI calls go to the stand-in
+# client (AI_PROVIDER=stub, with --ai-latency-ms of simulated latency).
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+from benchmarks.common import percentile
+from benchmarks.seed import PASSWORD, create_database
+from benchmarks.workload import load_sessions, schedule
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def configure_environment(db_path, ai_latency_ms):
+    """Point the app at the benchmark database (must run before the app is imported)"""
+    os.environ.update({
+        'FLASK_ENV': 'development',
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'AI_PROVIDER': 'stub',
+        'AI_STUB_LATENCY_MS': str(ai_latency_ms),
+        'EMBEDDING_PROVIDER': 'local',
+        'RATE_LIMIT_ENABLED': 'false',
+        'PERF_LOG_REQUESTS': 'false',
+        'BCRYPT_LOG_ROUNDS': '4'  # Matches the seeded password hashes
+    })
+
+
+class InProcessTransport:
+    """Sends requests through Flask test clients (one per thread)"""
+    
+    def __init__(self):
+        # Routes import 'backend.*', so the repository root must be importable
+        sys.path.insert(0, str(BACKEND_DIR.parent))
+        from app import app
+        
+        self.app = app
+        self._local = threading.local()
+    
+    def request(self, method, path, headers=None, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTransport:
+    """Sends requests to a running server"""
+    
+    def __init__(self, base_url):
+        import requests
+        
+        self.base_url = base_url.rstrip('/')
+        self._requests = requests
+        self._local = threading.local()
+    
+    def request(self, method, path, headers=None, body=None):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        response = session.request(method, self.base_url + path, headers=headers, json=body)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+def log_in(transport, sessions):
+    """Log every seeded designer in through the real endpoint and keep their tokens"""
+    for session in sessions:
+        status, payload = transport.request('POST', '/api/auth/login',
+                                            body={'email': session.email, 'password': PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'Login failed for {session.email}: {status} {payload}')
+        session.token = payload['access_token']
+
+
+def run_plan(transport, plan, concurrency):
+    """
+    Replay a request plan with a pool of threads
+    
+    Returns:
+        Tuple of (list of (operation name, status, milliseconds), elapsed seconds)
+    """
+    samples = []
+    lock = threading.Lock()
+    pending = iter(plan)
+    
+    def worker():
+        local = []
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                break
+            
+            session, operation, path, body = item
+            started = time.perf_counter()
+            try:
+                status, _ = transport.request(operation.method, path, session.headers, body)
+            except Exception:
+                status = 0
+            local.append((operation.name, status, (time.perf_counter() - started) * 1000))
+        with lock:
+            samples.extend(local)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    """Aggregate samples into overall and per-endpoint statistics"""
+    def stats(latencies, statuses):
+        errors = sum(count for status, count in statuses.items() if not 200 <= int(status) < 400)
+        return {
+            'count': len(latencies),
+            'errors': errors,
+            'statuses': statuses,
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'max_ms': round(max(latencies), 3)
+        }
+    
+    grouped = {}
+    for name, status, milliseconds in samples:
+        latencies, statuses = grouped.setdefault(name, ([], {}))
+        latencies.append(milliseconds)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    
+    overall_statuses = {}
+    for _, statuses in grouped.values():
+        for status, count in statuses.items():
+            overall_statuses[status] = overall_statuses.get(status, 0) + count
+    
+    return {
+        'duration_s': round(elapsed, 3),
+        'overall': stats([sample[2] for sample in samples], overall_statuses),
+        'endpoints': {name: stats(*grouped[name]) for name in sorted(grouped)}
+    }
+
+
+def git_revision():
+    """Short commit hash of the working tree, if available"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    """Print the per-endpoint table"""
+    overall = results['overall']
+    print(f"\n{results['meta']['requests']} requests in {results['duration_s']}s "
+          f"({overall['throughput_rps']} req/s, {overall['errors']} errors, "
+          f"concurrency {results['meta']['concurrency']})")
+    print(f"{'endpoint':<40} {'count':>6} {'err':>4} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'max_ms':>9}")
+    for name, row in list(results['endpoints'].items()) + [('ALL', overall)]:
+        print(f"{name:<40} {row['count']:>6} {row['errors']:>4} {row['p50_ms']:>9.2f} "
+              f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}")
+
+
+def compare(results, baseline, threshold):
+    """
+    Print latency changes against a baseline run
+    
+    Args:
+        results: Results of this run
+        baseline: Results loaded from an earlier run
+        threshold: Percentage increase in p95 counted as a regression
+    
+    Returns:
+        List of endpoint names that regressed
+    """
+    print(f"\nCompared with {baseline['meta'].get('revision') or 'baseline'} "
+          f"({baseline['meta'].get('started_at')}):")
+    print(f"{'endpoint':<40} {'p50 base':>9} {'p50 now':>9} {'p95 base':>9} {'p95 now':>9} {'change':>8}")
+    
+    regressions = []
+    rows = list(results['endpoints'].items()) + [('ALL', results['overall'])]
+    for name, row in rows:
+        base = baseline['overall'] if name == 'ALL' else baseline['endpoints'].get(name)
+        if not base:
+            continue
+        
+        change = (row['p95_ms'] - base['p95_ms']) * 100 / base['p95_ms'] if base['p95_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<40} {base['p50_ms']:>9.2f} {row['p50_ms']:>9.2f} {base['p95_ms']:>9.2f} "
+              f"{row['p95_ms']:>9.2f} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+def run(args):
+    """Seed, warm up, run the workload and write the results"""
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='ai_studio_load_'), 'bench.db')
+    anchor = args.anchor or date.today()
+    
+    if args.base_url:
+        if not args.db:
+            raise SystemExit('--base-url needs --db pointing at the database the server uses')
+        transport = HttpTransport(args.base_url)
+    else:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        counts = create_database(db_path, args.scale, args.seed, anchor)
+        print(f"Seeded {db_path}: " + ', '.join(f'{count} {table}' for table, count in counts.items()))
+        configure_environment(db_path, args.ai_latency_ms)
+        transport = InProcessTransport()
+    
+    sessions = load_sessions(db_path)
+    log_in(transport, sessions)
+    
+    if args.warmup:
+        run_plan(transport, schedule(sessions, args.warmup, args.seed + 1), args.concurrency)
+    
+    samples, elapsed = run_plan(transport, schedule(sessions, args.requests, args.seed), args.concurrency)
+    
+    results = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'mode': 'http' if args.base_url else 'in-process',
+            'scale': args.scale,
+            'seed': args.seed,
+            'anchor': anchor.isoformat(),
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+            'ai_latency_ms': args.ai_latency_ms,
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count()
+        },
+        **summarize(samples, elapsed)
+    }
+    
+    print_report(results)
+    
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+        print(f"\nResults written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions and args.fail_on_regression:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the API against a seeded SQLite database')
+    parser.add_argument('--scale', type=int, default=1, help='Seed data multiplier (10 designers per unit)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for data and workload')
+    parser.add_argument('--anchor', type=date.fromisoformat, default=None,
+                        help='Anchor date for seeded dates (YYYY-MM-DD, default: today)')
+    parser.add_argument('--requests', type=int, default=2000, help='Measured requests')
+    parser.add_argument('--warmup', type=int, default=200, help='Unmeasured requests sent first')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent client threads')
+    parser.add_argument('--ai-latency-ms', type=int, default=0, help='Simulated AI call latency')
+    parser.add_argument('--db', help='Database file (created fresh unless --base-url is given)')
+    parser.add_argument('--base-url', help='Load test a running server instead of the app in-process')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--compare', help='Results JSON of a baseline run to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='p95 increase (percent) reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with status 1 when any endpoint regresses')
+    run(parser.parse_args())
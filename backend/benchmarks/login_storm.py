@@ -0,0 +1,124 @@
+# Login storm benchmark
+# Fires a burst of logins at a fixed pool of web worker threads while a
+# health check is probed every few milliseconds, once with bcrypt running
+# inline on the request thread and once through the bounded hashing pool
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.login_storm --logins 60 --web-workers 4 --rounds 10
+#
+# Inline hashing runs as many bcrypt jobs at once as there are request threads,
+# so probes queue behind the whole burst. The pool lets at most --hash-workers
+# plus --max-queue logins hold a request thread (fewer than --web-workers) and
+# answers the rest with an immediate 503, so a thread stays free for probes.
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.password_hasher import PasswordHasher, PasswordHasherBusy, _hash_password
+
+
+def percentile(values, fraction):
+    """Return the value at the given fraction of a sorted copy of values"""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def storm(hasher, password_hash, logins, web_workers, probe_interval):
+    """
+    Run one login storm and probe health check latency throughout
+    
+    Args:
+        hasher: PasswordHasher under test
+        password_hash: Stored hash every login is checked against
+        logins: Number of concurrent login requests
+        web_workers: Request threads available (like gunicorn --threads)
+        probe_interval: Seconds between health check probes
+    
+    Returns:
+        Dictionary of login outcomes and probe latencies
+    """
+    web = ThreadPoolExecutor(max_workers=web_workers)
+    outcomes = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    
+    def login():
+        try:
+            hasher.verify('correct horse battery staple', password_hash)
+            result = 'ok'
+        except PasswordHasherBusy:
+            result = 'busy'
+        with lock:
+            outcomes[result] += 1
+    
+    def health_check(submitted):
+        return (time.perf_counter() - submitted) * 1000
+    
+    started = time.perf_counter()
+    login_futures = [web.submit(login) for _ in range(logins)]
+    
+    probes = []
+    while not all(future.done() for future in login_futures):
+        probes.append(web.submit(health_check, time.perf_counter()))
+        time.sleep(probe_interval)
+    
+    probe_ms = [future.result() for future in probes]
+    elapsed = time.perf_counter() - started
+    web.shutdown()
+    
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'ok': outcomes['ok'],
+        'busy': outcomes['busy'],
+        'probes': len(probe_ms),
+        'probe_p50_ms': round(statistics.median(probe_ms), 1) if probe_ms else 0.0,
+        'probe_p95_ms': round(percentile(probe_ms, 0.95), 1) if probe_ms else 0.0,
+        'probe_max_ms': round(max(probe_ms), 1) if probe_ms else 0.0
+    }
+
+
+def run(logins, web_workers, rounds, hash_workers, max_queue, queue_timeout, probe_interval):
+    """
+    Compare inline bcrypt with the bounded hashing pool and print the results
+    """
+    password_hash = _hash_password('correct horse battery staple', rounds)
+    
+    modes = [
+        ('inline', PasswordHasher(rounds=rounds, max_workers=0, max_queue=logins)),
+        ('pool', PasswordHasher(rounds=rounds, max_workers=hash_workers,
+                                max_queue=max_queue, queue_timeout=queue_timeout))
+    ]
+    
+    if hash_workers + max_queue >= web_workers:
+        print(f"warning: hash_workers + max_queue ({hash_workers + max_queue}) leaves no request "
+              f"thread free of the {web_workers}; probes will wait behind logins")
+    print(f"logins={logins} web_workers={web_workers} rounds={rounds} "
+          f"hash_workers={hash_workers} max_queue={max_queue} queue_timeout={queue_timeout}s")
+    print(f"{'mode':<8} {'elapsed_s':>9} {'ok':>6} {'busy':>6} {'probes':>7} "
+          f"{'p50_ms':>8} {'p95_ms':>8} {'max_ms':>8}")
+    
+    for name, hasher in modes:
+        result = storm(hasher, password_hash, logins, web_workers, probe_interval)
+        hasher.shutdown()
+        print(f"{name:<8} {result['elapsed_s']:>9} {result['ok']:>6} {result['busy']:>6} "
+              f"{result['probes']:>7} {result['probe_p50_ms']:>8} {result['probe_p95_ms']:>8} "
+              f"{result['probe_max_ms']:>8}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark health check latency during a login storm')
+    parser.add_argument('--logins', type=int, default=100, help='Concurrent login requests')
+    parser.add_argument('--web-workers', type=int, default=4, help='Request threads')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    parser.add_argument('--hash-workers', type=int, default=2, help='Hashing processes')
+    parser.add_argument('--max-queue', type=int, default=1, help='Hashing jobs allowed to wait')
+    parser.add_argument('--queue-timeout', type=float, default=0.0,
+                        help='Seconds to wait for a hashing slot before answering 503')
+    parser.add_argument('--probe-interval', type=float, default=0.02,
+                        help='Seconds between health check probes')
+    args = parser.parse_args()
+    
+    run(args.logins, args.web_workers, args.rounds, args.hash_workers, args.max_queue,
+        args.queue_timeout, args.probe_interval)
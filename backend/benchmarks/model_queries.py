@@ -0,0 +1,300 @@
+# Model query micro-benchmarks
+# Times the hot model methods over tables of 1k to 1M rows and reports, for
+# each, the statements issued, the SQLite query plan and the virtual machine
+# steps executed (a proxy for rows scanned)
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.model_queries --sizes 1000 10000 100000
+#     python -m benchmarks.model_queries --sizes 1000000 --only Invoice.get_financial_summary
+#     python -m benchmarks.model_queries --output results/models.json
+#
+# Every designer owns ROWS_PER_USER rows of each table, so larger sizes mean
+# more tenants rather than a bigger account: an indexed method should stay
+# flat as the size grows, while a full table scan grows linearly. Full scans
+# are listed in the report so a dropped index shows up immediately.
+#
+# Invoices are seeded with raw SQL, so their aggregates are rebuilt afterwards
+# (as the app's backfill does) and the financial summary is checked against a
+# direct SUM over the invoices before it is timed.
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks.common import SCHEMA_PATH, measure
+from models.activity import ActivityLog
+from models.calendar import CalendarEvent
+from models.client import Client
+from models.invoice import Invoice
+from models.invoice_totals import InvoiceTotals
+from models.message import Message
+from models.product import Product
+from models.project import Project
+from utils.db import CountingConnection, CountingCursor, adapt_sql, wrap_connection
+
+# Rows of each table owned by every designer
+ROWS_PER_USER = 1000
+
+# The designer whose data the benchmarks read
+TARGET_USER = 1
+
+# VM instructions between progress handler calls when counting steps
+STEP_GRANULARITY = 100
+
+
+class RecordingCursor(CountingCursor):
+    """Counting cursor that also keeps every statement for EXPLAIN QUERY PLAN"""
+    
+    def execute(self, sql, params=()):
+        self._connection.statements.append((sql, tuple(params)))
+        return super().execute(sql, params)
+
+
+class RecordingConnection(CountingConnection):
+    """Connection handing out recording cursors"""
+    
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.statements = []
+    
+    def cursor(self, *args, **kwargs):
+        cursor = RecordingCursor(self._connection.cursor(*args, **kwargs), self)
+        self._cursors.add(cursor)
+        return cursor
+
+
+def seed(db_path, size, seed_value=42, chunk_size=20000):
+    """
+    Create a database whose benchmarked tables each hold `size` rows
+    
+    Args:
+        db_path: Database file to create
+        size: Rows per table
+        seed_value: Random seed
+        chunk_size: Rows per executemany batch
+    """
+    rng = random.Random(seed_value)
+    users = max(size // ROWS_PER_USER, 1)
+    now = datetime.now()
+    
+    def when(days_back, days_ahead=0):
+        moment = now + timedelta(minutes=rng.randint(-days_back * 1440, days_ahead * 1440))
+        return moment.strftime('%Y-%m-%d %H:%M:%S')
+    
+    def day(days_back, days_ahead=0):
+        return (date.today() + timedelta(days=rng.randint(-days_back, days_ahead))).isoformat()
+    
+    def owner(index):
+        # Rows are interleaved across tenants, as they would be after real use
+        return index % users + 1
+    
+    generators = {
+        'clients': ('INSERT INTO clients (id, user_id, name, email, created_at) VALUES (?, ?, ?, ?, ?)',
+                    lambda i: (i + 1, owner(i), f'Client {i}', f'client{i}@bench.local', when(365))),
+        'projects': ('INSERT INTO projects (id, user_id, client_id, title, status, budget, spent, deadline, '
+                     'created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     lambda i: (i + 1, owner(i), i + 1, f'Project {i}',
+                                rng.choice(('planning', 'in_progress', 'review', 'completed', 'on_hold')),
+                                rng.randrange(5000, 50000), rng.randrange(0, 20000), day(60, 120), when(365))),
+        'invoices': ('INSERT INTO invoices (id, user_id, client_id, invoice_number, amount, status, issue_date, '
+                     'due_date, paid_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     lambda i: (i + 1, owner(i), i + 1, f'INV-{i:07d}', rng.randrange(500, 15000),
+                                rng.choice(('draft', 'sent', 'paid', 'paid', 'overdue')), day(180),
+                                day(150, 30), day(150))),
+        'activity_log': ('INSERT INTO activity_log (id, user_id, action, entity_type, entity_id, created_at) '
+                         'VALUES (?, ?, ?, ?, ?, ?)',
+                         lambda i: (i + 1, owner(i), rng.choice(('project_created', 'invoice_created',
+                                                                 'client_created', 'design_generated')),
+                                    'project', i, when(30))),
+        'products': ('INSERT INTO products (id, user_id, name, price, vendor, category, style, color, created_at) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     lambda i: (i + 1, owner(i), f'Product {i}', rng.randrange(20, 3000),
+                                f'Vendor {rng.randrange(50)}', rng.choice(('sofa', 'chair', 'table', 'rug', 'lamp')),
+                                rng.choice(('modern', 'minimalist', 'industrial')),
+                                rng.choice(('oak', 'grey', 'white')), when(365))),
+        'calendar_events': ('INSERT INTO calendar_events (id, user_id, client_id, project_id, title, start_time) '
+                            'VALUES (?, ?, ?, ?, ?, ?)',
+                            lambda i: (i + 1, owner(i), i + 1, i + 1, f'Meeting {i}', when(60, 60))),
+        'messages': ('INSERT INTO messages (id, user_id, client_id, sender, message_text, is_read, created_at) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     lambda i: (i + 1, owner(i), i + 1,
+                                rng.choice(('designer', 'client')), 'Seeded message',
+                                int(rng.random() < 0.8), when(90)))
+    }
+    
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(SCHEMA_PATH.read_text())
+        connection.executemany(
+            "INSERT OR IGNORE INTO users (id, name, email, password_hash) VALUES (?, ?, ?, 'x')",
+            [(user_id, f'Designer {user_id}', f'designer{user_id}@bench.local') for user_id in range(1, users + 1)]
+        )
+        for table, (sql, row) in generators.items():
+            for start in range(0, size, chunk_size):
+                connection.executemany(sql, (row(i) for i in range(start, min(start + chunk_size, size))))
+        connection.commit()
+        # The wrapper owns (and closes) the connection, so keep it alive here
+        wrapped = wrap_connection(connection)
+        InvoiceTotals(wrapped).rebuild()
+        connection.execute('ANALYZE')
+    finally:
+        connection.close()
+
+
+def check_financial_summary(db_path, user_id=TARGET_USER):
+    """
+    Compare the aggregate-backed financial summary with sums over the invoices
+    
+    Returns:
+        List of (field, summary value, expected value) that differ
+    """
+    raw = sqlite3.connect(db_path)
+    try:
+        wrapped = wrap_connection(raw)
+        summary = Invoice(wrapped).get_financial_summary(user_id)
+        expected = dict(raw.execute("""
+            SELECT
+                ROUND(COALESCE(SUM(CASE WHEN type = 'invoice' AND status = 'paid' THEN amount END), 0), 2)
+                    AS total_revenue,
+                ROUND(COALESCE(SUM(CASE WHEN type = 'invoice' AND status = 'sent' THEN amount END), 0), 2)
+                    AS pending_payments,
+                COUNT(CASE WHEN type = 'invoice' AND status = 'overdue' THEN 1 END) AS overdue_count,
+                ROUND(COALESCE(SUM(CASE WHEN type = 'invoice' AND status = 'overdue' THEN amount END), 0), 2)
+                    AS overdue_amount,
+                COUNT(CASE WHEN type = 'quote' AND status = 'sent' THEN 1 END) AS pending_quotes
+            FROM invoices WHERE user_id = ?
+        """, (user_id,)).fetchone())
+    finally:
+        raw.close()
+    return [(field, summary[field], value) for field, value in expected.items() if summary[field] != value]
+
+
+def cases():
+    """
+    The benchmarked model methods
+    
+    Returns:
+        Dictionary of name -> function(connection) calling the method
+    """
+    today = date.today()
+    return {
+        'Project.get_all': lambda c: Project(c).get_all(TARGET_USER),
+        'Project.get_dashboard_stats': lambda c: Project(c).get_dashboard_stats(TARGET_USER),
+        'Invoice.get_financial_summary': lambda c: Invoice(c).get_financial_summary(TARGET_USER),
+        'ActivityLog.get_activity_summary': lambda c: ActivityLog(c).get_activity_summary(TARGET_USER, 7),
+        'Client.get_with_stats': lambda c: Client(c).get_with_stats(TARGET_USER, TARGET_USER),
+        'Product.search': lambda c: Product(c).search(TARGET_USER, {'category': 'sofa'}),
+        'CalendarEvent.get_by_date_range': lambda c: CalendarEvent(c).get_by_date_range(
+            TARGET_USER, (today - timedelta(days=7)).isoformat(), (today + timedelta(days=7)).isoformat()),
+        'Message.get_unread': lambda c: Message(c).get_unread(TARGET_USER)
+    }
+
+
+def explain(raw, statements):
+    """
+    Query plans of the recorded statements
+    
+    Returns:
+        Tuple of (plan lines, tables (or their aliases) read by full scans)
+    """
+    plan, full_scans = [], []
+    for sql, params in statements:
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            continue
+        for row in raw.execute('EXPLAIN QUERY PLAN ' + adapt_sql(sql), params):
+            detail = row['detail']
+            plan.append(detail)
+            # 'SCAN t' reads every row; 'SCAN t USING (COVERING) INDEX' walks an index
+            # and 'SCAN t VIRTUAL TABLE INDEX' queries an R*Tree
+            if detail.startswith('SCAN ') and ' USING ' not in detail and ' VIRTUAL TABLE INDEX ' not in detail:
+                full_scans.append(detail[5:].split(' ')[0])
+    return plan, sorted(set(full_scans))
+
+
+def profile_case(db_path, func, repeat):
+    """
+    Time one method and collect its query statistics
+    
+    Returns:
+        Dictionary of timings, query count, VM steps and plan
+    """
+    raw = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        timing_connection = wrap_connection(raw)
+        timings = measure(lambda: func(timing_connection), repeat=repeat, warmup=1)
+        
+        probe = RecordingConnection(raw)
+        steps = 0
+        
+        def count_steps():
+            nonlocal steps
+            steps += STEP_GRANULARITY
+            return 0
+        
+        raw.set_progress_handler(count_steps, STEP_GRANULARITY)
+        func(probe)
+        raw.set_progress_handler(None, 0)
+        
+        plan, full_scans = explain(raw, probe.statements)
+        return {
+            **timings,
+            'queries': probe.query_count,
+            'vm_steps': steps,
+            'full_scans': full_scans,
+            'plan': plan
+        }
+    finally:
+        raw.close()
+
+
+def run(sizes, only, repeat, output):
+    """Seed each size, benchmark every method and print the report"""
+    selected = {name: func for name, func in cases().items() if not only or name in only}
+    results = {'meta': {'started_at': datetime.now().isoformat(timespec='seconds'),
+                        'rows_per_user': ROWS_PER_USER, 'repeat': repeat}, 'cases': []}
+    
+    print(f"{'method':<34} {'rows':>9} {'median_ms':>10} {'max_ms':>9} {'queries':>8} {'vm_steps':>10}  full scans")
+    for size in sizes:
+        workdir = tempfile.mkdtemp(prefix='ai_studio_models_')
+        db_path = os.path.join(workdir, f'models_{size}.db')
+        
+        started = time.perf_counter()
+        seed(db_path, size)
+        print(f"-- {size} rows per table (seeded in {time.perf_counter() - started:.1f}s)")
+        
+        mismatches = check_financial_summary(db_path)
+        if mismatches:
+            raise SystemExit(f"Invoice.get_financial_summary disagrees with the invoices: {mismatches}")
+        
+        for name, func in selected.items():
+            result = profile_case(db_path, func, repeat)
+            results['cases'].append({'method': name, 'rows': size, **result})
+            print(f"{name:<34} {size:>9} {result['median_ms']:>10.3f} {result['max_ms']:>9.3f} "
+                  f"{result['queries']:>8} {result['vm_steps']:>10}  {', '.join(result['full_scans']) or '-'}")
+        
+        os.remove(db_path)
+        os.rmdir(workdir)
+    
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark model query methods over growing tables')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Rows per table (up to 1000000)')
+    parser.add_argument('--only', nargs='+', help='Method names to run, e.g. Project.get_all')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed calls per method and size')
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args()
+    
+    run(args.sizes, args.only, args.repeat, args.output)
@@ -0,0 +1,117 @@
+# Scheduled post dispatch benchmarks
+# Seeds thousands of due marketing posts and publishes them with several dispatchers
+# running at once (as every worker process does), through an adapter that simulates
+# platform API latency. Reports throughput and checks that no post went out twice.
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.post_dispatch --posts 5000 --dispatchers 1 2 4 --latency-ms 20
+#
+# Throughput is bounded by publish latency / MARKETING_PUBLISH_WORKERS per dispatcher;
+# the database cost per batch is one claiming UPDATE and one executemany.
+
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.load_test import configure_environment
+from benchmarks.seed import create_database
+
+
+def add_due_posts(db_path, posts):
+    """Insert posts that are due now, spread over the seeded designers"""
+    raw = sqlite3.connect(db_path)
+    try:
+        owners = raw.execute('SELECT user_id, MIN(id) FROM projects GROUP BY user_id').fetchall()
+        due = (datetime.now(timezone.utc) - timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M:%S')
+        raw.executemany("""
+            INSERT INTO marketing_content (user_id, project_id, content_type, platform, title, content,
+                                           scheduled_date, status)
+            VALUES (?, ?, 'post', 'instagram', 'Benchmark post', 'Before and after reveal.', ?, 'scheduled')
+        """, [(*owners[index % len(owners)], due) for index in range(posts)])
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def reset(db_path):
+    """Make every benchmark post due again"""
+    raw = sqlite3.connect(db_path)
+    try:
+        raw.execute("""
+            UPDATE marketing_content
+            SET status = 'scheduled', attempts = 0, claimed_by = NULL, claimed_until = NULL,
+                external_id = NULL, post_url = NULL, posted_date = NULL
+            WHERE title = 'Benchmark post'
+        """)
+        raw.execute("DELETE FROM activity_log WHERE action = 'content_posted'")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def run(posts, dispatcher_counts, latency_ms, batch_size, workers):
+    """Seed the posts, run each dispatcher count and print the report"""
+    workdir = tempfile.mkdtemp(prefix='ai_studio_posts_')
+    db_path = os.path.join(workdir, 'posts.db')
+    create_database(db_path, 1, 42, date.today())
+    add_due_posts(db_path, posts)
+    
+    # Settings are read on import
+    configure_environment(db_path, 0)
+    from services.post_dispatcher import MemoryPublisher, PostDispatcher
+    
+    logging.getLogger('ai_studio.slow_query').disabled = True
+    
+    class PlatformStandIn(MemoryPublisher):
+        """Memory adapter with a fixed per-post API latency"""
+        
+        name = 'stand-in'
+        
+        def publish(self, post):
+            time.sleep(latency_ms / 1000)
+            return super().publish(post)
+    
+    print(f"{'dispatchers':>11} {'posts':>6} {'seconds':>8} {'posts_per_min':>14} {'duplicates':>11}")
+    try:
+        for count in dispatcher_counts:
+            reset(db_path)
+            adapter = PlatformStandIn()
+            dispatchers = [PostDispatcher(adapter, batch_size=batch_size, workers=workers)
+                           for _ in range(count)]
+            threads = [threading.Thread(target=dispatcher.dispatch) for dispatcher in dispatchers]
+            
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            
+            published = Counter(post['id'] for post in adapter.published)
+            duplicates = sum(times - 1 for times in published.values())
+            print(f"{count:>11} {len(published):>6} {elapsed:>8.2f} {len(published) / elapsed * 60:>14.0f} "
+                  f"{duplicates:>11}")
+            if duplicates or len(published) < posts:
+                raise SystemExit(f'{duplicates} duplicate and {posts - len(published)} missing posts')
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark scheduled post dispatch across concurrent dispatchers')
+    parser.add_argument('--posts', type=int, default=5000, help='Due posts')
+    parser.add_argument('--dispatchers', type=int, nargs='+', default=[1, 2, 4], help='Concurrent dispatchers')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Simulated platform API latency per post')
+    parser.add_argument('--batch-size', type=int, default=500, help='Posts claimed per UPDATE')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent publishes per dispatcher')
+    args = parser.parse_args()
+    
+    run(args.posts, args.dispatchers, args.latency_ms, args.batch_size, args.workers)
@@ -0,0 +1,118 @@
+# Product search benchmark
+# Compares the SQL faceted search (composite indexes) with the in-memory
+# columnar facet index for catalogs of 10k to 1M products
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.product_search --sizes 10000 100000 1000000
+
+import argparse
+import random
+import time
+
+from benchmarks.common import connect, measure
+from models.product import Product
+from services.product_search import ProductFacetIndex, ProductSearchService
+
+CATEGORIES = ['sofa', 'chair', 'table', 'lamp', 'rug', 'bed', 'desk', 'shelf',
+              'mirror', 'cabinet', 'stool', 'artwork']
+STYLES = ['modern', 'minimalist', 'scandinavian', 'industrial', 'bohemian',
+          'traditional', 'mid-century', 'coastal', 'rustic', 'art deco']
+COLORS = ['grey', 'white', 'black', 'oak', 'walnut', 'navy', 'green', 'beige',
+          'terracotta', 'brass', 'blush', 'charcoal', 'cream', 'sage', 'mustard']
+VENDORS = [f'Vendor {index:02d}' for index in range(50)]
+
+# Filter combinations exercised at every catalog size
+SCENARIOS = {
+    'no_filters': {},
+    'category': {'category': 'sofa'},
+    'category_style': {'category': 'sofa', 'style': 'modern'},
+    'price_range': {'min_price': 250, 'max_price': 1000},
+    'vendor_color': {'vendor': 'Vendor 07', 'color': 'oak'}
+}
+
+
+def seed_products(connection, user_id, count, seed=42, chunk_size=10000):
+    """
+    Insert a deterministic synthetic product catalog
+    
+    Args:
+        connection: Benchmark database connection
+        user_id: Owner of the products
+        count: Number of products to insert
+        seed: Random seed so runs are reproducible
+        chunk_size: Rows per executemany batch
+    """
+    rng = random.Random(seed)
+    
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT OR IGNORE INTO users (id, name, email, password_hash) VALUES (%s, %s, %s, %s)",
+                       (user_id, f'Bench User {user_id}', f'bench{user_id}@example.com', 'x'))
+        
+        sql = """
+            INSERT INTO products (user_id, name, price, vendor, category, style, color, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        for start in range(0, count, chunk_size):
+            rows = []
+            for index in range(start, min(start + chunk_size, count)):
+                rows.append((
+                    user_id,
+                    f'Product {index}',
+                    round(rng.lognormvariate(6, 1), 2),
+                    rng.choice(VENDORS),
+                    rng.choice(CATEGORIES),
+                    rng.choice(STYLES),
+                    rng.choice(COLORS),
+                    f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00'
+                ))
+            cursor.executemany(sql, rows)
+        connection.commit()
+
+
+def run(sizes, repeat):
+    """
+    Run every scenario at every catalog size and print the timings
+    
+    Args:
+        sizes: List of catalog sizes
+        repeat: Timed calls per scenario
+    """
+    print(f"{'size':>9}  {'scenario':<16} {'total':>8} {'sql_median_ms':>14} {'index_median_ms':>16}")
+    
+    for size in sizes:
+        connection = connect()
+        seed_products(connection, user_id=1, count=size)
+        # Another tenant so the user_id prefix of the indexes matters
+        seed_products(connection, user_id=2, count=max(size // 10, 1), seed=7)
+        connection.raw.execute("ANALYZE")
+        
+        product_model = Product(connection)
+        
+        started = time.perf_counter()
+        ProductFacetIndex(1, product_model.get_search_columns(1))
+        build_ms = (time.perf_counter() - started) * 1000
+        print(f"{size:>9}  {'index_build':<16} {'':>8} {'':>14} {build_ms:>16.3f}")
+        
+        search_service = ProductSearchService()
+        for name, filters in SCENARIOS.items():
+            sql_result = product_model.faceted_search(1, filters)
+            index_result = search_service.search(connection, 1, filters)
+            assert sql_result['total'] == index_result['total']
+            assert sql_result['price_histogram'] == index_result['price_histogram']
+            assert sql_result['facets'] == index_result['facets']
+            
+            sql_timing = measure(lambda: product_model.faceted_search(1, filters), repeat=repeat)
+            index_timing = measure(lambda: search_service.search(connection, 1, filters), repeat=repeat)
+            print(f"{size:>9}  {name:<16} {sql_result['total']:>8} "
+                  f"{sql_timing['median_ms']:>14} {index_timing['median_ms']:>16}")
+        
+        connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark faceted product search')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Catalog sizes to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed calls per scenario')
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
@@ -0,0 +1,103 @@
+# Rate limit overhead benchmark
+# Measures the cost of one limiter check on its own and the added latency
+# of the rate limiting middleware on an authenticated request
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.rate_limit --requests 5000
+
+import argparse
+import time
+
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+
+from config import get_config
+from utils.rate_limit import MemoryBackend, RateLimiter, init_rate_limiting
+
+
+def bench_limiter(iterations, users):
+    """
+    Time raw limiter checks spread over many users
+    
+    Returns:
+        Average microseconds per check
+    """
+    limiter = RateLimiter(MemoryBackend())
+    keys = [f'user:{i}:default' for i in range(users)]
+    
+    started = time.perf_counter()
+    for i in range(iterations):
+        limiter.hit(keys[i % users], 1000000, 60)
+    return (time.perf_counter() - started) * 1e6 / iterations
+
+
+def build_app(rate_limited):
+    """Create a minimal app with one JWT-protected route"""
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'benchmark-secret-key-0123456789abcdef'
+    JWTManager(app)
+    
+    @app.route('/api/ping')
+    @jwt_required()
+    def ping():
+        return jsonify({'ok': True})
+    
+    if rate_limited:
+        # Effectively unlimited so every request takes the allowed path
+        config = get_config()
+        config.RATE_LIMIT_ENABLED = True
+        config.RATE_LIMITS = dict(config.RATE_LIMITS, agency='100000000/minute')
+        init_rate_limiting(app, RateLimiter(MemoryBackend()))
+    
+    with app.app_context():
+        token = create_access_token(identity='7', additional_claims={'tier': 'agency'})
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def bench_requests(client, headers, requests):
+    """
+    Time authenticated requests through the Flask test client
+    
+    Returns:
+        Average microseconds per request
+    """
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/api/ping', headers=headers)
+    assert response.status_code == 200
+    return (time.perf_counter() - started) * 1e6 / requests
+
+
+def run(requests, iterations, users, rounds):
+    """Print limiter and middleware overhead"""
+    print(f"limiter.hit: {bench_limiter(iterations, users):.2f} us/check "
+          f"({iterations} checks over {users} users)")
+    
+    setups = {}
+    for rate_limited in (False, True):
+        app, headers = build_app(rate_limited)
+        client = app.test_client()
+        for _ in range(200):
+            client.get('/api/ping', headers=headers)
+        setups[rate_limited] = (client, headers)
+    
+    # Alternate the two setups and keep the best round of each to damp noise
+    best = {False: float('inf'), True: float('inf')}
+    for _ in range(rounds):
+        for rate_limited, (client, headers) in setups.items():
+            best[rate_limited] = min(best[rate_limited], bench_requests(client, headers, requests))
+    
+    print(f"request without limiter: {best[False]:.1f} us (best of {rounds})")
+    print(f"request with limiter:    {best[True]:.1f} us (best of {rounds})")
+    print(f"middleware overhead:     {best[True] - best[False]:.1f} us/request")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark rate limiting overhead')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per round')
+    parser.add_argument('--rounds', type=int, default=5, help='Alternating rounds per setup')
+    parser.add_argument('--iterations', type=int, default=200000, help='Raw limiter checks')
+    parser.add_argument('--users', type=int, default=1000, help='Distinct rate limit keys')
+    args = parser.parse_args()
+    
+    run(args.requests, args.iterations, args.users, args.rounds)
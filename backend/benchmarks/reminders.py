@@ -0,0 +1,102 @@
+# Reminder dispatch benchmarks
+# Compares polling every designer for pending reminders (one query per designer)
+# with the global dispatcher's queries: loading the due-time heap and claiming
+# every due reminder in one UPDATE
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.reminders --users 100 1000 --events 200
+#
+# Polling grows with the number of designers; the dispatcher's queries only
+# grow with the number of reminders that are actually due.
+
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.calendar_queries import seed
+from benchmarks.common import measure
+from models.calendar import CalendarEvent
+from utils.db import wrap_connection
+
+# Reminders go out this long before an event starts
+LEAD = timedelta(hours=24)
+
+
+def poll_every_user(connection, users):
+    """The per-designer approach: one pending-reminders query per designer"""
+    calendar = CalendarEvent(connection)
+    return sum(len(calendar.get_pending_reminders(user_id)) for user_id in range(1, users + 1))
+
+
+def load_heap(connection, heap_size=1000):
+    """The dispatcher's resync: due times of the next reminders of all designers"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return len(CalendarEvent(connection).get_reminder_schedule(now, now + LEAD + timedelta(minutes=10),
+                                                               limit=heap_size))
+
+
+def claim_all(raw, connection, batch_size=200):
+    """
+    The dispatcher's delivery run: claim every due reminder in batches
+    
+    Returns:
+        (milliseconds, reminders claimed, UPDATE statements); the claims are
+        reset afterwards so the run can be repeated
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    calendar = CalendarEvent(connection)
+    claimed = statements = 0
+    started = time.perf_counter()
+    while True:
+        batch = calendar.claim_due_reminders(now, LEAD, limit=batch_size)
+        statements += 1
+        claimed += len(batch)
+        if len(batch) < batch_size:
+            break
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    raw.execute('UPDATE calendar_events SET reminder_sent = 0, reminded_until = NULL')
+    raw.commit()
+    return elapsed, claimed, statements
+
+
+def run(user_counts, events, repeat):
+    """Seed each designer count, time both approaches and print the report"""
+    logging.getLogger('ai_studio.slow_query').disabled = True
+    
+    print(f"{'designers':>9} {'due':>6} {'poll_ms':>9} {'poll_queries':>13} {'heap_ms':>8} "
+          f"{'claim_ms':>9} {'claim_updates':>14}")
+    for users in user_counts:
+        workdir = tempfile.mkdtemp(prefix='ai_studio_reminders_')
+        db_path = os.path.join(workdir, f'reminders_{users}.db')
+        seed(db_path, events, users)
+        
+        raw = sqlite3.connect(db_path, check_same_thread=False)
+        try:
+            connection = wrap_connection(raw)
+            poll = measure(lambda: poll_every_user(connection, users), repeat=repeat)
+            heap = measure(lambda: load_heap(connection), repeat=repeat)
+            claims = [claim_all(raw, connection) for _ in range(repeat)]
+            claim_ms = sorted(elapsed for elapsed, _, _ in claims)[len(claims) // 2]
+            _, due, statements = claims[0]
+            
+            print(f"{users:>9} {due:>6} {poll['median_ms']:>9.3f} {users:>13} {heap['median_ms']:>8.3f} "
+                  f"{claim_ms:>9.3f} {statements:>14}")
+        finally:
+            raw.close()
+            os.remove(db_path)
+            os.rmdir(workdir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark per-designer reminder polling against the dispatcher')
+    parser.add_argument('--users', type=int, nargs='+', default=[100, 1000], help='Designers')
+    parser.add_argument('--events', type=int, default=200, help='Events per designer')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per approach')
+    args = parser.parse_args()
+    
+    run(args.users, args.events, args.repeat)
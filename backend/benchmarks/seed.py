@@ -0,0 +1,256 @@
+# Synthetic data seeder
+# Deterministic users, clients, projects, tasks, messages, invoices, products,
+# events and activity for load tests and benchmarks
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.seed --db /tmp/ai_studio_bench.db --scale 2 --seed 42
+#
+# The same seed, scale and anchor date always produce the same rows. Dates are
+# spread around the anchor (default: today) so "upcoming" and "overdue"
+# queries find data.
+
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import SCHEMA_PATH
+
+# Rows created per designer at scale 1
+PER_USER = {
+    'clients': 20,
+    'projects': 15,
+    'tasks_per_project': 8,
+    'messages': 40,
+    'invoices': 12,
+    'products': 30,
+    'events': 20,
+    'marketing': 6,
+    'activity': 200
+}
+
+# Designers created at scale 1
+USERS = 10
+
+# Password of every seeded user (hashed once with a cheap cost factor)
+PASSWORD = 'benchmark-password'
+PASSWORD_ROUNDS = 4
+
+TIERS = (('free', 0.2), ('pro', 0.5), ('agency', 0.3))
+ROOM_TYPES = ('living room', 'bedroom', 'kitchen', 'bathroom', 'office', 'dining room')
+STYLES = ('modern', 'minimalist', 'scandinavian', 'industrial', 'bohemian', 'traditional')
+CATEGORIES = ('sofa', 'chair', 'table', 'lighting', 'rug', 'storage', 'decor', 'bed')
+VENDORS = ('Heal\'s', 'John Lewis', 'Made', 'West Elm', 'IKEA', 'Habitat', 'Loaf')
+COLORS = ('white', 'black', 'oak', 'walnut', 'sage', 'terracotta', 'navy', 'brass')
+FIRST_NAMES = ('Amelia', 'Oliver', 'Isla', 'George', 'Ava', 'Noah', 'Mia', 'Arthur', 'Ivy', 'Leo')
+LAST_NAMES = ('Smith', 'Jones', 'Taylor', 'Brown', 'Wilson', 'Evans', 'Thomas', 'Roberts')
+ACTIONS = ('client_created', 'project_created', 'project_updated', 'invoice_created',
+           'design_generated', 'product_added', 'event_created', 'task_created')
+
+
+def _timestamp(moment):
+    """Format a datetime the way SQLite's CURRENT_TIMESTAMP does"""
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def seed_database(connection, scale=1, seed=42, anchor=None):
+    """
+    Fill an empty database (with the application schema) with synthetic data
+    
+    Args:
+        connection: sqlite3 connection
+        scale: Multiplier for the number of designers
+        seed: Random seed
+        anchor: Date the generated dates are spread around (default: today)
+    
+    Returns:
+        Dictionary of row counts per table
+    """
+    import bcrypt
+    
+    rng = random.Random(seed)
+    anchor = anchor or date.today()
+    anchor_time = datetime.combine(anchor, datetime.min.time()) + timedelta(hours=12)
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'),
+                                  bcrypt.gensalt(PASSWORD_ROUNDS)).decode('utf-8')
+    
+    def some_day(before, after):
+        return (anchor + timedelta(days=rng.randint(-before, after))).isoformat()
+    
+    def some_time(before_days, after_days):
+        offset = timedelta(minutes=rng.randint(-before_days * 1440, after_days * 1440))
+        return _timestamp(anchor_time + offset)
+    
+    def tier():
+        roll, total = rng.random(), 0.0
+        for name, share in TIERS:
+            total += share
+            if roll < total:
+                return name
+        return TIERS[-1][0]
+    
+    rows = {name: [] for name in ('users', 'clients', 'projects', 'tasks', 'messages', 'invoices',
+                                  'products', 'calendar_events', 'marketing_content', 'activity_log')}
+    
+    # IDs are assigned explicitly so child rows can reference them before insertion
+    next_id = {name: 1 for name in rows}
+    next_id['users'] = 1000
+    
+    def new_id(table):
+        next_id[table] += 1
+        return next_id[table] - 1
+    
+    for _ in range(USERS * scale):
+        user_id = new_id('users')
+        user_tier = tier()
+        rows['users'].append((user_id, f'Designer {user_id}', f'designer{user_id}@bench.local',
+                              password_hash, 'designer', user_tier, 0,
+                              5 if user_tier == 'free' else 999999))
+        
+        client_ids = []
+        for _ in range(PER_USER['clients']):
+            client_id = new_id('clients')
+            client_ids.append(client_id)
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            rows['clients'].append((client_id, user_id, name, f'client{client_id}@bench.local',
+                                    f'07{rng.randint(100000000, 999999999)}',
+                                    f'{rng.randint(1, 200)} High Street',
+                                    ', '.join(rng.sample(STYLES, 2)),
+                                    rng.choice(('£5k-10k', '£10k-25k', '£25k-50k')),
+                                    'Seeded client', some_time(365, 0)))
+        
+        project_ids = []
+        for _ in range(PER_USER['projects']):
+            project_id = new_id('projects')
+            project_ids.append(project_id)
+            budget = rng.randrange(5000, 60000, 500)
+            rows['projects'].append((project_id, user_id, rng.choice(client_ids),
+                                     f'{rng.choice(STYLES).title()} {rng.choice(ROOM_TYPES)}',
+                                     'Seeded project',
+                                     rng.choice(('planning', 'in_progress', 'in_progress', 'review',
+                                                 'completed', 'on_hold')),
+                                     budget, round(budget * rng.random() * 0.9, 2),
+                                     some_day(180, 0), some_day(30, 120), some_time(200, 0)))
+            
+            for _ in range(PER_USER['tasks_per_project']):
+                status = rng.choice(('pending', 'pending', 'in_progress', 'completed'))
+                rows['tasks'].append((new_id('tasks'), project_id, f'Task for project {project_id}',
+                                      'Seeded task', status, rng.choice(('low', 'medium', 'high')),
+                                      some_day(30, 60),
+                                      some_time(30, 0) if status == 'completed' else None))
+        
+        for _ in range(PER_USER['messages']):
+            rows['messages'].append((new_id('messages'), user_id, rng.choice(client_ids),
+                                     rng.choice(('designer', 'client')), 'Project update',
+                                     'Could we look at the fabric samples again before ordering?',
+                                     rng.choice(('positive', 'neutral', 'negative')),
+                                     int(rng.random() < 0.7), some_time(60, 0)))
+        
+        for number in range(PER_USER['invoices']):
+            status = rng.choice(('draft', 'sent', 'sent', 'paid', 'paid', 'overdue'))
+            issue_date = some_day(180, 0)
+            rows['invoices'].append((new_id('invoices'), user_id, rng.choice(project_ids),
+                                     rng.choice(client_ids), f'INV-{user_id}-{number + 1:05d}',
+                                     rng.choice(('invoice', 'invoice', 'quote')),
+                                     rng.randrange(500, 15000, 50), status, issue_date,
+                                     (date.fromisoformat(issue_date) + timedelta(days=30)).isoformat(),
+                                     some_day(150, 0) if status == 'paid' else None))
+        
+        for _ in range(PER_USER['products']):
+            category = rng.choice(CATEGORIES)
+            rows['products'].append((new_id('products'), rng.choice(project_ids + [None]), user_id,
+                                     f'{rng.choice(COLORS).title()} {category}',
+                                     rng.randrange(20, 3000), rng.choice(VENDORS), category,
+                                     rng.choice(STYLES), rng.choice(COLORS),
+                                     int(rng.random() < 0.3)))
+        
+        for _ in range(PER_USER['events']):
+            start = some_time(30, 30)
+            rows['calendar_events'].append((new_id('calendar_events'), user_id,
+                                            rng.choice(project_ids), rng.choice(client_ids),
+                                            'Client meeting', rng.choice(('meeting', 'deadline', 'reminder')),
+                                            start, _timestamp(datetime.strptime(start, '%Y-%m-%d %H:%M:%S')
+                                                              + timedelta(hours=1))))
+        
+        for _ in range(PER_USER['marketing']):
+            status = rng.choice(('draft', 'scheduled', 'posted'))
+            rows['marketing_content'].append((new_id('marketing_content'), user_id,
+                                              rng.choice(project_ids),
+                                              rng.choice(('caption', 'blog', 'email', 'post')),
+                                              'instagram', 'Seeded post', 'Before and after reveal.',
+                                              some_time(10, 20) if status == 'scheduled' else None,
+                                              status))
+        
+        for _ in range(PER_USER['activity']):
+            rows['activity_log'].append((new_id('activity_log'), user_id, rng.choice(ACTIONS),
+                                         'project', rng.choice(project_ids), json.dumps({'seeded': True}),
+                                         some_time(90, 0)))
+    
+    statements = {
+        'users': 'INSERT INTO users (id, name, email, password_hash, role, subscription_tier, '
+                 'ai_generations_used, ai_generations_limit) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        'clients': 'INSERT INTO clients (id, user_id, name, email, phone, address, style_preferences, '
+                   'budget_range, notes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        'projects': 'INSERT INTO projects (id, user_id, client_id, title, description, status, budget, '
+                    'spent, start_date, deadline, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        'tasks': 'INSERT INTO tasks (id, project_id, title, description, status, priority, due_date, '
+                 'completed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        'messages': 'INSERT INTO messages (id, user_id, client_id, sender, subject, message_text, '
+                    'sentiment, is_read, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        'invoices': 'INSERT INTO invoices (id, user_id, project_id, client_id, invoice_number, type, '
+                    'amount, status, issue_date, due_date, paid_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        'products': 'INSERT INTO products (id, project_id, user_id, name, price, vendor, category, '
+                    'style, color, is_purchased) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        'calendar_events': 'INSERT INTO calendar_events (id, user_id, project_id, client_id, title, '
+                           'event_type, start_time, end_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        'marketing_content': 'INSERT INTO marketing_content (id, user_id, project_id, content_type, '
+                             'platform, title, content, scheduled_date, status) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        'activity_log': 'INSERT INTO activity_log (id, user_id, action, entity_type, entity_id, '
+                        'details, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)'
+    }
+    
+    with connection:
+        for table, statement in statements.items():
+            connection.executemany(statement, rows[table])
+    
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+
+def create_database(db_path, scale=1, seed=42, anchor=None):
+    """
+    Create a database file with the application schema and seed it
+    
+    Args:
+        db_path: Database file to create (must not exist yet)
+        scale: Multiplier for the number of designers
+        seed: Random seed
+        anchor: Date the generated dates are spread around
+    
+    Returns:
+        Dictionary of row counts per table
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(SCHEMA_PATH.read_text())
+        return seed_database(connection, scale, seed, anchor)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create a seeded benchmark database')
+    parser.add_argument('--db', required=True, help='Database file to create')
+    parser.add_argument('--scale', type=int, default=1, help=f'Multiplier ({USERS} designers per unit)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--anchor', type=date.fromisoformat, default=None,
+                        help='Anchor date for generated dates (YYYY-MM-DD, default: today)')
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    counts = create_database(args.db, args.scale, args.seed, args.anchor)
+    print(f"Seeded {args.db} in {time.perf_counter() - started:.2f}s")
+    for table, count in counts.items():
+        print(f"  {table:<18} {count:>8}")
@@ -0,0 +1,229 @@
+# SQLite write throughput benchmark
+# Runs concurrent writer and reader threads against a database file, once
+# with SQLite's default settings and once with the production profile
+# (WAL, tuned pragmas, BEGIN IMMEDIATE and the in-process writer queue)
+#
+# Usage (from the backend directory):
+#     python -m benchmarks.sqlite_writes --writers 8 --readers 4 --seconds 10
+#
+# Each write is a short request-style transaction: an activity log insert
+# and a user update committed together, on a fresh connection as the routes
+# do. 'locked' counts transactions that failed with 'database is locked'.
+#
+# Before the runs, a check makes sure a write transaction that is never ended
+# (a dropped connection, or one a request left open) does not hold up the
+# writers after it until the writer queue times out.
+
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+from benchmarks.common import SCHEMA_PATH, percentile
+from config import get_config
+from utils.db import init_connection_cleanup, wrap_connection
+from utils.sqlite_tuning import connect, writer_queue_for
+
+PROFILES = ('default', 'production')
+
+
+def profile_config(profile):
+    """Active configuration with SQLITE_PROFILE overridden"""
+    return type('BenchmarkConfig', (get_config(),), {'SQLITE_PROFILE': profile})
+
+
+def create_database(db_path, users=50):
+    """Create a fresh database with the schema and a few designers"""
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(SCHEMA_PATH.read_text())
+        connection.executemany(
+            "INSERT OR IGNORE INTO users (id, name, email, password_hash) VALUES (?, ?, ?, 'x')",
+            [(user_id, f'Designer {user_id}', f'designer{user_id}@bench.local') for user_id in range(1, users + 1)]
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def run_profile(profile, writers, readers, seconds, users=50):
+    """
+    Hammer a fresh database with writer and reader threads
+    
+    Returns:
+        Dictionary of throughput, latency percentiles and lock errors
+    """
+    workdir = tempfile.mkdtemp(prefix='ai_studio_sqlite_')
+    db_path = os.path.join(workdir, 'writes.db')
+    create_database(db_path, users)
+    config = profile_config(profile)
+    
+    stop = threading.Event()
+    lock = threading.Lock()
+    write_latencies, read_latencies = [], []
+    errors = {'locked': 0, 'other': 0}
+    
+    def open_connection():
+        return wrap_connection(connect(db_path, config), writer_queue_for(db_path, config))
+    
+    def writer(seed):
+        rng = random.Random(seed)
+        local = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            connection = open_connection()
+            try:
+                user_id = rng.randint(1, users)
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) AS count FROM activity_log WHERE user_id = %s", (user_id,))
+                    cursor.fetchone()
+                    cursor.execute(
+                        "INSERT INTO activity_log (user_id, action, entity_type, entity_id) VALUES (%s, %s, %s, %s)",
+                        (user_id, 'task_created', 'task', rng.randint(1, 10 ** 6))
+                    )
+                    cursor.execute("UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = %s", (user_id,))
+                connection.commit()
+                local.append((time.perf_counter() - started) * 1000)
+            except sqlite3.OperationalError as e:
+                with lock:
+                    errors['locked' if 'locked' in str(e) else 'other'] += 1
+            finally:
+                connection.close()
+        with lock:
+            write_latencies.extend(local)
+    
+    def reader(seed):
+        rng = random.Random(seed)
+        local = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            connection = open_connection()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT action, COUNT(*) AS count FROM activity_log
+                        WHERE user_id = %s GROUP BY action
+                    """, (rng.randint(1, users),))
+                    cursor.fetchall()
+                local.append((time.perf_counter() - started) * 1000)
+            except sqlite3.OperationalError as e:
+                with lock:
+                    errors['locked' if 'locked' in str(e) else 'other'] += 1
+            finally:
+                connection.close()
+        with lock:
+            read_latencies.extend(local)
+    
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(1000 + i,)) for i in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    
+    def stats(latencies):
+        if not latencies:
+            return {'count': 0, 'per_second': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+        return {
+            'count': len(latencies),
+            'per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2)
+        }
+    
+    return {'writes': stats(write_latencies), 'reads': stats(read_latencies), **errors}
+
+
+def check_abandoned_writes(profile='production'):
+    """
+    Time a write that follows a write transaction nobody ended
+    
+    Returns:
+        Dictionary of scenario -> milliseconds the following write took, or
+        None if it failed (e.g. writer queue timeout)
+    """
+    workdir = tempfile.mkdtemp(prefix='ai_studio_sqlite_')
+    db_path = os.path.join(workdir, 'abandoned.db')
+    create_database(db_path, 2)
+    config = profile_config(profile)
+    app = Flask(__name__)
+    init_connection_cleanup(app)
+    kept = []
+    
+    def open_connection():
+        return wrap_connection(connect(db_path, config), writer_queue_for(db_path, config))
+    
+    def update(connection):
+        connection.cursor().execute("UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = %s", (1,))
+    
+    def dropped():
+        update(open_connection())
+    
+    def left_open_by_request():
+        with app.test_request_context():
+            connection = open_connection()
+            kept.append(connection)
+            update(connection)
+    
+    results = {}
+    for name, abandon in (('dropped connection', dropped), ('left open by a request', left_open_by_request)):
+        abandon()
+        started = time.perf_counter()
+        connection = open_connection()
+        try:
+            update(connection)
+            connection.commit()
+            results[name] = round((time.perf_counter() - started) * 1000, 2)
+        except sqlite3.OperationalError:
+            results[name] = None
+        finally:
+            connection.close()
+    
+    for connection in kept:
+        connection.close()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare SQLite write throughput across tuning profiles')
+    parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+    parser.add_argument('--seconds', type=float, default=10.0, help='Duration of each run')
+    args = parser.parse_args()
+    
+    # Lock waits make most statements "slow"; keep the report readable
+    logging.getLogger('ai_studio.slow_query').disabled = True
+    
+    for scenario, elapsed_ms in check_abandoned_writes().items():
+        if elapsed_ms is None:
+            raise SystemExit(f"A write after a {scenario} failed: its writer queue turn was never given back")
+        print(f"Write after a {scenario}: {elapsed_ms} ms")
+    print()
+    
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s per profile\n")
+    print(f"{'profile':<12} {'writes/s':>9} {'w p50':>8} {'w p95':>8} {'w p99':>8} "
+          f"{'reads/s':>9} {'r p95':>8} {'locked':>7} {'other':>6}")
+    for profile in PROFILES:
+        result = run_profile(profile, args.writers, args.readers, args.seconds)
+        writes, reads = result['writes'], result['reads']
+        print(f"{profile:<12} {writes['per_second']:>9} {writes['p50_ms']:>8} {writes['p95_ms']:>8} "
+              f"{writes['p99_ms']:>8} {reads['per_second']:>9} {reads['p95_ms']:>8} "
+              f"{result['locked']:>7} {result['other']:>6}")
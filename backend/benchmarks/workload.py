@@ -0,0 +1,143 @@
+# Load test workload
+# Weighted mix of real API calls made by a designer using the studio
+
+import random
+import sqlite3
+from collections import namedtuple
+
+# name: label results are grouped by; weight: relative frequency;
+# build(session, rng) -> (path, json body or None); ai: needs a paid tier
+Operation = namedtuple('Operation', ['name', 'weight', 'method', 'build', 'ai'])
+
+
+class Session:
+    """A seeded designer, their access token and the IDs of their records"""
+    
+    def __init__(self, user_id, email, tier, ids):
+        self.user_id = user_id
+        self.email = email
+        self.tier = tier
+        self.ids = ids
+        self.token = None
+    
+    @property
+    def headers(self):
+        return {'Authorization': f'Bearer {self.token}'}
+
+
+def load_sessions(db_path):
+    """
+    Read the seeded designers and their record IDs
+    
+    Args:
+        db_path: Seeded database file
+    
+    Returns:
+        List of Session objects ordered by user ID
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        users = connection.execute(
+            "SELECT id, email, subscription_tier FROM users WHERE role = 'designer' ORDER BY id"
+        ).fetchall()
+        
+        ids = {user_id: {} for user_id, _, _ in users}
+        for table in ('clients', 'projects', 'invoices', 'products', 'calendar_events'):
+            for user_id, record_id in connection.execute(f"SELECT user_id, id FROM {table} ORDER BY id"):
+                if user_id in ids:
+                    ids[user_id].setdefault(table, []).append(record_id)
+        
+        return [Session(user_id, email, tier, ids[user_id]) for user_id, email, tier in users]
+    finally:
+        connection.close()
+
+
+def _pick(session, rng, table):
+    return rng.choice(session.ids[table])
+
+
+WORKLOAD = [
+    # Reads dominate: dashboards and list views
+    Operation('GET /api/dashboard/overview', 12, 'GET',
+              lambda s, rng: ('/api/dashboard/overview', None), False),
+    Operation('GET /api/dashboard/stats', 4, 'GET',
+              lambda s, rng: ('/api/dashboard/stats', None), False),
+    Operation('GET /api/dashboard/activity', 4, 'GET',
+              lambda s, rng: ('/api/dashboard/activity?limit=20', None), False),
+    Operation('GET /api/projects', 10, 'GET',
+              lambda s, rng: ('/api/projects', None), False),
+    Operation('GET /api/projects/<id>', 10, 'GET',
+              lambda s, rng: (f"/api/projects/{_pick(s, rng, 'projects')}?include=tasks,products,budget", None),
+              False),
+    Operation('GET /api/clients', 8, 'GET',
+              lambda s, rng: ('/api/clients', None), False),
+    Operation('GET /api/clients/<id>', 6, 'GET',
+              lambda s, rng: (f"/api/clients/{_pick(s, rng, 'clients')}", None), False),
+    Operation('GET /api/invoices', 6, 'GET',
+              lambda s, rng: ('/api/invoices', None), False),
+    Operation('GET /api/invoices/summary', 3, 'GET',
+              lambda s, rng: ('/api/invoices/summary', None), False),
+    Operation('GET /api/products/search', 5, 'GET',
+              lambda s, rng: (f"/api/products/search?category={rng.choice(('sofa', 'rug', 'lighting'))}", None),
+              False),
+    Operation('GET /api/calendar/upcoming', 5, 'GET',
+              lambda s, rng: ('/api/calendar/upcoming', None), False),
+    Operation('GET /api/marketing', 2, 'GET',
+              lambda s, rng: ('/api/marketing', None), False),
+    Operation('GET /api/auth/me', 3, 'GET',
+              lambda s, rng: ('/api/auth/me', None), False),
+    
+    # Writes
+    Operation('POST /api/clients', 2, 'POST',
+              lambda s, rng: ('/api/clients', {'name': f'Load test client {rng.randint(1, 10 ** 6)}',
+                                               'email': 'load@bench.local'}), False),
+    Operation('POST /api/projects/<id>/tasks', 3, 'POST',
+              lambda s, rng: (f"/api/projects/{_pick(s, rng, 'projects')}/tasks",
+                              {'title': 'Order samples', 'priority': 'medium'}), False),
+    Operation('POST /api/invoices', 2, 'POST',
+              lambda s, rng: ('/api/invoices', {'amount': rng.randrange(500, 5000, 50),
+                                                'client_id': _pick(s, rng, 'clients'),
+                                                'project_id': _pick(s, rng, 'projects')}), False),
+    Operation('PUT /api/invoices/<id>/status', 2, 'PUT',
+              lambda s, rng: (f"/api/invoices/{_pick(s, rng, 'invoices')}/status",
+                              {'status': rng.choice(('sent', 'paid'))}), False),
+    
+    # AI features (served by the offline stand-in)
+    Operation('POST /api/designs/generate', 1, 'POST',
+              lambda s, rng: ('/api/designs/generate', {'project_id': _pick(s, rng, 'projects'),
+                                                        'room_type': 'living room', 'style': 'modern',
+                                                        'budget': 8000}), True),
+    Operation('POST /api/marketing/generate', 1, 'POST',
+              lambda s, rng: ('/api/marketing/generate', {'content_type': 'caption', 'platform': 'instagram',
+                                                          'project_id': _pick(s, rng, 'projects')}), True),
+    Operation('POST /api/projects/<id>/ai-insights', 1, 'POST',
+              lambda s, rng: (f"/api/projects/{_pick(s, rng, 'projects')}/ai-insights", {}), True)
+]
+
+
+def operations_for(session):
+    """Operations a session may issue (AI features need a paid tier)"""
+    return [operation for operation in WORKLOAD if not operation.ai or session.tier != 'free']
+
+
+def schedule(sessions, total, seed=42):
+    """
+    Build a deterministic list of requests
+    
+    Args:
+        sessions: Sessions to spread requests over
+        total: Number of requests
+        seed: Random seed
+    
+    Returns:
+        List of (session, operation, path, body) tuples
+    """
+    rng = random.Random(seed)
+    plan = []
+    for _ in range(total):
+        session = rng.choice(sessions)
+        operations = operations_for(session)
+        operation = rng.choices(operations, weights=[op.weight for op in operations])[0]
+        path, body = operation.build(session, rng)
+        plan.append((session, operation, path, body))
+    return plan
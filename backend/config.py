@@ -2,6 +2,7 @@
 # This file centralizes all configuration settings for the Flask application
 
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -20,6 +21,20 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)  # Tokens expire after 24 hours
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)  # Refresh tokens expire after 30 days
+    JWT_VERIFY_SUB = False  # Identities are integer user IDs; PyJWT >= 2.10 otherwise rejects them
+    
+    # Tier/role claims are embedded in access tokens; this bounds how long 
+    # a process trusts them (or its cached copy) before re-reading the user row
+    USER_CLAIMS_CACHE_TTL = int(os.getenv('USER_CLAIMS_CACHE_TTL', 300))  # seconds
+    
+    # Password hashing (bcrypt runs in a bounded process pool, 0 workers = inline).
+    # A login holds its request thread while it waits, so workers + queue must stay
+    # below GUNICORN_THREADS (4) to keep a thread free for other requests; logins
+    # beyond that get a 503 at once instead of queueing behind the hashes.
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 1))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 0.0))  # seconds
     
     # Database configuration - using SQLite for development
     DB_HOST = os.getenv('DB_HOST', 'localhost')
@@ -33,11 +48,102 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # Disable modification tracking to save resources
     SQLALCHEMY_ECHO = FLASK_ENV == 'development'  # Log SQL queries in development
     
+    # SQLite performance profile: 'production' (WAL, tuned pragmas, writer queue,
+    # background checkpoints) or 'default' (SQLite's own settings)
+    SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'production')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))  # Wait this long for locks
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is durable against crashes in WAL mode
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 65536))  # Page cache per connection
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # Bytes read through mmap
+    SQLITE_TEMP_STORE = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+    SQLITE_SERIALIZE_WRITES = os.getenv('SQLITE_SERIALIZE_WRITES', 'true').lower() == 'true'
+    SQLITE_WAL_AUTOCHECKPOINT = int(os.getenv('SQLITE_WAL_AUTOCHECKPOINT', 1000))  # Pages; backstop for the checkpointer
+    SQLITE_CHECKPOINT_INTERVAL = float(os.getenv('SQLITE_CHECKPOINT_INTERVAL', 30))  # Seconds, 0 disables
+    SQLITE_WAL_SIZE_LIMIT = int(os.getenv('SQLITE_WAL_SIZE_LIMIT', 64 * 1024 * 1024))  # Bytes before TRUNCATE
+    
+    # Invoice numbers: str.format template (fields: user_id, number, year, type; keep
+    # user_id in it, numbers are unique across designers) and how many numbers each
+    # worker reserves per sequence update (1 = no gaps)
+    INVOICE_NUMBER_FORMAT = os.getenv('INVOICE_NUMBER_FORMAT', 'INV-{user_id:03d}-{number:05d}')
+    INVOICE_NUMBER_BLOCK_SIZE = int(os.getenv('INVOICE_NUMBER_BLOCK_SIZE', 1))
+    
+    # Background sweep marking 'sent' invoices past their due date as overdue
+    OVERDUE_SWEEP_ENABLED = os.getenv('OVERDUE_SWEEP_ENABLED', 'true').lower() == 'true'
+    OVERDUE_SWEEP_INTERVAL_MINUTES = int(os.getenv('OVERDUE_SWEEP_INTERVAL_MINUTES', 15))
+    OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv('OVERDUE_SWEEP_BATCH_SIZE', 500))  # Invoices per transaction
+    
+    # Event reminders for all designers: delivery channel (activity, email or memory),
+    # how long before the start they go out, reminders claimed per UPDATE, due times
+    # kept in memory and how often those are reloaded from the database
+    REMINDERS_ENABLED = os.getenv('REMINDERS_ENABLED', 'true').lower() == 'true'
+    REMINDER_SENDER = os.getenv('REMINDER_SENDER', 'activity')
+    REMINDER_LEAD_MINUTES = int(os.getenv('REMINDER_LEAD_MINUTES', 24 * 60))
+    REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 200))
+    REMINDER_HEAP_SIZE = int(os.getenv('REMINDER_HEAP_SIZE', 1000))
+    REMINDER_RESYNC_MINUTES = int(os.getenv('REMINDER_RESYNC_MINUTES', 5))
+    
+    # ICS calendar feeds: serialized bodies cached per designer until their events
+    # change (larger bodies are streamed uncached) and how far back events are included
+    CALENDAR_FEED_CACHE_TTL = int(os.getenv('CALENDAR_FEED_CACHE_TTL', 3600))  # seconds
+    CALENDAR_FEED_CACHE_ENTRIES = int(os.getenv('CALENDAR_FEED_CACHE_ENTRIES', 256))
+    CALENDAR_FEED_CACHE_MAX_KB = int(os.getenv('CALENDAR_FEED_CACHE_MAX_KB', 2048))
+    CALENDAR_FEED_PAST_DAYS = int(os.getenv('CALENDAR_FEED_PAST_DAYS', 180))
+    
+    # Scheduled marketing posts of all designers: default publishing adapter, posts
+    # claimed per UPDATE, concurrent publishes, claim lease and retries (delay doubles
+    # per attempt). With no adapter, posts stay scheduled until platform adapters are
+    # registered; the 'local' (files in MARKETING_OUTBOX_DIR) and 'memory' stand-ins
+    # must be chosen explicitly and only run under DEBUG or TESTING
+    MARKETING_DISPATCH_ENABLED = os.getenv('MARKETING_DISPATCH_ENABLED', 'true').lower() == 'true'
+    MARKETING_DISPATCH_INTERVAL_SECONDS = int(os.getenv('MARKETING_DISPATCH_INTERVAL_SECONDS', 30))
+    MARKETING_DISPATCH_BATCH_SIZE = int(os.getenv('MARKETING_DISPATCH_BATCH_SIZE', 500))
+    MARKETING_PUBLISHER = os.getenv('MARKETING_PUBLISHER', '')
+    MARKETING_OUTBOX_DIR = os.getenv('MARKETING_OUTBOX_DIR', os.path.join(tempfile.gettempdir(), 'ai_studio_outbox'))
+    MARKETING_PUBLISH_WORKERS = int(os.getenv('MARKETING_PUBLISH_WORKERS', 8))
+    MARKETING_PUBLISH_MAX_ATTEMPTS = int(os.getenv('MARKETING_PUBLISH_MAX_ATTEMPTS', 5))
+    MARKETING_PUBLISH_RETRY_SECONDS = int(os.getenv('MARKETING_PUBLISH_RETRY_SECONDS', 60))
+    MARKETING_CLAIM_LEASE_SECONDS = int(os.getenv('MARKETING_CLAIM_LEASE_SECONDS', 300))
+    
+    # Bulk marketing generation: items per request and AI calls in flight per request
+    MARKETING_BULK_MAX_ITEMS = int(os.getenv('MARKETING_BULK_MAX_ITEMS', 200))
+    MARKETING_BULK_CONCURRENCY = int(os.getenv('MARKETING_BULK_CONCURRENCY', 4))
+    
+    # Request instrumentation: Server-Timing headers, one structured log line per
+    # request ('ai_studio.perf') and a slow-query log ('ai_studio.slow_query')
+    PERF_INSTRUMENTATION_ENABLED = os.getenv('PERF_INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    PERF_LOG_REQUESTS = os.getenv('PERF_LOG_REQUESTS', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))  # Statements slower than this are logged
+    
+    # Prometheus metrics at /metrics. Under gunicorn, set PROMETHEUS_MULTIPROC_DIR
+    # (gunicorn.conf.py does) so every worker's samples are aggregated.
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # Optional bearer token for scrapes
+    
+    # Admin-only profiling: stack sampling via /api/admin/profile/sample and
+    # cProfile for single requests sent with the PROFILE_HEADER header
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() == 'true'
+    PROFILE_HEADER = 'X-Profile'
+    PROFILE_REPORT_DIR = os.getenv('PROFILE_REPORT_DIR', os.path.join(tempfile.gettempdir(), 'ai_studio_profiles'))
+    PROFILER_MAX_SECONDS = int(os.getenv('PROFILER_MAX_SECONDS', 60))
+    
     # OpenAI API configuration for AI features
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
     OPENAI_MODEL = 'gpt-4-turbo-preview'  # Model for text generation
     OPENAI_IMAGE_MODEL = 'dall-e-3'  # Model for image generation
     
+    # 'stub' swaps the OpenAI client for the offline stand-in in services/ai_stub.py
+    # (deterministic responses, optional simulated latency) for development and load tests.
+    # Only development and testing fall back to it when OPENAI_API_KEY is missing;
+    # elsewhere it must be set explicitly, so a missing key fails instead of serving canned output
+    AI_PROVIDER = os.getenv('AI_PROVIDER', 'openai')
+    AI_STUB_LATENCY_MS = int(os.getenv('AI_STUB_LATENCY_MS', 0))
+    
+    # Style embeddings ('openai' needs OPENAI_API_KEY, 'local' is deterministic and offline)
+    EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'openai' if OPENAI_API_KEY else 'local')
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-ada-002')
+    EMBEDDING_DIM = int(os.getenv('EMBEDDING_DIM', 256))  # Local provider only
+    EMBEDDING_SYNC_TTL = int(os.getenv('EMBEDDING_SYNC_TTL', 300))  # seconds between catch-up syncs of a user's products
+    
     # Email configuration using SendGrid
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.sendgrid.net')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
@@ -55,6 +161,16 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
     
+    # Invoice and moodboard PDFs render in a bounded process pool (0 workers = inline)
+    # into a disk cache keyed by content hash; re-downloads are served from the cache
+    PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ai_studio_pdf'))
+    PDF_CACHE_MAX_MB = int(os.getenv('PDF_CACHE_MAX_MB', 512))
+    PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', 2))
+    PDF_RENDER_MAX_QUEUE = int(os.getenv('PDF_RENDER_MAX_QUEUE', 8))
+    PDF_RENDER_QUEUE_TIMEOUT = float(os.getenv('PDF_RENDER_QUEUE_TIMEOUT', 1.0))  # seconds
+    PDF_RENDER_TIMEOUT = float(os.getenv('PDF_RENDER_TIMEOUT', 30))  # seconds
+    PDF_THUMBNAIL_TIMEOUT = float(os.getenv('PDF_THUMBNAIL_TIMEOUT', 3))  # seconds per remote image
+    
     # Frontend URL for CORS
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5000')
     
@@ -62,25 +178,64 @@ class Config:
     API_PREFIX = '/api'
     API_VERSION = 'v1'
     
-    # Subscription tier limits
+    # Subscription tier limits (AI generations are limited by AI_QUOTA_LIMITS)
     TIER_LIMITS = {
         'free': {
             'projects': 2,
-            'ai_generations': 5,
             'storage_mb': 100
         },
         'pro': {
             'projects': -1,  # -1 means unlimited
-            'ai_generations': -1,
             'storage_mb': 5000
         },
         'agency': {
             'projects': -1,
-            'ai_generations': -1,
             'storage_mb': 20000
         }
     }
     
+    # API rate limits per subscription tier (GCRA, 'count/second|minute|hour|day')
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL', '')  # e.g. redis://localhost:6379/0
+    RATE_LIMITS = {
+        'anonymous': '30/minute',  # Per client IP (login, register, health)
+        'free': '60/minute',
+        'pro': '300/minute',
+        'agency': '1200/minute'
+    }
+    
+    # Stricter limits for expensive endpoints (keyed by Flask endpoint name)
+    RATE_LIMIT_ROUTES = {
+        'dashboard.get_dashboard_overview': {'free': '10/minute', 'pro': '60/minute', 'agency': '240/minute'},
+        'calendar.get_feed': {'anonymous': '30/minute'}
+    }
+    RATE_LIMIT_EXEMPT = {'health_check'}
+    
+    # Number of reverse proxies in front of the app whose X-Forwarded-For / -Proto /
+    # -Host headers are trusted (werkzeug ProxyFix). Behind a proxy, leave this at 0
+    # and every anonymous client shares the proxy's rate limit bucket; set it without
+    # a proxy and clients can spoof their address.
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+    
+    # Endpoints authorized by a token in the URL are limited per token (endpoint ->
+    # view argument) rather than per client IP: calendar apps poll every
+    # subscriber's feed from a small shared pool of addresses
+    RATE_LIMIT_URL_TOKENS = {'calendar.get_feed': 'token'}
+    
+    # Monthly AI generation quotas per feature (-1 means unlimited)
+    AI_QUOTA_LIMITS = {
+        'free': {'designs': 5, 'marketing': 0, 'insights': 5},
+        'pro': {'designs': -1, 'marketing': -1, 'insights': -1},
+        'agency': {'designs': -1, 'marketing': -1, 'insights': -1}
+    }
+    
+    # In-memory product facet indexes (one per active user)
+    PRODUCT_SEARCH_INDEX_MAX_USERS = int(os.getenv('PRODUCT_SEARCH_INDEX_MAX_USERS', 64))
+    PRODUCT_SEARCH_INDEX_TTL = int(os.getenv('PRODUCT_SEARCH_INDEX_TTL', 300))  # seconds
+    
+    # Rows per executemany transaction for bulk product imports
+    PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv('PRODUCT_IMPORT_CHUNK_SIZE', 1000))
+    
     # Google Calendar API (for Phase 3)
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID', '')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET', '')
@@ -90,6 +245,8 @@ class DevelopmentConfig(Config):
     """Development environment configuration"""
     DEBUG = True
     TESTING = False
+    
+    AI_PROVIDER = os.getenv('AI_PROVIDER', 'openai' if Config.OPENAI_API_KEY else 'stub')
 
 
 class ProductionConfig(Config):
@@ -108,6 +265,19 @@ class TestingConfig(Config):
     
     # Use separate test database
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    
+    # Cheap hashes keep tests fast
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    
+    AI_PROVIDER = os.getenv('AI_PROVIDER', 'stub')
+    RATE_LIMIT_ENABLED = False
+    PERF_LOG_REQUESTS = False
+    SQLITE_CHECKPOINT_INTERVAL = 0
+    OVERDUE_SWEEP_ENABLED = False
+    PDF_RENDER_WORKERS = 0
+    REMINDERS_ENABLED = False
+    MARKETING_DISPATCH_ENABLED = False
 
 
 # Configuration dictionary for easy access
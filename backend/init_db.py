@@ -4,10 +4,80 @@ Database initialization script for AI Studio
 Creates SQLite database and tables from schema
 """
 
+import re
 import sqlite3
 import os
 from pathlib import Path
 
+# Columns added to existing tables after their first release: (table, column, definition).
+# CREATE TABLE IF NOT EXISTS leaves existing tables as they are, so these are added
+# before the schema's indexes and triggers refer to them.
+ADDED_COLUMNS = [
+    ('users', 'claims_version', 'INTEGER DEFAULT 0'),
+    ('marketing_content', 'attempts', 'INTEGER NOT NULL DEFAULT 0'),
+    ('marketing_content', 'claimed_by', 'TEXT'),
+    ('marketing_content', 'claimed_until', 'TIMESTAMP NULL'),
+    ('marketing_content', 'last_error', 'TEXT'),
+    ('marketing_content', 'external_id', 'TEXT'),
+    ('marketing_content', 'post_url', 'TEXT'),
+    ('calendar_events', 'recurrence_rule', 'TEXT'),
+    ('calendar_events', 'recurrence_exceptions', 'TEXT'),
+    ('calendar_events', 'recurrence_until', 'TIMESTAMP'),
+    ('calendar_events', 'reminded_until', 'TIMESTAMP')
+]
+
+
+def table_columns(cursor, table):
+    """Column names of a table (empty if the table does not exist yet)"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def rebuild_table(cursor, table, schema_sql):
+    """
+    Recreate a table from its schema definition, keeping its rows
+    
+    Needed when a CHECK constraint changes, which ALTER TABLE cannot do.
+    The schema script recreates the table's indexes afterwards.
+    """
+    match = re.search(rf"CREATE TABLE IF NOT EXISTS {table} \((.*?)\n\);", schema_sql, re.S)
+    columns = ', '.join(sorted(table_columns(cursor, table)))
+    cursor.execute(f"CREATE TABLE {table}_rebuilt ({match.group(1)})")
+    cursor.execute(f"INSERT INTO {table}_rebuilt ({columns}) SELECT {columns} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_rebuilt RENAME TO {table}")
+
+
+def migrate_database(conn, schema_sql):
+    """
+    Bring a database created from an older schema up to date
+    
+    Safe to run any number of times; does nothing on a new database.
+    
+    Returns:
+        List of the changes made
+    """
+    cursor = conn.cursor()
+    changes = []
+    
+    # Marketing posts gained the 'failed' status (a CHECK constraint)
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'marketing_content'")
+    row = cursor.fetchone()
+    if row and "'failed'" not in row[0]:
+        cursor.execute("PRAGMA foreign_keys = OFF")
+        rebuild_table(cursor, 'marketing_content', schema_sql)
+        changes.append('rebuilt marketing_content')
+    
+    for table, column, definition in ADDED_COLUMNS:
+        columns = table_columns(cursor, table)
+        if columns and column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            changes.append(f'added {table}.{column}')
+    
+    conn.commit()
+    return changes
+
+
 def init_database():
     """Initialize the SQLite database with schema"""
     
@@ -32,6 +102,11 @@ def init_database():
         with open(schema_path, 'r') as f:
             schema_sql = f.read()
         
+        # Add what an existing database is missing before the schema's
+        # indexes and triggers refer to it
+        for change in migrate_database(conn, schema_sql):
+            print(f"✓ Migrated: {change}")
+        
         # Execute schema (SQLite can handle multiple statements)
         cursor.executescript(schema_sql)
         
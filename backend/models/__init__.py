@@ -9,9 +9,14 @@ from .message import Message
 from .design import Design
 from .product import Product
 from .invoice import Invoice
+from .invoice_sequence import InvoiceSequence
+from .invoice_totals import InvoiceTotals
 from .marketing import MarketingContent
 from .calendar import CalendarEvent
+from .calendar_feed import CalendarFeed
 from .activity import ActivityLog
+from .embedding import Embedding
+from .usage import UsageCounter
 
 # Export all models
 __all__ = [
@@ -23,8 +28,13 @@ __all__ = [
     'Design',
     'Product',
     'Invoice',
+    'InvoiceSequence',
+    'InvoiceTotals',
     'MarketingContent',
     'CalendarEvent',
-    'ActivityLog'
+    'CalendarFeed',
+    'ActivityLog',
+    'Embedding',
+    'UsageCounter'
 ]
 
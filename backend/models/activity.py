@@ -42,6 +42,36 @@ class ActivityLog:
             print(f"Error logging activity: {e}")
             return None
     
+    def log_many(self, entries):
+        """
+        Log several activities in one statement
+        
+        Args:
+            entries: List of (user_id, action, entity_type, entity_id, details) tuples
+        
+        Returns:
+            Number of entries logged
+        """
+        if not entries:
+            return 0
+        
+        try:
+            with self.connection.cursor() as cursor:
+                sql = """
+                    INSERT INTO activity_log 
+                    (user_id, action, entity_type, entity_id, details)
+                    VALUES (%s, %s, %s, %s, %s)
+                """
+                cursor.executemany(sql, [
+                    (user_id, action, entity_type, entity_id, json.dumps(details) if details else None)
+                    for user_id, action, entity_type, entity_id, details in entries
+                ])
+                self.connection.commit()
+                return len(entries)
+        except Exception as e:
+            print(f"Error logging activities: {e}")
+            return 0
+    
     def get_by_user(self, user_id, limit=100, offset=0):
         """
         Get activity log for a specific user
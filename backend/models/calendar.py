@@ -1,7 +1,90 @@
 # Calendar model - represents calendar events and automations
 # Manages meetings, deadlines, reminders, and automated actions
 
-from datetime import datetime
+import json
+from datetime import datetime, timedelta, timezone
+from models.calendar_feed import touch_feed
+from utils.loaders import attach_client_names, attach_project_titles
+from utils.recurrence import (next_occurrences, normalize_rule, occurrences, occurrences_between,
+                              parse_exceptions, series_end)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Columns of a claimed reminder
+_REMINDER_COLUMNS = 'id, user_id, project_id, client_id, title, event_type, start_time, end_time, location'
+
+
+def _to_utc(value):
+    """
+    Naive UTC datetime of a datetime or ISO 8601 string (naive values are taken as UTC,
+    as SQLite's date functions do)
+    """
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip())
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _epoch_minutes(value, round_up=False):
+    """Minutes since the epoch, as stored in the calendar_event_intervals index"""
+    seconds = int((_to_utc(value) - _EPOCH).total_seconds())
+    return -(-seconds // 60) if round_up else seconds // 60
+
+
+def _range_end(value):
+    """Treat a date-only range end as the end of that day"""
+    if isinstance(value, str) and len(value.strip()) == 10:
+        return f"{value.strip()} 23:59:59"
+    return value
+
+
+def _duration(start_time, end_time):
+    """Length of an event (zero for deadlines and reminders without an end time)"""
+    if not end_time:
+        return timedelta(0)
+    return max(_to_utc(end_time) - _to_utc(start_time), timedelta(0))
+
+
+def _series_until(rule, start_time, end_time):
+    """Stored recurrence_until of a series: end of its last occurrence, None if open-ended"""
+    end = series_end(rule, _to_utc(start_time), _duration(start_time, end_time))
+    return end.isoformat(sep=' ') if end else None
+
+
+def _occurrence(series, start):
+    """
+    One occurrence of a recurring series as an event dictionary
+    
+    The occurrence keeps the series' ID (edits apply to the whole series);
+    recurrence_id identifies the occurrence itself, e.g. to cancel it.
+    """
+    event = dict(series)
+    event['start_time'] = start.isoformat()
+    if series.get('end_time'):
+        event['end_time'] = (start + _duration(series['start_time'], series['end_time'])).isoformat()
+    event['recurrence_id'] = start.isoformat()
+    return event
+
+
+def _start_bounds(start, end):
+    """
+    Indexable (start_time >= lower, start_time < upper) string bounds for a UTC range
+    
+    Stored start times mix 'T' and ' ' separators and may carry an offset, so
+    the bounds are whole dates widened by a day on each side; callers refine
+    with datetime() on the rows in between.
+    """
+    return ((start - timedelta(days=1)).strftime('%Y-%m-%d'),
+            (end + timedelta(days=2)).strftime('%Y-%m-%d'))
+
+
+def _start_key(event):
+    """Sort key of events whose start times may mix formats and offsets"""
+    try:
+        return _to_utc(event['start_time'])
+    except (TypeError, ValueError):
+        return datetime.min
+
 
 class CalendarEvent:
     """Calendar event model for scheduling and automations"""
@@ -12,7 +95,8 @@ class CalendarEvent:
     
     def create(self, user_id, title, start_time, event_type='meeting', 
                end_time=None, description=None, project_id=None, client_id=None, 
-               location=None, is_automated=False):
+               location=None, is_automated=False, recurrence_rule=None,
+               recurrence_exceptions=None):
         """
         Create a new calendar event
         
@@ -27,23 +111,36 @@ class CalendarEvent:
             client_id: Associated client (optional)
             location: Event location
             is_automated: Whether this is an automated event
+            recurrence_rule: RRULE making the event a recurring series (optional)
+            recurrence_exceptions: Starts of cancelled occurrences (optional)
         
         Returns:
             event_id if successful, None otherwise
         """
         try:
+            recurrence_rule = normalize_rule(recurrence_rule)
+            recurrence_until = exceptions = None
+            if recurrence_rule:
+                recurrence_until = _series_until(recurrence_rule, start_time, end_time)
+                exceptions = json.dumps(sorted(parse_exceptions(recurrence_exceptions))) \
+                    if recurrence_exceptions else None
+            
             with self.connection.cursor() as cursor:
                 sql = """
                     INSERT INTO calendar_events 
                     (user_id, project_id, client_id, title, description, 
-                     event_type, start_time, end_time, location, is_automated)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                     event_type, start_time, end_time, location, is_automated,
+                     recurrence_rule, recurrence_exceptions, recurrence_until)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """
                 cursor.execute(sql, (user_id, project_id, client_id, title, 
                                    description, event_type, start_time, end_time, 
-                                   location, is_automated))
+                                   location, is_automated,
+                                   recurrence_rule, exceptions, recurrence_until))
+                event_id = cursor.lastrowid
+                touch_feed(cursor, user_id)
                 self.connection.commit()
-                return cursor.lastrowid
+                return event_id
         except Exception as e:
             print(f"Error creating calendar event: {e}")
             return None
@@ -70,30 +167,177 @@ class CalendarEvent:
             cursor.execute(sql, (event_id, user_id))
             return cursor.fetchone()
     
+    def _overlapping(self, user_id, start, end, busy_only=False, exclude_id=None):
+        """
+        Events of a designer overlapping [start, end], via the interval index
+        
+        The R*Tree narrows the candidates to the designer's events whose
+        minute-rounded interval meets the range; the exact comparison then
+        runs on those rows only. Recurring series whose span meets the range
+        are expanded into their occurrences within it.
+        
+        Args:
+            user_id: The designer's ID
+            start: Range start (datetime or ISO string)
+            end: Range end (datetime or ISO string)
+            busy_only: Only events with an end time that overlap the open range
+                       (start, end), i.e. time that is actually taken
+            exclude_id: Event ID to leave out (the event being rescheduled)
+        
+        Returns:
+            List of events (occurrences for series) ordered by start time
+        """
+        if busy_only:
+            exact = """
+                AND e.end_time IS NOT NULL
+                AND datetime(e.start_time) < datetime(%s)
+                AND ((e.recurrence_rule IS NULL AND datetime(e.end_time) > datetime(%s))
+                     OR (e.recurrence_rule IS NOT NULL
+                         AND (e.recurrence_until IS NULL OR datetime(e.recurrence_until) > datetime(%s))))
+            """
+        else:
+            exact = """
+                AND datetime(e.start_time) <= datetime(%s)
+                AND ((e.recurrence_rule IS NULL
+                      AND MAX(datetime(e.start_time), COALESCE(datetime(e.end_time), datetime(e.start_time))) >= datetime(%s))
+                     OR (e.recurrence_rule IS NOT NULL
+                         AND (e.recurrence_until IS NULL OR datetime(e.recurrence_until) >= datetime(%s))))
+            """
+        start, end = (value.isoformat(sep=' ') if isinstance(value, datetime) else value for value in (start, end))
+        params = [user_id, _epoch_minutes(end, round_up=True), _epoch_minutes(start), end, start, start]
+        if exclude_id is not None:
+            exact += " AND e.id != %s"
+            params.append(exclude_id)
+        
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT e.* FROM calendar_event_intervals r
+                JOIN calendar_events e ON e.id = r.id
+                WHERE r.user_min = %s
+                AND r.start_minute <= %s AND r.end_minute >= %s
+                {exact}
+                ORDER BY e.start_time ASC
+            """, params)
+            events = cursor.fetchall()
+        
+        if not any(event.get('recurrence_rule') for event in events):
+            return events
+        return self._expand(events, _to_utc(start), _to_utc(end), busy_only)
+    
+    def _expand(self, events, window_start, window_end, busy_only=False):
+        """
+        Replace recurring series by their occurrences within a window
+        
+        Expansion only walks the window (see utils.recurrence), and is memoized
+        per series and window, so its cost does not depend on series length.
+        
+        Args:
+            events: Rows from calendar_events
+            window_start: Window start (naive UTC)
+            window_end: Window end (naive UTC)
+            busy_only: Only occurrences that take up time inside the window
+        
+        Returns:
+            List of events and occurrences ordered by start time
+        """
+        expanded = []
+        for event in events:
+            if not event.get('recurrence_rule'):
+                expanded.append(event)
+                continue
+            try:
+                starts = occurrences(event['recurrence_rule'], _to_utc(event['start_time']),
+                                     _duration(event['start_time'], event.get('end_time')),
+                                     window_start, window_end,
+                                     parse_exceptions(event.get('recurrence_exceptions')), busy_only)
+            except ValueError:
+                continue
+            expanded.extend(_occurrence(event, start) for start in starts)
+        
+        expanded.sort(key=_start_key)
+        return expanded
+    
     def get_by_date_range(self, user_id, start_date, end_date):
         """
-        Get events within a date range
+        Get events overlapping a date range
         
         Args:
             user_id: The designer's ID
             start_date: Range start datetime
-            end_date: Range end datetime
+            end_date: Range end datetime (a date alone includes that whole day)
         
         Returns:
             List of events
         """
-        with self.connection.cursor() as cursor:
-            sql = """
-                SELECT e.*, c.name as client_name, p.title as project_title
-                FROM calendar_events e
-                LEFT JOIN clients c ON e.client_id = c.id
-                LEFT JOIN projects p ON e.project_id = p.id
-                WHERE e.user_id = %s 
-                AND e.start_time BETWEEN %s AND %s
-                ORDER BY e.start_time ASC
-            """
-            cursor.execute(sql, (user_id, start_date, end_date))
-            return cursor.fetchall()
+        events = self._overlapping(user_id, start_date, _range_end(end_date))
+        attach_client_names(self.connection, events)
+        return attach_project_titles(self.connection, events)
+    
+    def find_conflicts(self, user_id, start_time, end_time, exclude_id=None):
+        """
+        Get events that overlap a proposed time slot
+        
+        Only events with an end time take up time; deadlines and reminders
+        without one never conflict. Touching slots (one ends when the next
+        starts) do not conflict either.
+        
+        Args:
+            user_id: The designer's ID
+            start_time: Proposed start datetime
+            end_time: Proposed end datetime
+            exclude_id: Event being rescheduled, ignored as a conflict
+        
+        Returns:
+            List of conflicting events
+        """
+        if not end_time or _to_utc(end_time) <= _to_utc(start_time):
+            return []
+        return self._overlapping(user_id, start_time, end_time, busy_only=True, exclude_id=exclude_id)
+    
+    def get_free_busy(self, user_id, start, end, min_minutes=30):
+        """
+        Busy periods and free slots of a designer within a window
+        
+        Args:
+            user_id: The designer's ID
+            start: Window start datetime
+            end: Window end datetime
+            min_minutes: Shortest free slot worth returning
+        
+        Returns:
+            Dictionary with 'busy' (merged, overlapping events combined) and 'free'
+            lists of {'start', 'end'} in UTC
+        """
+        window_start, window_end = _to_utc(start), _to_utc(_range_end(end))
+        
+        periods = []
+        for event in self._overlapping(user_id, window_start, window_end, busy_only=True):
+            try:
+                event_start = max(_to_utc(event['start_time']), window_start)
+                event_end = min(_to_utc(event['end_time']), window_end)
+            except ValueError:
+                continue
+            if event_end > event_start:
+                periods.append((event_start, event_end))
+        
+        busy = []
+        for event_start, event_end in sorted(periods):
+            if busy and event_start <= busy[-1][1]:
+                busy[-1][1] = max(busy[-1][1], event_end)
+            else:
+                busy.append([event_start, event_end])
+        
+        free = []
+        cursor_time = window_start
+        for busy_start, busy_end in busy + [[window_end, window_end]]:
+            if busy_start - cursor_time >= timedelta(minutes=min_minutes):
+                free.append((cursor_time, busy_start))
+            cursor_time = max(cursor_time, busy_end)
+        
+        return {
+            'busy': [{'start': s.isoformat(), 'end': e.isoformat()} for s, e in busy],
+            'free': [{'start': s.isoformat(), 'end': e.isoformat()} for s, e in free]
+        }
     
     def get_upcoming(self, user_id, limit=20):
         """
@@ -104,21 +348,41 @@ class CalendarEvent:
             limit: Maximum number of events to return
         
         Returns:
-            List of upcoming events
+            List of upcoming events (with the next occurrences of recurring series)
         """
         with self.connection.cursor() as cursor:
             sql = """
-                SELECT e.*, c.name as client_name, p.title as project_title
-                FROM calendar_events e
-                LEFT JOIN clients c ON e.client_id = c.id
-                LEFT JOIN projects p ON e.project_id = p.id
+                SELECT e.* FROM calendar_events e
                 WHERE e.user_id = %s 
+                AND e.recurrence_rule IS NULL
                 AND e.start_time >= NOW()
                 ORDER BY e.start_time ASC
                 LIMIT %s
             """
             cursor.execute(sql, (user_id, limit))
-            return cursor.fetchall()
+            events = cursor.fetchall()
+            
+            cursor.execute("""
+                SELECT e.* FROM calendar_events e
+                WHERE e.user_id = %s
+                AND e.recurrence_rule IS NOT NULL
+                AND (e.recurrence_until IS NULL OR e.recurrence_until >= NOW())
+            """, (user_id,))
+            series = cursor.fetchall()
+        
+        if series:
+            now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+            for event in series:
+                try:
+                    starts = next_occurrences(event['recurrence_rule'], _to_utc(event['start_time']), now, limit,
+                                              parse_exceptions(event.get('recurrence_exceptions')))
+                except ValueError:
+                    continue
+                events.extend(_occurrence(event, start) for start in starts)
+            events = sorted(events, key=_start_key)[:limit]
+        
+        attach_client_names(self.connection, events)
+        return attach_project_titles(self.connection, events)
     
     def get_by_project(self, project_id):
         """
@@ -163,6 +427,25 @@ class CalendarEvent:
                     update_fields.append(f"{field} = %s")
                     values.append(value)
             
+            # Keep the series span in step with its rule and first occurrence;
+            # cancelled occurrences no longer line up once either changes
+            if any(kwargs.get(field) is not None for field in ('recurrence_rule', 'start_time', 'end_time')):
+                current = self.get_by_id(event_id, user_id)
+                if not current:
+                    return False
+                rule = normalize_rule(kwargs['recurrence_rule'] if kwargs.get('recurrence_rule') is not None
+                                      else current.get('recurrence_rule'))
+                start_time = kwargs.get('start_time') or current['start_time']
+                end_time = kwargs.get('end_time') or current.get('end_time')
+                update_fields.extend(['recurrence_rule = %s', 'recurrence_until = %s'])
+                if kwargs.get('start_time') is not None:
+                    # A rescheduled event gets a new reminder
+                    update_fields.append('reminder_sent = FALSE')
+                values.extend([rule, _series_until(rule, start_time, end_time) if rule else None])
+                if rule != current.get('recurrence_rule') or kwargs.get('start_time') is not None:
+                    # Occurrences move, so their reminders start over as well
+                    update_fields.extend(['recurrence_exceptions = NULL', 'reminded_until = NULL'])
+            
             if not update_fields:
                 return False
             
@@ -175,8 +458,11 @@ class CalendarEvent:
                     WHERE user_id = %s AND id = %s
                 """
                 cursor.execute(sql, values)
+                updated = cursor.rowcount > 0
+                if updated:
+                    touch_feed(cursor, user_id)
                 self.connection.commit()
-                return cursor.rowcount > 0
+                return updated
         except:
             return False
     
@@ -195,11 +481,53 @@ class CalendarEvent:
             with self.connection.cursor() as cursor:
                 sql = "DELETE FROM calendar_events WHERE id = %s AND user_id = %s"
                 cursor.execute(sql, (event_id, user_id))
+                deleted = cursor.rowcount > 0
+                if deleted:
+                    touch_feed(cursor, user_id)
                 self.connection.commit()
-                return cursor.rowcount > 0
+                return deleted
         except:
             return False
     
+    def add_exception(self, event_id, user_id, occurrence_start):
+        """
+        Cancel a single occurrence of a recurring series
+        
+        Args:
+            event_id: The series' ID
+            user_id: The designer's ID
+            occurrence_start: Start of the occurrence (its recurrence_id)
+        
+        Returns:
+            True if the occurrence was cancelled, False if the event is not a
+            series or has no occurrence at that time
+        
+        Raises:
+            ValueError: If occurrence_start is not an ISO 8601 datetime
+        """
+        occurrence = _to_utc(occurrence_start)
+        event = self.get_by_id(event_id, user_id)
+        if not event or not event.get('recurrence_rule'):
+            return False
+        
+        exceptions = parse_exceptions(event.get('recurrence_exceptions'))
+        if occurrence.isoformat() in exceptions:
+            return True
+        if occurrence not in occurrences(event['recurrence_rule'], _to_utc(event['start_time']),
+                                         timedelta(0), occurrence, occurrence):
+            return False
+        
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE calendar_events SET recurrence_exceptions = %s WHERE id = %s AND user_id = %s",
+                (json.dumps(sorted(exceptions | {occurrence.isoformat()})), event_id, user_id)
+            )
+            cancelled = cursor.rowcount > 0
+            if cancelled:
+                touch_feed(cursor, user_id)
+            self.connection.commit()
+            return cancelled
+    
     def mark_reminder_sent(self, event_id):
         """
         Mark reminder as sent for an event
@@ -219,6 +547,177 @@ class CalendarEvent:
         except:
             return False
     
+    def _due_series(self, cursor, start, end):
+        """
+        Recurring series with occurrences starting within a range whose reminder is not sent
+        
+        A series remembers the start of the latest occurrence reminded
+        (reminded_until); only later occurrences are due.
+        
+        Args:
+            cursor: Database cursor
+            start: Range start (naive UTC datetime, exclusive)
+            end: Range end (naive UTC datetime, inclusive)
+        
+        Returns:
+            List of (series, occurrence starts) tuples
+        """
+        cursor.execute(f"""
+            SELECT {_REMINDER_COLUMNS}, recurrence_rule, recurrence_exceptions, reminded_until
+            FROM calendar_events
+            WHERE recurrence_rule IS NOT NULL
+            AND (recurrence_until IS NULL OR datetime(recurrence_until) > datetime(%s))
+        """, (start.isoformat(sep=' '),))
+        
+        due = []
+        for series in cursor.fetchall():
+            try:
+                after = start
+                if series.get('reminded_until'):
+                    after = max(after, _to_utc(series['reminded_until']))
+                starts = occurrences_between(series['recurrence_rule'], _to_utc(series['start_time']),
+                                             after, end, parse_exceptions(series.get('recurrence_exceptions')))
+            except ValueError:
+                continue
+            if starts:
+                due.append((series, starts))
+        return due
+    
+    def get_reminder_schedule(self, start, end, limit=1000):
+        """
+        Start times of unsent reminders for events starting within a range, all designers
+        
+        Reads the (reminder_sent, start_time) index for single events; recurring
+        series add the occurrences they have not reminded yet (one row each,
+        with the series' ID).
+        
+        Args:
+            start: Range start (naive UTC datetime, exclusive)
+            end: Range end (naive UTC datetime, inclusive)
+            limit: Maximum number of events
+        
+        Returns:
+            List of dictionaries with id and start_time, soonest first
+        """
+        lower, upper = _start_bounds(start, end)
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, start_time FROM calendar_events
+                WHERE reminder_sent = FALSE
+                AND start_time >= %s AND start_time < %s
+                AND recurrence_rule IS NULL
+                AND datetime(start_time) > datetime(%s) AND datetime(start_time) <= datetime(%s)
+                ORDER BY start_time ASC
+                LIMIT %s
+            """, (lower, upper, start.isoformat(sep=' '), end.isoformat(sep=' '), limit))
+            schedule = cursor.fetchall()
+            
+            for series, starts in self._due_series(cursor, start, end):
+                schedule.extend({'id': series['id'], 'start_time': occurrence.isoformat()}
+                                for occurrence in starts)
+        
+        if len(schedule) > limit:
+            schedule = sorted(schedule, key=_start_key)[:limit]
+        return schedule
+    
+    def claim_due_reminders(self, now, lead, limit=200):
+        """
+        Claim a batch of reminders that are due, for all designers, in one UPDATE
+        
+        A reminder is due once its event (or an occurrence of a recurring
+        series) starts within lead of now. Claimed events are marked as
+        reminded before delivery, series by moving their reminded_until past
+        the claimed occurrences; concurrent workers never claim the same
+        reminder.
+        
+        Args:
+            now: Current time (naive UTC datetime)
+            lead: How long before the start reminders go out (timedelta)
+            limit: Maximum number of reminders to claim
+        
+        Returns:
+            List of claimed events, soonest first; occurrences carry
+            recurrence_id and reminded_before (see release_reminders)
+        """
+        lower, upper = _start_bounds(now, now + lead)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE calendar_events SET reminder_sent = TRUE
+                WHERE id IN (
+                    SELECT id FROM calendar_events
+                    WHERE reminder_sent = FALSE
+                    AND start_time >= %s AND start_time < %s
+                    AND recurrence_rule IS NULL
+                    AND datetime(start_time) > datetime(%s) AND datetime(start_time) <= datetime(%s)
+                    ORDER BY start_time ASC
+                    LIMIT %s
+                )
+                AND reminder_sent = FALSE
+                RETURNING {_REMINDER_COLUMNS}
+            """, (lower, upper, now.isoformat(sep=' '), (now + lead).isoformat(sep=' '), limit))
+            claimed = cursor.fetchall()
+            self.connection.commit()
+            
+            for series, starts in self._due_series(cursor, now, now + lead):
+                starts = starts[:limit - len(claimed)]
+                if not starts:
+                    break
+                # Only the worker that still sees the old value moves it on
+                reminded_until = starts[-1].isoformat(sep=' ')
+                if series.get('reminded_until') is None:
+                    cursor.execute("""
+                        UPDATE calendar_events SET reminded_until = %s
+                        WHERE id = %s AND reminded_until IS NULL
+                    """, (reminded_until, series['id']))
+                else:
+                    cursor.execute("""
+                        UPDATE calendar_events SET reminded_until = %s
+                        WHERE id = %s AND reminded_until = %s
+                    """, (reminded_until, series['id'], series['reminded_until']))
+                self.connection.commit()
+                if cursor.rowcount == 0:
+                    continue
+                
+                event = {column: series[column] for column in _REMINDER_COLUMNS.split(', ')}
+                for start in starts:
+                    reminder = _occurrence(event, start)
+                    reminder['reminded_before'] = series.get('reminded_until')
+                    claimed.append(reminder)
+        
+        claimed.sort(key=_start_key)
+        return claimed
+    
+    def release_reminders(self, reminders):
+        """
+        Return claimed reminders whose delivery failed, so they are claimed again
+        
+        Args:
+            reminders: Reminders as returned by claim_due_reminders
+        
+        Returns:
+            Number of events and series released
+        """
+        event_ids = sorted({reminder['id'] for reminder in reminders if not reminder.get('recurrence_id')})
+        # A series goes back to where it was before its earliest claimed occurrence
+        series = {}
+        for reminder in reminders:
+            if reminder.get('recurrence_id') and reminder['id'] not in series:
+                series[reminder['id']] = reminder.get('reminded_before')
+        
+        released = 0
+        with self.connection.cursor() as cursor:
+            if event_ids:
+                placeholders = ', '.join(['%s'] * len(event_ids))
+                cursor.execute(f"UPDATE calendar_events SET reminder_sent = FALSE WHERE id IN ({placeholders})",
+                               event_ids)
+                released += cursor.rowcount
+            for series_id, reminded_before in series.items():
+                cursor.execute("UPDATE calendar_events SET reminded_until = %s WHERE id = %s",
+                               (reminded_before, series_id))
+                released += cursor.rowcount
+            self.connection.commit()
+        return released
+    
     def get_pending_reminders(self, user_id):
         """
         Get events that need reminders sent (24 hours before)
@@ -231,15 +730,15 @@ class CalendarEvent:
         """
         with self.connection.cursor() as cursor:
             sql = """
-                SELECT e.*, c.name as client_name, p.title as project_title
-                FROM calendar_events e
-                LEFT JOIN clients c ON e.client_id = c.id
-                LEFT JOIN projects p ON e.project_id = p.id
+                SELECT e.* FROM calendar_events e
                 WHERE e.user_id = %s 
                 AND e.reminder_sent = FALSE
                 AND e.start_time BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL 24 HOUR)
                 ORDER BY e.start_time ASC
             """
             cursor.execute(sql, (user_id,))
-            return cursor.fetchall()
+            events = cursor.fetchall()
+        
+        attach_client_names(self.connection, events)
+        return attach_project_titles(self.connection, events)
 
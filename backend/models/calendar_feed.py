@@ -0,0 +1,100 @@
+# Calendar feed model - tokenized ICS subscriptions of designers
+# Only a hash of each token is stored; the version changes whenever the designer's events do
+
+import hashlib
+import secrets
+
+
+def hash_token(token):
+    """SHA-256 hex digest stored in place of a feed token"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def touch_feed(cursor, user_id):
+    """
+    Mark a designer's feed as changed, within the caller's transaction
+    
+    Args:
+        cursor: Cursor of the transaction writing the designer's events
+        user_id: The designer's ID
+    """
+    cursor.execute("""
+        UPDATE calendar_feeds SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = %s
+    """, (user_id,))
+
+
+class CalendarFeed:
+    """Calendar feed model for ICS subscriptions"""
+    
+    def __init__(self, connection):
+        """Initialize with database connection"""
+        self.connection = connection
+    
+    def rotate(self, user_id):
+        """
+        Issue a new feed token, replacing any previous one
+        
+        Args:
+            user_id: The designer's ID
+        
+        Returns:
+            The new token (only its hash is stored)
+        """
+        token = secrets.token_urlsafe(24)
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE calendar_feeds
+                SET token_hash = %s, version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = %s
+            """, (hash_token(token), user_id))
+            if cursor.rowcount == 0:
+                cursor.execute("INSERT INTO calendar_feeds (user_id, token_hash) VALUES (%s, %s)",
+                               (user_id, hash_token(token)))
+            self.connection.commit()
+        return token
+    
+    def get_by_token(self, token):
+        """
+        Look up a feed by its token
+        
+        Args:
+            token: Token from the feed URL
+        
+        Returns:
+            Dictionary with user_id, version and updated_at, or None
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT user_id, version, updated_at FROM calendar_feeds WHERE token_hash = %s",
+                           (hash_token(token),))
+            return cursor.fetchone()
+    
+    def get_by_user(self, user_id):
+        """
+        Get a designer's feed (without its token)
+        
+        Args:
+            user_id: The designer's ID
+        
+        Returns:
+            Dictionary with version, created_at and updated_at, or None
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT version, created_at, updated_at FROM calendar_feeds WHERE user_id = %s",
+                           (user_id,))
+            return cursor.fetchone()
+    
+    def revoke(self, user_id):
+        """
+        Delete a designer's feed; its URL stops working
+        
+        Args:
+            user_id: The designer's ID
+        
+        Returns:
+            True if a feed was deleted
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM calendar_feeds WHERE user_id = %s", (user_id,))
+            self.connection.commit()
+            return cursor.rowcount > 0
@@ -3,6 +3,7 @@
 
 import json
 from datetime import datetime
+from utils.loaders import attach_project_titles
 
 class Design:
     """Design model for AI-generated design concepts"""
@@ -111,6 +112,8 @@ class Design:
         """
         Get all designs created by a user
         
+        Designs whose project no longer exists are left out.
+        
         Args:
             user_id: The designer's ID
             limit: Maximum number of designs to return
@@ -120,10 +123,9 @@ class Design:
         """
         with self.connection.cursor() as cursor:
             sql = """
-                SELECT d.*, p.title as project_title 
-                FROM designs d
-                JOIN projects p ON d.project_id = p.id
+                SELECT d.* FROM designs d
                 WHERE d.user_id = %s
+                AND EXISTS (SELECT 1 FROM projects p WHERE p.id = d.project_id)
                 ORDER BY d.created_at DESC
                 LIMIT %s
             """
@@ -140,8 +142,8 @@ class Design:
                     design['image_urls'] = []
                     design['color_palette'] = []
                     design['product_list'] = []
-            
-            return designs
+        
+        return attach_project_titles(self.connection, designs)
     
     def update_outputs(self, design_id, image_urls=None, color_palette=None, 
                       description=None, product_list=None):
@@ -0,0 +1,155 @@
+# Embedding model - stores style embeddings for products, designs and clients
+# Vectors are kept as compact float32 blobs for the in-memory similarity index
+
+from datetime import datetime
+
+class Embedding:
+    """Embedding model for style similarity search"""
+    
+    def __init__(self, connection):
+        """Initialize with database connection"""
+        self.connection = connection
+    
+    def upsert_many(self, user_id, entity_type, items, model):
+        """
+        Store embeddings for several entities, replacing existing ones
+        
+        Args:
+            user_id: ID of the designer who owns the entities
+            entity_type: Type of entity (product, design, client)
+            items: List of (entity_id, content_hash, vector_bytes, dim) tuples
+            model: Name of the embedding model that produced the vectors
+        
+        Returns:
+            Number of embeddings stored
+        """
+        if not items:
+            return 0
+        
+        try:
+            with self.connection.cursor() as cursor:
+                placeholders = ', '.join(['%s'] * len(items))
+                cursor.execute(f"""
+                    DELETE FROM embeddings 
+                    WHERE entity_type = %s AND entity_id IN ({placeholders})
+                """, [entity_type] + [item[0] for item in items])
+                
+                sql = """
+                    INSERT INTO embeddings 
+                    (user_id, entity_type, entity_id, model, dim, content_hash, vector)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """
+                cursor.executemany(sql, [
+                    (user_id, entity_type, entity_id, model, dim, content_hash, vector)
+                    for entity_id, content_hash, vector, dim in items
+                ])
+                self.connection.commit()
+                return len(items)
+        except Exception as e:
+            print(f"Error storing embeddings: {e}")
+            self.connection.rollback()
+            return 0
+    
+    def get_by_entity(self, entity_type, entity_id):
+        """
+        Retrieve the embedding of one entity
+        
+        Args:
+            entity_type: Type of entity (product, design, client)
+            entity_id: The entity's ID
+        
+        Returns:
+            Dictionary with embedding data or None if not found
+        """
+        with self.connection.cursor() as cursor:
+            sql = "SELECT * FROM embeddings WHERE entity_type = %s AND entity_id = %s"
+            cursor.execute(sql, (entity_type, entity_id))
+            return cursor.fetchone()
+    
+    def get_by_user(self, user_id, entity_type, model):
+        """
+        Get all embeddings of one entity type for a designer
+        
+        Args:
+            user_id: The designer's ID
+            entity_type: Type of entity (product, design, client)
+            model: Only return vectors produced by this model
+        
+        Returns:
+            List of dictionaries with entity_id, dim and vector
+        """
+        with self.connection.cursor() as cursor:
+            sql = """
+                SELECT entity_id, dim, vector FROM embeddings 
+                WHERE user_id = %s AND entity_type = %s AND model = %s
+            """
+            cursor.execute(sql, (user_id, entity_type, model))
+            return cursor.fetchall()
+    
+    def get_version(self, user_id, entity_type, model):
+        """
+        Cheap signature of a designer's embeddings that changes on every write
+        
+        Upserts replace rows (new, higher IDs) and deletes lower the count, so
+        (count, highest ID) changes whenever any worker changed the vectors.
+        
+        Args:
+            user_id: The designer's ID
+            entity_type: Type of entity (product, design, client)
+            model: Embedding model name
+        
+        Returns:
+            Tuple of (count, highest embedding ID)
+        """
+        with self.connection.cursor() as cursor:
+            sql = """
+                SELECT COUNT(*) as count, MAX(id) as max_id FROM embeddings 
+                WHERE user_id = %s AND entity_type = %s AND model = %s
+            """
+            cursor.execute(sql, (user_id, entity_type, model))
+            row = cursor.fetchone()
+            return (row['count'], row['max_id'])
+    
+    def get_content_hashes(self, entity_type, entity_ids, model):
+        """
+        Map entity IDs to the content hash their embedding was computed from
+        
+        Args:
+            entity_type: Type of entity (product, design, client)
+            entity_ids: List of entity IDs to look up
+            model: Embedding model name
+        
+        Returns:
+            Dictionary of entity_id to content_hash
+        """
+        if not entity_ids:
+            return {}
+        
+        placeholders = ', '.join(['%s'] * len(entity_ids))
+        with self.connection.cursor() as cursor:
+            sql = f"""
+                SELECT entity_id, content_hash FROM embeddings 
+                WHERE entity_type = %s AND model = %s AND entity_id IN ({placeholders})
+            """
+            cursor.execute(sql, [entity_type, model] + list(entity_ids))
+            return {row['entity_id']: row['content_hash'] for row in cursor.fetchall()}
+    
+    def delete(self, entity_type, entity_id):
+        """
+        Delete the embedding of an entity
+        
+        Args:
+            entity_type: Type of entity (product, design, client)
+            entity_id: The entity's ID
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                sql = "DELETE FROM embeddings WHERE entity_type = %s AND entity_id = %s"
+                cursor.execute(sql, (entity_type, entity_id))
+                self.connection.commit()
+                return cursor.rowcount > 0
+        except:
+            return False
@@ -2,6 +2,9 @@
 # Manages invoices, quotes, and payment tracking
 
 from datetime import datetime, date
+from utils.loaders import attach_client_names, attach_project_titles
+from models.invoice_totals import INVOICE_COLUMNS, InvoiceTotals
+from services.invoice_numbers import invoice_numbers
 
 class Invoice:
     """Invoice model for financial management"""
@@ -30,7 +33,7 @@ class Invoice:
         """
         try:
             # Generate unique invoice number
-            invoice_number = self._generate_invoice_number(user_id)
+            invoice_number = self._generate_invoice_number(user_id, invoice_type)
             
             # Use current date if not provided
             if not issue_date:
@@ -45,29 +48,42 @@ class Invoice:
                 """
                 cursor.execute(sql, (user_id, project_id, client_id, invoice_number, 
                                    invoice_type, amount, issue_date, due_date, notes))
+                invoice_id = cursor.lastrowid
+                
+                # New invoices start as drafts (schema default)
+                InvoiceTotals(self.connection).apply([(user_id, None, {
+                    'type': invoice_type, 'status': 'draft', 'amount': amount,
+                    'issue_date': issue_date, 'due_date': due_date, 'paid_date': None
+                })])
                 self.connection.commit()
-                return cursor.lastrowid
+                return invoice_id
         except Exception as e:
             print(f"Error creating invoice: {e}")
             return None
     
-    def _generate_invoice_number(self, user_id):
+    def _generate_invoice_number(self, user_id, invoice_type='invoice'):
         """
         Generate unique invoice number
         
+        Numbers come from the designer's invoice sequence (see
+        services.invoice_numbers), so concurrent creates never collide and
+        deleted invoices do not cause numbers to be reused.
+        
         Args:
             user_id: The designer's ID
+            invoice_type: Type ('invoice' or 'quote')
         
         Returns:
-            Unique invoice number string
+            Unique invoice number string (INVOICE_NUMBER_FORMAT, e.g. INV-001-00123)
         """
+        return invoice_numbers.next_number(self.connection, user_id, invoice_type)
+    
+    def _get_for_totals(self, invoice_id, user_id):
+        """Current state of an invoice as the aggregates see it (see models.invoice_totals)"""
         with self.connection.cursor() as cursor:
-            # Count existing invoices for this user
-            cursor.execute("SELECT COUNT(*) as count FROM invoices WHERE user_id = %s", (user_id,))
-            count = cursor.fetchone()['count']
-            
-            # Format: INV-USERID-COUNT (e.g., INV-001-00123)
-            return f"INV-{user_id:03d}-{count+1:05d}"
+            cursor.execute(f"SELECT {INVOICE_COLUMNS} FROM invoices WHERE id = %s AND user_id = %s",
+                           (invoice_id, user_id))
+            return cursor.fetchone()
     
     def get_by_id(self, invoice_id, user_id):
         """
@@ -105,10 +121,7 @@ class Invoice:
             List of invoice dictionaries
         """
         query = """
-            SELECT i.*, c.name as client_name, p.title as project_title
-            FROM invoices i
-            LEFT JOIN clients c ON i.client_id = c.id
-            LEFT JOIN projects p ON i.project_id = p.id
+            SELECT i.* FROM invoices i
             WHERE i.user_id = %s
         """
         params = [user_id]
@@ -126,7 +139,11 @@ class Invoice:
         
         with self.connection.cursor() as cursor:
             cursor.execute(query, params)
-            return cursor.fetchall()
+            invoices = cursor.fetchall()
+        
+        # Resolve names in one batched query per table
+        attach_client_names(self.connection, invoices)
+        return attach_project_titles(self.connection, invoices)
     
     def update_status(self, invoice_id, user_id, new_status):
         """
@@ -141,25 +158,39 @@ class Invoice:
             True if successful, False otherwise
         """
         try:
+            # Read the old row inside the write transaction, or a concurrent
+            # change would make the aggregates subtract the wrong contribution
+            self.connection.begin_write()
             with self.connection.cursor() as cursor:
                 # If marking as paid, set paid_date
+                old = self._get_for_totals(invoice_id, user_id)
+                if not old:
+                    self.connection.rollback()
+                    return False
+                
                 if new_status == 'paid':
-                    sql = """
+                    sql = f"""
                         UPDATE invoices 
                         SET status = %s, paid_date = CURDATE()
                         WHERE id = %s AND user_id = %s
+                        RETURNING {INVOICE_COLUMNS}
                     """
                 else:
-                    sql = """
+                    sql = f"""
                         UPDATE invoices 
                         SET status = %s
                         WHERE id = %s AND user_id = %s
+                        RETURNING {INVOICE_COLUMNS}
                     """
                 
                 cursor.execute(sql, (new_status, invoice_id, user_id))
+                rows = cursor.fetchall()
+                new = rows[0] if rows else None
+                InvoiceTotals(self.connection).apply([(user_id, old, new)])
                 self.connection.commit()
-                return cursor.rowcount > 0
+                return new is not None
         except:
+            self.connection.rollback()
             return False
     
     def update(self, invoice_id, user_id, **kwargs):
@@ -190,16 +221,28 @@ class Invoice:
             
             values.extend([user_id, invoice_id])
             
+            # Read the old row inside the write transaction (see update_status)
+            self.connection.begin_write()
+            old = self._get_for_totals(invoice_id, user_id)
+            if not old:
+                self.connection.rollback()
+                return False
+            
             with self.connection.cursor() as cursor:
                 sql = f"""
                     UPDATE invoices 
                     SET {', '.join(update_fields)}, updated_at = NOW()
                     WHERE user_id = %s AND id = %s
+                    RETURNING {INVOICE_COLUMNS}
                 """
                 cursor.execute(sql, values)
+                rows = cursor.fetchall()
+                new = rows[0] if rows else None
+                InvoiceTotals(self.connection).apply([(user_id, old, new)])
                 self.connection.commit()
-                return cursor.rowcount > 0
+                return new is not None
         except:
+            self.connection.rollback()
             return False
     
     def delete(self, invoice_id, user_id):
@@ -215,10 +258,13 @@ class Invoice:
         """
         try:
             with self.connection.cursor() as cursor:
-                sql = "DELETE FROM invoices WHERE id = %s AND user_id = %s"
+                sql = f"DELETE FROM invoices WHERE id = %s AND user_id = %s RETURNING {INVOICE_COLUMNS}"
                 cursor.execute(sql, (invoice_id, user_id))
+                rows = cursor.fetchall()
+                old = rows[0] if rows else None
+                InvoiceTotals(self.connection).apply([(user_id, old, None)])
                 self.connection.commit()
-                return cursor.rowcount > 0
+                return old is not None
         except:
             return False
     
@@ -226,71 +272,71 @@ class Invoice:
         """
         Get financial summary for dashboard
         
+        Read from the per-designer aggregates (see models.invoice_totals) in a
+        single query instead of summing the invoices themselves.
+        
         Args:
             user_id: The designer's ID
         
         Returns:
             Dictionary with financial statistics
         """
-        with self.connection.cursor() as cursor:
-            # Total revenue (paid invoices)
-            cursor.execute("""
-                SELECT SUM(amount) as total FROM invoices 
-                WHERE user_id = %s AND status = 'paid' AND type = 'invoice'
-            """, (user_id,))
-            revenue = cursor.fetchone()['total'] or 0
-            
-            # Pending payments (sent invoices not yet paid)
-            cursor.execute("""
-                SELECT SUM(amount) as total FROM invoices 
-                WHERE user_id = %s AND status = 'sent' AND type = 'invoice'
-            """, (user_id,))
-            pending = cursor.fetchone()['total'] or 0
-            
-            # Overdue invoices
-            cursor.execute("""
-                SELECT COUNT(*) as count, SUM(amount) as total FROM invoices 
-                WHERE user_id = %s AND status = 'overdue' AND type = 'invoice'
-            """, (user_id,))
-            overdue_data = cursor.fetchone()
-            
-            # Quotes pending
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM invoices 
-                WHERE user_id = %s AND status = 'sent' AND type = 'quote'
-            """, (user_id,))
-            pending_quotes = cursor.fetchone()['count']
-            
-            return {
-                'total_revenue': float(revenue),
-                'pending_payments': float(pending),
-                'overdue_count': overdue_data['count'],
-                'overdue_amount': float(overdue_data['total'] or 0),
-                'pending_quotes': pending_quotes
-            }
+        totals = {(row['type'], row['status']): row for row in InvoiceTotals(self.connection).get_by_status(user_id)}
+        
+        def amount(invoice_type, status):
+            row = totals.get((invoice_type, status))
+            return float(row['amount'] or 0) if row else 0.0
+        
+        def count(invoice_type, status):
+            row = totals.get((invoice_type, status))
+            return int(row['invoice_count'] or 0) if row else 0
+        
+        return {
+            'total_revenue': round(amount('invoice', 'paid'), 2),
+            'pending_payments': round(amount('invoice', 'sent'), 2),
+            'overdue_count': count('invoice', 'overdue'),
+            'overdue_amount': round(amount('invoice', 'overdue'), 2),
+            'pending_quotes': count('quote', 'sent')
+        }
     
-    def check_overdue(self, user_id):
+    def mark_overdue_batch(self, today, limit=500):
         """
-        Check for overdue invoices and update their status
+        Mark one batch of unpaid invoices past their due date as overdue, for all designers
+        
+        Walks the (status, due_date) index, so the cost depends on the batch
+        size, not on how many invoices exist.
         
         Args:
-            user_id: The designer's ID
+            today: Invoices due before this date are overdue
+            limit: Maximum number of invoices to update
         
         Returns:
-            Number of invoices marked as overdue
+            List of dictionaries (id, user_id, invoice_number, amount, ...) of the invoices changed
         """
-        try:
-            with self.connection.cursor() as cursor:
-                sql = """
-                    UPDATE invoices 
-                    SET status = 'overdue'
-                    WHERE user_id = %s 
-                    AND status = 'sent' 
-                    AND due_date < CURDATE()
-                """
-                cursor.execute(sql, (user_id,))
-                self.connection.commit()
-                return cursor.rowcount
-        except:
-            return 0
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT id FROM invoices
+                WHERE status = 'sent' AND due_date < %s
+                ORDER BY due_date, id
+                LIMIT %s
+            """, (today, limit))
+            invoice_ids = [row['id'] for row in cursor.fetchall()]
+            if not invoice_ids:
+                return []
+            
+            # Re-check the status: an invoice may have been paid since the SELECT
+            placeholders = ', '.join(['%s'] * len(invoice_ids))
+            cursor.execute(f"""
+                UPDATE invoices
+                SET status = 'overdue', updated_at = CURRENT_TIMESTAMP
+                WHERE id IN ({placeholders}) AND status = 'sent'
+                RETURNING {INVOICE_COLUMNS}, invoice_number
+            """, invoice_ids)
+            changed = cursor.fetchall()
+            
+            InvoiceTotals(self.connection).apply([
+                (invoice['user_id'], dict(invoice, status='sent'), invoice) for invoice in changed
+            ])
+            self.connection.commit()
+            return changed
 
@@ -0,0 +1,75 @@
+# Invoice sequence model - per-designer counters for invoice numbers
+# Numbers are reserved with one atomic UPDATE ... RETURNING instead of counting invoices
+
+import re
+
+# Trailing digits of an issued invoice number (INV-001-00042 -> 42)
+_NUMBER_SUFFIX = re.compile(r'(\d+)$')
+
+class InvoiceSequence:
+    """Invoice sequence model for collision-free invoice numbering"""
+    
+    def __init__(self, connection):
+        """Initialize with database connection"""
+        self.connection = connection
+    
+    def allocate(self, user_id, count=1, name='invoice'):
+        """
+        Reserve the next `count` numbers of a designer's sequence
+        
+        The reservation is part of the caller's transaction and is not
+        committed here.
+        
+        Args:
+            user_id: The designer's ID
+            count: How many consecutive numbers to reserve
+            name: Sequence name
+        
+        Returns:
+            First reserved number (the block is first .. first + count - 1)
+        """
+        for _ in range(2):
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE invoice_sequences
+                    SET next_value = next_value + %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE user_id = %s AND name = %s
+                    RETURNING next_value
+                """, (count, user_id, name))
+                rows = cursor.fetchall()
+                if rows:
+                    return rows[0]['next_value'] - count
+                
+                # First invoice since sequences were introduced: continue after the
+                # highest number already issued, so older invoices never collide
+                first = self._highest_issued(user_id) + 1
+                try:
+                    cursor.execute("""
+                        INSERT INTO invoice_sequences (user_id, name, next_value)
+                        VALUES (%s, %s, %s)
+                    """, (user_id, name, first + count))
+                    return first
+                except Exception:
+                    # Another request created the row first; retry the UPDATE
+                    pass
+        
+        raise RuntimeError(f"Could not allocate invoice number for user {user_id}")
+    
+    def _highest_issued(self, user_id):
+        """
+        Highest numeric suffix among a designer's existing invoice numbers
+        
+        Args:
+            user_id: The designer's ID
+        
+        Returns:
+            Highest number found, or 0
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT invoice_number FROM invoices WHERE user_id = %s", (user_id,))
+            highest = 0
+            for row in cursor.fetchall():
+                match = _NUMBER_SUFFIX.search(row['invoice_number'] or '')
+                if match:
+                    highest = max(highest, int(match.group(1)))
+            return highest
@@ -0,0 +1,181 @@
+# Invoice totals model - per-designer monthly invoice aggregates
+# Kept up to date by the Invoice model on every write, so finance analytics never scan invoices
+
+# Aggregates are kept on three bases:
+#   issued - by issue month (YYYY-MM), every invoice and quote under its current status
+#   paid   - by paid month (YYYY-MM), paid invoices and quotes
+#   due    - by due date (YYYY-MM-DD), unpaid ('sent' and 'overdue') invoices and quotes
+UNPAID_STATUSES = ('sent', 'overdue')
+
+# Invoice columns the aggregates are derived from
+INVOICE_COLUMNS = 'id, user_id, type, status, amount, issue_date, due_date, paid_date'
+
+
+def contributions(invoice):
+    """
+    Aggregate rows an invoice counts towards
+    
+    Args:
+        invoice: Dictionary with type, status, amount, issue_date, due_date and paid_date
+    
+    Returns:
+        List of ((basis, period, type, status), amount) tuples
+    """
+    if not invoice:
+        return []
+    
+    amount = float(invoice.get('amount') or 0)
+    invoice_type = invoice.get('type') or 'invoice'
+    status = invoice.get('status') or 'draft'
+    rows = []
+    
+    # Invoices without an issue date still count towards the all-time totals
+    issued = str(invoice['issue_date'])[:7] if invoice.get('issue_date') else ''
+    rows.append((('issued', issued, invoice_type, status), amount))
+    if status == 'paid' and invoice.get('paid_date'):
+        rows.append((('paid', str(invoice['paid_date'])[:7], invoice_type, status), amount))
+    if status in UNPAID_STATUSES and invoice.get('due_date'):
+        rows.append((('due', str(invoice['due_date'])[:10], invoice_type, status), amount))
+    return rows
+
+
+class InvoiceTotals:
+    """Invoice totals model for incremental finance aggregates"""
+    
+    def __init__(self, connection):
+        """Initialize with database connection"""
+        self.connection = connection
+    
+    def apply(self, changes):
+        """
+        Move invoices' contributions from their old to their new state
+        
+        Runs in the caller's transaction; the caller commits together with
+        the invoice change itself.
+        
+        Args:
+            changes: List of (user_id, old_invoice, new_invoice) tuples; old_invoice is
+                     None for created invoices and new_invoice is None for deleted ones
+        
+        Returns:
+            Number of aggregate rows changed
+        """
+        deltas = {}
+        for user_id, old, new in changes:
+            for key, amount in contributions(old):
+                total = deltas.setdefault((user_id,) + key, [0.0, 0])
+                total[0] -= amount
+                total[1] -= 1
+            for key, amount in contributions(new):
+                total = deltas.setdefault((user_id,) + key, [0.0, 0])
+                total[0] += amount
+                total[1] += 1
+        
+        changed = 0
+        with self.connection.cursor() as cursor:
+            for (user_id, basis, period, invoice_type, status), (amount, count) in deltas.items():
+                if count == 0 and abs(amount) < 0.005:
+                    continue
+                
+                cursor.execute("""
+                    UPDATE invoice_totals
+                    SET amount = amount + %s, invoice_count = invoice_count + %s,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE user_id = %s AND basis = %s AND period = %s AND type = %s AND status = %s
+                """, (amount, count, user_id, basis, period, invoice_type, status))
+                if cursor.rowcount == 0:
+                    cursor.execute("""
+                        INSERT INTO invoice_totals
+                        (user_id, basis, period, type, status, amount, invoice_count)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, (user_id, basis, period, invoice_type, status, amount, count))
+                changed += 1
+        return changed
+    
+    def rebuild(self, user_id=None):
+        """
+        Recompute the aggregates from the invoices table
+        
+        Used to backfill existing invoices and to repair drift.
+        
+        Args:
+            user_id: Only rebuild this designer's totals (default: everyone)
+        
+        Returns:
+            Number of aggregate rows written
+        """
+        user_filter = " AND user_id = %s" if user_id is not None else ""
+        params = (user_id,) if user_id is not None else ()
+        unpaid = ', '.join(f"'{status}'" for status in UNPAID_STATUSES)
+        
+        with self.connection.cursor() as cursor:
+            if user_id is not None:
+                cursor.execute("DELETE FROM invoice_totals WHERE user_id = %s", params)
+            else:
+                cursor.execute("DELETE FROM invoice_totals")
+            
+            written = 0
+            for basis, period, condition in (
+                ('issued', "COALESCE(DATE_FORMAT(issue_date, '%Y-%m'), '')", "amount IS NOT NULL"),
+                ('paid', "DATE_FORMAT(paid_date, '%Y-%m')", "status = 'paid' AND paid_date IS NOT NULL"),
+                ('due', "DATE_FORMAT(due_date, '%Y-%m-%d')", f"status IN ({unpaid}) AND due_date IS NOT NULL")
+            ):
+                cursor.execute(f"""
+                    INSERT INTO invoice_totals
+                    (user_id, basis, period, type, status, amount, invoice_count)
+                    SELECT user_id, '{basis}', {period}, type, status, SUM(amount), COUNT(*)
+                    FROM invoices
+                    WHERE {condition}{user_filter}
+                    GROUP BY user_id, {period}, type, status
+                """, params)
+                written += cursor.rowcount
+            self.connection.commit()
+            return written
+    
+    def is_empty(self):
+        """Whether no aggregates exist yet (e.g. right after the table was added)"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 AS found FROM invoice_totals LIMIT 1")
+            return cursor.fetchone() is None
+    
+    def get_by_status(self, user_id):
+        """
+        All-time totals of a designer by type and current status
+        
+        Args:
+            user_id: The designer's ID
+        
+        Returns:
+            List of dictionaries with type, status, amount and invoice_count
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT type, status, SUM(amount) as amount, SUM(invoice_count) as invoice_count
+                FROM invoice_totals
+                WHERE user_id = %s AND basis = 'issued'
+                GROUP BY type, status
+            """, (user_id,))
+            return cursor.fetchall()
+    
+    def get_range(self, user_id, basis, start, end):
+        """
+        Aggregate rows of one basis between two periods (inclusive)
+        
+        Args:
+            user_id: The designer's ID
+            basis: 'issued', 'paid' or 'due'
+            start: First period ('YYYY-MM', or 'YYYY-MM-DD' for 'due')
+            end: Last period
+        
+        Returns:
+            List of dictionaries with period, type, status, amount and invoice_count
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT period, type, status, amount, invoice_count
+                FROM invoice_totals
+                WHERE user_id = %s AND basis = %s AND period BETWEEN %s AND %s
+                AND invoice_count > 0
+                ORDER BY period
+            """, (user_id, basis, start, end))
+            return cursor.fetchall()
@@ -1,7 +1,28 @@
 # Marketing model - represents AI-generated marketing content
 # Manages social media posts, blogs, emails, and content scheduling
 
-from datetime import datetime
+from datetime import datetime, timezone
+from utils.loaders import attach_project_titles
+
+# Columns the post dispatcher hands to platform adapters
+POST_COLUMNS = 'id, user_id, project_id, content_type, platform, title, content, scheduled_date, attempts'
+
+
+def utc_timestamp(value):
+    """
+    Normalize a datetime or ISO 8601 string to a UTC 'YYYY-MM-DD HH:MM:SS' string
+    
+    Scheduled dates are stored in this form so they compare correctly with
+    NOW() and with each other in the due-post index.
+    
+    Raises:
+        ValueError: If the value is not a valid datetime
+    """
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip())
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
 
 class MarketingContent:
     """Marketing content model for AI-generated marketing materials"""
@@ -41,6 +62,37 @@ class MarketingContent:
             print(f"Error creating marketing content: {e}")
             return None
     
+    def bulk_create(self, user_id, rows):
+        """
+        Insert many pieces of content in one transaction
+        
+        Args:
+            user_id: ID of the designer
+            rows: List of (project_id, content_type, platform, title, content) tuples
+        
+        Returns:
+            Number of rows inserted
+        
+        Raises:
+            Exception: If the insert fails (the transaction is rolled back)
+        """
+        if not rows:
+            return 0
+        
+        try:
+            with self.connection.cursor() as cursor:
+                sql = """
+                    INSERT INTO marketing_content
+                    (user_id, project_id, content_type, platform, title, content)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                cursor.executemany(sql, [(user_id,) + tuple(row) for row in rows])
+                self.connection.commit()
+                return len(rows)
+        except Exception:
+            self.connection.rollback()
+            raise
+    
     def get_by_id(self, content_id, user_id):
         """
         Retrieve marketing content by ID
@@ -76,9 +128,7 @@ class MarketingContent:
             List of content dictionaries
         """
         query = """
-            SELECT m.*, p.title as project_title
-            FROM marketing_content m
-            LEFT JOIN projects p ON m.project_id = p.id
+            SELECT m.* FROM marketing_content m
             WHERE m.user_id = %s
         """
         params = [user_id]
@@ -96,7 +146,9 @@ class MarketingContent:
         
         with self.connection.cursor() as cursor:
             cursor.execute(query, params)
-            return cursor.fetchall()
+            content = cursor.fetchall()
+        
+        return attach_project_titles(self.connection, content)
     
     def update(self, content_id, user_id, **kwargs):
         """
@@ -120,7 +172,7 @@ class MarketingContent:
             for field, value in kwargs.items():
                 if field in allowed_fields and value is not None:
                     update_fields.append(f"{field} = %s")
-                    values.append(value)
+                    values.append(utc_timestamp(value) if field == 'scheduled_date' else value)
             
             if not update_fields:
                 return False
@@ -143,10 +195,13 @@ class MarketingContent:
         """
         Schedule content for future posting
         
+        Rescheduling starts over: earlier publish attempts and errors are
+        cleared.
+        
         Args:
             content_id: The content's ID
             user_id: The designer's ID
-            scheduled_date: Date/time to post
+            scheduled_date: Date/time to post (naive values are taken as UTC)
         
         Returns:
             True if successful, False otherwise
@@ -155,22 +210,25 @@ class MarketingContent:
             with self.connection.cursor() as cursor:
                 sql = """
                     UPDATE marketing_content 
-                    SET status = 'scheduled', scheduled_date = %s
+                    SET status = 'scheduled', scheduled_date = %s, attempts = 0,
+                        claimed_by = NULL, claimed_until = NULL, last_error = NULL
                     WHERE id = %s AND user_id = %s
                 """
-                cursor.execute(sql, (scheduled_date, content_id, user_id))
+                cursor.execute(sql, (utc_timestamp(scheduled_date), content_id, user_id))
                 self.connection.commit()
                 return cursor.rowcount > 0
         except:
             return False
     
-    def mark_posted(self, content_id, user_id):
+    def mark_posted(self, content_id, user_id, external_id=None, post_url=None):
         """
         Mark content as posted
         
         Args:
             content_id: The content's ID
             user_id: The designer's ID
+            external_id: Post ID on the platform (optional)
+            post_url: Link to the published post (optional)
         
         Returns:
             True if successful, False otherwise
@@ -179,10 +237,11 @@ class MarketingContent:
             with self.connection.cursor() as cursor:
                 sql = """
                     UPDATE marketing_content 
-                    SET status = 'posted', posted_date = NOW()
+                    SET status = 'posted', posted_date = NOW(), external_id = %s, post_url = %s,
+                        claimed_by = NULL, claimed_until = NULL, last_error = NULL
                     WHERE id = %s AND user_id = %s
                 """
-                cursor.execute(sql, (content_id, user_id))
+                cursor.execute(sql, (external_id, post_url, content_id, user_id))
                 self.connection.commit()
                 return cursor.rowcount > 0
         except:
@@ -208,6 +267,127 @@ class MarketingContent:
         except:
             return False
     
+    def claim_due(self, claimed_by, now, lease_until, limit=500, platforms=None):
+        """
+        Claim scheduled posts of all designers that are due, in one UPDATE
+        
+        Posts whose claim lease expired (a dispatcher that died mid-batch) or
+        whose retry time has come are claimable again. Concurrent dispatchers
+        never claim the same post.
+        
+        Args:
+            claimed_by: Unique ID of the claiming dispatcher run
+            now: Current time (naive UTC datetime)
+            lease_until: When the claim expires (naive UTC datetime)
+            limit: Maximum number of posts to claim
+            platforms: Only claim posts for these platforms (lowercase names),
+                       or None for every platform
+        
+        Returns:
+            List of claimed posts (POST_COLUMNS), earliest scheduled first
+        """
+        now, lease_until = utc_timestamp(now), utc_timestamp(lease_until)
+        platform_filter = ''
+        platform_params = []
+        if platforms is not None:
+            if not platforms:
+                return []
+            platform_filter = f"AND LOWER(platform) IN ({', '.join(['%s'] * len(platforms))})"
+            platform_params = list(platforms)
+        
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE marketing_content
+                SET claimed_by = %s, claimed_until = %s, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM marketing_content
+                    WHERE status = 'scheduled' AND scheduled_date <= %s
+                    AND (claimed_until IS NULL OR claimed_until <= %s)
+                    {platform_filter}
+                    ORDER BY scheduled_date ASC
+                    LIMIT %s
+                )
+                AND status = 'scheduled'
+                AND (claimed_until IS NULL OR claimed_until <= %s)
+                RETURNING {POST_COLUMNS}
+            """, [claimed_by, lease_until, now, now] + platform_params + [limit, now])
+            claimed = cursor.fetchall()
+            self.connection.commit()
+        
+        claimed.sort(key=lambda post: (post['scheduled_date'], post['id']))
+        return claimed
+    
+    def mark_posted_many(self, claimed_by, posts):
+        """
+        Mark claimed posts as posted in one transaction
+        
+        Args:
+            claimed_by: ID of the dispatcher run holding the claims
+            posts: List of (content_id, external_id, post_url) tuples
+        
+        Returns:
+            Number of posts marked (posts whose claim was lost are not marked)
+        """
+        if not posts:
+            return 0
+        
+        with self.connection.cursor() as cursor:
+            cursor.executemany("""
+                UPDATE marketing_content
+                SET status = 'posted', posted_date = NOW(), external_id = %s, post_url = %s,
+                    claimed_by = NULL, claimed_until = NULL, last_error = NULL
+                WHERE id = %s AND claimed_by = %s
+            """, [(external_id, post_url, content_id, claimed_by) for content_id, external_id, post_url in posts])
+            marked = cursor.rowcount
+            self.connection.commit()
+        return marked
+    
+    def renew_claims(self, claimed_by, lease_until):
+        """
+        Extend the lease of a dispatcher run's claimed posts
+        
+        Args:
+            claimed_by: ID of the dispatcher run holding the claims
+            lease_until: New expiry of the claims (naive UTC datetime)
+        
+        Returns:
+            Number of posts whose claim was extended
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE marketing_content SET claimed_until = %s
+                WHERE claimed_by = %s AND status = 'scheduled'
+            """, (utc_timestamp(lease_until), claimed_by))
+            renewed = cursor.rowcount
+            self.connection.commit()
+        return renewed
+    
+    def release_failed(self, claimed_by, failures):
+        """
+        Record failed publish attempts of claimed posts in one transaction
+        
+        Args:
+            claimed_by: ID of the dispatcher run holding the claims
+            failures: List of (content_id, error, retry_at) tuples; retry_at is a
+                      naive UTC datetime, or None when the post gives up ('failed')
+        
+        Returns:
+            Number of posts released
+        """
+        if not failures:
+            return 0
+        
+        with self.connection.cursor() as cursor:
+            cursor.executemany("""
+                UPDATE marketing_content
+                SET status = CASE WHEN %s IS NULL THEN 'failed' ELSE status END,
+                    claimed_by = NULL, claimed_until = %s, last_error = %s
+                WHERE id = %s AND claimed_by = %s
+            """, [(retry_at and utc_timestamp(retry_at), retry_at and utc_timestamp(retry_at), str(error)[:500],
+                   content_id, claimed_by) for content_id, error, retry_at in failures])
+            self.connection.commit()
+        return len(failures)
+    
     def get_scheduled(self, user_id):
         """
         Get scheduled content that needs to be posted
@@ -2,6 +2,7 @@
 # Manages messaging between designers and clients with AI features
 
 from datetime import datetime
+from utils.loaders import attach_client_names
 
 class Message:
     """Message model for client communication management"""
@@ -80,6 +81,8 @@ class Message:
         """
         Get recent messages for a designer
         
+        Messages of clients that no longer exist are left out.
+        
         Args:
             user_id: The designer's ID
             limit: Maximum number of messages to return
@@ -89,20 +92,23 @@ class Message:
         """
         with self.connection.cursor() as cursor:
             sql = """
-                SELECT m.*, c.name as client_name 
-                FROM messages m
-                JOIN clients c ON m.client_id = c.id
+                SELECT m.* FROM messages m
                 WHERE m.user_id = %s
+                AND EXISTS (SELECT 1 FROM clients c WHERE c.id = m.client_id)
                 ORDER BY m.created_at DESC
                 LIMIT %s
             """
             cursor.execute(sql, (user_id, limit))
-            return cursor.fetchall()
+            messages = cursor.fetchall()
+        
+        return attach_client_names(self.connection, messages)
     
     def get_unread(self, user_id):
         """
         Get unread messages for a designer
         
+        Messages of clients that no longer exist are left out.
+        
         Args:
             user_id: The designer's ID
         
@@ -111,14 +117,15 @@ class Message:
         """
         with self.connection.cursor() as cursor:
             sql = """
-                SELECT m.*, c.name as client_name 
-                FROM messages m
-                JOIN clients c ON m.client_id = c.id
+                SELECT m.* FROM messages m
                 WHERE m.user_id = %s AND m.is_read = FALSE AND m.sender = 'client'
+                AND EXISTS (SELECT 1 FROM clients c WHERE c.id = m.client_id)
                 ORDER BY m.created_at DESC
             """
             cursor.execute(sql, (user_id,))
-            return cursor.fetchall()
+            messages = cursor.fetchall()
+        
+        return attach_client_names(self.connection, messages)
     
     def mark_as_read(self, message_id):
         """
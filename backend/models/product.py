@@ -3,6 +3,16 @@
 
 from datetime import datetime
 
+# Default price histogram bucket boundaries (lower bounds, last bucket is open-ended)
+DEFAULT_PRICE_BUCKETS = [0, 100, 250, 500, 1000, 2500, 5000]
+
+# Columns that get facet counts in faceted search
+FACET_FIELDS = ['category', 'style', 'color', 'vendor']
+
+# Columns accepted by bulk import, in insert order
+PRODUCT_IMPORT_COLUMNS = ['name', 'price', 'project_id', 'description', 'vendor',
+                          'product_url', 'image_url', 'category', 'style', 'color']
+
 class Product:
     """Product model for product sourcing and management"""
     
@@ -104,46 +114,285 @@ class Product:
             cursor.execute(sql, (user_id, limit))
             return cursor.fetchall()
     
-    def search(self, user_id, filters=None):
+    def bulk_create(self, user_id, rows):
+        """
+        Insert many products in a single transaction
+        
+        Args:
+            user_id: ID of the designer
+            rows: List of tuples in PRODUCT_IMPORT_COLUMNS order
+        
+        Returns:
+            Number of products inserted
+        
+        Raises:
+            Exception: If the insert fails (the transaction is rolled back)
+        """
+        if not rows:
+            return 0
+        
+        columns = ', '.join(PRODUCT_IMPORT_COLUMNS)
+        placeholders = ', '.join(['%s'] * (len(PRODUCT_IMPORT_COLUMNS) + 1))
+        try:
+            with self.connection.cursor() as cursor:
+                sql = f"INSERT INTO products (user_id, {columns}) VALUES ({placeholders})"
+                cursor.executemany(sql, [(user_id,) + tuple(row) for row in rows])
+                self.connection.commit()
+                return len(rows)
+        except Exception:
+            self.connection.rollback()
+            raise
+    
+    def iter_by_user(self, user_id, batch_size=1000):
+        """
+        Stream all products of a user without loading them into memory
+        
+        Args:
+            user_id: The designer's ID
+            batch_size: Rows fetched per round trip
+        
+        Yields:
+            Product dictionaries, newest first
+        """
+        with self.connection.cursor() as cursor:
+            sql = """
+                SELECT * FROM products 
+                WHERE user_id = %s
+                ORDER BY created_at DESC, id DESC
+            """
+            cursor.execute(sql, (user_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+    
+    def get_by_ids(self, product_ids, user_id):
+        """
+        Retrieve several products in one query, keeping the given order
+        
+        Args:
+            product_ids: List of product IDs
+            user_id: The designer's ID (for authorization)
+        
+        Returns:
+            List of product dictionaries in the order of product_ids
+        """
+        if not product_ids:
+            return []
+        
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        with self.connection.cursor() as cursor:
+            sql = f"SELECT * FROM products WHERE user_id = %s AND id IN ({placeholders})"
+            cursor.execute(sql, [user_id] + list(product_ids))
+            rows = {row['id']: row for row in cursor.fetchall()}
+        
+        return [rows[product_id] for product_id in product_ids if product_id in rows]
+    
+    def get_search_columns(self, user_id, batch_size=5000):
+        """
+        Stream the columns needed to build a facet index, newest first
+        
+        Args:
+            user_id: The designer's ID
+            batch_size: Rows fetched per round trip
+        
+        Yields:
+            Dictionaries with id, price, category, style, color and vendor
+        """
+        with self.connection.cursor() as cursor:
+            sql = """
+                SELECT id, price, category, style, color, vendor FROM products 
+                WHERE user_id = %s
+                ORDER BY created_at DESC, id DESC
+            """
+            cursor.execute(sql, (user_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+    
+    def search(self, user_id, filters=None, limit=100):
         """
         Search products with filters
         
         Args:
             user_id: The designer's ID
             filters: Dictionary with search filters (category, style, color, max_price)
+            limit: Maximum number of products to return
         
         Returns:
             List of matching products
         """
-        query = "SELECT * FROM products WHERE user_id = %s"
-        params = [user_id]
+        where_sql, params = self._build_filter_clause(user_id, filters)
+        query = f"SELECT * FROM products WHERE {where_sql} ORDER BY created_at DESC LIMIT %s"
+        params.append(limit)
         
-        if filters:
-            if filters.get('category'):
-                query += " AND category = %s"
-                params.append(filters['category'])
-            
-            if filters.get('style'):
-                query += " AND style = %s"
-                params.append(filters['style'])
-            
-            if filters.get('color'):
-                query += " AND color = %s"
-                params.append(filters['color'])
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+    
+    def faceted_search(self, user_id, filters=None, limit=50, offset=0, 
+                       price_buckets=None, facet_limit=20):
+        """
+        Search products and return facet counts for the filter sidebar
+        
+        Facet counts for a field ignore that field's own filter, so the UI can 
+        show how many results each alternative value would give. The whole 
+        response is served by three queries on the (user_id, ...) composite indexes.
+        
+        Args:
+            user_id: The designer's ID
+            filters: Dictionary with search filters (category, style, color, 
+                     vendor, min_price, max_price)
+            limit: Maximum number of products to return
+            offset: Number of products to skip (for pagination)
+            price_buckets: Ascending bucket lower bounds for the price histogram
+            facet_limit: Maximum number of values returned per facet
+        
+        Returns:
+            Dictionary with products, total, facets and price_histogram
+        """
+        filters = filters or {}
+        buckets = sorted(price_buckets or DEFAULT_PRICE_BUCKETS)
+        
+        with self.connection.cursor() as cursor:
+            # Page of matching products
+            where_sql, params = self._build_filter_clause(user_id, filters)
+            cursor.execute(f"""
+                SELECT * FROM products 
+                WHERE {where_sql}
+                ORDER BY created_at DESC
+                LIMIT %s OFFSET %s
+            """, params + [limit, offset])
+            products = cursor.fetchall()
             
-            if filters.get('max_price'):
-                query += " AND price <= %s"
-                params.append(filters['max_price'])
+            # Value counts for every facet in one UNION ALL round trip
+            facet_queries = []
+            facet_params = []
+            for field in FACET_FIELDS:
+                facet_where, field_params = self._build_filter_clause(user_id, filters, exclude=field)
+                facet_queries.append(f"""
+                    SELECT '{field}' as facet, {field} as value, COUNT(*) as count
+                    FROM products
+                    WHERE {facet_where} AND {field} IS NOT NULL
+                    GROUP BY {field}
+                """)
+                facet_params.extend(field_params)
+            cursor.execute(" UNION ALL ".join(facet_queries), facet_params)
+            facet_rows = cursor.fetchall()
             
-            if filters.get('vendor'):
-                query += " AND vendor LIKE %s"
-                params.append(f"%{filters['vendor']}%")
+            # Price histogram (ignores the price filters) plus the total match count
+            histogram_where, histogram_params = self._build_filter_clause(
+                user_id, filters, exclude='price')
+            price_filter_sql, price_params = self._build_price_clause(filters)
+            bucket_columns = []
+            bucket_params = []
+            for index, lower in enumerate(buckets):
+                if index + 1 < len(buckets):
+                    bucket_columns.append(
+                        f"SUM(CASE WHEN price >= %s AND price < %s THEN 1 ELSE 0 END) as bucket_{index}")
+                    bucket_params.extend([lower, buckets[index + 1]])
+                else:
+                    bucket_columns.append(
+                        f"SUM(CASE WHEN price >= %s THEN 1 ELSE 0 END) as bucket_{index}")
+                    bucket_params.append(lower)
+            cursor.execute(f"""
+                SELECT 
+                    SUM(CASE WHEN {price_filter_sql} THEN 1 ELSE 0 END) as total,
+                    {', '.join(bucket_columns)}
+                FROM products
+                WHERE {histogram_where}
+            """, price_params + bucket_params + histogram_params)
+            histogram_row = cursor.fetchone()
         
-        query += " ORDER BY created_at DESC"
+        facets = {field: [] for field in FACET_FIELDS}
+        for row in facet_rows:
+            facets[row['facet']].append({'value': row['value'], 'count': row['count']})
+        for field in FACET_FIELDS:
+            facets[field].sort(key=lambda item: (-item['count'], str(item['value'])))
+            facets[field] = facets[field][:facet_limit]
         
-        with self.connection.cursor() as cursor:
-            cursor.execute(query, params)
-            return cursor.fetchall()
+        price_histogram = []
+        for index, lower in enumerate(buckets):
+            price_histogram.append({
+                'min': lower,
+                'max': buckets[index + 1] if index + 1 < len(buckets) else None,
+                'count': int(histogram_row[f'bucket_{index}'] or 0)
+            })
+        
+        return {
+            'products': products,
+            'total': int(histogram_row['total'] or 0),
+            'facets': facets,
+            'price_histogram': price_histogram,
+            'limit': limit,
+            'offset': offset
+        }
+    
+    def _build_filter_clause(self, user_id, filters, exclude=None):
+        """
+        Build the WHERE clause shared by search and faceted_search
+        
+        Args:
+            user_id: The designer's ID
+            filters: Dictionary with search filters
+            exclude: Filter to leave out ('category', 'style', 'color', 
+                     'vendor' or 'price'), used for facet counts
+        
+        Returns:
+            Tuple of (where_sql, params)
+        """
+        clauses = ["user_id = %s"]
+        params = [user_id]
+        filters = filters or {}
+        
+        for field in ['category', 'style', 'color']:
+            if field != exclude and filters.get(field):
+                clauses.append(f"{field} = %s")
+                params.append(filters[field])
+        
+        if exclude != 'vendor' and filters.get('vendor'):
+            clauses.append("vendor LIKE %s")
+            params.append(f"%{filters['vendor']}%")
+        
+        if exclude != 'price':
+            price_sql, price_params = self._build_price_clause(filters)
+            if price_params:
+                clauses.append(price_sql)
+                params.extend(price_params)
+        
+        return " AND ".join(clauses), params
+    
+    def _build_price_clause(self, filters):
+        """
+        Build the price range condition for the given filters
+        
+        Args:
+            filters: Dictionary with optional min_price and max_price
+        
+        Returns:
+            Tuple of (condition_sql, params), condition is always true when no 
+            price filter is set
+        """
+        clauses = []
+        params = []
+        
+        if filters.get('min_price'):
+            clauses.append("price >= %s")
+            params.append(filters['min_price'])
+        
+        if filters.get('max_price'):
+            clauses.append("price <= %s")
+            params.append(filters['max_price'])
+        
+        if not clauses:
+            return "1 = 1", params
+        
+        return "(" + " AND ".join(clauses) + ")", params
     
     def mark_purchased(self, product_id):
         """
@@ -2,6 +2,7 @@
 # Manages project lifecycle, budget tracking, and AI insights
 
 import json
+from utils.loaders import attach_client_names
 from datetime import datetime
 
 class Project:
@@ -93,9 +94,7 @@ class Project:
         with self.connection.cursor() as cursor:
             if status:
                 sql = """
-                    SELECT p.*, c.name as client_name 
-                    FROM projects p
-                    LEFT JOIN clients c ON p.client_id = c.id
+                    SELECT p.* FROM projects p
                     WHERE p.user_id = %s AND p.status = %s
                     ORDER BY p.created_at DESC 
                     LIMIT %s OFFSET %s
@@ -103,9 +102,7 @@ class Project:
                 cursor.execute(sql, (user_id, status, limit, offset))
             else:
                 sql = """
-                    SELECT p.*, c.name as client_name 
-                    FROM projects p
-                    LEFT JOIN clients c ON p.client_id = c.id
+                    SELECT p.* FROM projects p
                     WHERE p.user_id = %s 
                     ORDER BY p.created_at DESC 
                     LIMIT %s OFFSET %s
@@ -121,8 +118,8 @@ class Project:
                         project['ai_insights'] = json.loads(project['ai_insights'])
                     except:
                         project['ai_insights'] = {}
-            
-            return projects
+        
+        return attach_client_names(self.connection, projects)
     
     def update(self, project_id, user_id, **kwargs):
         """
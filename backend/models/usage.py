@@ -0,0 +1,122 @@
+# Usage counter model - tracks AI feature usage per billing period
+# Counters are changed with single conditional UPDATEs so concurrent requests cannot overshoot a limit
+
+class UsageCounter:
+    """Usage counter model for AI generation quotas"""
+    
+    def __init__(self, connection):
+        """Initialize with database connection"""
+        self.connection = connection
+    
+    def try_increment(self, user_id, feature, period_start, limit=None):
+        """
+        Atomically add one use if the counter is still below its limit
+        
+        Args:
+            user_id: The designer's ID
+            feature: Feature being used (designs, marketing, insights)
+            period_start: First day of the usage period
+            limit: Maximum uses in the period (None for unlimited)
+        
+        Returns:
+            True if the use was counted, False if the limit is reached
+        """
+        if limit is not None and limit <= 0:
+            return False
+        
+        for _ in range(2):
+            with self.connection.cursor() as cursor:
+                sql = """
+                    UPDATE usage_counters
+                    SET used = used + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE user_id = %s AND feature = %s AND period_start = %s
+                """
+                params = [user_id, feature, period_start]
+                if limit is not None:
+                    sql += " AND used < %s"
+                    params.append(limit)
+                cursor.execute(sql, params)
+                
+                if cursor.rowcount > 0:
+                    self.connection.commit()
+                    return True
+                
+                # No row updated: either the limit is reached or the period has no row yet
+                cursor.execute("""
+                    SELECT id FROM usage_counters
+                    WHERE user_id = %s AND feature = %s AND period_start = %s
+                """, (user_id, feature, period_start))
+                if cursor.fetchone():
+                    self.connection.rollback()
+                    return False
+                
+                try:
+                    cursor.execute("""
+                        INSERT INTO usage_counters (user_id, feature, period_start, used)
+                        VALUES (%s, %s, %s, 1)
+                    """, (user_id, feature, period_start))
+                    self.connection.commit()
+                    return True
+                except Exception:
+                    # Another request created the row first; retry the UPDATE
+                    self.connection.rollback()
+        
+        return False
+    
+    def decrement(self, user_id, feature, period_start):
+        """
+        Give back one use (e.g. when the AI call failed)
+        
+        Args:
+            user_id: The designer's ID
+            feature: Feature that was reserved
+            period_start: First day of the usage period the use was counted in
+        
+        Returns:
+            True if a use was refunded, False otherwise
+        """
+        with self.connection.cursor() as cursor:
+            sql = """
+                UPDATE usage_counters
+                SET used = used - 1, updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = %s AND feature = %s AND period_start = %s AND used > 0
+            """
+            cursor.execute(sql, (user_id, feature, period_start))
+            self.connection.commit()
+            return cursor.rowcount > 0
+    
+    def reset_period(self, user_id, period_start):
+        """
+        Clear every feature counter of a user for one period
+        
+        Args:
+            user_id: The designer's ID
+            period_start: First day of the usage period
+        
+        Returns:
+            Number of counters cleared
+        """
+        with self.connection.cursor() as cursor:
+            sql = "DELETE FROM usage_counters WHERE user_id = %s AND period_start = %s"
+            cursor.execute(sql, (user_id, period_start))
+            self.connection.commit()
+            return cursor.rowcount
+    
+    def get_by_period(self, user_id, period_start):
+        """
+        Get every feature counter of a user for one period
+        
+        Args:
+            user_id: The designer's ID
+            period_start: First day of the usage period
+        
+        Returns:
+            Dictionary mapping feature -> uses
+        """
+        with self.connection.cursor() as cursor:
+            sql = """
+                SELECT feature, used FROM usage_counters
+                WHERE user_id = %s AND period_start = %s
+            """
+            cursor.execute(sql, (user_id, period_start))
+            return {row['feature']: row['used'] for row in cursor.fetchall()}
@@ -2,8 +2,27 @@
 # Handles user authentication and subscription management
 
 from datetime import datetime
-from flask_bcrypt import generate_password_hash, check_password_hash
 import sqlite3
+from utils.cache import user_claims_cache
+from services.password_hasher import password_hasher
+
+
+def build_user_claims(user):
+    """
+    Build the authorization snapshot embedded in access tokens
+    
+    Args:
+        user: User dictionary
+    
+    Returns:
+        Dictionary with tier, role and claims version
+    """
+    return {
+        'tier': user['subscription_tier'],
+        'role': user['role'],
+        'ver': user.get('claims_version') or 0
+    }
+
 
 class User:
     """User model for interior designers using the platform"""
@@ -27,8 +46,8 @@ class User:
             user_id if successful, None if email already exists
         """
         try:
-            # Hash the password for security
-            password_hash = generate_password_hash(password).decode('utf-8')
+            # Hash the password for security (off the request thread)
+            password_hash = password_hasher.hash(password)
             
             # Set AI generation limits based on tier
             limits = {
@@ -95,13 +114,35 @@ class User:
             User data if password is correct, None otherwise
         """
         user = self.get_by_email(email)
-        if user and check_password_hash(user['password_hash'], password):
+        if user and password_hasher.verify(password, user['password_hash']):
+            # Upgrade hashes made with an old cost factor while we have the password
+            if password_hasher.needs_rehash(user['password_hash']):
+                self.update_password_hash(user['id'], password_hasher.hash(password))
+                password_hasher.record_rehash()
+            
             # Remove password hash from returned data for security
             user_data = dict(user)
             del user_data['password_hash']
             return user_data
         return None
     
+    def update_password_hash(self, user_id, password_hash):
+        """
+        Replace a user's stored password hash
+        
+        Args:
+            user_id: The user's ID
+            password_hash: New bcrypt hash
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        with self.connection.cursor() as cursor:
+            sql = "UPDATE users SET password_hash = %s WHERE id = %s"
+            cursor.execute(sql, (password_hash, user_id))
+            self.connection.commit()
+            return cursor.rowcount > 0
+    
     def update_subscription(self, user_id, new_tier):
         """
         Update user's subscription tier
@@ -125,38 +166,40 @@ class User:
             with self.connection.cursor() as cursor:
                 sql = """
                     UPDATE users 
-                    SET subscription_tier = %s, ai_generations_limit = %s, ai_generations_used = 0
+                    SET subscription_tier = %s, ai_generations_limit = %s, ai_generations_used = 0,
+                        claims_version = claims_version + 1
                     WHERE id = %s
                 """
                 cursor.execute(sql, (new_tier, ai_limit, user_id))
                 self.connection.commit()
-                return cursor.rowcount > 0
+                updated = cursor.rowcount > 0
         except:
             return False
+        
+        # Replace the cached claims so old tokens stop granting the previous tier
+        user_claims_cache.delete(user_id)
+        if updated:
+            self.get_claims(user_id)
+        return updated
     
-    def increment_ai_usage(self, user_id):
+    def get_claims(self, user_id):
         """
-        Increment the AI generations counter for usage tracking
+        Get the user's current authorization claims, caching them briefly
         
         Args:
             user_id: The user's ID
         
         Returns:
-            True if successful and under limit, False if limit reached
+            Claims dictionary (see build_user_claims) or None if not found
         """
-        user = self.get_by_id(user_id)
-        if not user:
-            return False
-        
-        # Check if user has reached their limit
-        if user['ai_generations_used'] >= user['ai_generations_limit']:
-            return False
-        
-        with self.connection.cursor() as cursor:
-            sql = "UPDATE users SET ai_generations_used = ai_generations_used + 1 WHERE id = %s"
-            cursor.execute(sql, (user_id,))
-            self.connection.commit()
-            return True
+        claims = user_claims_cache.get(user_id)
+        if claims is None:
+            user = self.get_by_id(user_id)
+            if not user:
+                return None
+            claims = build_user_claims(user)
+            user_claims_cache.set(user_id, claims)
+        return claims
     
     def get_stats(self, user_id):
         """
@@ -10,6 +10,7 @@ from . import invoice_routes
 from . import marketing_routes
 from . import calendar_routes
 from . import dashboard_routes
+from . import admin_routes
 
 __all__ = [
     'auth_routes',
@@ -20,6 +21,7 @@ __all__ = [
     'invoice_routes',
     'marketing_routes',
     'calendar_routes',
-    'dashboard_routes'
+    'dashboard_routes',
+    'admin_routes'
 ]
 
@@ -0,0 +1,132 @@
+# Admin Routes
+# API endpoints for production diagnostics (admin role only)
+
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required
+from config import get_config
+from services.finance_analytics import rebuild_totals
+from services.profiler import sampling_profiler, request_profiler, ProfilerBusy
+from utils.auth import require_role
+from utils.instrumentation import get_slow_queries
+
+# Create blueprint for admin routes
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/profile/sample', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def sample_profile():
+    """
+    Sample the stacks of every thread on this worker for a while
+    
+    The request blocks for the sampling period. Only the worker process that
+    receives the request is profiled (the response includes its pid).
+    
+    Query Parameters:
+        seconds: Sampling duration (default: 10, max: PROFILER_MAX_SECONDS)
+        interval_ms: Milliseconds between samples (default: 5, min: 1)
+        format: 'collapsed' (default) for flamegraph.pl/speedscope input, or 'json'
+        include_idle: Keep threads blocked in sleep/wait/select (default: false)
+    
+    Returns:
+        Collapsed stacks as text/plain, or JSON with stacks and statistics
+    """
+    try:
+        config = get_config()
+        seconds = request.args.get('seconds', 10, type=float)
+        interval_ms = request.args.get('interval_ms', 5, type=float)
+        output_format = request.args.get('format', 'collapsed')
+        include_idle = request.args.get('include_idle', 'false').lower() == 'true'
+        
+        if not 0 < seconds <= config.PROFILER_MAX_SECONDS:
+            return jsonify({'error': f'seconds must be between 0 and {config.PROFILER_MAX_SECONDS}'}), 400
+        if output_format not in ('collapsed', 'json'):
+            return jsonify({'error': "format must be 'collapsed' or 'json'"}), 400
+        
+        result = sampling_profiler.sample(seconds, max(interval_ms, 1) / 1000, include_idle)
+        
+        if output_format == 'json':
+            result['stacks'] = dict(result['stacks'].most_common())
+            return jsonify(result), 200
+        
+        response = Response(sampling_profiler.collapse(result['stacks']), mimetype='text/plain')
+        response.headers['X-Profile-Pid'] = str(result['pid'])
+        response.headers['X-Profile-Samples'] = str(result['samples'])
+        return response
+        
+    except ProfilerBusy as e:
+        return jsonify({'error': 'Profiler busy', 'message': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': 'Failed to profile', 'message': str(e)}), 500
+
+
+@bp.route('/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def get_request_profile(profile_id):
+    """
+    Get the cProfile report of a request sent with the X-Profile header
+    
+    Args:
+        profile_id: Value of the X-Profile-Id response header
+    
+    Query Parameters:
+        format: 'text' (default) for the pstats listing, or 'json'
+    
+    Returns:
+        Profile report
+    """
+    try:
+        report = request_profiler.get_report(profile_id)
+        
+        if not report:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        if request.args.get('format', 'text') == 'json':
+            return jsonify(report), 200
+        return Response(report['stats'], mimetype='text/plain')
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to get profile', 'message': str(e)}), 500
+
+
+@bp.route('/slow-queries', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def get_slow_query_stats():
+    """
+    Get the slowest query fingerprints seen by this worker
+    
+    Query Parameters:
+        limit: Maximum number of fingerprints (default: 20)
+    
+    Returns:
+        Slow query statistics, slowest total time first
+    """
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify({'slow_queries': get_slow_queries(limit)}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get slow queries', 'message': str(e)}), 500
+
+
+@bp.route('/finance/rebuild', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def rebuild_finance_totals():
+    """
+    Recompute the invoice aggregates behind finance analytics
+    
+    Request Body (optional):
+        user_id: Only rebuild this designer's totals
+    
+    Returns:
+        Number of aggregate rows written
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        rows = rebuild_totals(data.get('user_id'))
+        return jsonify({'message': 'Finance totals rebuilt', 'rows': rows}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to rebuild finance totals', 'message': str(e)}), 500
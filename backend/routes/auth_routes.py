@@ -3,10 +3,13 @@
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
-from models.user import User
+from models.user import User, build_user_claims
 from models.activity import ActivityLog
 from utils.db import get_db_connection, close_db_connection
-from utils.auth import get_current_user
+from utils.responses import busy_response
+from utils.auth import get_current_user, get_user_claims
+from services.quota import QuotaService
+from services.password_hasher import BUSY_MESSAGE, PasswordHasherBusy
 
 # Create blueprint for auth routes
 bp = Blueprint('auth', __name__)
@@ -63,6 +66,8 @@ def register():
             'user_id': user_id
         }), 201
         
+    except PasswordHasherBusy:
+        return busy_response(BUSY_MESSAGE, 1)
     except Exception as e:
         return jsonify({'error': 'Registration failed', 'message': str(e)}), 500
 
@@ -106,8 +111,9 @@ def login():
         
         close_db_connection(connection)
         
-        # Create JWT tokens
-        access_token = create_access_token(identity=user['id'])
+        # Create JWT tokens (tier and role ride along as signed claims)
+        access_token = create_access_token(identity=user['id'], 
+                                           additional_claims=build_user_claims(user))
         refresh_token = create_refresh_token(identity=user['id'])
         
         return jsonify({
@@ -123,6 +129,8 @@ def login():
             }
         }), 200
         
+    except PasswordHasherBusy:
+        return busy_response(BUSY_MESSAGE, 1)
     except Exception as e:
         return jsonify({'error': 'Login failed', 'message': str(e)}), 500
 
@@ -140,8 +148,18 @@ def refresh():
         # Get user ID from refresh token
         user_id = get_jwt_identity()
         
+        # Re-read the user so the new token carries current claims
+        connection = get_db_connection()
+        user_model = User(connection)
+        user = user_model.get_by_id(user_id)
+        close_db_connection(connection)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
         # Create new access token
-        access_token = create_access_token(identity=user_id)
+        access_token = create_access_token(identity=user_id, 
+                                           additional_claims=build_user_claims(user))
         
         return jsonify({
             'access_token': access_token
@@ -187,6 +205,35 @@ def get_profile():
         return jsonify({'error': 'Failed to fetch profile', 'message': str(e)}), 500
 
 
+@bp.route('/usage', methods=['GET'])
+@jwt_required()
+def get_usage():
+    """
+    Get AI generation usage for the current month
+    
+    Returns:
+        Per-feature usage, limits and remaining generations
+    """
+    try:
+        user_id = get_jwt_identity()
+        claims = get_user_claims(user_id)
+        
+        if not claims:
+            return jsonify({'error': 'User not found'}), 404
+        
+        connection = get_db_connection()
+        usage = QuotaService(connection).get_usage(user_id, claims['tier'])
+        close_db_connection(connection)
+        
+        return jsonify({
+            'tier': claims['tier'],
+            'usage': usage
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch usage', 'message': str(e)}), 500
+
+
 @bp.route('/update-subscription', methods=['PUT'])
 @jwt_required()
 def update_subscription():
@@ -215,6 +262,8 @@ def update_subscription():
         # Update subscription
         connection = get_db_connection()
         user_model = User(connection)
+        user = user_model.get_by_id(user_id)
+        tier_changed = bool(user) and user.get('subscription_tier') != new_tier
         success = user_model.update_subscription(user_id, new_tier)
         
         if success:
@@ -222,6 +271,14 @@ def update_subscription():
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'subscription_updated', 'user', user_id, 
                              {'new_tier': new_tier})
+            
+            # A new tier's quota starts from zero; re-selecting the same tier keeps it
+            if tier_changed:
+                QuotaService(connection).reset(user_id)
+            
+            # Issue a token carrying the new tier
+            access_token = create_access_token(identity=user_id, 
+                                               additional_claims=user_model.get_claims(user_id))
         
         close_db_connection(connection)
         
@@ -230,7 +287,8 @@ def update_subscription():
         
         return jsonify({
             'message': 'Subscription updated successfully',
-            'new_tier': new_tier
+            'new_tier': new_tier,
+            'access_token': access_token
         }), 200
         
     except Exception as e:
@@ -1,11 +1,16 @@
 # Calendar Routes
 # API endpoints for calendar events and scheduling
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.http import is_resource_modified
 from backend.models.calendar import CalendarEvent
+from backend.models.calendar_feed import CalendarFeed
 from backend.models.activity import ActivityLog
 from backend.utils.db import get_db_connection, close_db_connection
+from backend.utils.recurrence import normalize_rule
+from services.reminder_dispatcher import reminder_dispatcher
+from services.calendar_feed import feed_etag, feed_last_modified, stream_feed
 from datetime import datetime, timedelta
 
 # Create blueprint for calendar routes
@@ -36,8 +41,12 @@ def get_events():
         calendar_model = CalendarEvent(connection)
         
         if start_date and end_date:
-            # Get events within date range
-            events = calendar_model.get_by_date_range(user_id, start_date, end_date)
+            # Get events overlapping the date range
+            try:
+                events = calendar_model.get_by_date_range(user_id, start_date, end_date)
+            except ValueError:
+                close_db_connection(connection)
+                return jsonify({'error': 'start_date and end_date must be ISO 8601 dates'}), 400
         else:
             # Get upcoming events
             events = calendar_model.get_upcoming(user_id, limit=limit)
@@ -99,7 +108,9 @@ def create_event():
             "description": "Discuss design concepts",
             "project_id": 1,
             "client_id": 1,
-            "location": "Office"
+            "location": "Office",
+            "recurrence_rule": "FREQ=WEEKLY;BYDAY=MO",  // optional, makes a recurring series
+            "recurrence_exceptions": ["2024-02-26T10:00:00"]  // optional, cancelled occurrences
         }
     
     Returns:
@@ -113,6 +124,12 @@ def create_event():
         if not data.get('title') or not data.get('start_time'):
             return jsonify({'error': 'Title and start_time are required'}), 400
         
+        try:
+            recurrence_rule = normalize_rule(data.get('recurrence_rule'))
+            datetime.fromisoformat(str(data['start_time']))
+        except ValueError as e:
+            return jsonify({'error': 'Invalid recurrence', 'message': str(e)}), 400
+        
         connection = get_db_connection()
         calendar_model = CalendarEvent(connection)
         
@@ -127,7 +144,9 @@ def create_event():
             project_id=data.get('project_id'),
             client_id=data.get('client_id'),
             location=data.get('location'),
-            is_automated=data.get('is_automated', False)
+            is_automated=data.get('is_automated', False),
+            recurrence_rule=recurrence_rule,
+            recurrence_exceptions=data.get('recurrence_exceptions')
         )
         
         if not event_id:
@@ -141,17 +160,32 @@ def create_event():
         
         # Get the created event
         event = calendar_model.get_by_id(event_id, user_id)
+        if not recurrence_rule:
+            reminder_dispatcher.schedule(event_id, data['start_time'])
+        
+        # Overlapping events are reported, not rejected
+        try:
+            conflicts = calendar_model.find_conflicts(user_id, data['start_time'], data.get('end_time'),
+                                                      exclude_id=event_id)
+        except ValueError:
+            conflicts = []
         close_db_connection(connection)
         
         return jsonify({
             'message': 'Event created successfully',
-            'event': event
+            'event': event,
+            'conflicts': [_conflict_summary(conflict) for conflict in conflicts]
         }), 201
         
     except Exception as e:
         return jsonify({'error': 'Failed to create event', 'message': str(e)}), 500
 
 
+def _conflict_summary(event):
+    """Fields of a conflicting event shown to the designer"""
+    return {key: event[key] for key in ('id', 'title', 'event_type', 'start_time', 'end_time')}
+
+
 @bp.route('/events/<int:event_id>', methods=['PUT'])
 @jwt_required()
 def update_event(event_id):
@@ -162,7 +196,7 @@ def update_event(event_id):
         event_id: The event's ID
     
     Expected JSON:
-        Any event fields to update
+        Any event fields to update ("recurrence_rule": "" ends recurrence)
     
     Returns:
         Success message
@@ -171,6 +205,11 @@ def update_event(event_id):
         user_id = get_jwt_identity()
         data = request.get_json()
         
+        try:
+            normalize_rule(data.get('recurrence_rule'))
+        except ValueError as e:
+            return jsonify({'error': 'Invalid recurrence', 'message': str(e)}), 400
+        
         connection = get_db_connection()
         calendar_model = CalendarEvent(connection)
         
@@ -181,6 +220,8 @@ def update_event(event_id):
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'calendar_event_updated', 'calendar_event', event_id)
+            if data.get('start_time'):
+                reminder_dispatcher.schedule(event_id, data['start_time'])
         
         close_db_connection(connection)
         
@@ -197,20 +238,40 @@ def update_event(event_id):
 @jwt_required()
 def delete_event(event_id):
     """
-    Delete an event
+    Delete an event, or a single occurrence of a recurring series
     
     Args:
         event_id: The event's ID
     
+    Query Parameters:
+        occurrence: recurrence_id of the occurrence to cancel (optional)
+    
     Returns:
         Success message
     """
     try:
         user_id = get_jwt_identity()
+        occurrence = request.args.get('occurrence')
         
         connection = get_db_connection()
         calendar_model = CalendarEvent(connection)
         
+        if occurrence:
+            try:
+                cancelled = calendar_model.add_exception(event_id, user_id, occurrence)
+            except ValueError:
+                close_db_connection(connection)
+                return jsonify({'error': 'occurrence must be an ISO 8601 datetime'}), 400
+            
+            if cancelled:
+                ActivityLog(connection).log(user_id, 'calendar_occurrence_cancelled', 'calendar_event', event_id,
+                                            {'occurrence': occurrence})
+            close_db_connection(connection)
+            
+            if not cancelled:
+                return jsonify({'error': 'Occurrence not found'}), 404
+            return jsonify({'message': 'Occurrence cancelled successfully'}), 200
+        
         # Delete event
         success = calendar_model.delete(event_id, user_id)
         
@@ -252,7 +313,8 @@ def get_upcoming_events():
         # Group events by date
         events_by_date = {}
         for event in events:
-            event_date = event['start_time'].strftime('%Y-%m-%d')
+            # datetime from MySQL, ISO string from SQLite
+            event_date = str(event['start_time'])[:10]
             if event_date not in events_by_date:
                 events_by_date[event_date] = []
             events_by_date[event_date].append(event)
@@ -266,3 +328,202 @@ def get_upcoming_events():
     except Exception as e:
         return jsonify({'error': 'Failed to fetch upcoming events', 'message': str(e)}), 500
 
+
+
+@bp.route('/conflicts', methods=['GET'])
+@jwt_required()
+def get_conflicts():
+    """
+    Check a proposed time slot against existing events
+    
+    Query Parameters:
+        start_time: Proposed start (ISO 8601)
+        end_time: Proposed end (ISO 8601)
+        exclude_id: Event being rescheduled (optional)
+    
+    Returns:
+        Events overlapping the slot
+    """
+    try:
+        user_id = get_jwt_identity()
+        start_time = request.args.get('start_time')
+        end_time = request.args.get('end_time')
+        exclude_id = request.args.get('exclude_id', None, type=int)
+        
+        if not start_time or not end_time:
+            return jsonify({'error': 'start_time and end_time are required'}), 400
+        
+        connection = get_db_connection()
+        calendar_model = CalendarEvent(connection)
+        
+        try:
+            conflicts = calendar_model.find_conflicts(user_id, start_time, end_time, exclude_id=exclude_id)
+        except ValueError:
+            close_db_connection(connection)
+            return jsonify({'error': 'start_time and end_time must be ISO 8601 datetimes'}), 400
+        close_db_connection(connection)
+        
+        return jsonify({
+            'conflicts': [_conflict_summary(conflict) for conflict in conflicts],
+            'has_conflicts': bool(conflicts)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to check conflicts', 'message': str(e)}), 500
+
+
+@bp.route('/free-busy', methods=['GET'])
+@jwt_required()
+def get_free_busy():
+    """
+    Get busy periods and free slots within a window
+    
+    Query Parameters:
+        start: Window start (ISO 8601, default: now)
+        end: Window end (ISO 8601, default: 7 days after start)
+        min_minutes: Shortest free slot to return (default: 30)
+    
+    Returns:
+        Merged busy periods and free slots (UTC)
+    """
+    try:
+        user_id = get_jwt_identity()
+        min_minutes = request.args.get('min_minutes', 30, type=int)
+        
+        try:
+            start = datetime.fromisoformat(request.args['start']) if request.args.get('start') \
+                else datetime.utcnow().replace(microsecond=0)
+            end = datetime.fromisoformat(request.args['end']) if request.args.get('end') \
+                else start + timedelta(days=7)
+        except ValueError:
+            return jsonify({'error': 'start and end must be ISO 8601 datetimes'}), 400
+        
+        if (end.tzinfo is None) != (start.tzinfo is None) or end <= start:
+            return jsonify({'error': 'end must be after start'}), 400
+        if end - start > timedelta(days=92):
+            return jsonify({'error': 'Window cannot exceed 92 days'}), 400
+        
+        connection = get_db_connection()
+        calendar_model = CalendarEvent(connection)
+        free_busy = calendar_model.get_free_busy(user_id, start, end, min_minutes=max(min_minutes, 1))
+        close_db_connection(connection)
+        
+        return jsonify(free_busy), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to compute free/busy', 'message': str(e)}), 500
+
+
+@bp.route('/feed', methods=['GET'])
+@jwt_required()
+def get_feed_status():
+    """
+    Get the current user's ICS feed subscription
+    
+    Returns:
+        Whether a feed exists and when it last changed (the URL is only
+        shown when the feed is created or rotated)
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        connection = get_db_connection()
+        feed = CalendarFeed(connection).get_by_user(user_id)
+        close_db_connection(connection)
+        
+        return jsonify({'active': feed is not None, 'feed': feed}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch calendar feed', 'message': str(e)}), 500
+
+
+@bp.route('/feed', methods=['POST'])
+@jwt_required()
+def rotate_feed():
+    """
+    Create the current user's ICS feed, or replace its URL
+    
+    Returns:
+        Subscription URL for calendar apps (previous URLs stop working)
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        connection = get_db_connection()
+        token = CalendarFeed(connection).rotate(user_id)
+        ActivityLog(connection).log(user_id, 'calendar_feed_rotated', 'calendar_feed', None)
+        close_db_connection(connection)
+        
+        url = url_for('calendar.get_feed', token=token, _external=True)
+        return jsonify({
+            'message': 'Calendar feed created successfully',
+            'url': url,
+            'webcal_url': url.replace('https://', 'webcal://', 1).replace('http://', 'webcal://', 1)
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to create calendar feed', 'message': str(e)}), 500
+
+
+@bp.route('/feed', methods=['DELETE'])
+@jwt_required()
+def revoke_feed():
+    """
+    Delete the current user's ICS feed
+    
+    Returns:
+        Success message
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        connection = get_db_connection()
+        revoked = CalendarFeed(connection).revoke(user_id)
+        close_db_connection(connection)
+        
+        if not revoked:
+            return jsonify({'error': 'Calendar feed not found'}), 404
+        return jsonify({'message': 'Calendar feed deleted successfully'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to delete calendar feed', 'message': str(e)}), 500
+
+
+@bp.route('/feed/<token>.ics', methods=['GET'])
+def get_feed(token):
+    """
+    ICS feed for calendar apps (authorized by the token in the URL)
+    
+    Subscribed apps poll this URL; while no event changed, conditional
+    requests (If-None-Match / If-Modified-Since) get 304 without reading
+    any events. Otherwise the body is streamed from the feed cache, or
+    built while streaming.
+    
+    Args:
+        token: Feed token
+    
+    Returns:
+        text/calendar body, or 304
+    """
+    try:
+        connection = get_db_connection()
+        feed = CalendarFeed(connection).get_by_token(token)
+        close_db_connection(connection)
+        
+        if not feed:
+            return jsonify({'error': 'Calendar feed not found'}), 404
+        
+        etag, last_modified = feed_etag(feed), feed_last_modified(feed)
+        if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response = Response(stream_feed(feed), mimetype='text/calendar')
+            response.headers['Content-Disposition'] = 'inline; filename="ai-studio.ics"'
+        else:
+            response = Response(status=304)
+        
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to build calendar feed', 'message': str(e)}), 500
@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.client import Client
 from backend.models.activity import ActivityLog
+from backend.services.style_similarity import style_similarity_service
 from backend.utils.db import get_db_connection, close_db_connection
 
 # Create blueprint for client routes
@@ -137,6 +138,7 @@ def create_client():
         
         # Get the created client
         client = client_model.get_by_id(client_id, user_id)
+        style_similarity_service.refresh(connection, user_id, 'client', client)
         close_db_connection(connection)
         
         return jsonify({
@@ -174,6 +176,9 @@ def update_client(client_id):
         success = client_model.update(client_id, user_id, **data)
         
         if success:
+            style_similarity_service.refresh(connection, user_id, 'client', 
+                                             client_model.get_by_id(client_id, user_id))
+            
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'client_updated', 'client', client_id)
@@ -211,6 +216,8 @@ def delete_client(client_id):
         success = client_model.delete(client_id, user_id)
         
         if success:
+            style_similarity_service.remove(connection, user_id, 'client', client_id)
+            
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'client_deleted', 'client', client_id)
@@ -9,6 +9,7 @@ from backend.models.invoice import Invoice
 from backend.models.message import Message
 from backend.models.activity import ActivityLog
 from backend.models.user import User
+from backend.services.finance_analytics import get_revenue_trend
 from backend.utils.db import get_db_connection, close_db_connection
 
 # Create blueprint for dashboard routes
@@ -117,18 +118,7 @@ def get_stats():
             project_breakdown = cursor.fetchall()
         
         # Monthly revenue trend (last 6 months)
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    DATE_FORMAT(paid_date, '%Y-%m') as month,
-                    SUM(amount) as revenue
-                FROM invoices 
-                WHERE user_id = %s AND status = 'paid' AND type = 'invoice'
-                AND paid_date >= DATE_SUB(NOW(), INTERVAL 6 MONTH)
-                GROUP BY month
-                ORDER BY month DESC
-            """, (user_id,))
-            revenue_trend = cursor.fetchall()
+        revenue_trend = get_revenue_trend(connection, user_id, months=6)
         
         close_db_connection(connection)
         
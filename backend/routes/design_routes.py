@@ -1,14 +1,19 @@
 # Design Routes
 # API endpoints for AI design generation and moodboards
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.design import Design
-from backend.models.user import User
 from backend.models.activity import ActivityLog
 from backend.services.ai_service import AIService
+from backend.services.style_similarity import style_similarity_service
+# Unprefixed on purpose: app.py imports services.pdf_renderer, and importing it as
+# backend.services.pdf_renderer would create a second renderer (pool, cache counters)
+from services.pdf_renderer import BUSY_MESSAGE, PdfRendererBusy, pdf_renderer
 from backend.utils.db import get_db_connection, close_db_connection
-from backend.utils.auth import check_subscription_limit
+from backend.utils.responses import busy_response
+from backend.utils.loaders import attach_project_titles
+from backend.services.quota import QuotaService
 from backend.config import get_config
 
 # Create blueprint for design routes
@@ -101,6 +106,7 @@ def generate_design():
     Returns:
         Generated design with images, colors, and recommendations
     """
+    quota = reservation = None
     try:
         user_id = get_jwt_identity()
         data = request.get_json()
@@ -109,14 +115,18 @@ def generate_design():
         if not data.get('project_id') or not data.get('room_type') or not data.get('style'):
             return jsonify({'error': 'project_id, room_type, and style are required'}), 400
         
-        # Check AI generation limit
-        if not check_subscription_limit(user_id, 'ai_generations'):
+        connection = get_db_connection()
+        
+        # Reserve one AI generation up front (refunded if generation fails)
+        quota = QuotaService(connection)
+        reservation = quota.reserve(user_id, 'designs')
+        if not reservation:
+            close_db_connection(connection)
             return jsonify({
                 'error': 'AI generation limit reached',
                 'message': 'Please upgrade your subscription to generate more designs'
             }), 403
         
-        connection = get_db_connection()
         design_model = Design(connection)
         
         # Create design entry
@@ -130,6 +140,7 @@ def generate_design():
         )
         
         if not design_id:
+            quota.release(reservation)
             close_db_connection(connection)
             return jsonify({'error': 'Failed to create design entry'}), 500
         
@@ -146,6 +157,7 @@ def generate_design():
         )
         
         if not moodboard:
+            quota.release(reservation)
             close_db_connection(connection)
             return jsonify({'error': 'Failed to generate AI design'}), 500
         
@@ -158,9 +170,8 @@ def generate_design():
             product_list=moodboard.get('furniture_list', [])
         )
         
-        # Increment AI usage counter
-        user_model = User(connection)
-        user_model.increment_ai_usage(user_id)
+        # Keep the reserved AI generation
+        quota.commit(reservation)
         
         # Log activity
         activity_model = ActivityLog(connection)
@@ -169,6 +180,7 @@ def generate_design():
         
         # Get the complete design
         design = design_model.get_by_id(design_id)
+        style_similarity_service.refresh(connection, user_id, 'design', design)
         close_db_connection(connection)
         
         return jsonify({
@@ -177,6 +189,8 @@ def generate_design():
         }), 201
         
     except Exception as e:
+        if reservation:
+            quota.release(reservation)
         return jsonify({'error': 'Failed to generate design', 'message': str(e)}), 500
 
 
@@ -202,6 +216,8 @@ def delete_design(design_id):
         success = design_model.delete(design_id)
         
         if success:
+            style_similarity_service.remove(connection, user_id, 'design', design_id)
+            
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'design_deleted', 'design', design_id)
@@ -216,3 +232,42 @@ def delete_design(design_id):
     except Exception as e:
         return jsonify({'error': 'Failed to delete design', 'message': str(e)}), 500
 
+
+
+@bp.route('/<int:design_id>/pdf', methods=['GET'])
+@jwt_required()
+def download_moodboard_pdf(design_id):
+    """
+    Download a design moodboard (concept, palette, products, images) as PDF
+    
+    The PDF is rendered once per design version and then served from the
+    render cache, with ETag (If-None-Match) and Range support.
+    
+    Args:
+        design_id: The design's ID
+    
+    Returns:
+        PDF file
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        connection = get_db_connection()
+        design = Design(connection).get_by_id(design_id)
+        if design:
+            attach_project_titles(connection, [design])
+        close_db_connection(connection)
+        
+        if not design or str(design['user_id']) != str(user_id):
+            return jsonify({'error': 'Design not found'}), 404
+        
+        path, etag = pdf_renderer.moodboard_pdf(design)
+        response = send_file(path, mimetype='application/pdf', conditional=True, etag=etag,
+                             download_name=f"moodboard-{design_id}.pdf", max_age=0)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+        
+    except PdfRendererBusy:
+        return busy_response(BUSY_MESSAGE, 2)
+    except Exception as e:
+        return jsonify({'error': 'Failed to generate moodboard PDF', 'message': str(e)}), 500
@@ -1,11 +1,18 @@
 # Invoice Routes
 # API endpoints for financial management (invoices and quotes)
 
-from flask import Blueprint, request, jsonify
+from datetime import date
+from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.invoice import Invoice
 from backend.models.activity import ActivityLog
+from backend.models.user import User
+from backend.services.finance_analytics import add_months, get_aging, get_trend, parse_month
+# Unprefixed on purpose: app.py imports services.pdf_renderer, and importing it as
+# backend.services.pdf_renderer would create a second renderer (pool, cache counters)
+from services.pdf_renderer import BUSY_MESSAGE, PdfRendererBusy, pdf_renderer
 from backend.utils.db import get_db_connection, close_db_connection
+from backend.utils.responses import busy_response
 
 # Create blueprint for invoice routes
 bp = Blueprint('invoices', __name__)
@@ -34,13 +41,11 @@ def get_invoices():
         connection = get_db_connection()
         invoice_model = Invoice(connection)
         
-        # Get invoices with optional filters
+        # Get invoices with optional filters (overdue status is kept up to
+        # date by the background sweeper, see services.overdue_sweeper)
         invoices = invoice_model.get_all(user_id, status=status, 
                                         invoice_type=invoice_type, limit=limit)
         
-        # Check for overdue invoices
-        invoice_model.check_overdue(user_id)
-        
         close_db_connection(connection)
         
         return jsonify({
@@ -298,3 +303,108 @@ def get_financial_summary():
     except Exception as e:
         return jsonify({'error': 'Failed to fetch financial summary', 'message': str(e)}), 500
 
+
+
+@bp.route('/analytics/trend', methods=['GET'])
+@jwt_required()
+def get_finance_trend():
+    """
+    Get monthly invoiced, paid, quoted, overdue and expected amounts
+    
+    Query Parameters:
+        start: First month as YYYY-MM (default: 11 months before end)
+        end: Last month as YYYY-MM (default: current month)
+    
+    Returns:
+        Zero-filled monthly series
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        today = date.today()
+        end = request.args.get('end', f"{today.year:04d}-{today.month:02d}")
+        try:
+            end_year, end_month = parse_month(end)
+            start = request.args.get('start')
+            if start is None:
+                start = '%04d-%02d' % add_months(end_year, end_month, -11)
+            start_year, start_month = parse_month(start)
+        except ValueError:
+            return jsonify({'error': 'start and end must be months formatted as YYYY-MM'}), 400
+        
+        if (start_year, start_month) > (end_year, end_month):
+            return jsonify({'error': 'start must not be after end'}), 400
+        if (end_year * 12 + end_month) - (start_year * 12 + start_month) >= 120:
+            return jsonify({'error': 'Date range cannot exceed 120 months'}), 400
+        
+        connection = get_db_connection()
+        trend = get_trend(connection, user_id, start, end)
+        close_db_connection(connection)
+        
+        return jsonify({'trend': trend, 'start': start, 'end': end}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch finance trend', 'message': str(e)}), 500
+
+
+@bp.route('/analytics/aging', methods=['GET'])
+@jwt_required()
+def get_finance_aging():
+    """
+    Get unpaid invoices grouped by days past due (0-30, 31-60, 61-90, 90+)
+    
+    Returns:
+        Amount and count per aging bucket
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        connection = get_db_connection()
+        aging = get_aging(connection, user_id)
+        close_db_connection(connection)
+        
+        return jsonify({'aging': aging}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch invoice aging', 'message': str(e)}), 500
+
+
+@bp.route('/<int:invoice_id>/pdf', methods=['GET'])
+@jwt_required()
+def download_invoice_pdf(invoice_id):
+    """
+    Download an invoice or quote as PDF
+    
+    The PDF is rendered once per invoice version and then served from the
+    render cache, with ETag (If-None-Match) and Range support.
+    
+    Args:
+        invoice_id: The invoice's ID
+    
+    Returns:
+        PDF file
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        connection = get_db_connection()
+        invoice = Invoice(connection).get_by_id(invoice_id, user_id)
+        designer = User(connection).get_by_id(user_id) if invoice else None
+        close_db_connection(connection)
+        
+        if not invoice:
+            return jsonify({'error': 'Invoice not found'}), 404
+        
+        path, etag = pdf_renderer.invoice_pdf(invoice, {
+            'name': designer.get('name') if designer else '',
+            'email': designer.get('email') if designer else ''
+        })
+        response = send_file(path, mimetype='application/pdf', conditional=True, etag=etag,
+                             download_name=f"{invoice['invoice_number']}.pdf", max_age=0)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+        
+    except PdfRendererBusy:
+        return busy_response(BUSY_MESSAGE, 2)
+    except Exception as e:
+        return jsonify({'error': 'Failed to generate invoice PDF', 'message': str(e)}), 500
@@ -1,14 +1,18 @@
 # Marketing Routes
 # API endpoints for AI-powered marketing content generation
 
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.models.marketing import MarketingContent
+from backend.models.marketing import MarketingContent, utc_timestamp
 from backend.models.project import Project
 from backend.models.activity import ActivityLog
 from backend.services.ai_service import AIService
+from backend.services.marketing_bulk import BulkMarketingGenerator, expand_items
 from backend.utils.db import get_db_connection, close_db_connection
-from backend.utils.auth import check_subscription_limit, require_subscription_tier
+from backend.services.quota import QuotaService
+from backend.utils.auth import require_subscription_tier
 from backend.config import get_config
 
 # Create blueprint for marketing routes
@@ -101,6 +105,7 @@ def generate_marketing_content():
     Returns:
         Generated marketing content
     """
+    quota = reservation = None
     try:
         user_id = get_jwt_identity()
         data = request.get_json()
@@ -109,15 +114,18 @@ def generate_marketing_content():
         if not data.get('content_type'):
             return jsonify({'error': 'content_type is required'}), 400
         
-        # Check AI generation limit
-        if not check_subscription_limit(user_id, 'ai_generations'):
+        connection = get_db_connection()
+        
+        # Reserve one AI generation up front (refunded if generation fails)
+        quota = QuotaService(connection)
+        reservation = quota.reserve(user_id, 'marketing')
+        if not reservation:
+            close_db_connection(connection)
             return jsonify({
                 'error': 'AI generation limit reached',
                 'message': 'Please upgrade your subscription'
             }), 403
         
-        connection = get_db_connection()
-        
         # Get project info if provided
         project_info = {}
         if data.get('project_id'):
@@ -149,9 +157,12 @@ def generate_marketing_content():
         )
         
         if not generated_content:
+            quota.release(reservation)
             close_db_connection(connection)
             return jsonify({'error': 'Failed to generate content'}), 500
         
+        quota.commit(reservation)
+        
         # Save generated content
         marketing_model = MarketingContent(connection)
         content_id = marketing_model.create(
@@ -179,7 +190,90 @@ def generate_marketing_content():
         }), 201
         
     except Exception as e:
+        if reservation:
+            quota.release(reservation)
+        return jsonify({'error': 'Failed to generate marketing content', 'message': str(e)}), 500
+
+
+@bp.route('/generate/bulk', methods=['POST'])
+@jwt_required()
+@require_subscription_tier('pro')
+def bulk_generate_marketing_content():
+    """
+    Generate marketing content for many projects, platforms and content types
+    
+    Identical prompts are generated once and shared by their items (each
+    distinct prompt uses one AI generation). Generation runs with bounded
+    concurrency and progress is streamed as NDJSON; all content is saved
+    with one insert at the end.
+    
+    Expected JSON (every combination is generated):
+        {
+            "project_ids": [1, 2],
+            "platforms": ["Instagram", "LinkedIn"],
+            "content_types": ["caption"]
+        }
+    or a list of items:
+        {
+            "items": [{"content_type": "post", "project_id": 1, "platform": "Facebook"}, ...]
+        }
+    
+    Returns:
+        NDJSON stream: a "started" event, "generated"/"failed" events as items
+        finish, and a "completed" event with the summary and per-item errors
+    """
+    bulk = None
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        config = get_config()
+        
+        items, error = expand_items(data, config.MARKETING_BULK_MAX_ITEMS)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        bulk = BulkMarketingGenerator(user_id, items, AIService(config.OPENAI_API_KEY),
+                                      concurrency=config.MARKETING_BULK_CONCURRENCY)
+        
+        connection = get_db_connection()
+        failures = bulk.prepare(connection)
+        if bulk.prompts:
+            failures += bulk.reserve(QuotaService(connection))
+        close_db_connection(connection)
+        
+        if not bulk.reservations:
+            if bulk.prompts:
+                return jsonify({
+                    'error': 'AI generation limit reached',
+                    'message': 'Please upgrade your subscription'
+                }), 403
+            return jsonify({'error': 'Project not found', 'summary': bulk.summary}), 404
+            
+    except Exception as e:
+        if bulk:
+            bulk.close()
         return jsonify({'error': 'Failed to generate marketing content', 'message': str(e)}), 500
+    
+    def generate():
+        try:
+            yield json.dumps({'event': 'started', 'requested': bulk.summary['requested'],
+                              'unique_prompts': bulk.summary['unique_prompts']}) + '\n'
+            for indexes, message in failures:
+                yield json.dumps({'event': 'failed', 'items': indexes, 'error': message}) + '\n'
+            
+            for event in bulk.generate():
+                yield json.dumps(event) + '\n'
+            
+            connection = get_db_connection()
+            try:
+                summary = bulk.save(connection)
+            finally:
+                close_db_connection(connection)
+            yield json.dumps({'event': 'completed', **summary}) + '\n'
+        finally:
+            bulk.close()
+    
+    return Response(generate(), status=201, mimetype='application/x-ndjson')
 
 
 @bp.route('/<int:content_id>', methods=['PUT'])
@@ -234,7 +328,7 @@ def schedule_content(content_id):
     
     Expected JSON:
         {
-            "scheduled_date": "2024-02-15T10:00:00"
+            "scheduled_date": "2024-02-15T10:00:00"  (naive times are UTC)
         }
     
     Returns:
@@ -247,6 +341,11 @@ def schedule_content(content_id):
         if not data.get('scheduled_date'):
             return jsonify({'error': 'scheduled_date is required'}), 400
         
+        try:
+            utc_timestamp(data['scheduled_date'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'scheduled_date must be an ISO 8601 date/time'}), 400
+        
         connection = get_db_connection()
         marketing_model = MarketingContent(connection)
         
@@ -1,11 +1,18 @@
 # Product Routes
 # API endpoints for product sourcing and management
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.product import Product
 from backend.models.activity import ActivityLog
+from backend.models.design import Design
+from backend.models.client import Client
+from backend.services.product_search import product_search_service
+from backend.services.style_similarity import style_similarity_service
+from backend.services.product_import import (ProductImporter, detect_format, iter_records, 
+                                             iter_export, FORMAT_CONTENT_TYPES)
 from backend.utils.db import get_db_connection, close_db_connection
+from backend.config import get_config
 
 # Create blueprint for product routes
 bp = Blueprint('products', __name__)
@@ -52,7 +59,7 @@ def get_products():
             
             # Search with filters if provided, otherwise get all
             if filters:
-                products = product_model.search(user_id, filters)
+                products = product_model.search(user_id, filters, limit=limit)
             else:
                 products = product_model.get_by_user(user_id, limit=limit)
         
@@ -67,6 +74,123 @@ def get_products():
         return jsonify({'error': 'Failed to fetch products', 'message': str(e)}), 500
 
 
+@bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_products():
+    """
+    Faceted product search for the product sourcing sidebar
+    
+    Query Parameters:
+        category: Filter by category (optional)
+        style: Filter by style (optional)
+        color: Filter by color (optional)
+        vendor: Filter by vendor name (optional)
+        min_price: Minimum price filter (optional)
+        max_price: Maximum price filter (optional)
+        limit: Maximum number of products (default: 50)
+        offset: Pagination offset (default: 0)
+    
+    Returns:
+        Matching products with total count, facet counts and price histogram
+    """
+    try:
+        user_id = get_jwt_identity()
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        offset = request.args.get('offset', 0, type=int)
+        
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
+        if offset < 0:
+            return jsonify({'error': 'offset cannot be negative'}), 400
+        
+        # Build filters from query parameters
+        filters = {}
+        for field in ['category', 'style', 'color', 'vendor']:
+            if request.args.get(field):
+                filters[field] = request.args.get(field)
+        for field in ['min_price', 'max_price']:
+            if request.args.get(field):
+                filters[field] = request.args.get(field, type=float)
+        
+        connection = get_db_connection()
+        
+        # Products, facets and histogram in one call from the user's facet index
+        result = product_search_service.search(connection, user_id, filters, limit=limit, offset=offset)
+        close_db_connection(connection)
+        
+        result['count'] = len(result['products'])
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to search products', 'message': str(e)}), 500
+
+
+@bp.route('/recommendations', methods=['GET'])
+@jwt_required()
+def recommend_products():
+    """
+    Recommend saved products that match a design or a client's taste
+    
+    Uses the in-memory style embedding index, so no LLM call is needed.
+    
+    Query Parameters:
+        design_id: Design to match (one of design_id or client_id is required)
+        client_id: Client to match
+        limit: Maximum number of products (default: 10)
+    
+    Returns:
+        List of products with similarity scores, best match first
+    """
+    try:
+        user_id = get_jwt_identity()
+        design_id = request.args.get('design_id', None, type=int)
+        client_id = request.args.get('client_id', None, type=int)
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        
+        if not design_id and not client_id:
+            return jsonify({'error': 'design_id or client_id is required'}), 400
+        
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
+        
+        connection = get_db_connection()
+        
+        # Load the entity to match against
+        if design_id:
+            entity_type = 'design'
+            entity = Design(connection).get_by_id(design_id)
+            if entity and entity['user_id'] != user_id:
+                entity = None
+        else:
+            entity_type = 'client'
+            entity = Client(connection).get_by_id(client_id, user_id)
+        
+        if not entity:
+            close_db_connection(connection)
+            return jsonify({'error': f'{entity_type.capitalize()} not found'}), 404
+        
+        matches = style_similarity_service.recommend_products(
+            connection, user_id, entity_type, entity, k=limit)
+        
+        # Load product rows for the matches, keeping the ranking
+        product_model = Product(connection)
+        scores = dict(matches)
+        products = product_model.get_by_ids([product_id for product_id, _ in matches], user_id)
+        close_db_connection(connection)
+        
+        for product in products:
+            product['similarity'] = round(scores[product['id']], 4)
+        
+        return jsonify({
+            'products': products,
+            'count': len(products)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to recommend products', 'message': str(e)}), 500
+
+
 @bp.route('/<int:product_id>', methods=['GET'])
 @jwt_required()
 def get_product(product_id):
@@ -148,6 +272,8 @@ def create_product():
             close_db_connection(connection)
             return jsonify({'error': 'Failed to create product'}), 500
         
+        product_search_service.invalidate(user_id)
+        
         # Log activity
         activity_model = ActivityLog(connection)
         activity_model.log(user_id, 'product_added', 'product', product_id, 
@@ -155,6 +281,7 @@ def create_product():
         
         # Get the created product
         product = product_model.get_by_id(product_id)
+        style_similarity_service.refresh(connection, user_id, 'product', product)
         close_db_connection(connection)
         
         return jsonify({
@@ -166,6 +293,102 @@ def create_product():
         return jsonify({'error': 'Failed to create product', 'message': str(e)}), 500
 
 
+@bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_import_products():
+    """
+    Import a supplier catalog from a streamed CSV or NDJSON upload
+    
+    The body is parsed incrementally and inserted in chunked transactions, 
+    so uploads of tens of thousands of rows never sit in memory at once.
+    
+    Query Parameters:
+        format: csv or ndjson (optional, defaults to the Content-Type)
+    
+    Expected body (CSV with header row, or one JSON object per line):
+        name,price,project_id,description,vendor,product_url,image_url,category,style,color
+    
+    Returns:
+        Import summary with per-row errors
+    """
+    try:
+        user_id = get_jwt_identity()
+        file_format = detect_format(request.args.get('format'), request.content_type)
+        
+        if not file_format:
+            return jsonify({'error': 'Unsupported format, upload CSV or NDJSON'}), 400
+        
+        config = get_config()
+        
+        connection = get_db_connection()
+        importer = ProductImporter(connection, user_id, 
+                                   chunk_size=config.PRODUCT_IMPORT_CHUNK_SIZE)
+        
+        # Parse, validate and insert as the upload streams in
+        summary = importer.run(iter_records(request.stream, file_format))
+        
+        if summary['imported']:
+            product_search_service.invalidate(user_id)
+            style_similarity_service.mark_stale(user_id)
+        
+        # Log one activity entry for the whole import
+        activity_model = ActivityLog(connection)
+        activity_model.log(user_id, 'products_bulk_imported', 'product', None, {
+            'format': file_format,
+            'received': summary['received'],
+            'imported': summary['imported'],
+            'failed': summary['failed']
+        })
+        
+        close_db_connection(connection)
+        
+        status_code = 201 if summary['imported'] else 400
+        return jsonify({
+            'message': f"Imported {summary['imported']} of {summary['received']} products",
+            'summary': summary
+        }), status_code
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to import products', 'message': str(e)}), 500
+
+
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_products():
+    """
+    Download all of the user's products as CSV or NDJSON
+    
+    Rows are streamed from the database cursor in batches, so memory use 
+    stays flat regardless of catalog size.
+    
+    Query Parameters:
+        format: csv or ndjson (default: csv)
+    
+    Returns:
+        Streaming file download
+    """
+    user_id = get_jwt_identity()
+    file_format = request.args.get('format', 'csv').lower()
+    
+    if file_format not in FORMAT_CONTENT_TYPES:
+        return jsonify({'error': 'Unsupported format, use csv or ndjson'}), 400
+    
+    def generate():
+        connection = get_db_connection()
+        try:
+            product_model = Product(connection)
+            for chunk in iter_export(product_model.iter_by_user(user_id), file_format):
+                yield chunk
+        finally:
+            close_db_connection(connection)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype=FORMAT_CONTENT_TYPES[file_format],
+        headers={'Content-Disposition': f'attachment; filename=products.{file_format}'}
+    )
+
+
 @bp.route('/<int:product_id>', methods=['PUT'])
 @jwt_required()
 def update_product(product_id):
@@ -192,6 +415,10 @@ def update_product(product_id):
         success = product_model.update(product_id, **data)
         
         if success:
+            product_search_service.invalidate(user_id)
+            style_similarity_service.refresh(connection, user_id, 'product', 
+                                             product_model.get_by_id(product_id))
+            
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'product_updated', 'product', product_id)
@@ -229,6 +456,8 @@ def mark_purchased(product_id):
         success = product_model.mark_purchased(product_id)
         
         if success:
+            product_search_service.invalidate(user_id)
+            
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'product_purchased', 'product', product_id)
@@ -266,6 +495,9 @@ def delete_product(product_id):
         success = product_model.delete(product_id)
         
         if success:
+            product_search_service.invalidate(user_id)
+            style_similarity_service.remove(connection, user_id, 'product', product_id)
+            
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'product_deleted', 'product', product_id)
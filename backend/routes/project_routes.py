@@ -5,8 +5,12 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.project import Project
 from backend.models.task import Task
+from backend.models.design import Design
+from backend.models.product import Product
+from backend.models.calendar import CalendarEvent
 from backend.models.activity import ActivityLog
 from backend.services.ai_service import AIService
+from backend.services.quota import QuotaService
 from backend.utils.db import get_db_connection, close_db_connection
 from backend.config import get_config
 import os
@@ -55,20 +59,30 @@ def get_projects():
 @jwt_required()
 def get_project(project_id):
     """
-    Get a specific project by ID with tasks
+    Get a specific project by ID with related data
     
     Args:
         project_id: The project's ID
     
+    Query Parameters:
+        include: Comma-separated related data to embed 
+                 (tasks, designs, products, events, budget; default: tasks)
+    
     Returns:
-        Project data with tasks
+        Project data with the requested related data
     """
     try:
         user_id = get_jwt_identity()
+        include = _parse_include(request.args.get('include', None))
+        
+        if include is None:
+            return jsonify({
+                'error': 'Invalid include',
+                'message': f"Supported values: {', '.join(PROJECT_INCLUDES)}"
+            }), 400
         
         connection = get_db_connection()
         project_model = Project(connection)
-        task_model = Task(connection)
         
         # Get project
         project = project_model.get_by_id(project_id, user_id)
@@ -77,18 +91,73 @@ def get_project(project_id):
             close_db_connection(connection)
             return jsonify({'error': 'Project not found'}), 404
         
-        # Get project tasks
-        tasks = task_model.get_by_project(project_id)
-        project['tasks'] = tasks
+        # Load every requested relation on the same connection
+        for name in include:
+            project[name] = PROJECT_INCLUDES[name](connection, project)
         
+        query_count = connection.query_count
         close_db_connection(connection)
         
-        return jsonify({'project': project}), 200
+        return jsonify({
+            'project': project,
+            'meta': {'include': include, 'queries': query_count}
+        }), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to fetch project', 'message': str(e)}), 500
 
 
+def _load_budget(connection, project):
+    """Summarize product spend, reusing already loaded products if possible"""
+    products = project.get('products')
+    if products is None:
+        summary = Product(connection).get_project_budget_summary(project['id'])
+    else:
+        total_value = sum(float(p['price'] or 0) for p in products)
+        purchased_value = sum(float(p['price'] or 0) for p in products if p['is_purchased'])
+        summary = {
+            'total_items': len(products),
+            'total_value': total_value,
+            'purchased_value': purchased_value,
+            'pending_value': total_value - purchased_value
+        }
+    
+    budget = float(project.get('budget') or 0)
+    summary['budget'] = budget
+    summary['remaining'] = budget - summary['purchased_value']
+    return summary
+
+
+# Related data that can be embedded with ?include=, in load order
+# (budget comes last so it can reuse the products list)
+PROJECT_INCLUDES = {
+    'tasks': lambda connection, project: Task(connection).get_by_project(project['id']),
+    'designs': lambda connection, project: Design(connection).get_by_project(project['id']),
+    'products': lambda connection, project: Product(connection).get_by_project(project['id']),
+    'events': lambda connection, project: CalendarEvent(connection).get_by_project(project['id']),
+    'budget': _load_budget
+}
+
+
+def _parse_include(raw_include):
+    """
+    Parse the ?include= parameter
+    
+    Args:
+        raw_include: Comma-separated include list (None means the default)
+    
+    Returns:
+        Include names in load order, or None if any name is unknown
+    """
+    if raw_include is None:
+        return ['tasks']
+    
+    requested = {name.strip().lower() for name in raw_include.split(',') if name.strip()}
+    if requested - set(PROJECT_INCLUDES):
+        return None
+    return [name for name in PROJECT_INCLUDES if name in requested]
+
+
 @bp.route('', methods=['POST'])
 @jwt_required()
 def create_project():
@@ -312,6 +381,7 @@ def generate_insights(project_id):
     Returns:
         AI-generated insights and recommendations
     """
+    quota = reservation = None
     try:
         user_id = get_jwt_identity()
         
@@ -325,6 +395,16 @@ def generate_insights(project_id):
             close_db_connection(connection)
             return jsonify({'error': 'Project not found'}), 404
         
+        # Reserve one AI generation up front (refunded if generation fails)
+        quota = QuotaService(connection)
+        reservation = quota.reserve(user_id, 'insights')
+        if not reservation:
+            close_db_connection(connection)
+            return jsonify({
+                'error': 'AI generation limit reached',
+                'message': 'Please upgrade your subscription'
+            }), 403
+        
         # Initialize AI service
         config = get_config()
         ai_service = AIService(config.OPENAI_API_KEY)
@@ -333,12 +413,16 @@ def generate_insights(project_id):
         insights = ai_service.generate_project_insights(project)
         
         if insights:
+            quota.commit(reservation)
+            
             # Save insights to project
             project_model.update_ai_insights(project_id, user_id, insights)
             
             # Log activity
             activity_model = ActivityLog(connection)
             activity_model.log(user_id, 'ai_insights_generated', 'project', project_id)
+        else:
+            quota.release(reservation)
         
         close_db_connection(connection)
         
@@ -351,5 +435,7 @@ def generate_insights(project_id):
         }), 200
         
     except Exception as e:
+        if reservation:
+            quota.release(reservation)
         return jsonify({'error': 'Failed to generate insights', 'message': str(e)}), 500
 
@@ -5,6 +5,9 @@ import openai
 from openai import OpenAI
 import os
 import json
+from config import get_config
+from services.ai_stub import StubOpenAIClient
+from utils.metrics import ai_call
 
 class AIService:
     """Service class for OpenAI API interactions"""
@@ -13,10 +16,22 @@ class AIService:
         """
         Initialize OpenAI client with API key
         
+        With AI_PROVIDER set to 'stub' the offline stand-in client is used
+        instead, so every method works without network access.
+        
         Args:
             api_key: OpenAI API key
+        
+        Raises:
+            ValueError: If the OpenAI provider is configured without an API key
         """
-        self.client = OpenAI(api_key=api_key)
+        config = get_config()
+        if config.AI_PROVIDER == 'stub':
+            self.client = StubOpenAIClient(config.AI_STUB_LATENCY_MS)
+        elif not api_key:
+            raise ValueError('OPENAI_API_KEY is not set (set AI_PROVIDER=stub to use the offline stand-in)')
+        else:
+            self.client = OpenAI(api_key=api_key)
     
     def generate_design_description(self, room_type, style, budget, keywords=None):
         """
@@ -50,15 +65,16 @@ Please provide:
 Format the response as JSON with keys: description, color_palette, furniture_list, lighting, styling_tips"""
 
             # Call OpenAI GPT-4 API
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are an expert interior designer helping create beautiful, functional spaces."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1500
-            )
+            with ai_call('generate_design_description'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4-turbo-preview",
+                    messages=[
+                        {"role": "system", "content": "You are an expert interior designer helping create beautiful, functional spaces."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=1500
+                )
             
             # Extract response content
             content = response.choices[0].message.content
@@ -99,13 +115,14 @@ Format the response as JSON with keys: description, color_palette, furniture_lis
             prompt = f"Professional interior design photo: {style} style {room_type}, {description}. High quality, realistic, well-lit, magazine quality"
             
             # Call DALL-E API
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size="1024x1024",
-                quality="standard",
-                n=1
-            )
+            with ai_call('generate_design_image'):
+                response = self.client.images.generate(
+                    model="dall-e-3",
+                    prompt=prompt,
+                    size="1024x1024",
+                    quality="standard",
+                    n=1
+                )
             
             # Extract image URL
             image_url = response.data[0].url
@@ -164,15 +181,16 @@ Message: {message_text}
 
 Sentiment:"""
             
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a sentiment analysis assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=10
-            )
+            with ai_call('analyze_message_sentiment'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4-turbo-preview",
+                    messages=[
+                        {"role": "system", "content": "You are a sentiment analysis assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=10
+                )
             
             sentiment = response.choices[0].message.content.strip().lower()
             return sentiment
@@ -194,14 +212,15 @@ Sentiment:"""
         try:
             prompt = f"Summarize this client message in one concise sentence:\n\n{message_text}"
             
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=100
-            )
+            with ai_call('summarize_message'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4-turbo-preview",
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=100
+                )
             
             summary = response.choices[0].message.content.strip()
             return summary
@@ -210,9 +229,12 @@ Sentiment:"""
             print(f"Error summarizing message: {e}")
             return message_text[:100] + '...' if len(message_text) > 100 else message_text
     
-    def generate_marketing_content(self, content_type, project_info, platform=None):
+    def marketing_prompt(self, content_type, project_info, platform=None):
         """
-        Generate marketing content for social media, blogs, or emails
+        Prompt used to generate marketing content
+        
+        Requests with the same prompt produce interchangeable content, which
+        bulk generation uses to make each distinct prompt only once.
         
         Args:
             content_type: Type of content (caption, blog, email, post)
@@ -220,54 +242,71 @@ Sentiment:"""
             platform: Target platform (Instagram, LinkedIn, etc.)
         
         Returns:
-            Generated content text
+            Prompt text
         """
-        try:
-            # Build prompt based on content type
-            if content_type == 'caption':
-                prompt = f"""Create an engaging Instagram caption for an interior design project:
+        # Build prompt based on content type
+        if content_type == 'caption':
+            prompt = f"""Create an engaging {platform or 'Instagram'} caption for an interior design project:
                 
 Project: {project_info.get('title', '')}
 Style: {project_info.get('style', '')}
 Description: {project_info.get('description', '')}
 
 Include relevant hashtags and keep it concise yet engaging."""
-            
-            elif content_type == 'blog':
-                prompt = f"""Write a professional blog post about this interior design project:
+        
+        elif content_type == 'blog':
+            prompt = f"""Write a professional blog post about this interior design project:
                 
 Project: {project_info.get('title', '')}
 Style: {project_info.get('style', '')}
 Description: {project_info.get('description', '')}
 
 Include sections on design inspiration, key features, and styling tips. 400-500 words."""
-            
-            elif content_type == 'email':
-                prompt = f"""Write a professional email to showcase this interior design project to potential clients:
+        
+        elif content_type == 'email':
+            prompt = f"""Write a professional email to showcase this interior design project to potential clients:
                 
 Project: {project_info.get('title', '')}
 Style: {project_info.get('style', '')}
 Description: {project_info.get('description', '')}
 
 Keep it professional, engaging, and include a call-to-action."""
-            
-            else:  # general post
-                prompt = f"""Create engaging social media content for {platform or 'social media'} about this interior design project:
+        
+        else:  # general post
+            prompt = f"""Create engaging social media content for {platform or 'social media'} about this interior design project:
                 
 Project: {project_info.get('title', '')}
 Description: {project_info.get('description', '')}
 
 Make it professional yet personable."""
+        
+        return prompt
+    
+    def generate_marketing_content(self, content_type, project_info, platform=None):
+        """
+        Generate marketing content for social media, blogs, or emails
+        
+        Args:
+            content_type: Type of content (caption, blog, email, post)
+            project_info: Dictionary with project details
+            platform: Target platform (Instagram, LinkedIn, etc.)
+        
+        Returns:
+            Generated content text
+        """
+        try:
+            prompt = self.marketing_prompt(content_type, project_info, platform)
             
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a professional marketing copywriter specializing in interior design."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
+            with ai_call('generate_marketing_content'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4-turbo-preview",
+                    messages=[
+                        {"role": "system", "content": "You are a professional marketing copywriter specializing in interior design."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=800
+                )
             
             content = response.choices[0].message.content.strip()
             return content
@@ -303,15 +342,16 @@ Provide:
 
 Format as JSON with keys: budget_analysis, timeline_recommendation, potential_issues, next_steps"""
             
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are an AI assistant helping interior designers manage projects efficiently."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                max_tokens=600
-            )
+            with ai_call('generate_project_insights'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4-turbo-preview",
+                    messages=[
+                        {"role": "system", "content": "You are an AI assistant helping interior designers manage projects efficiently."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.5,
+                    max_tokens=600
+                )
             
             content = response.choices[0].message.content
             
@@ -326,4 +366,29 @@ Format as JSON with keys: budget_analysis, timeline_recommendation, potential_is
         except Exception as e:
             print(f"Error generating project insights: {e}")
             return None
-
+    
+    def generate_embeddings(self, texts, model="text-embedding-ada-002"):
+        """
+        Generate embedding vectors for a batch of texts
+        
+        Args:
+            texts: List of strings to embed
+            model: OpenAI embedding model name
+        
+        Returns:
+            List of float lists (one per text) or None on failure
+        """
+        try:
+            with ai_call('generate_embeddings'):
+                response = self.client.embeddings.create(
+                    model=model,
+                    input=texts
+                )
+            
+            # Keep the input order regardless of response ordering
+            ordered = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in ordered]
+            
+        except Exception as e:
+            print(f"Error generating embeddings: {e}")
+            return None
@@ -0,0 +1,109 @@
+# AI Stub - offline stand-in for the OpenAI client
+# Deterministic responses with the OpenAI response shapes, for development, load tests and benchmarks
+
+import hashlib
+import json
+import math
+import re
+import time
+from types import SimpleNamespace
+
+# Prompts ending in "Format ... as JSON with keys: a, b, c" get a JSON object with those keys
+_JSON_KEYS_PATTERN = re.compile(r'JSON with keys:\s*([\w\s,]+)')
+
+SENTIMENTS = ('positive', 'neutral', 'negative')
+
+
+def _digest(text):
+    """Stable integer derived from a text"""
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:12], 16)
+
+
+def _stub_text(prompt, words=40):
+    """Deterministic filler text that varies with the prompt"""
+    vocabulary = ('warm', 'oak', 'linen', 'light', 'texture', 'layered', 'calm', 'brass',
+                  'natural', 'palette', 'space', 'balance', 'soft', 'contrast', 'stone', 'curve')
+    seed = _digest(prompt)
+    return ' '.join(vocabulary[(seed >> (i % 40)) % len(vocabulary)] for i in range(words)).capitalize() + '.'
+
+
+class _Completions:
+    """Stand-in for client.chat.completions"""
+    
+    def __init__(self, client):
+        self._client = client
+    
+    def create(self, model, messages, **kwargs):
+        self._client._wait()
+        prompt = messages[-1]['content']
+        
+        keys_match = _JSON_KEYS_PATTERN.search(prompt)
+        if keys_match:
+            keys = [key.strip() for key in keys_match.group(1).split(',') if key.strip()]
+            content = json.dumps({key: _stub_text(prompt + key, 12) for key in keys})
+        elif 'Return only: positive, neutral, or negative' in prompt:
+            content = SENTIMENTS[_digest(prompt) % len(SENTIMENTS)]
+        else:
+            content = _stub_text(prompt, min(kwargs.get('max_tokens', 100) // 4, 60))
+        
+        message = SimpleNamespace(role='assistant', content=content)
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)])
+
+
+class _Images:
+    """Stand-in for client.images"""
+    
+    def __init__(self, client):
+        self._client = client
+    
+    def generate(self, model, prompt, n=1, **kwargs):
+        self._client._wait()
+        key = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:16]
+        return SimpleNamespace(data=[SimpleNamespace(url=f'https://placehold.co/1024x1024?text={key}-{i}')
+                                     for i in range(n)])
+
+
+class _Embeddings:
+    """Stand-in for client.embeddings"""
+    
+    def __init__(self, client, dimensions):
+        self._client = client
+        self._dimensions = dimensions
+    
+    def create(self, model, input, **kwargs):
+        self._client._wait()
+        texts = [input] if isinstance(input, str) else input
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=self._vector(text))
+                                     for i, text in enumerate(texts)])
+    
+    def _vector(self, text):
+        """Unit vector seeded by the text, so equal texts embed identically"""
+        seed = _digest(text)
+        values = [math.sin(seed % 9973 + i * 0.37) for i in range(self._dimensions)]
+        norm = math.sqrt(sum(value * value for value in values)) or 1.0
+        return [value / norm for value in values]
+
+
+class StubOpenAIClient:
+    """
+    Offline replacement for openai.OpenAI used when AI_PROVIDER is 'stub'
+    
+    Supports the calls AIService makes (chat completions, image generation
+    and embeddings) and returns deterministic content in the same shapes,
+    optionally after a fixed delay to mimic API latency.
+    """
+    
+    def __init__(self, latency_ms=0, embedding_dim=1536):
+        """
+        Args:
+            latency_ms: Simulated round-trip time of each call
+            embedding_dim: Length of returned embedding vectors
+        """
+        self.latency_ms = latency_ms
+        self.chat = SimpleNamespace(completions=_Completions(self))
+        self.images = _Images(self)
+        self.embeddings = _Embeddings(self, embedding_dim)
+    
+    def _wait(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
@@ -0,0 +1,117 @@
+# Calendar Feed Service - streamed ICS feeds with a per-designer cache of the serialized body
+# Cached bodies are keyed by the feed version, which every event write bumps (models.calendar_feed)
+
+from datetime import datetime, timedelta, timezone
+
+from config import get_config
+from utils.cache import TTLCache
+from utils.db import close_db_connection, get_db_connection
+from utils.ics import calendar_footer, calendar_header, serialize_event
+
+# Events serialized per chunk of the streamed body
+CHUNK_EVENTS = 200
+
+
+def _build_cache():
+    """Create the serialized feed cache from configuration"""
+    config = get_config()
+    return TTLCache(ttl_seconds=config.CALENDAR_FEED_CACHE_TTL,
+                    max_entries=config.CALENDAR_FEED_CACHE_ENTRIES, name='calendar_feed')
+
+
+# Serialized feed bodies keyed by user ID, stored with the version they were built from
+feed_cache = _build_cache()
+
+
+def feed_etag(feed):
+    """ETag of a feed version"""
+    return f"feed-{feed['user_id']}-{feed['version']}"
+
+
+def feed_last_modified(feed):
+    """Last-Modified of a feed (UTC datetime), or None if unknown"""
+    value = feed.get('updated_at')
+    if not value:
+        return None
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+def _serialize(user_id):
+    """
+    Build a designer's feed, yielding it in chunks as events are read
+    
+    Recurring series come first (one VEVENT each), then single events from
+    CALENDAR_FEED_PAST_DAYS ago onwards in start order.
+    """
+    config = get_config()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=config.CALENDAR_FEED_PAST_DAYS)).strftime('%Y-%m-%d')
+    
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM users WHERE id = %s", (user_id,))
+            user = cursor.fetchone() or {}
+        yield calendar_header(f"AI Studio - {user.get('name') or 'Calendar'}")
+        
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM calendar_events
+                WHERE user_id = %s AND recurrence_rule IS NOT NULL
+            """, (user_id,))
+            series = cursor.fetchall()
+        if series:
+            yield b''.join(serialize_event(event) for event in series)
+        
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM calendar_events
+                WHERE user_id = %s AND recurrence_rule IS NULL AND start_time >= %s
+                ORDER BY start_time ASC
+            """, (user_id, cutoff))
+            while True:
+                events = cursor.fetchmany(CHUNK_EVENTS)
+                if not events:
+                    break
+                yield b''.join(serialize_event(event) for event in events)
+        
+        yield calendar_footer()
+    finally:
+        close_db_connection(connection)
+
+
+def stream_feed(feed, chunk_size=64 * 1024):
+    """
+    Body of a feed as a stream of chunks
+    
+    Serves the cached body while the feed version is unchanged; otherwise
+    serializes the events, streaming them as they are read, and caches the
+    result (bodies over CALENDAR_FEED_CACHE_MAX_KB are not cached).
+    
+    Args:
+        feed: Feed row (user_id, version)
+        chunk_size: Bytes per chunk when serving a cached body
+    
+    Yields:
+        Chunks of the ICS body
+    """
+    cached = feed_cache.get(feed['user_id'])
+    if cached is not None and cached[0] == feed['version']:
+        body = cached[1]
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+        return
+    
+    max_bytes = get_config().CALENDAR_FEED_CACHE_MAX_KB * 1024
+    parts, size = [], 0
+    for chunk in _serialize(feed['user_id']):
+        if parts is not None:
+            size += len(chunk)
+            if size <= max_bytes:
+                parts.append(chunk)
+            else:
+                parts = None
+        yield chunk
+    
+    if parts is not None:
+        feed_cache.set(feed['user_id'], (feed['version'], b''.join(parts)))
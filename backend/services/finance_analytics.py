@@ -0,0 +1,208 @@
+# Finance Analytics Service - revenue trends, cash-flow forecasts and invoice aging
+# Reads the incremental monthly aggregates of models.invoice_totals, never the invoices themselves
+
+import logging
+from datetime import date
+
+from models.invoice_totals import InvoiceTotals
+from utils.db import close_db_connection, get_db_connection
+
+logger = logging.getLogger('ai_studio.finance')
+
+# Days past due per aging bucket (upper bound inclusive, None = open ended)
+AGING_BUCKETS = (('0-30', 30), ('31-60', 60), ('61-90', 90), ('90+', None))
+
+# Invoices that were issued to a client (drafts and cancelled invoices are not revenue)
+ISSUED_STATUSES = ('sent', 'paid', 'overdue')
+
+
+def parse_month(value):
+    """
+    Parse a 'YYYY-MM' month
+    
+    Args:
+        value: Month string
+    
+    Returns:
+        (year, month) tuple
+    
+    Raises:
+        ValueError: If the value is not a valid month
+    """
+    year, month = (int(part) for part in str(value).split('-', 1))
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {value}")
+    return year, month
+
+
+def add_months(year, month, count):
+    """Shift a (year, month) pair by count months"""
+    index = year * 12 + (month - 1) + count
+    return index // 12, index % 12 + 1
+
+
+def month_range(start, end):
+    """
+    All months from start to end inclusive
+    
+    Args:
+        start: First month ('YYYY-MM')
+        end: Last month ('YYYY-MM')
+    
+    Returns:
+        List of 'YYYY-MM' strings
+    """
+    year, month = parse_month(start)
+    last = parse_month(end)
+    months = []
+    while (year, month) <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = add_months(year, month, 1)
+    return months
+
+
+def get_trend(connection, user_id, start, end):
+    """
+    Monthly revenue and cash-flow series of a designer
+    
+    Every month in the range is present (zero-filled), so the series can be
+    charted or fed to a forecast directly.
+    
+    Args:
+        connection: Database connection
+        user_id: The designer's ID
+        start: First month ('YYYY-MM')
+        end: Last month ('YYYY-MM')
+    
+    Returns:
+        List of dictionaries with month, invoiced, paid, quoted, overdue and
+        expected (unpaid invoices falling due that month)
+    """
+    months = month_range(start, end)
+    series = {month: {'month': month, 'invoiced': 0.0, 'paid': 0.0, 'quoted': 0.0,
+                      'overdue': 0.0, 'expected': 0.0} for month in months}
+    if not months:
+        return []
+    
+    totals = InvoiceTotals(connection)
+    
+    for row in totals.get_range(user_id, 'issued', months[0], months[-1]):
+        point = series.get(row['period'])
+        if point is None or row['status'] not in ISSUED_STATUSES:
+            continue
+        point['quoted' if row['type'] == 'quote' else 'invoiced'] += float(row['amount'] or 0)
+    
+    for row in totals.get_range(user_id, 'paid', months[0], months[-1]):
+        point = series.get(row['period'])
+        if point is not None and row['type'] == 'invoice':
+            point['paid'] += float(row['amount'] or 0)
+    
+    # Due dates are stored per day; '-99' sorts after every day of the last month
+    for row in totals.get_range(user_id, 'due', f"{months[0]}-01", f"{months[-1]}-99"):
+        point = series.get(row['period'][:7])
+        if point is not None and row['type'] == 'invoice':
+            point['overdue' if row['status'] == 'overdue' else 'expected'] += float(row['amount'] or 0)
+    
+    return [{key: round(value, 2) if isinstance(value, float) else value
+             for key, value in series[month].items()} for month in months]
+
+
+def get_aging(connection, user_id, today=None):
+    """
+    Unpaid invoices of a designer grouped by days past their due date
+    
+    Args:
+        connection: Database connection
+        user_id: The designer's ID
+        today: Reference date (defaults to today)
+    
+    Returns:
+        Dictionary with 'current' (not yet due) and one entry per aging bucket,
+        each with amount and count
+    """
+    today = today or date.today()
+    aging = {'current': {'amount': 0.0, 'count': 0}}
+    for name, _ in AGING_BUCKETS:
+        aging[name] = {'amount': 0.0, 'count': 0}
+    
+    for row in InvoiceTotals(connection).get_range(user_id, 'due', '0000-00-00', '9999-99-99'):
+        if row['type'] != 'invoice':
+            continue
+        try:
+            days = (today - date.fromisoformat(row['period'])).days
+        except ValueError:
+            continue
+        
+        if days <= 0:
+            bucket = 'current'
+        else:
+            bucket = next(name for name, limit in AGING_BUCKETS if limit is None or days <= limit)
+        aging[bucket]['amount'] += float(row['amount'] or 0)
+        aging[bucket]['count'] += int(row['invoice_count'] or 0)
+    
+    for bucket in aging.values():
+        bucket['amount'] = round(bucket['amount'], 2)
+    return aging
+
+
+def get_revenue_trend(connection, user_id, months=6):
+    """
+    Paid invoice revenue per month, most recent first
+    
+    Args:
+        connection: Database connection
+        user_id: The designer's ID
+        months: Number of months back from the current one
+    
+    Returns:
+        List of dictionaries with month and revenue, months without revenue omitted
+    """
+    today = date.today()
+    start = add_months(today.year, today.month, -months)
+    revenue = {}
+    for row in InvoiceTotals(connection).get_range(user_id, 'paid', f"{start[0]:04d}-{start[1]:02d}",
+                                                   f"{today.year:04d}-{today.month:02d}"):
+        if row['type'] == 'invoice':
+            revenue[row['period']] = revenue.get(row['period'], 0.0) + float(row['amount'] or 0)
+    
+    return [{'month': month, 'revenue': round(amount, 2)}
+            for month, amount in sorted(revenue.items(), reverse=True)]
+
+
+def rebuild_totals(user_id=None):
+    """
+    Recompute the invoice aggregates from scratch
+    
+    Args:
+        user_id: Only rebuild this designer's totals (default: everyone)
+    
+    Returns:
+        Number of aggregate rows written
+    """
+    connection = get_db_connection()
+    try:
+        return InvoiceTotals(connection).rebuild(user_id)
+    finally:
+        close_db_connection(connection)
+
+
+def init_finance_analytics(app):
+    """
+    Backfill the invoice aggregates on first start after they were introduced
+    
+    Args:
+        app: Flask application
+    """
+    try:
+        connection = get_db_connection()
+        try:
+            if not InvoiceTotals(connection).is_empty():
+                return
+            written = InvoiceTotals(connection).rebuild()
+        finally:
+            close_db_connection(connection)
+        
+        if written:
+            logger.info('Backfilled %s invoice aggregate rows', written)
+    except Exception as e:
+        logger.warning('Could not backfill invoice aggregates: %s', e)
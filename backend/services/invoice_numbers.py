@@ -0,0 +1,92 @@
+# Invoice Numbers Service - formats and hands out invoice numbers
+# Numbers come from per-designer sequences, optionally reserved in blocks per worker process
+
+import os
+import threading
+from datetime import date
+
+from config import get_config
+from models.invoice_sequence import InvoiceSequence
+
+
+class InvoiceNumberAllocator:
+    """
+    Hands out invoice numbers from the invoice_sequences table
+    
+    With block_size 1 every number is reserved inside the transaction that
+    inserts the invoice, so numbers stay gapless unless an insert fails.
+    With a larger block_size each worker process reserves block_size numbers
+    at a time (committed straight away) and hands them out from memory: one
+    write per block instead of one per invoice, at the cost of gaps and of
+    numbers not being strictly in creation order across workers.
+    """
+    
+    def __init__(self, number_format='INV-{user_id:03d}-{number:05d}', block_size=1):
+        """
+        Args:
+            number_format: str.format template with user_id, number, year and type fields
+            block_size: Numbers reserved per sequence update
+        """
+        self.number_format = number_format
+        self.block_size = max(int(block_size), 1)
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+    
+    def _take_reserved(self, key):
+        """Next number from this process's reserved blocks, or None"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Blocks were reserved by the parent process before a fork
+                self._blocks = {}
+                self._pid = os.getpid()
+            
+            blocks = self._blocks.get(key)
+            while blocks:
+                block = blocks[0]
+                if block[0] < block[1]:
+                    number = block[0]
+                    block[0] += 1
+                    return number
+                blocks.pop(0)
+            return None
+    
+    def next_number(self, connection, user_id, invoice_type='invoice'):
+        """
+        Allocate and format the next invoice number of a designer
+        
+        Args:
+            connection: Database connection the invoice is created on
+            user_id: The designer's ID
+            invoice_type: Invoice type ('invoice' or 'quote'), available to the format
+        
+        Returns:
+            Formatted invoice number
+        """
+        if self.block_size == 1:
+            number = InvoiceSequence(connection).allocate(user_id)
+        else:
+            key = user_id
+            number = self._take_reserved(key)
+            if number is None:
+                number = InvoiceSequence(connection).allocate(user_id, self.block_size)
+                connection.commit()
+                # Threads that ran out at the same time each reserve a block; keep them all
+                with self._lock:
+                    self._blocks.setdefault(key, []).append([number + 1, number + self.block_size])
+        
+        return self.number_format.format(user_id=user_id, number=number,
+                                         year=date.today().year, type=invoice_type)
+
+
+def _build_allocator():
+    """Create the shared allocator from configuration"""
+    config = get_config()
+    return InvoiceNumberAllocator(
+        number_format=config.INVOICE_NUMBER_FORMAT,
+        block_size=config.INVOICE_NUMBER_BLOCK_SIZE
+    )
+
+
+# Shared allocator used by the Invoice model
+invoice_numbers = _build_allocator()
@@ -0,0 +1,282 @@
+# Marketing Bulk Service - many pieces of marketing content from one request
+# Identical prompts are generated once, AI calls run in a bounded thread pool and results are saved with one executemany
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from models.activity import ActivityLog
+from models.marketing import MarketingContent
+from services.quota import QuotaService
+from utils.db import close_db_connection, get_db_connection
+
+# Content types the generator has prompts for
+CONTENT_TYPES = ('caption', 'blog', 'email', 'post')
+
+
+def expand_items(data, max_items):
+    """
+    Turn a bulk request into a list of items to generate
+    
+    Either lists the items, or asks for every combination of projects,
+    platforms and content types.
+    
+    Args:
+        data: Request JSON ({"items": [...]} or {"project_ids", "platforms", "content_types"})
+        max_items: Most items one request may ask for
+    
+    Returns:
+        (items, error): list of dictionaries with content_type, project_id,
+        platform, title, description and style, or None and an error message
+    """
+    if data.get('items') is not None:
+        items = data['items']
+        if not isinstance(items, list):
+            return None, 'items must be a list'
+    else:
+        content_types = data.get('content_types') or [data.get('content_type')]
+        project_ids = data.get('project_ids') or [None]
+        platforms = data.get('platforms') or [data.get('platform')]
+        if not all(isinstance(values, list) for values in (content_types, project_ids, platforms)):
+            return None, 'project_ids, platforms and content_types must be lists'
+        items = [{'content_type': content_type, 'project_id': project_id, 'platform': platform,
+                  'title': data.get('title'), 'description': data.get('description'), 'style': data.get('style')}
+                 for project_id in project_ids for platform in platforms for content_type in content_types]
+    
+    if not items:
+        return None, 'No items to generate'
+    if len(items) > max_items:
+        return None, f'At most {max_items} items can be generated per request'
+    
+    expanded = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, f'Item {index} must be an object'
+        if item.get('content_type') not in CONTENT_TYPES:
+            return None, f"Item {index}: content_type must be one of {', '.join(CONTENT_TYPES)}"
+        project_id = item.get('project_id')
+        if project_id is not None and (isinstance(project_id, bool) or not isinstance(project_id, int)):
+            return None, f'Item {index}: project_id must be an integer'
+        expanded.append({
+            'content_type': item['content_type'],
+            'project_id': project_id,
+            'platform': item.get('platform'),
+            'title': item.get('title'),
+            'description': item.get('description'),
+            'style': item.get('style')
+        })
+    return expanded, None
+
+
+class BulkMarketingGenerator:
+    """Deduplicated, concurrent marketing generation with per-item failure reporting"""
+    
+    def __init__(self, user_id, items, ai_service, concurrency=4):
+        """
+        Args:
+            user_id: ID of the designer
+            items: Items from expand_items()
+            ai_service: AIService making the generation calls
+            concurrency: Most AI calls in flight at once
+        """
+        self.user_id = user_id
+        self.items = items
+        self.ai_service = ai_service
+        self.concurrency = max(1, concurrency)
+        
+        # Distinct prompts in request order, each with the items it serves
+        self.prompts = {}
+        self.reservations = {}
+        self.results = {}
+        self._executor = None
+        self.summary = {
+            'requested': len(items),
+            'unique_prompts': 0,
+            'generated': 0,
+            'created': 0,
+            'failed': 0,
+            'errors': []
+        }
+    
+    def _fail(self, indexes, message):
+        """Count failed items and keep their error"""
+        self.summary['failed'] += len(indexes)
+        self.summary['errors'].extend({'item': index, 'error': message} for index in indexes)
+    
+    def prepare(self, connection):
+        """
+        Resolve the items' projects and group the items by prompt
+        
+        Args:
+            connection: Database connection
+        
+        Returns:
+            List of (item indexes, error) for items that cannot be generated
+        """
+        project_ids = sorted({item['project_id'] for item in self.items if item['project_id'] is not None})
+        projects = {}
+        if project_ids:
+            placeholders = ', '.join(['%s'] * len(project_ids))
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT id, title, description FROM projects
+                    WHERE user_id = %s AND id IN ({placeholders})
+                """, [self.user_id] + project_ids)
+                projects = {project['id']: project for project in cursor.fetchall()}
+        
+        missing = []
+        for index, item in enumerate(self.items):
+            if item['project_id'] is not None:
+                project = projects.get(item['project_id'])
+                if not project:
+                    missing.append(index)
+                    continue
+                item['project_info'] = {
+                    'title': project.get('title') or '',
+                    'description': project.get('description') or '',
+                    'style': item['style'] or ''
+                }
+            else:
+                item['project_info'] = {
+                    'title': item['title'] or 'Interior Design Project',
+                    'description': item['description'] or ''
+                }
+            
+            prompt = self.ai_service.marketing_prompt(item['content_type'], item['project_info'], item['platform'])
+            self.prompts.setdefault(prompt, []).append(index)
+        
+        self.summary['unique_prompts'] = len(self.prompts)
+        if missing:
+            self._fail(missing, 'Project not found')
+            return [(missing, 'Project not found')]
+        return []
+    
+    def reserve(self, quota):
+        """
+        Reserve one AI generation per distinct prompt
+        
+        Prompts beyond the remaining monthly quota are not generated.
+        
+        Args:
+            quota: QuotaService
+        
+        Returns:
+            List of (item indexes, error) for prompts over the quota
+        """
+        over_quota = []
+        for prompt, indexes in self.prompts.items():
+            reservation = None if over_quota else quota.reserve(self.user_id, 'marketing')
+            if reservation:
+                self.reservations[prompt] = reservation
+            else:
+                over_quota.extend(indexes)
+        
+        if over_quota:
+            self._fail(over_quota, 'AI generation limit reached')
+            return [(over_quota, 'AI generation limit reached')]
+        return []
+    
+    def _generate(self, prompt):
+        """Generate the content of one prompt (runs in the thread pool)"""
+        item = self.items[self.prompts[prompt][0]]
+        return self.ai_service.generate_marketing_content(
+            content_type=item['content_type'],
+            project_info=item['project_info'],
+            platform=item['platform']
+        )
+    
+    def generate(self):
+        """
+        Generate every reserved prompt, at most `concurrency` at a time
+        
+        Yields:
+            Progress events as prompts finish: {"event": "generated" or "failed",
+            "items": [...], "completed": n, "total": n}
+        """
+        total = len(self.reservations)
+        if not total:
+            return
+        
+        self._executor = ThreadPoolExecutor(max_workers=min(self.concurrency, total),
+                                            thread_name_prefix='marketing-bulk')
+        futures = {self._executor.submit(self._generate, prompt): prompt for prompt in self.reservations}
+        try:
+            for completed, future in enumerate(as_completed(futures), 1):
+                prompt = futures[future]
+                indexes = self.prompts[prompt]
+                try:
+                    content = future.result()
+                except Exception:
+                    content = None
+                
+                if content:
+                    self.results[prompt] = content
+                    self.summary['generated'] += 1
+                    yield {'event': 'generated', 'items': indexes, 'completed': completed, 'total': total}
+                else:
+                    self._fail(indexes, 'Failed to generate content')
+                    yield {'event': 'failed', 'items': indexes, 'error': 'Failed to generate content',
+                           'completed': completed, 'total': total}
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def save(self, connection):
+        """
+        Insert the generated content with one executemany and settle the quota
+        
+        Generations are kept on the quota only if their content was saved.
+        
+        Args:
+            connection: Database connection
+        
+        Returns:
+            Summary dictionary with requested, unique_prompts, generated,
+            created, failed and errors
+        """
+        rows = []
+        for prompt, content in self.results.items():
+            for index in self.prompts[prompt]:
+                item = self.items[index]
+                rows.append((item['project_id'], item['content_type'], item['platform'],
+                             item['project_info'].get('title'), content))
+        
+        try:
+            self.summary['created'] = MarketingContent(connection).bulk_create(self.user_id, rows)
+        except Exception as e:
+            self._fail([index for prompt in self.results for index in self.prompts[prompt]], f'Database error: {e}')
+            self.results = {}
+        
+        quota = QuotaService(connection)
+        for prompt, reservation in self.reservations.items():
+            if prompt in self.results:
+                quota.commit(reservation)
+            else:
+                quota.release(reservation)
+        
+        if self.summary['created']:
+            ActivityLog(connection).log(self.user_id, 'marketing_content_bulk_generated', 'marketing', None, {
+                'requested': self.summary['requested'],
+                'created': self.summary['created'],
+                'failed': self.summary['failed']
+            })
+        
+        self.summary['errors'].sort(key=lambda error: error['item'])
+        return self.summary
+    
+    def close(self):
+        """
+        Stop pending AI calls and refund every reservation that was not settled
+        
+        Called when the stream ends early (e.g. the client disconnected).
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        
+        unsettled = [reservation for reservation in self.reservations.values() if not reservation.settled]
+        if not unsettled:
+            return
+        connection = get_db_connection()
+        try:
+            quota = QuotaService(connection)
+            for reservation in unsettled:
+                quota.release(reservation)
+        finally:
+            close_db_connection(connection)
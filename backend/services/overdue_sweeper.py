@@ -0,0 +1,117 @@
+# Overdue Sweeper Service - marks unpaid invoices past their due date as overdue
+# Runs on the background scheduler in batches across all designers, so listing invoices stays read-only
+
+import logging
+import threading
+import time
+from datetime import date, datetime
+
+from config import get_config
+from models.activity import ActivityLog
+from models.invoice import Invoice
+from services.scheduler import get_scheduler
+from utils.db import close_db_connection, get_db_connection
+
+logger = logging.getLogger('ai_studio.overdue_sweeper')
+
+
+class OverdueSweeper:
+    """Periodic overdue marking with activity entries"""
+    
+    def __init__(self, batch_size=500):
+        """
+        Args:
+            batch_size: Invoices updated per transaction
+        """
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._counters = {'runs': 0, 'marked': 0, 'errors': 0}
+        self._last_run = None
+    
+    def sweep(self, today=None):
+        """
+        Mark every 'sent' invoice due before today as overdue
+        
+        Args:
+            today: Reference date (defaults to today)
+        
+        Returns:
+            Number of invoices marked as overdue
+        """
+        today = today or date.today()
+        started = time.perf_counter()
+        marked = 0
+        
+        connection = get_db_connection()
+        try:
+            invoice_model = Invoice(connection)
+            activity = ActivityLog(connection)
+            
+            while True:
+                changed = invoice_model.mark_overdue_batch(today, self.batch_size)
+                if not changed:
+                    break
+                marked += len(changed)
+                
+                activity.log_many([
+                    (invoice['user_id'], 'invoice_overdue', 'invoice', invoice['id'],
+                     {'invoice_number': invoice['invoice_number'], 'amount': float(invoice['amount'])})
+                    for invoice in changed
+                ])
+        except Exception as e:
+            with self._lock:
+                self._counters['errors'] += 1
+            logger.error('Overdue sweep failed after %s invoices: %s', marked, e)
+            raise
+        finally:
+            close_db_connection(connection)
+            
+            with self._lock:
+                self._counters['runs'] += 1
+                self._counters['marked'] += marked
+                self._last_run = {
+                    'at': datetime.now().isoformat(timespec='seconds'),
+                    'marked': marked,
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+                }
+        
+        if marked:
+            logger.info('Marked %s invoices overdue', marked)
+        return marked
+    
+    def stats(self):
+        """
+        Sweep counters for health checks
+        
+        Returns:
+            Dictionary of counters and the last run
+        """
+        with self._lock:
+            return {'batch_size': self.batch_size, 'last_run': self._last_run, **self._counters}
+
+
+def _build_sweeper():
+    """Create the shared sweeper from configuration"""
+    return OverdueSweeper(batch_size=get_config().OVERDUE_SWEEP_BATCH_SIZE)
+
+
+# Shared sweeper run by the background scheduler
+overdue_sweeper = _build_sweeper()
+
+
+def init_overdue_sweeper(app):
+    """
+    Schedule the overdue sweep (first run at startup)
+    
+    Every worker process schedules its own sweep; runs in different workers
+    do not conflict because each invoice is only updated while still 'sent'.
+    
+    Args:
+        app: Flask application
+    """
+    config = get_config()
+    if not config.OVERDUE_SWEEP_ENABLED:
+        return
+    
+    get_scheduler().add_job(overdue_sweeper.sweep, 'interval', minutes=config.OVERDUE_SWEEP_INTERVAL_MINUTES,
+                            id='overdue_sweep', replace_existing=True, next_run_time=datetime.now())
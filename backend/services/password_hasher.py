@@ -0,0 +1,207 @@
+# Password Hasher Service - bcrypt hashing off the request thread
+# Runs bcrypt in a bounded process pool so login bursts cannot starve the web workers
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+from config import get_config
+from utils.metrics import JOB_QUEUE_DEPTH
+
+
+# Shown to users when PasswordHasherBusy is answered with 503
+BUSY_MESSAGE = 'Too many sign-in attempts right now. Please retry shortly.'
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503"""
+
+
+def _hash_password(password, rounds):
+    """Hash a password (runs in a pool process)"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password, password_hash):
+    """Check a password against a bcrypt hash (runs in a pool process)"""
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        # Malformed hash
+        return False
+
+
+def hash_rounds(password_hash):
+    """
+    Read the cost factor from a bcrypt hash
+    
+    Args:
+        password_hash: Hash such as '$2b$12$...'
+    
+    Returns:
+        Cost factor, or None if the hash is not bcrypt
+    """
+    parts = (password_hash or '').split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """Bounded bcrypt worker pool with queueing metrics"""
+    
+    def __init__(self, rounds=12, max_workers=2, max_queue=1, queue_timeout=0.0):
+        """
+        Args:
+            rounds: bcrypt cost factor for new hashes
+            max_workers: Hashing processes (0 hashes inline on the calling thread)
+            max_queue: Jobs allowed to wait for a free process before rejecting
+                (workers + queue should stay below the request threads)
+            queue_timeout: Seconds a caller waits for a queue slot before rejecting
+                (0 rejects at once)
+        """
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        
+        self._in_flight = 0
+        self._counters = {'hashed': 0, 'verified': 0, 'rejected': 0, 'rehashed': 0}
+        self._busy_seconds = 0.0
+        self._max_job_ms = 0.0
+    
+    def _get_executor(self):
+        """Create the process pool lazily, once per (forked) process"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._executor_pid = os.getpid()
+            return self._executor
+    
+    def _run(self, func, *args):
+        """Run a bcrypt job in the pool, enforcing the queue bound"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise PasswordHasherBusy('Password hashing queue is full')
+        
+        started = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        JOB_QUEUE_DEPTH.labels('password_hasher').inc()
+        try:
+            if self.max_workers == 0:
+                return func(*args)
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._in_flight -= 1
+                self._busy_seconds += elapsed
+                self._max_job_ms = max(self._max_job_ms, elapsed * 1000)
+            JOB_QUEUE_DEPTH.labels('password_hasher').dec()
+            self._slots.release()
+    
+    def hash(self, password):
+        """
+        Hash a password with the configured cost factor
+        
+        Args:
+            password: Plain text password
+        
+        Returns:
+            bcrypt hash string
+        
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full
+        """
+        password_hash = self._run(_hash_password, password, self.rounds)
+        with self._lock:
+            self._counters['hashed'] += 1
+        return password_hash
+    
+    def verify(self, password, password_hash):
+        """
+        Check a password against a stored hash
+        
+        Args:
+            password: Plain text password
+            password_hash: Stored bcrypt hash
+        
+        Returns:
+            True if the password matches
+        
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full
+        """
+        matches = self._run(_check_password, password, password_hash)
+        with self._lock:
+            self._counters['verified'] += 1
+        return matches
+    
+    def needs_rehash(self, password_hash):
+        """
+        Whether a stored hash uses a different cost factor than configured
+        
+        Args:
+            password_hash: Stored bcrypt hash
+        
+        Returns:
+            True if the hash should be regenerated
+        """
+        return hash_rounds(password_hash) != self.rounds
+    
+    def record_rehash(self):
+        """Count a hash upgraded on login"""
+        with self._lock:
+            self._counters['rehashed'] += 1
+    
+    def stats(self):
+        """
+        Queueing metrics for health checks and monitoring
+        
+        Returns:
+            Dictionary of pool size, queue depth and job counters
+        """
+        with self._lock:
+            jobs = self._counters['hashed'] + self._counters['verified']
+            return {
+                'rounds': self.rounds,
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'queued': max(self._in_flight - max(self.max_workers, 1), 0),
+                'avg_job_ms': round(self._busy_seconds * 1000 / jobs, 2) if jobs else 0.0,
+                'max_job_ms': round(self._max_job_ms, 2),
+                **self._counters
+            }
+    
+    def shutdown(self):
+        """Stop the pool processes"""
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _build_hasher():
+    """Create the shared hasher from configuration"""
+    config = get_config()
+    return PasswordHasher(
+        rounds=config.BCRYPT_LOG_ROUNDS,
+        max_workers=config.PASSWORD_HASH_WORKERS,
+        max_queue=config.PASSWORD_HASH_MAX_QUEUE,
+        queue_timeout=config.PASSWORD_HASH_QUEUE_TIMEOUT
+    )
+
+
+# Shared hasher used by the User model
+password_hasher = _build_hasher()
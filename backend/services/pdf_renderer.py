@@ -0,0 +1,550 @@
+# PDF Renderer Service - invoice and moodboard PDFs rendered off the request thread
+# Renders in a bounded process pool into an on-disk cache keyed by a content hash of the document
+
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from config import get_config
+from utils.metrics import JOB_QUEUE_DEPTH
+from utils.pdf import PdfDocument, wrap_text
+
+# Bump when the layout changes so cached PDFs are rendered again
+RENDERER_VERSION = 2
+
+# Moodboards with an image that could not be loaded are written under this
+# suffix instead of their cache path, so the next request renders them again
+PARTIAL_SUFFIX = '.partial.pdf'
+
+_HEX_COLOR = re.compile(r'#?\b([0-9a-fA-F]{6})\b')
+
+_INK = (33, 37, 41)
+_MUTED = (108, 117, 125)
+_RULE = (222, 226, 230)
+
+
+# Shown to users when PdfRendererBusy is answered with 503
+BUSY_MESSAGE = 'Too many documents are being generated right now. Please retry shortly.'
+
+
+class PdfRendererBusy(Exception):
+    """Raised when the render queue is full; callers should answer 503"""
+
+
+def content_key(kind, document):
+    """
+    Cache key of a document version
+    
+    Args:
+        kind: 'invoice' or 'moodboard'
+        document: Everything the rendered PDF depends on
+    
+    Returns:
+        Hex digest that changes whenever the rendered output would
+    """
+    payload = json.dumps({'kind': kind, 'version': RENDERER_VERSION, 'document': document},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _money(value):
+    """Format an amount for display"""
+    try:
+        return f"${float(value):,.2f}"
+    except (TypeError, ValueError):
+        return str(value or '')
+
+
+def _parse_color(item):
+    """(label, (r, g, b) or None) of a palette entry (string or dictionary)"""
+    if isinstance(item, dict):
+        label = str(item.get('name') or item.get('label') or '')
+        raw = str(item.get('hex') or item.get('color') or item.get('code') or '')
+    else:
+        label = raw = str(item)
+    match = _HEX_COLOR.search(raw)
+    if not match:
+        return label, None
+    value = match.group(1)
+    return label or f"#{value.upper()}", tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _as_list(value):
+    """Palette or product list as a list (AI output may be a string)"""
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    return [part.strip(' -•') for part in re.split(r'[\n,;]', str(value)) if part.strip(' -•')]
+
+
+def _product_line(item):
+    """(name, detail) of a product list entry"""
+    if isinstance(item, dict):
+        name = item.get('name') or item.get('item') or item.get('title') or ''
+        details = [str(item[key]) for key in ('vendor', 'category') if item.get(key)]
+        if item.get('price') not in (None, ''):
+            details.append(_money(item['price']))
+        return str(name), ' · '.join(details)
+    return str(item), ''
+
+
+def _load_thumbnail(url, upload_folder, timeout, size=(480, 360)):
+    """
+    Fetch an image and shrink it to a JPEG thumbnail
+    
+    Args:
+        url: http(s) URL or a path of an uploaded file
+        upload_folder: Directory uploaded files live in
+        timeout: Seconds allowed for a remote fetch
+        size: Maximum thumbnail size in pixels
+    
+    Returns:
+        (jpeg_bytes, width, height), or None if the image is unavailable
+    """
+    from PIL import Image
+    
+    try:
+        if url.startswith(('http://', 'https://')):
+            import requests
+            response = requests.get(url, timeout=timeout)
+            response.raise_for_status()
+            data = response.content
+        else:
+            # Only files inside the upload folder
+            with open(os.path.join(upload_folder, os.path.basename(url)), 'rb') as f:
+                data = f.read()
+        
+        image = Image.open(io.BytesIO(data)).convert('RGB')
+        image.thumbnail(size)
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=80)
+        return output.getvalue(), image.width, image.height
+    except Exception:
+        return None
+
+
+def _page_header(document, title, subtitle):
+    """Start a page with a title block; returns (page, y below the header)"""
+    page = document.add_page()
+    top = page.height - 56
+    page.text(48, top, title, size=20, bold=True, color=_INK)
+    if subtitle:
+        page.text(48, top - 18, subtitle, size=10, color=_MUTED)
+    page.line(48, top - 30, page.width - 48, top - 30, color=_RULE)
+    return page, top - 54
+
+
+def render_invoice(invoice, designer, path):
+    """
+    Render an invoice or quote to a PDF file (runs in a pool process)
+    
+    Args:
+        invoice: Invoice dictionary (as returned by Invoice.get_by_id)
+        designer: Dictionary with the designer's name and email
+        path: Output file path
+    
+    Returns:
+        Path of the written file
+    """
+    kind = 'Quote' if invoice.get('type') == 'quote' else 'Invoice'
+    document = PdfDocument(title=f"{kind} {invoice.get('invoice_number', '')}")
+    page, y = _page_header(document, f"{kind} {invoice.get('invoice_number', '')}",
+                           f"Status: {str(invoice.get('status') or 'draft').capitalize()}")
+    right = page.width - 48
+    
+    page.text(48, y, 'From', size=9, bold=True, color=_MUTED)
+    page.text(300, y, 'Bill to', size=9, bold=True, color=_MUTED)
+    y -= 14
+    page.text(48, y, designer.get('name') or '', size=11, color=_INK)
+    page.text(300, y, invoice.get('client_name') or '-', size=11, color=_INK)
+    y -= 14
+    page.text(48, y, designer.get('email') or '', size=10, color=_MUTED)
+    if invoice.get('project_title'):
+        page.text(300, y, f"Project: {invoice['project_title']}", size=10, color=_MUTED)
+    y -= 32
+    
+    for label, key in (('Issue date', 'issue_date'), ('Due date', 'due_date'), ('Paid on', 'paid_date')):
+        if invoice.get(key):
+            page.text(48, y, label, size=10, color=_MUTED)
+            page.text(140, y, str(invoice[key])[:10], size=10, color=_INK)
+            y -= 16
+    y -= 16
+    
+    page.rect(48, y - 6, right - 48, 22, fill=(241, 243, 245))
+    page.text(56, y, 'Description', size=10, bold=True, color=_INK)
+    page.text_right(right - 8, y, 'Amount', size=10, bold=True, color=_INK)
+    y -= 28
+    description = invoice.get('project_title') or f"Design services ({kind.lower()})"
+    page.text(56, y, description, size=10, color=_INK)
+    page.text_right(right - 8, y, _money(invoice.get('amount')), size=10, color=_INK)
+    y -= 14
+    page.line(48, y, right, y, color=_RULE)
+    y -= 22
+    page.text_right(right - 120, y, 'Total', size=12, bold=True, color=_INK)
+    page.text_right(right - 8, y, _money(invoice.get('amount')), size=12, bold=True, color=_INK)
+    y -= 40
+    
+    if invoice.get('notes'):
+        page.text(48, y, 'Notes', size=9, bold=True, color=_MUTED)
+        y -= 14
+        for line in wrap_text(invoice['notes'], 10, right - 48):
+            if y < 60:
+                page = document.add_page()
+                y = page.height - 56
+            page.text(48, y, line, size=10, color=_INK)
+            y -= 14
+    
+    _save(document, path)
+    return path
+
+
+def render_moodboard(design, upload_folder, thumbnail_timeout, path):
+    """
+    Render a design moodboard to a PDF file (runs in a pool process)
+    
+    Args:
+        design: Design dictionary with parsed JSON fields (see Design.get_by_id)
+        upload_folder: Directory uploaded images are read from
+        thumbnail_timeout: Seconds allowed per remote image
+        path: Output file path
+    
+    Returns:
+        Path of the written file: path, or its PARTIAL_SUFFIX variant when an
+        image could not be loaded (a placeholder is drawn in its place)
+    """
+    title = ' '.join(part for part in (str(design.get('style') or '').title(),
+                                       str(design.get('room_type') or '').title()) if part) or 'Design concept'
+    document = PdfDocument(title=title)
+    subtitle = design.get('project_title') or ''
+    if design.get('budget'):
+        subtitle = f"{subtitle} · Budget {_money(design['budget'])}" if subtitle else f"Budget {_money(design['budget'])}"
+    page, y = _page_header(document, title, subtitle)
+    right = page.width - 48
+    
+    def ensure_space(height):
+        nonlocal page, y
+        if y - height < 56:
+            page = document.add_page()
+            y = page.height - 56
+    
+    # Thumbnails, two per row (a placeholder for images that failed to load)
+    thumbnails = [_load_thumbnail(url, upload_folder, thumbnail_timeout)
+                  for url in (design.get('image_urls') or [])[:4]]
+    cell_width = (right - 48 - 12) / 2
+    for index, thumbnail in enumerate(thumbnails):
+        height = cell_width * thumbnail[2] / thumbnail[1] if thumbnail else cell_width * 3 / 4
+        if index % 2 == 0:
+            ensure_space(height)
+        x = 48 + (index % 2) * (cell_width + 12)
+        if thumbnail:
+            jpeg, pixel_width, pixel_height = thumbnail
+            page.image(jpeg, pixel_width, pixel_height, x, y - height, cell_width, height)
+        else:
+            page.rect(x, y - height, cell_width, height, fill=(241, 243, 245))
+            page.text(x + 12, y - height / 2, 'Image unavailable', size=9, color=_MUTED)
+        if index % 2 == 1 or index == len(thumbnails) - 1:
+            y -= height + 20
+    
+    if design.get('description'):
+        ensure_space(30)
+        page.text(48, y, 'Concept', size=12, bold=True, color=_INK)
+        y -= 18
+        for line in wrap_text(design['description'], 10, right - 48):
+            ensure_space(14)
+            page.text(48, y, line, size=10, color=_INK)
+            y -= 14
+        y -= 12
+    
+    palette = [_parse_color(item) for item in _as_list(design.get('color_palette'))]
+    if palette:
+        ensure_space(80)
+        page.text(48, y, 'Color palette', size=12, bold=True, color=_INK)
+        y -= 52
+        x = 48
+        for label, rgb in palette[:8]:
+            if rgb:
+                page.rect(x, y, 56, 36, fill=rgb)
+            else:
+                page.rect(x, y, 56, 36, fill=(241, 243, 245))
+            for offset, line in enumerate(wrap_text(label, 7, 60)[:2]):
+                page.text(x, y - 10 - offset * 9, line, size=7, color=_MUTED)
+            x += 64
+        y -= 40
+    
+    products = [_product_line(item) for item in _as_list(design.get('product_list'))]
+    if products:
+        ensure_space(40)
+        page.text(48, y, 'Products', size=12, bold=True, color=_INK)
+        y -= 18
+        for name, detail in products:
+            lines = wrap_text(name, 10, right - 48 - 170)
+            ensure_space(14 * len(lines) + 6)
+            for offset, line in enumerate(lines):
+                page.text(56, y - offset * 14, line, size=10, color=_INK)
+            if detail:
+                page.text_right(right, y, detail, size=9, color=_MUTED)
+            y -= 14 * len(lines) + 4
+            page.line(48, y + 8, right, y + 8, color=_RULE)
+    
+    if None in thumbnails:
+        path = path[:-len('.pdf')] + PARTIAL_SUFFIX
+    _save(document, path)
+    return path
+
+
+def _save(document, path):
+    """Write a document next to its final path and move it into place"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            size = document.write(f)
+        os.replace(temp_path, path)
+        return size
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class PdfRenderer:
+    """Bounded render pool with an on-disk, content-addressed PDF cache"""
+    
+    def __init__(self, cache_dir, max_workers=2, max_queue=8, queue_timeout=1.0,
+                 render_timeout=30.0, cache_max_bytes=512 * 1024 * 1024, thumbnail_timeout=3.0,
+                 upload_folder=''):
+        """
+        Args:
+            cache_dir: Directory rendered PDFs are kept in
+            max_workers: Rendering processes (0 renders inline on the calling thread)
+            max_queue: Renders allowed to wait for a free process before rejecting
+            queue_timeout: Seconds a caller waits for a queue slot before rejecting
+            render_timeout: Seconds a caller waits for its render to finish
+            cache_max_bytes: Cache size above which the least recently used PDFs are removed
+            thumbnail_timeout: Seconds allowed per remote moodboard image
+            upload_folder: Directory uploaded images are read from
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.render_timeout = render_timeout
+        self.cache_max_bytes = cache_max_bytes
+        self.thumbnail_timeout = thumbnail_timeout
+        self.upload_folder = upload_folder
+        
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._in_flight = {}
+        self._counters = {'hits': 0, 'rendered': 0, 'joined': 0, 'rejected': 0, 'failed': 0, 'evicted': 0}
+        self._render_seconds = 0.0
+    
+    def _get_executor(self):
+        """Create the process pool lazily, once per (forked) process"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._executor_pid = os.getpid()
+                self._in_flight = {}
+            return self._executor
+    
+    def cache_path(self, key):
+        """Path of a cached PDF"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pdf")
+    
+    def _render(self, key, func, *args):
+        """
+        Return the cached PDF of a key, rendering it first if needed
+        
+        Concurrent requests for the same document share one render.
+        
+        Returns:
+            Path of the PDF (see render_moodboard for renders that are not cached)
+        """
+        path = self.cache_path(key)
+        if os.path.exists(path):
+            try:
+                # Mark as recently used for eviction
+                os.utime(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._counters['hits'] += 1
+            return path
+        
+        executor = self._get_executor() if self.max_workers else None
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self._counters['joined'] += 1
+        
+        if owner:
+            self._start(key, future, executor, func, *args, path)
+        try:
+            return future.result(timeout=self.render_timeout)
+        except FutureTimeout:
+            raise PdfRendererBusy('PDF render timed out')
+    
+    def _start(self, key, future, executor, func, *args):
+        """Run a render job in the pool and resolve the shared future"""
+        def finish(result=None, error=None):
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._in_flight.pop(key, None)
+                self._render_seconds += elapsed
+                self._counters['failed' if error else 'rendered'] += 1
+            JOB_QUEUE_DEPTH.labels('pdf_renderer').dec()
+            self._slots.release()
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+                self._evict()
+        
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._in_flight.pop(key, None)
+                self._counters['rejected'] += 1
+            future.set_exception(PdfRendererBusy('PDF render queue is full'))
+            return
+        
+        started = time.perf_counter()
+        JOB_QUEUE_DEPTH.labels('pdf_renderer').inc()
+        if executor is None:
+            try:
+                result = func(*args)
+            except Exception as e:
+                finish(error=e)
+            else:
+                finish(result)
+            return
+        
+        def done(job):
+            error = job.exception()
+            finish(None if error else job.result(), error)
+        
+        try:
+            executor.submit(func, *args).add_done_callback(done)
+        except Exception as e:
+            # Pool broken or shut down
+            finish(error=e)
+    
+    def _evict(self):
+        """Remove least recently used PDFs while the cache is over its size limit"""
+        if not self.cache_max_bytes:
+            return
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.pdf'):
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.cache_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self._counters['evicted'] += 1
+    
+    def invoice_pdf(self, invoice, designer):
+        """
+        PDF of an invoice or quote
+        
+        Args:
+            invoice: Invoice dictionary (as returned by Invoice.get_by_id)
+            designer: Dictionary with the designer's name and email
+        
+        Returns:
+            (path, key) of the cached PDF; the key doubles as its ETag
+        
+        Raises:
+            PdfRendererBusy: If the render queue is full
+        """
+        key = content_key('invoice', {'invoice': invoice, 'designer': designer})
+        return self._render(key, render_invoice, invoice, designer), key
+    
+    def moodboard_pdf(self, design):
+        """
+        PDF of a design moodboard
+        
+        Args:
+            design: Design dictionary with parsed JSON fields
+        
+        Returns:
+            (path, key) of the cached PDF; the key doubles as its ETag. The key
+            is False when an image could not be loaded: that PDF is neither
+            cached nor given an ETag, so it is rendered again next time.
+        
+        Raises:
+            PdfRendererBusy: If the render queue is full
+        """
+        key = content_key('moodboard', design)
+        path = self._render(key, render_moodboard, design, self.upload_folder, self.thumbnail_timeout)
+        return path, key if path == self.cache_path(key) else False
+    
+    def stats(self):
+        """
+        Render and cache counters for health checks
+        
+        Returns:
+            Dictionary of pool size, renders in progress and counters
+        """
+        with self._lock:
+            renders = self._counters['rendered'] + self._counters['failed']
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': len(self._in_flight),
+                'avg_render_ms': round(self._render_seconds * 1000 / renders, 2) if renders else 0.0,
+                **self._counters
+            }
+    
+    def shutdown(self):
+        """Stop the pool processes"""
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _build_renderer():
+    """Create the shared renderer from configuration"""
+    config = get_config()
+    return PdfRenderer(
+        cache_dir=config.PDF_CACHE_DIR,
+        max_workers=config.PDF_RENDER_WORKERS,
+        max_queue=config.PDF_RENDER_MAX_QUEUE,
+        queue_timeout=config.PDF_RENDER_QUEUE_TIMEOUT,
+        render_timeout=config.PDF_RENDER_TIMEOUT,
+        cache_max_bytes=config.PDF_CACHE_MAX_MB * 1024 * 1024,
+        thumbnail_timeout=config.PDF_THUMBNAIL_TIMEOUT,
+        upload_folder=config.UPLOAD_FOLDER
+    )
+
+
+# Shared renderer used by the invoice and design routes
+pdf_renderer = _build_renderer()
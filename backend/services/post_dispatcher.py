@@ -0,0 +1,374 @@
+# Post Dispatcher Service - publishes scheduled marketing posts of all designers when they fall due
+# Batches are claimed with one UPDATE under a lease (renewed while publishing, so workers never post twice)
+# and published in a thread pool
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from config import get_config
+from models.activity import ActivityLog
+from models.marketing import MarketingContent
+from services.scheduler import get_scheduler
+from utils.db import close_db_connection, get_db_connection
+from utils.metrics import JOB_QUEUE_DEPTH
+
+logger = logging.getLogger('ai_studio.marketing')
+
+
+def _utcnow():
+    """Current time as naive UTC, the form scheduled dates are stored in"""
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+class PublishError(Exception):
+    """
+    A post could not be published
+    
+    Args:
+        message: What went wrong
+        retryable: False when retrying cannot help (e.g. content rejected by
+                   the platform); the post is then marked 'failed' at once
+    """
+    
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class PlatformAdapter(ABC):
+    """
+    Publishing channel for one or more platforms
+    
+    Subclasses must implement publish(); it is called from worker threads, one
+    post at a time, and must be thread-safe.
+    """
+    
+    name = 'base'
+    
+    # Stand-ins do not reach any platform; they only run under DEBUG or TESTING
+    stand_in = False
+    
+    @abstractmethod
+    def publish(self, post):
+        """
+        Publish one post
+        
+        Args:
+            post: Claimed post (id, user_id, project_id, content_type, platform,
+                  title, content, scheduled_date, attempts)
+        
+        Returns:
+            Dictionary with the platform's external_id and post_url (either may be None)
+        
+        Raises:
+            PublishError: If the post was not published
+        """
+
+
+class LocalPublisher(PlatformAdapter):
+    """
+    Stand-in for the social platforms: appends posts to per-platform NDJSON
+    files in an outbox directory (no external service)
+    """
+    
+    name = 'local'
+    stand_in = True
+    
+    def __init__(self, outbox_dir=None):
+        self.outbox_dir = outbox_dir or get_config().MARKETING_OUTBOX_DIR
+        self._lock = threading.Lock()
+    
+    def publish(self, post):
+        platform = (post.get('platform') or 'general').lower()
+        path = os.path.join(self.outbox_dir, f"{''.join(c for c in platform if c.isalnum()) or 'general'}.ndjson")
+        line = json.dumps({
+            'id': post['id'],
+            'user_id': post['user_id'],
+            'platform': post.get('platform'),
+            'title': post.get('title'),
+            'content': post.get('content'),
+            'scheduled_date': str(post.get('scheduled_date')),
+            'published_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+        })
+        try:
+            with self._lock:
+                os.makedirs(self.outbox_dir, exist_ok=True)
+                with open(path, 'a', encoding='utf-8') as outbox:
+                    outbox.write(line + '\n')
+        except OSError as e:
+            raise PublishError(f'Could not write to outbox: {e}')
+        return {'external_id': f"local-{post['id']}", 'post_url': f"file://{path}#{post['id']}"}
+
+
+class MemoryPublisher(PlatformAdapter):
+    """Keeps published posts in memory, for tests and benchmarks"""
+    
+    name = 'memory'
+    stand_in = True
+    
+    def __init__(self):
+        self.published = []
+        self._lock = threading.Lock()
+    
+    def publish(self, post):
+        with self._lock:
+            self.published.append(post)
+        return {'external_id': f"memory-{post['id']}", 'post_url': None}
+
+
+# Stand-in adapters selectable with MARKETING_PUBLISHER
+ADAPTERS = {adapter.name: adapter for adapter in (LocalPublisher, MemoryPublisher)}
+
+
+class PostDispatcher:
+    """Publishes due scheduled posts across all designers"""
+    
+    def __init__(self, adapter=None, batch_size=500, workers=8, max_attempts=5, lease_seconds=300,
+                 interval_seconds=30, retry_seconds=60):
+        """
+        Args:
+            adapter: Default PlatformAdapter for platforms without their own adapter;
+                     without one, only posts for registered platforms are claimed
+            batch_size: Posts claimed per UPDATE
+            workers: Posts published concurrently
+            max_attempts: Attempts before a post is marked 'failed'
+            lease_seconds: How long a claim is held before other workers may take the post
+                           over; renewed every third of it while a batch is publishing
+            interval_seconds: How often due posts are looked for
+            retry_seconds: Delay before the first retry; doubles with every attempt
+        """
+        self.adapter = adapter
+        self.adapters = {}
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.lease = timedelta(seconds=lease_seconds)
+        self.interval = interval_seconds
+        self.retry = timedelta(seconds=retry_seconds)
+        
+        self._executor = None
+        self._lock = threading.Lock()
+        self._dispatch_lock = threading.Lock()
+        self._counters = {'runs': 0, 'posted': 0, 'retried': 0, 'failed': 0}
+        self._last_run = None
+    
+    def set_adapter(self, adapter):
+        """Replace the default adapter (e.g. with a MemoryPublisher in tests)"""
+        self.adapter = adapter
+    
+    def register_adapter(self, platform, adapter):
+        """
+        Publish one platform's posts through its own adapter
+        
+        Args:
+            platform: Platform name as stored on the posts (case-insensitive)
+            adapter: PlatformAdapter for that platform
+        """
+        self.adapters[platform.lower()] = adapter
+    
+    def platforms(self):
+        """Platforms whose posts can be claimed, or None for every platform"""
+        return None if self.adapter is not None else sorted(self.adapters)
+    
+    def adapter_for(self, post):
+        """The adapter publishing a post"""
+        return self.adapters.get((post.get('platform') or '').lower(), self.adapter)
+    
+    def start(self, scheduler=None):
+        """
+        Look for due posts periodically
+        
+        Args:
+            scheduler: APScheduler instance (defaults to the shared one)
+        """
+        scheduler = scheduler or get_scheduler()
+        scheduler.add_job(self.dispatch, 'interval', seconds=self.interval, id='marketing_dispatch',
+                          replace_existing=True, next_run_time=datetime.now(timezone.utc))
+    
+    def dispatch(self, now=None):
+        """
+        Claim and publish every post that is due, batch by batch
+        
+        Args:
+            now: Reference time (naive UTC, defaults to now)
+        
+        Returns:
+            Number of posts published
+        """
+        platforms = self.platforms()
+        if platforms == []:
+            # Nothing can publish: posts stay scheduled instead of being marked posted
+            return 0
+        
+        posted = retried = failed = 0
+        with self._dispatch_lock:
+            connection = get_db_connection()
+            try:
+                marketing = MarketingContent(connection)
+                while True:
+                    reference = now or _utcnow()
+                    claim = uuid.uuid4().hex
+                    batch = marketing.claim_due(claim, reference, reference + self.lease,
+                                                limit=self.batch_size, platforms=platforms)
+                    if not batch:
+                        break
+                    JOB_QUEUE_DEPTH.labels('marketing_posts').set(len(batch))
+                    
+                    def renew():
+                        marketing.renew_claims(claim, max(_utcnow(), reference) + self.lease)
+                    
+                    done, retries, failures = self._publish_batch(batch, reference, renew)
+                    marked = marketing.mark_posted_many(claim, [
+                        (post['id'], result.get('external_id'), result.get('post_url')) for post, result in done
+                    ])
+                    if marked != len(done):
+                        logger.error('Lost the claim on %s published posts; they may be published again',
+                                     len(done) - marked)
+                    marketing.release_failed(claim, retries + failures)
+                    ActivityLog(connection).log_many([
+                        (post['user_id'], 'content_posted', 'marketing', post['id'],
+                         {'platform': post.get('platform'), 'post_url': result.get('post_url')})
+                        for post, result in done
+                    ])
+                    
+                    posted += len(done)
+                    retried += len(retries)
+                    failed += len(failures)
+                    if len(batch) < self.batch_size:
+                        break
+            except Exception as e:
+                logger.error('Marketing post dispatch failed: %s', e)
+            finally:
+                close_db_connection(connection)
+                JOB_QUEUE_DEPTH.labels('marketing_posts').set(0)
+        
+        with self._lock:
+            self._counters['runs'] += 1
+            self._counters['posted'] += posted
+            self._counters['retried'] += retried
+            self._counters['failed'] += failed
+            self._last_run = {'at': datetime.now().isoformat(timespec='seconds'), 'posted': posted,
+                              'retried': retried, 'failed': failed}
+        
+        if posted:
+            logger.info('Published %s scheduled posts', posted)
+        return posted
+    
+    def _publish_batch(self, batch, now, renew):
+        """
+        Publish a claimed batch concurrently
+        
+        The claim lease is renewed while posts are still publishing, so slow
+        adapters never let another worker take the batch over.
+        
+        Args:
+            batch: Claimed posts
+            now: Reference time of the claim (naive UTC)
+            renew: Callable extending the batch's claim lease
+        
+        Returns:
+            ([(post, result)] published, [(id, error, retry_at)] to retry,
+             [(id, error, None)] given up on)
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='marketing-publish')
+        
+        futures = [self._executor.submit(self._publish, post) for post in batch]
+        pending = set(futures)
+        renew_every = self.lease.total_seconds() / 3
+        renewed_at = time.monotonic()
+        while pending:
+            _, pending = wait(pending, timeout=renew_every, return_when=FIRST_COMPLETED)
+            if pending and time.monotonic() - renewed_at >= renew_every:
+                renew()
+                renewed_at = time.monotonic()
+        
+        done, retries, failures = [], [], []
+        for post, outcome in zip(batch, (future.result() for future in futures)):
+            if isinstance(outcome, dict):
+                done.append((post, outcome))
+                continue
+            
+            attempts = post.get('attempts') or 1
+            if getattr(outcome, 'retryable', True) and attempts < self.max_attempts:
+                retries.append((post['id'], outcome, now + self.retry * 2 ** (attempts - 1)))
+            else:
+                failures.append((post['id'], outcome, None))
+            logger.warning('Publishing post %s (attempt %s) failed: %s', post['id'], attempts, outcome)
+        return done, retries, failures
+    
+    def _publish(self, post):
+        """Publish one post; returns the adapter's result or the exception it raised"""
+        try:
+            return self.adapter_for(post).publish(post) or {}
+        except Exception as e:
+            return e
+    
+    def stats(self):
+        """
+        Dispatcher counters for health checks
+        
+        Returns:
+            Dictionary with the adapters, counters and the last run
+        """
+        with self._lock:
+            return {
+                'adapter': self.adapter.name if self.adapter else None,
+                'platform_adapters': {platform: adapter.name for platform, adapter in self.adapters.items()},
+                'last_run': self._last_run,
+                **self._counters
+            }
+
+
+def _build_dispatcher():
+    """Create the shared dispatcher from configuration"""
+    config = get_config()
+    adapter = None
+    if config.MARKETING_PUBLISHER:
+        adapter = ADAPTERS.get(config.MARKETING_PUBLISHER)
+        if adapter is None:
+            raise ValueError(f"Unknown MARKETING_PUBLISHER '{config.MARKETING_PUBLISHER}' "
+                             f"(choose from {', '.join(ADAPTERS)})")
+        if adapter.stand_in and not (getattr(config, 'DEBUG', False) or getattr(config, 'TESTING', False)):
+            raise ValueError(f"MARKETING_PUBLISHER '{config.MARKETING_PUBLISHER}' is a stand-in that does not "
+                             f"publish anywhere; it is only allowed in development and testing")
+        adapter = adapter()
+    return PostDispatcher(
+        adapter=adapter,
+        batch_size=config.MARKETING_DISPATCH_BATCH_SIZE,
+        workers=config.MARKETING_PUBLISH_WORKERS,
+        max_attempts=config.MARKETING_PUBLISH_MAX_ATTEMPTS,
+        lease_seconds=config.MARKETING_CLAIM_LEASE_SECONDS,
+        interval_seconds=config.MARKETING_DISPATCH_INTERVAL_SECONDS,
+        retry_seconds=config.MARKETING_PUBLISH_RETRY_SECONDS
+    )
+
+
+# Shared dispatcher driven by the background scheduler
+post_dispatcher = _build_dispatcher()
+
+
+def init_post_dispatcher(app):
+    """
+    Start publishing scheduled posts in the background
+    
+    Every worker process runs its own dispatcher; a post is published once
+    because each batch is claimed by exactly one of them. Until an adapter is
+    configured or registered (register_adapter), runs claim nothing.
+    
+    Args:
+        app: Flask application
+    """
+    if not get_config().MARKETING_DISPATCH_ENABLED:
+        return
+    post_dispatcher.start()
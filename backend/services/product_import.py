@@ -0,0 +1,303 @@
+# Product Import Service - streaming bulk import and export of product catalogs
+# Parses CSV/NDJSON uploads incrementally and writes them in chunked transactions
+
+import csv
+import io
+import json
+import math
+import re
+
+from models.product import Product, PRODUCT_IMPORT_COLUMNS
+
+# Content types understood by the bulk endpoints
+FORMAT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Maximum length of the text columns (matches the MySQL schema)
+TEXT_LIMITS = {
+    'name': 255,
+    'vendor': 255,
+    'category': 100,
+    'style': 100,
+    'color': 50
+}
+
+# Bytes that are not valid UTF-8 decode to lone surrogates (surrogateescape)
+UNDECODABLE = re.compile('[\udc80-\udcff]')
+
+
+def detect_format(requested_format, content_type):
+    """
+    Work out the upload format from the query string or Content-Type header
+    
+    Args:
+        requested_format: Value of the ?format= query parameter (optional)
+        content_type: Request Content-Type header
+    
+    Returns:
+        'csv', 'ndjson' or None if the format is not supported
+    """
+    if requested_format:
+        return requested_format.lower() if requested_format.lower() in FORMAT_CONTENT_TYPES else None
+    
+    content_type = (content_type or '').lower()
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonlines' in content_type or 'json' in content_type:
+        return 'ndjson'
+    return None
+
+
+def iter_records(stream, file_format):
+    """
+    Parse an upload stream one record at a time
+    
+    Args:
+        stream: Binary file-like object (e.g. request.stream)
+        file_format: 'csv' or 'ndjson'
+    
+    Yields:
+        Tuples of (line_number, record_dict, parse_error); a malformed row or
+        one that is not valid UTF-8 is reported and parsing continues with the
+        next one
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='surrogateescape', newline='')
+    
+    if file_format == 'csv':
+        # The csv module does not count lines of rows it rejects
+        lines_read = 0
+        undecodable_line = None
+        
+        def counted_lines():
+            nonlocal lines_read, undecodable_line
+            for line in text:
+                lines_read += 1
+                if undecodable_line is None and UNDECODABLE.search(line):
+                    undecodable_line = lines_read
+                yield line
+        
+        reader = csv.DictReader(counted_lines())
+        failed_line = None
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                if lines_read == failed_line:
+                    # The reader made no progress past the bad row
+                    return
+                failed_line = lines_read
+                undecodable_line = None
+                yield lines_read, None, f'Invalid CSV: {e}'
+                continue
+            if undecodable_line is not None:
+                undecodable_line = None
+                yield lines_read, None, 'Invalid UTF-8 text'
+                continue
+            yield lines_read, record, None
+    
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        if UNDECODABLE.search(line):
+            yield line_number, None, 'Invalid UTF-8 text'
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Each line must be a JSON object'
+            continue
+        yield line_number, record, None
+
+
+def validate_record(record, project_ids):
+    """
+    Validate one product record and convert it to an insert row
+    
+    Args:
+        record: Parsed record dictionary
+        project_ids: Set of project IDs owned by the importing user
+    
+    Returns:
+        Tuple of (row, error) where exactly one is None
+    """
+    values = {}
+    for column in PRODUCT_IMPORT_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        values[column] = value if value not in ('', None) else None
+    
+    if not values['name']:
+        return None, 'Product name is required'
+    
+    if values['price'] is None:
+        return None, 'Product price is required'
+    try:
+        values['price'] = float(values['price'])
+    except (TypeError, ValueError):
+        return None, f"Invalid price: {values['price']}"
+    if not math.isfinite(values['price']):
+        return None, f"Invalid price: {record.get('price')}"
+    if values['price'] < 0:
+        return None, 'Price cannot be negative'
+    
+    if values['project_id'] is not None:
+        try:
+            values['project_id'] = int(values['project_id'])
+        except (TypeError, ValueError):
+            return None, f"Invalid project_id: {values['project_id']}"
+        if values['project_id'] not in project_ids:
+            return None, f"Project {values['project_id']} not found"
+    
+    for column, limit in TEXT_LIMITS.items():
+        if values[column] is not None:
+            values[column] = str(values[column])
+            if len(values[column]) > limit:
+                return None, f'{column} is longer than {limit} characters'
+    
+    return tuple(values[column] for column in PRODUCT_IMPORT_COLUMNS), None
+
+
+class ProductImporter:
+    """Chunked bulk importer with per-row error reporting"""
+    
+    def __init__(self, connection, user_id, chunk_size=1000, max_errors=1000):
+        """
+        Args:
+            connection: Database connection
+            user_id: ID of the designer importing products
+            chunk_size: Rows inserted per executemany transaction
+            max_errors: Maximum number of row errors included in the summary
+        """
+        self.connection = connection
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.product_model = Product(connection)
+        self.summary = {
+            'received': 0,
+            'imported': 0,
+            'failed': 0,
+            'errors': [],
+            'errors_truncated': False,
+            'aborted': None
+        }
+    
+    def _record_error(self, line_number, message):
+        """Count a failed row and keep its error if there is room"""
+        self.summary['failed'] += 1
+        if len(self.summary['errors']) < self.max_errors:
+            self.summary['errors'].append({'line': line_number, 'error': message})
+        else:
+            self.summary['errors_truncated'] = True
+    
+    def _flush(self, chunk):
+        """
+        Insert a chunk, falling back to row-by-row inserts to isolate failures
+        
+        Args:
+            chunk: List of (line_number, row) tuples
+        """
+        if not chunk:
+            return
+        
+        try:
+            self.summary['imported'] += self.product_model.bulk_create(
+                self.user_id, [row for _, row in chunk])
+            return
+        except Exception:
+            pass
+        
+        for line_number, row in chunk:
+            try:
+                self.summary['imported'] += self.product_model.bulk_create(self.user_id, [row])
+            except Exception as e:
+                self._record_error(line_number, f'Database error: {e}')
+    
+    def _load_project_ids(self):
+        """Fetch the IDs of the user's projects once for validation"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM projects WHERE user_id = %s", (self.user_id,))
+            return {row['id'] for row in cursor.fetchall()}
+    
+    def run(self, records):
+        """
+        Validate and insert records as they are parsed
+        
+        Args:
+            records: Iterable of (line_number, record, parse_error) tuples
+        
+        Returns:
+            Summary dictionary with received, imported, failed and errors;
+            'aborted' explains why reading stopped early if the upload could
+            not be read to the end (rows before that are still imported)
+        """
+        project_ids = self._load_project_ids()
+        chunk = []
+        records = iter(records)
+        
+        while True:
+            try:
+                line_number, record, parse_error = next(records)
+            except StopIteration:
+                break
+            except (OSError, ValueError) as e:
+                self.summary['aborted'] = f'Upload could not be read past this point: {e}'
+                break
+            self.summary['received'] += 1
+            
+            if parse_error:
+                self._record_error(line_number, parse_error)
+                continue
+            
+            row, error = validate_record(record, project_ids)
+            if error:
+                self._record_error(line_number, error)
+                continue
+            
+            chunk.append((line_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+        
+        self._flush(chunk)
+        return self.summary
+
+
+def iter_export(products, file_format):
+    """
+    Serialize products for download one row at a time
+    
+    Args:
+        products: Iterable of product dictionaries
+        file_format: 'csv' or 'ndjson'
+    
+    Yields:
+        Encoded chunks of the export file
+    """
+    columns = ['id'] + PRODUCT_IMPORT_COLUMNS + ['is_purchased', 'created_at']
+    
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for product in products:
+            writer.writerow([product.get(column) for column in columns])
+            # Flush roughly every 64KB to keep chunks reasonably sized
+            if buffer.tell() >= 65536:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+        return
+    
+    for product in products:
+        line = json.dumps({column: product.get(column) for column in columns}, default=str)
+        yield (line + '\n').encode('utf-8')
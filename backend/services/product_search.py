@@ -0,0 +1,244 @@
+# Product Search Service - in-memory columnar facet index for product search
+# Serves filtered product pages plus facet counts and price histograms per user
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import get_config
+from models.product import Product, DEFAULT_PRICE_BUCKETS, FACET_FIELDS
+from utils.metrics import record_cache_access
+
+
+class ProductFacetIndex:
+    """Columnar snapshot of one user's catalog used to answer faceted searches"""
+    
+    def __init__(self, user_id, rows):
+        """
+        Build the index from product rows
+        
+        Args:
+            user_id: The designer's ID
+            rows: Iterable of product rows ordered newest first, each with
+                  id, price and the facet fields
+        """
+        self.user_id = user_id
+        self.built_at = time.time()
+        
+        ids = []
+        prices = []
+        values = {field: {} for field in FACET_FIELDS}
+        codes = {field: [] for field in FACET_FIELDS}
+        
+        for row in rows:
+            ids.append(row['id'])
+            prices.append(np.nan if row['price'] is None else float(row['price']))
+            for field in FACET_FIELDS:
+                value = row[field]
+                if value is None:
+                    codes[field].append(-1)
+                else:
+                    codes[field].append(values[field].setdefault(value, len(values[field])))
+        
+        # Position in these arrays is the recency rank (0 = newest)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.codes = {field: np.asarray(codes[field], dtype=np.int32) for field in FACET_FIELDS}
+        self.values = {field: list(values[field]) for field in FACET_FIELDS}
+        self.value_codes = values
+        
+        # Rank of each code by its value's text, so facet ties are ordered by
+        # value as in the SQL search
+        self.value_ranks = {}
+        for field in FACET_FIELDS:
+            order = sorted(range(len(self.values[field])), key=lambda code: str(self.values[field][code]))
+            ranks = np.empty(len(order), dtype=np.int64)
+            ranks[order] = np.arange(len(order))
+            self.value_ranks[field] = ranks
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def _field_mask(self, field, value):
+        """Boolean mask for one facet filter"""
+        if field == 'vendor':
+            # Vendor keeps the substring semantics of the SQL search
+            needle = str(value).lower()
+            matched = [code for vendor, code in self.value_codes['vendor'].items() 
+                       if needle in str(vendor).lower()]
+            return np.isin(self.codes['vendor'], matched)
+        
+        code = self.value_codes[field].get(value)
+        if code is None:
+            return np.zeros(len(self.ids), dtype=bool)
+        return self.codes[field] == code
+    
+    def _price_mask(self, filters):
+        """Boolean mask for the price range filters (None when unfiltered)"""
+        mask = None
+        if filters.get('min_price'):
+            mask = self.prices >= float(filters['min_price'])
+        if filters.get('max_price'):
+            upper = self.prices <= float(filters['max_price'])
+            mask = upper if mask is None else mask & upper
+        return mask
+    
+    def search(self, filters=None, limit=50, offset=0, price_buckets=None, facet_limit=20):
+        """
+        Run a faceted search against the snapshot
+        
+        Args:
+            filters: Dictionary with search filters (category, style, color,
+                     vendor, min_price, max_price)
+            limit: Maximum number of product ids to return
+            offset: Number of products to skip (for pagination)
+            price_buckets: Ascending bucket lower bounds for the price histogram
+            facet_limit: Maximum number of values returned per facet
+        
+        Returns:
+            Dictionary with product_ids, total, facets and price_histogram
+        """
+        filters = filters or {}
+        buckets = np.asarray(sorted(price_buckets or DEFAULT_PRICE_BUCKETS), dtype=np.float64)
+        everything = np.ones(len(self.ids), dtype=bool)
+        
+        # One mask per active filter, combined differently for each facet
+        masks = {}
+        for field in FACET_FIELDS:
+            if filters.get(field):
+                masks[field] = self._field_mask(field, filters[field])
+        price_mask = self._price_mask(filters)
+        if price_mask is not None:
+            masks['price'] = price_mask
+        
+        def combined(exclude=None):
+            result = everything
+            for name, mask in masks.items():
+                if name != exclude:
+                    result = result & mask
+            return result
+        
+        match = combined()
+        positions = np.flatnonzero(match)
+        
+        facets = {}
+        for field in FACET_FIELDS:
+            field_codes = self.codes[field][combined(exclude=field)]
+            counts = np.bincount(field_codes[field_codes >= 0], minlength=len(self.values[field]))
+            top = np.flatnonzero(counts)
+            top = top[np.lexsort((self.value_ranks[field][top], -counts[top]))][:facet_limit]
+            facets[field] = [{'value': self.values[field][code], 'count': int(counts[code])} 
+                             for code in top]
+        
+        histogram_prices = self.prices[combined(exclude='price')]
+        histogram_prices = histogram_prices[histogram_prices >= buckets[0]]
+        bucket_counts = np.bincount(np.searchsorted(buckets, histogram_prices, side='right') - 1,
+                                    minlength=len(buckets))
+        price_histogram = []
+        for index, lower in enumerate(buckets):
+            price_histogram.append({
+                'min': float(lower),
+                'max': float(buckets[index + 1]) if index + 1 < len(buckets) else None,
+                'count': int(bucket_counts[index])
+            })
+        
+        return {
+            'product_ids': self.ids[positions[offset:offset + limit]].tolist(),
+            'total': int(len(positions)),
+            'facets': facets,
+            'price_histogram': price_histogram
+        }
+
+
+class ProductSearchService:
+    """Per-user cache of facet indexes, rebuilt on demand after changes"""
+    
+    def __init__(self, max_users=64, ttl_seconds=300):
+        """
+        Args:
+            max_users: Maximum number of user indexes kept in memory
+            ttl_seconds: Age after which an index is rebuilt even without an
+                         explicit invalidation (covers writes from other workers)
+        """
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_index(self, connection, user_id):
+        """
+        Get a fresh index for a user, building it if needed
+        
+        Args:
+            connection: Database connection
+            user_id: The designer's ID
+        
+        Returns:
+            ProductFacetIndex for the user
+        """
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index and time.time() - index.built_at < self.ttl_seconds:
+                self._indexes.move_to_end(user_id)
+                record_cache_access('product_search', True)
+                return index
+        
+        record_cache_access('product_search', False)
+        index = ProductFacetIndex(user_id, Product(connection).get_search_columns(user_id))
+        
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        
+        return index
+    
+    def invalidate(self, user_id):
+        """
+        Drop a user's index after their products change
+        
+        Args:
+            user_id: The designer's ID
+        """
+        with self._lock:
+            self._indexes.pop(user_id, None)
+    
+    def search(self, connection, user_id, filters=None, limit=50, offset=0, 
+               price_buckets=None, facet_limit=20):
+        """
+        Faceted product search backed by the user's columnar index
+        
+        Args:
+            connection: Database connection
+            user_id: The designer's ID
+            filters: Dictionary with search filters
+            limit: Maximum number of products to return
+            offset: Number of products to skip (for pagination)
+            price_buckets: Ascending bucket lower bounds for the price histogram
+            facet_limit: Maximum number of values returned per facet
+        
+        Returns:
+            Dictionary with products, total, facets and price_histogram
+        """
+        index = self.get_index(connection, user_id)
+        result = index.search(filters, limit=limit, offset=offset, 
+                              price_buckets=price_buckets, facet_limit=facet_limit)
+        
+        # Load the full rows for the requested page only
+        products = Product(connection).get_by_ids(result.pop('product_ids'), user_id)
+        
+        result['products'] = products
+        result['limit'] = limit
+        result['offset'] = offset
+        return result
+
+
+# Shared instance used by the product routes
+_config = get_config()
+product_search_service = ProductSearchService(
+    max_users=_config.PRODUCT_SEARCH_INDEX_MAX_USERS,
+    ttl_seconds=_config.PRODUCT_SEARCH_INDEX_TTL
+)
@@ -0,0 +1,225 @@
+# Profiler Service - on-demand profiling of a live worker
+# Statistical stack sampling for hot-path analysis and cProfile for single requests
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from config import get_config
+
+
+class ProfilerBusy(Exception):
+    """Raised when a sampling session is already running in this process"""
+
+
+# Innermost functions of threads that are waiting rather than working
+IDLE_FUNCTIONS = {'wait', 'sleep', 'select', 'poll', 'accept', 'recv', 'recv_into', 'readinto',
+                  '_wait_for_tstate_lock', 'serve_forever'}
+
+
+def _frame_label(frame):
+    """Describe a frame as 'function (file.py:line)' for collapsed stacks"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of every thread in the process
+    
+    Nothing runs until sample() is called, so the profiler costs nothing
+    while idle. During a session one background thread wakes every interval
+    and records each thread's current stack.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+    
+    def sample(self, duration, interval=0.005, include_idle=False):
+        """
+        Sample all threads for a while and aggregate identical stacks
+        
+        Args:
+            duration: Seconds to sample for
+            interval: Seconds between samples
+            include_idle: Keep stacks of threads blocked in sleep/wait/select
+        
+        Returns:
+            Dictionary with collapsed stacks and sampling statistics
+        
+        Raises:
+            ProfilerBusy: If another session is running
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy('A profiling session is already running on this worker')
+        
+        try:
+            stacks = Counter()
+            caller = threading.get_ident()
+            samples = 0
+            thread_names = {}
+            
+            def run():
+                nonlocal samples
+                sampler = threading.get_ident()
+                deadline = time.monotonic() + duration
+                while time.monotonic() < deadline:
+                    if not thread_names or samples % 100 == 0:
+                        thread_names.update({t.ident: t.name for t in threading.enumerate()})
+                    
+                    for ident, frame in sys._current_frames().items():
+                        if ident in (sampler, caller):
+                            continue
+                        
+                        stack = []
+                        while frame is not None:
+                            stack.append(_frame_label(frame))
+                            frame = frame.f_back
+                        if not include_idle and stack and stack[0].split(' ', 1)[0] in IDLE_FUNCTIONS:
+                            continue
+                        
+                        stack.append(thread_names.get(ident, f'thread-{ident}'))
+                        stacks[';'.join(reversed(stack))] += 1
+                    
+                    samples += 1
+                    time.sleep(interval)
+            
+            started = time.perf_counter()
+            worker = threading.Thread(target=run, name='sampling-profiler', daemon=True)
+            worker.start()
+            worker.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            self._lock.release()
+        
+        return {
+            'pid': os.getpid(),
+            'duration': round(elapsed, 3),
+            'interval_ms': interval * 1000,
+            'samples': samples,
+            'stacks': stacks
+        }
+    
+    @staticmethod
+    def collapse(stacks):
+        """
+        Render stacks in the collapsed format read by flamegraph.pl and speedscope
+        
+        Args:
+            stacks: Counter of 'frame;frame;frame' -> sample count
+        
+        Returns:
+            One 'stack count' line per distinct stack, most frequent first
+        """
+        return '\n'.join(f'{stack} {count}' for stack, count in stacks.most_common()) + '\n'
+
+
+class RequestProfiler:
+    """
+    Runs single requests under cProfile and keeps the reports for a short while
+    
+    Reports are written to a directory rather than kept in memory so that
+    any gunicorn worker can serve a report produced by another.
+    """
+    
+    def __init__(self, report_dir, max_reports=100):
+        """
+        Args:
+            report_dir: Directory reports are written to
+            max_reports: Reports kept before the oldest are deleted
+        """
+        self.report_dir = report_dir
+        self.max_reports = max_reports
+    
+    def start(self):
+        """
+        Start profiling the current thread
+        
+        Returns:
+            cProfile.Profile, or None if another profiler is active
+        """
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process
+            return None
+        return profile
+    
+    def finish(self, profile, label, sort='cumulative', limit=60):
+        """
+        Stop a profile and store its report
+        
+        Args:
+            profile: Profile returned by start()
+            label: Description of the profiled request
+            sort: pstats sort key
+            limit: Functions included in the report
+        
+        Returns:
+            Report dictionary (including its ID)
+        """
+        profile.disable()
+        
+        output = io.StringIO()
+        stats = pstats.Stats(profile, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        
+        report = {
+            'id': uuid.uuid4().hex[:16],
+            'pid': os.getpid(),
+            'request': label,
+            'created_at': time.time(),
+            'total_calls': stats.total_calls,
+            'total_time': round(stats.total_tt, 6),
+            'stats': output.getvalue()
+        }
+        
+        os.makedirs(self.report_dir, exist_ok=True)
+        with open(os.path.join(self.report_dir, f"{report['id']}.json"), 'w') as report_file:
+            json.dump(report, report_file)
+        self._prune()
+        return report
+    
+    def get_report(self, report_id):
+        """
+        Fetch a stored report
+        
+        Args:
+            report_id: ID returned by finish()
+        
+        Returns:
+            Report dictionary or None if unknown
+        """
+        if not report_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.report_dir, f'{report_id}.json')) as report_file:
+                return json.load(report_file)
+        except (OSError, ValueError):
+            return None
+    
+    def _prune(self):
+        """Delete the oldest reports beyond max_reports"""
+        try:
+            paths = [entry.path for entry in os.scandir(self.report_dir) if entry.name.endswith('.json')]
+            if len(paths) <= self.max_reports:
+                return
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.max_reports]:
+                os.remove(path)
+        except OSError:
+            # Another worker pruned concurrently
+            pass
+
+
+# Shared per-process profilers
+sampling_profiler = SamplingProfiler()
+request_profiler = RequestProfiler(get_config().PROFILE_REPORT_DIR)
@@ -0,0 +1,156 @@
+# Quota Service - reserve/commit/release accounting for AI generations
+# A use is reserved before the slow AI call and refunded if the call fails
+
+from datetime import datetime
+
+from config import get_config
+from models.usage import UsageCounter
+from utils.auth import get_user_claims
+
+# Features with their own monthly counters
+QUOTA_FEATURES = ('designs', 'marketing', 'insights')
+
+
+def current_period_start(now=None):
+    """
+    First day of the monthly usage window containing now
+    
+    Args:
+        now: Reference datetime (defaults to the current UTC time)
+    
+    Returns:
+        ISO date string, e.g. '2024-05-01'
+    """
+    now = now or datetime.utcnow()
+    return now.date().replace(day=1).isoformat()
+
+
+class Reservation:
+    """One reserved AI generation that must be committed or released"""
+    
+    def __init__(self, user_id, feature, period_start):
+        self.user_id = user_id
+        self.feature = feature
+        self.period_start = period_start
+        self.settled = False
+
+
+class QuotaService:
+    """Atomic per-feature AI generation quotas with monthly resets"""
+    
+    def __init__(self, connection):
+        """Initialize with database connection"""
+        self.connection = connection
+        self.counter_model = UsageCounter(connection)
+    
+    def get_limit(self, tier, feature):
+        """
+        Monthly limit of a feature for a subscription tier
+        
+        AI_QUOTA_LIMITS is the only source of limits; the users table's
+        ai_generations_limit column is not a per-user override.
+        
+        Args:
+            tier: Subscription tier
+            feature: Feature name
+        
+        Returns:
+            Maximum uses per month, or None for unlimited
+        """
+        config = get_config()
+        limits = config.AI_QUOTA_LIMITS.get(tier, config.AI_QUOTA_LIMITS['free'])
+        limit = limits.get(feature, 0)
+        return None if limit == -1 else limit
+    
+    def reserve(self, user_id, feature, tier=None):
+        """
+        Reserve one use of a feature, failing if the monthly limit is reached
+        
+        Args:
+            user_id: The designer's ID
+            feature: Feature name (designs, marketing, insights)
+            tier: Subscription tier (read from the token claims if omitted)
+        
+        Returns:
+            Reservation, or None if the quota is exhausted
+        """
+        if feature not in QUOTA_FEATURES:
+            raise ValueError(f"Unknown quota feature '{feature}'")
+        
+        if tier is None:
+            claims = get_user_claims(user_id)
+            if not claims:
+                return None
+            tier = claims['tier']
+        
+        period_start = current_period_start()
+        limit = self.get_limit(tier, feature)
+        if not self.counter_model.try_increment(user_id, feature, period_start, limit):
+            return None
+        return Reservation(user_id, feature, period_start)
+    
+    def commit(self, reservation):
+        """
+        Keep a reserved use and add it to the lifetime AI usage total
+        
+        Args:
+            reservation: Reservation returned by reserve()
+        """
+        if reservation.settled:
+            return
+        reservation.settled = True
+        
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET ai_generations_used = ai_generations_used + 1 WHERE id = %s",
+                (reservation.user_id,)
+            )
+            self.connection.commit()
+    
+    def release(self, reservation):
+        """
+        Refund a reserved use (e.g. the AI call failed)
+        
+        Args:
+            reservation: Reservation returned by reserve()
+        """
+        if reservation.settled:
+            return
+        reservation.settled = True
+        
+        self.counter_model.decrement(reservation.user_id, reservation.feature,
+                                     reservation.period_start)
+    
+    def reset(self, user_id):
+        """
+        Start a user's current period over (e.g. after a subscription change)
+        
+        Args:
+            user_id: The designer's ID
+        """
+        self.counter_model.reset_period(user_id, current_period_start())
+    
+    def get_usage(self, user_id, tier):
+        """
+        Usage and limits of every feature for the current period
+        
+        Args:
+            user_id: The designer's ID
+            tier: Subscription tier
+        
+        Returns:
+            Dictionary with period_start and per-feature used/limit/remaining
+        """
+        period_start = current_period_start()
+        used = self.counter_model.get_by_period(user_id, period_start)
+        
+        features = {}
+        for feature in QUOTA_FEATURES:
+            limit = self.get_limit(tier, feature)
+            features[feature] = {
+                'used': used.get(feature, 0),
+                'limit': limit,
+                'remaining': None if limit is None else max(limit - used.get(feature, 0), 0)
+            }
+        
+        return {'period_start': period_start, 'features': features}
@@ -0,0 +1,356 @@
+# Reminder Dispatcher Service - delivers event reminders for all designers from one due-time queue
+# A min-heap of due times (rebuilt from the reminder index) decides when to wake; claims are batched UPDATEs
+
+import heapq
+import logging
+import smtplib
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+
+from config import get_config
+from models.activity import ActivityLog
+from models.calendar import CalendarEvent, _to_utc
+from services.scheduler import get_scheduler
+from utils.db import close_db_connection, get_db_connection
+from utils.metrics import JOB_QUEUE_DEPTH
+
+logger = logging.getLogger('ai_studio.reminders')
+
+
+def _utcnow():
+    """Current time as naive UTC, like the calendar model's comparisons"""
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+class ReminderSender(ABC):
+    """
+    Delivery channel for reminders
+    
+    Subclasses must implement send(); a failure raised from it releases the whole
+    batch, which is claimed and sent again on the next run.
+    """
+    
+    name = 'base'
+    
+    @abstractmethod
+    def send(self, reminders):
+        """
+        Deliver a batch of reminders
+        
+        Args:
+            reminders: List of claimed events (id, user_id, title, start_time,
+                       end_time, location, ...) with user_email and user_name
+        """
+
+
+class ActivityReminderSender(ReminderSender):
+    """Reminders as entries in the designers' activity feed (no external service)"""
+    
+    name = 'activity'
+    
+    def send(self, reminders):
+        connection = get_db_connection()
+        try:
+            logged = ActivityLog(connection).log_many([
+                (reminder['user_id'], 'calendar_reminder', 'calendar_event', reminder['id'],
+                 {'title': reminder['title'], 'start_time': str(reminder['start_time'])})
+                for reminder in reminders
+            ])
+        finally:
+            close_db_connection(connection)
+        if logged != len(reminders):
+            raise RuntimeError('Could not write reminder activity entries')
+
+
+class EmailReminderSender(ReminderSender):
+    """Reminders by email through the configured SMTP server (MAIL_* settings)"""
+    
+    name = 'email'
+    
+    def __init__(self, config=None, timeout=10):
+        self.config = config or get_config()
+        self.timeout = timeout
+    
+    def send(self, reminders):
+        with smtplib.SMTP(self.config.MAIL_SERVER, self.config.MAIL_PORT, timeout=self.timeout) as smtp:
+            if self.config.MAIL_USE_TLS:
+                smtp.starttls()
+            if self.config.MAIL_PASSWORD:
+                smtp.login(self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD)
+            
+            for reminder in reminders:
+                if not reminder.get('user_email'):
+                    continue
+                message = EmailMessage()
+                message['From'] = self.config.MAIL_DEFAULT_SENDER
+                message['To'] = reminder['user_email']
+                message['Subject'] = f"Reminder: {reminder['title']}"
+                lines = [f"Hi {reminder.get('user_name') or 'there'},", '',
+                         f"{reminder['title']} starts at {reminder['start_time']}."]
+                if reminder.get('location'):
+                    lines.append(f"Location: {reminder['location']}")
+                message.set_content('\n'.join(lines))
+                smtp.send_message(message)
+
+
+class MemoryReminderSender(ReminderSender):
+    """Keeps delivered reminders in memory, for tests and benchmarks"""
+    
+    name = 'memory'
+    
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+    
+    def send(self, reminders):
+        with self._lock:
+            self.sent.extend(reminders)
+
+
+# Senders selectable with REMINDER_SENDER
+SENDERS = {sender.name: sender for sender in (ActivityReminderSender, EmailReminderSender, MemoryReminderSender)}
+
+
+class ReminderDispatcher:
+    """Due-time ordered reminder delivery across all designers"""
+    
+    def __init__(self, sender, lead_minutes=1440, batch_size=200, heap_size=1000,
+                 resync_minutes=5, retry_seconds=60):
+        """
+        Args:
+            sender: ReminderSender delivering the reminders
+            lead_minutes: How long before an event its reminder goes out
+            batch_size: Reminders claimed per UPDATE
+            heap_size: Most due times kept in memory (later ones are loaded on resync)
+            resync_minutes: How often the heap is rebuilt from the database
+            retry_seconds: Delay before a failed delivery is retried
+        """
+        self.sender = sender
+        self.lead = timedelta(minutes=lead_minutes)
+        self.batch_size = batch_size
+        self.heap_size = heap_size
+        self.resync = timedelta(minutes=resync_minutes)
+        self.retry = timedelta(seconds=retry_seconds)
+        
+        self._heap = []
+        self._truncated = False
+        self._armed_at = None
+        self._started = False
+        self._lock = threading.Lock()
+        self._dispatch_lock = threading.Lock()
+        self._counters = {'runs': 0, 'sent': 0, 'failed': 0, 'rebuilds': 0}
+        self._last_run = None
+    
+    def set_sender(self, sender):
+        """Replace the delivery channel (e.g. with a MemoryReminderSender in tests)"""
+        self.sender = sender
+    
+    def start(self, scheduler=None):
+        """
+        Load the heap and keep it in sync with the database
+        
+        Args:
+            scheduler: APScheduler instance (defaults to the shared one)
+        """
+        self._scheduler = scheduler or get_scheduler()
+        self._started = True
+        self._scheduler.add_job(self.rebuild, 'interval', seconds=self.resync.total_seconds(),
+                                id='reminder_resync', replace_existing=True,
+                                next_run_time=datetime.now(timezone.utc))
+    
+    def rebuild(self):
+        """
+        Reload the due times of upcoming reminders from the reminder index
+        
+        Catches events written by other workers and reminders that were
+        released after a failed delivery.
+        """
+        now = _utcnow()
+        connection = get_db_connection()
+        try:
+            rows = CalendarEvent(connection).get_reminder_schedule(now, now + self.lead + self.resync * 2,
+                                                                   limit=self.heap_size)
+        finally:
+            close_db_connection(connection)
+        
+        heap = []
+        for row in rows:
+            try:
+                heap.append((_to_utc(row['start_time']) - self.lead, row['id']))
+            except ValueError:
+                continue
+        heapq.heapify(heap)
+        
+        with self._lock:
+            self._heap = heap
+            self._truncated = len(rows) >= self.heap_size
+            self._armed_at = None
+            self._counters['rebuilds'] += 1
+        JOB_QUEUE_DEPTH.labels('reminders').set(len(heap))
+        self._arm()
+    
+    def schedule(self, event_id, start_time):
+        """
+        Add a new or rescheduled event's reminder without waiting for a resync
+        
+        Args:
+            event_id: The event's ID
+            start_time: Event start (datetime or ISO string)
+        """
+        if not self._started:
+            return
+        try:
+            start = _to_utc(start_time)
+        except (TypeError, ValueError):
+            return
+        if start <= _utcnow():
+            return
+        
+        with self._lock:
+            heapq.heappush(self._heap, (start - self.lead, event_id))
+        JOB_QUEUE_DEPTH.labels('reminders').inc()
+        self._arm()
+    
+    def _arm(self, at=None):
+        """Make the dispatch job run at the next due time (or at), unless it already runs earlier"""
+        if not self._started:
+            return
+        with self._lock:
+            due = at or (self._heap[0][0] if self._heap else None)
+            if due is None or (self._armed_at is not None and self._armed_at <= due):
+                return
+            self._armed_at = due
+        
+        run_at = max(due, _utcnow()).replace(tzinfo=timezone.utc)
+        self._scheduler.add_job(self.dispatch, 'date', run_date=run_at, id='reminder_dispatch',
+                                replace_existing=True, misfire_grace_time=None)
+    
+    def dispatch(self, now=None):
+        """
+        Claim and deliver every reminder that is due
+        
+        Args:
+            now: Reference time (naive UTC, defaults to now)
+        
+        Returns:
+            Number of reminders delivered
+        """
+        now = now or _utcnow()
+        with self._lock:
+            self._armed_at = None
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+            needs_rebuild = not self._heap and self._truncated
+            depth = len(self._heap)
+        JOB_QUEUE_DEPTH.labels('reminders').set(depth)
+        
+        sent = failed = 0
+        with self._dispatch_lock:
+            connection = get_db_connection()
+            try:
+                calendar = CalendarEvent(connection)
+                while True:
+                    claimed = calendar.claim_due_reminders(now, self.lead, limit=self.batch_size)
+                    if not claimed:
+                        break
+                    
+                    if self._deliver(connection, claimed):
+                        sent += len(claimed)
+                    else:
+                        failed += len(claimed)
+                        calendar.release_reminders(claimed)
+                        break
+                    if len(claimed) < self.batch_size:
+                        break
+            except Exception as e:
+                logger.error('Reminder dispatch failed: %s', e)
+            finally:
+                close_db_connection(connection)
+        
+        with self._lock:
+            self._counters['runs'] += 1
+            self._counters['sent'] += sent
+            self._counters['failed'] += failed
+            self._last_run = {'at': datetime.now().isoformat(timespec='seconds'), 'sent': sent, 'failed': failed}
+        
+        if sent:
+            logger.info('Sent %s reminders', sent)
+        if failed:
+            self._arm(now + self.retry)
+        if needs_rebuild:
+            self.rebuild()
+        else:
+            self._arm()
+        return sent
+    
+    def _deliver(self, connection, reminders):
+        """Attach the designers' contact details and hand the batch to the sender"""
+        user_ids = sorted({reminder['user_id'] for reminder in reminders})
+        with connection.cursor() as cursor:
+            placeholders = ', '.join(['%s'] * len(user_ids))
+            cursor.execute(f"SELECT id, name, email FROM users WHERE id IN ({placeholders})", user_ids)
+            users = {user['id']: user for user in cursor.fetchall()}
+        
+        for reminder in reminders:
+            user = users.get(reminder['user_id']) or {}
+            reminder['user_name'] = user.get('name')
+            reminder['user_email'] = user.get('email')
+        
+        try:
+            self.sender.send(reminders)
+            return True
+        except Exception as e:
+            logger.warning('Reminder sender %s failed for %s reminders: %s', self.sender.name, len(reminders), e)
+            return False
+    
+    def stats(self):
+        """
+        Dispatcher counters for health checks
+        
+        Returns:
+            Dictionary with the sender, queue state, counters and the last run
+        """
+        with self._lock:
+            return {
+                'sender': self.sender.name,
+                'queued': len(self._heap),
+                'next_due': self._heap[0][0].isoformat() if self._heap else None,
+                'last_run': self._last_run,
+                **self._counters
+            }
+
+
+def _build_dispatcher():
+    """Create the shared dispatcher from configuration"""
+    config = get_config()
+    sender = SENDERS.get(config.REMINDER_SENDER)
+    if sender is None:
+        raise ValueError(f"Unknown REMINDER_SENDER '{config.REMINDER_SENDER}' (choose from {', '.join(SENDERS)})")
+    return ReminderDispatcher(
+        sender=sender(),
+        lead_minutes=config.REMINDER_LEAD_MINUTES,
+        batch_size=config.REMINDER_BATCH_SIZE,
+        heap_size=config.REMINDER_HEAP_SIZE,
+        resync_minutes=config.REMINDER_RESYNC_MINUTES
+    )
+
+
+# Shared dispatcher driven by the background scheduler
+reminder_dispatcher = _build_dispatcher()
+
+
+def init_reminder_dispatcher(app):
+    """
+    Start delivering reminders in the background
+    
+    Every worker process runs its own dispatcher; a reminder is delivered
+    once because claiming it marks it as sent.
+    
+    Args:
+        app: Flask application
+    """
+    if not get_config().REMINDERS_ENABLED:
+        return
+    reminder_dispatcher.start()
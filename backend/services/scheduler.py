@@ -0,0 +1,34 @@
+# Background Scheduler - shared APScheduler instance for periodic jobs
+# Each worker process runs one scheduler thread that every periodic service registers its jobs with
+
+import os
+import threading
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+_scheduler = None
+_scheduler_pid = None
+_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Shared background scheduler of this process, started on first use
+    
+    Jobs do not pile up: a run that is still going when the next one is due
+    is skipped, and missed runs are merged into one.
+    
+    Returns:
+        Running BackgroundScheduler
+    """
+    global _scheduler, _scheduler_pid
+    with _lock:
+        if _scheduler is None or _scheduler_pid != os.getpid():
+            _scheduler = BackgroundScheduler(daemon=True, job_defaults={
+                'coalesce': True,
+                'max_instances': 1,
+                'misfire_grace_time': 60
+            })
+            _scheduler.start()
+            _scheduler_pid = os.getpid()
+        return _scheduler
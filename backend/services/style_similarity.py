@@ -0,0 +1,452 @@
+# Style Similarity Service - embedding index for products, designs and clients
+# Computes style embeddings and serves top-k matches with vectorized dot products
+
+import hashlib
+import json
+import re
+import threading
+import time
+
+import numpy as np
+
+from config import get_config
+from models.embedding import Embedding
+from services.ai_service import AIService
+
+# Token pattern for the local embedding (words, hex colours, numbers)
+TOKEN_PATTERN = re.compile(r"#[0-9a-f]{3,6}|[a-z0-9]+")
+
+# Entity types that can be embedded
+ENTITY_TYPES = ['product', 'design', 'client']
+
+
+def _hash_feature(feature, dim):
+    """Map a feature string to a stable (bucket, sign) pair"""
+    digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+    value = int.from_bytes(digest, 'little')
+    return value % dim, 1.0 if (value >> 63) & 1 else -1.0
+
+
+def local_embedding(text, dim=256):
+    """
+    Deterministic offline embedding using signed feature hashing
+    
+    Unigrams and bigrams are hashed into a fixed-size vector, so the same
+    text always gets the same vector on every machine without any API call.
+    
+    Args:
+        text: Text to embed
+        dim: Vector dimension
+    
+    Returns:
+        L2-normalized float32 numpy array
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = TOKEN_PATTERN.findall((text or '').lower())
+    features = tokens + [f'{a}_{b}' for a, b in zip(tokens, tokens[1:])]
+    
+    for feature in features:
+        bucket, sign = _hash_feature(feature, dim)
+        vector[bucket] += sign
+    
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def product_text(product):
+    """Build the text describing a product's style"""
+    parts = [product.get('name'), product.get('category'), product.get('style'),
+             product.get('color'), product.get('vendor'), product.get('description')]
+    return ' '.join(str(part) for part in parts if part)
+
+
+def design_text(design):
+    """Build the text describing a design's style"""
+    palette = design.get('color_palette') or []
+    if isinstance(palette, str):
+        try:
+            palette = json.loads(palette)
+        except ValueError:
+            palette = []
+    palette_text = ' '.join(
+        str(color.get('name', '')) + ' ' + str(color.get('hex', '')) if isinstance(color, dict) else str(color)
+        for color in palette
+    )
+    parts = [design.get('room_type'), design.get('style'), design.get('keywords'),
+             palette_text, design.get('description')]
+    return ' '.join(str(part) for part in parts if part)
+
+
+def client_text(client):
+    """Build the text describing a client's taste"""
+    profile = client.get('personality_profile') or {}
+    if isinstance(profile, str):
+        try:
+            profile = json.loads(profile)
+        except ValueError:
+            profile = {'summary': profile}
+    profile_text = ' '.join(
+        ' '.join(map(str, value)) if isinstance(value, list) else str(value)
+        for value in profile.values()
+    ) if isinstance(profile, dict) else str(profile)
+    parts = [client.get('style_preferences'), profile_text, client.get('budget_range')]
+    return ' '.join(str(part) for part in parts if part)
+
+
+# Text builder for each entity type
+TEXT_BUILDERS = {
+    'product': product_text,
+    'design': design_text,
+    'client': client_text
+}
+
+
+class EmbeddingService:
+    """Computes embeddings with OpenAI or the deterministic local fallback"""
+    
+    def __init__(self, provider='local', model='text-embedding-ada-002', dim=256, api_key=''):
+        """
+        Args:
+            provider: 'openai' or 'local'
+            model: OpenAI embedding model (ignored for the local provider)
+            dim: Vector dimension of the local provider
+            api_key: OpenAI API key
+        """
+        self.provider = provider if provider == 'openai' and api_key else 'local'
+        self.dim = dim
+        self.model = model if self.provider == 'openai' else f'local-hash-{dim}'
+        self.ai_service = AIService(api_key) if self.provider == 'openai' else None
+    
+    def embed(self, texts):
+        """
+        Embed a batch of texts
+        
+        Args:
+            texts: List of strings
+        
+        Returns:
+            float32 numpy array of shape (len(texts), dim) with unit-length
+            rows, or None if the remote provider failed
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        
+        if self.provider == 'local':
+            return np.vstack([local_embedding(text, self.dim) for text in texts])
+        
+        vectors = self.ai_service.generate_embeddings(texts, model=self.model)
+        if vectors is None:
+            return None
+        
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class VectorStore:
+    """In-memory float32 matrices of embeddings, one per (user, entity type)"""
+    
+    def __init__(self):
+        self._matrices = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+    
+    def is_loaded(self, user_id, entity_type):
+        """Check whether a user's vectors are already in memory"""
+        return (user_id, entity_type) in self._matrices
+    
+    def version(self, user_id, entity_type):
+        """Database version the user's vectors were loaded at (None if not loaded)"""
+        return self._versions.get((user_id, entity_type))
+    
+    def load(self, user_id, entity_type, rows, version=None):
+        """
+        Replace a user's vectors with rows loaded from the database
+        
+        Args:
+            user_id: The designer's ID
+            entity_type: Type of entity
+            rows: List of dictionaries with entity_id, dim and vector bytes
+            version: Embedding.get_version() signature of the rows
+        """
+        ids = np.asarray([row['entity_id'] for row in rows], dtype=np.int64)
+        if rows:
+            matrix = np.vstack([np.frombuffer(row['vector'], dtype=np.float32) for row in rows])
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        
+        with self._lock:
+            self._matrices[(user_id, entity_type)] = (ids, matrix)
+            self._versions[(user_id, entity_type)] = version
+    
+    def upsert(self, user_id, entity_type, entity_ids, vectors):
+        """
+        Add or replace vectors of a loaded user (no-op if not loaded yet)
+        
+        Args:
+            user_id: The designer's ID
+            entity_type: Type of entity
+            entity_ids: List of entity IDs
+            vectors: float32 array with one row per entity ID
+        """
+        with self._lock:
+            key = (user_id, entity_type)
+            if key not in self._matrices:
+                return
+            
+            ids, matrix = self._matrices[key]
+            keep = ~np.isin(ids, entity_ids)
+            new_ids = np.concatenate([ids[keep], np.asarray(entity_ids, dtype=np.int64)])
+            if matrix.size:
+                new_matrix = np.vstack([matrix[keep], vectors])
+            else:
+                new_matrix = np.asarray(vectors, dtype=np.float32)
+            self._matrices[key] = (new_ids, new_matrix)
+    
+    def remove(self, user_id, entity_type, entity_id):
+        """Drop one vector of a loaded user"""
+        with self._lock:
+            key = (user_id, entity_type)
+            if key not in self._matrices:
+                return
+            ids, matrix = self._matrices[key]
+            keep = ids != entity_id
+            self._matrices[key] = (ids[keep], matrix[keep] if matrix.size else matrix)
+    
+    def get(self, user_id, entity_type, entity_id):
+        """Get one vector of a loaded user or None"""
+        ids, matrix = self._matrices.get((user_id, entity_type), (None, None))
+        if ids is None:
+            return None
+        positions = np.flatnonzero(ids == entity_id)
+        return matrix[positions[0]] if len(positions) else None
+    
+    def top_k(self, user_id, entity_type, query, k=10, exclude_ids=None):
+        """
+        Find the vectors most similar to a query vector
+        
+        Args:
+            user_id: The designer's ID
+            entity_type: Type of entity to search
+            query: Unit-length float32 query vector
+            k: Number of results
+            exclude_ids: Entity IDs to leave out of the results
+        
+        Returns:
+            List of (entity_id, score) tuples, best match first
+        """
+        ids, matrix = self._matrices.get((user_id, entity_type), (None, None))
+        if ids is None or not len(ids) or k < 1 or matrix.shape[1] != len(query):
+            return []
+        
+        # Cosine similarity of unit vectors is a single matrix-vector product
+        scores = matrix @ query
+        if exclude_ids:
+            scores = np.where(np.isin(ids, list(exclude_ids)), -np.inf, scores)
+        
+        k = min(k, len(ids))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(int(ids[i]), float(scores[i])) for i in candidates if np.isfinite(scores[i])]
+
+
+class StyleSimilarityService:
+    """Keeps embeddings in sync with entities and answers similarity queries"""
+    
+    def __init__(self, embedder, store, sync_ttl=300):
+        """
+        Args:
+            embedder: EmbeddingService used to compute vectors
+            store: VectorStore holding the in-memory index
+            sync_ttl: Seconds after which a user's products are checked for
+                      missing embeddings again (covers imports in other workers)
+        """
+        self.embedder = embedder
+        self.store = store
+        self.sync_ttl = sync_ttl
+        self._synced_at = {}
+    
+    def _ensure_loaded(self, connection, user_id, entity_type):
+        """
+        Load a user's vectors from the database on first use, and again
+        whenever another worker changed them since they were loaded
+        """
+        embedding_model = Embedding(connection)
+        version = embedding_model.get_version(user_id, entity_type, self.embedder.model)
+        if not self.store.is_loaded(user_id, entity_type) or self.store.version(user_id, entity_type) != version:
+            rows = embedding_model.get_by_user(user_id, entity_type, self.embedder.model)
+            self.store.load(user_id, entity_type, rows, version)
+    
+    def index(self, connection, user_id, entity_type, entities):
+        """
+        Compute and store embeddings for entities whose content changed
+        
+        Args:
+            connection: Database connection
+            user_id: ID of the designer who owns the entities
+            entity_type: Type of entity (product, design, client)
+            entities: List of entity dictionaries (must include 'id')
+        
+        Returns:
+            Number of embeddings (re)computed
+        """
+        embedding_model = Embedding(connection)
+        known_hashes = embedding_model.get_content_hashes(
+            entity_type, [entity['id'] for entity in entities], self.embedder.model)
+        
+        pending = []
+        for entity in entities:
+            text = TEXT_BUILDERS[entity_type](entity)
+            content_hash = hashlib.sha1(text.encode('utf-8')).hexdigest()
+            if known_hashes.get(entity['id']) != content_hash:
+                pending.append((entity['id'], content_hash, text))
+        
+        if not pending:
+            return 0
+        
+        vectors = self.embedder.embed([text for _, _, text in pending])
+        if vectors is None:
+            return 0
+        
+        embedding_model.upsert_many(user_id, entity_type, [
+            (entity_id, content_hash, vector.tobytes(), len(vector))
+            for (entity_id, content_hash, _), vector in zip(pending, vectors)
+        ], self.embedder.model)
+        
+        self.store.upsert(user_id, entity_type, [entity_id for entity_id, _, _ in pending], vectors)
+        return len(pending)
+    
+    def refresh(self, connection, user_id, entity_type, entity):
+        """
+        Re-embed one entity after it was created or updated
+        
+        Errors are logged rather than raised so a failed embedding never 
+        fails the write that triggered it.
+        
+        Args:
+            connection: Database connection
+            user_id: ID of the designer who owns the entity
+            entity_type: Type of entity (product, design, client)
+            entity: Entity dictionary (ignored if None)
+        """
+        if not entity:
+            return
+        try:
+            self.index(connection, user_id, entity_type, [entity])
+        except Exception as e:
+            print(f"Error updating {entity_type} embedding: {e}")
+    
+    def remove(self, connection, user_id, entity_type, entity_id):
+        """
+        Delete an entity's embedding from the database and the index
+        
+        Args:
+            connection: Database connection
+            user_id: ID of the designer who owns the entity
+            entity_type: Type of entity
+            entity_id: The entity's ID
+        """
+        Embedding(connection).delete(entity_type, entity_id)
+        self.store.remove(user_id, entity_type, entity_id)
+    
+    def mark_stale(self, user_id):
+        """
+        Flag a user's products for a catch-up sync (e.g. after a bulk import)
+        
+        Other workers catch up once their last sync is sync_ttl seconds old.
+        
+        Args:
+            user_id: The designer's ID
+        """
+        self._synced_at.pop(user_id, None)
+    
+    def sync_products(self, connection, user_id, batch_size=500):
+        """
+        Embed products that have no embedding yet
+        
+        Args:
+            connection: Database connection
+            user_id: The designer's ID
+            batch_size: Products embedded per batch
+        
+        Returns:
+            Number of products embedded
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT p.* FROM products p
+                LEFT JOIN embeddings e
+                    ON e.entity_type = 'product' AND e.entity_id = p.id AND e.model = %s
+                WHERE p.user_id = %s AND e.id IS NULL
+            """, (self.embedder.model, user_id))
+            missing = cursor.fetchall()
+        
+        indexed = 0
+        for start in range(0, len(missing), batch_size):
+            indexed += self.index(connection, user_id, 'product', missing[start:start + batch_size])
+        
+        self._synced_at[user_id] = time.time()
+        return indexed
+    
+    def query_vector(self, connection, user_id, entity_type, entity):
+        """
+        Get the vector of a source entity, embedding it if needed
+        
+        Args:
+            connection: Database connection
+            user_id: The designer's ID
+            entity_type: Type of the source entity (design or client)
+            entity: Entity dictionary
+        
+        Returns:
+            Unit-length float32 vector or None
+        """
+        self._ensure_loaded(connection, user_id, entity_type)
+        self.index(connection, user_id, entity_type, [entity])
+        vector = self.store.get(user_id, entity_type, entity['id'])
+        if vector is None:
+            embedded = self.embedder.embed([TEXT_BUILDERS[entity_type](entity)])
+            vector = embedded[0] if embedded is not None else None
+        return vector
+    
+    def recommend_products(self, connection, user_id, entity_type, entity, k=10):
+        """
+        Recommend the user's products closest in style to a design or client
+        
+        Args:
+            connection: Database connection
+            user_id: The designer's ID
+            entity_type: Type of the source entity (design or client)
+            entity: Source entity dictionary
+            k: Number of products to return
+        
+        Returns:
+            List of (product_id, score) tuples, best match first
+        """
+        synced_at = self._synced_at.get(user_id)
+        if synced_at is None or time.time() - synced_at >= self.sync_ttl:
+            self.sync_products(connection, user_id)
+        self._ensure_loaded(connection, user_id, 'product')
+        
+        vector = self.query_vector(connection, user_id, entity_type, entity)
+        if vector is None:
+            return []
+        
+        return self.store.top_k(user_id, 'product', vector, k=k)
+
+
+def _build_service():
+    """Create the shared service from configuration"""
+    config = get_config()
+    embedder = EmbeddingService(
+        provider=config.EMBEDDING_PROVIDER,
+        model=config.EMBEDDING_MODEL,
+        dim=config.EMBEDDING_DIM,
+        api_key=config.OPENAI_API_KEY
+    )
+    return StyleSimilarityService(embedder, VectorStore(), sync_ttl=config.EMBEDDING_SYNC_TTL)
+
+
+# Shared instance used by the routes
+style_similarity_service = _build_service()
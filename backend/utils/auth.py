@@ -1,12 +1,18 @@
 # Authentication utilities
 # Helper functions for JWT token management and authentication
 
+import time
 from functools import wraps
-from flask import request, jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask import request, jsonify, has_request_context
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from config import get_config
 from models.user import User
+from utils.cache import user_claims_cache
 from utils.db import get_db_connection
 
+# Subscription tier hierarchy
+TIER_LEVELS = {'free': 0, 'pro': 1, 'agency': 2}
+
 def token_required(f):
     """
     Decorator to require valid JWT token for protected routes
@@ -53,61 +59,68 @@ def get_current_user():
         return None
 
 
-def check_subscription_limit(user_id, feature_type):
+def get_user_claims(user_id=None, token_claims=None):
     """
-    Check if user has reached their subscription tier limits
+    Get tier and role claims for a user without hitting the database
+    
+    The access token's embedded claims are used while the token is younger 
+    than USER_CLAIMS_CACHE_TTL; otherwise the per-process claims cache is 
+    consulted and only a cache miss reads the user row. When both a cached 
+    snapshot and token claims exist, the one with the higher version wins, 
+    so a subscription change takes effect even for tokens minted earlier.
     
     Args:
-        user_id: The user's ID
-        feature_type: Type of feature to check (projects, ai_generations, etc.)
+        user_id: The user's ID (defaults to the JWT identity)
+        token_claims: Decoded access token of that user, for callers running
+                      before the route verified the request's token
     
     Returns:
-        True if user is within limits, False if limit reached
+        Claims dictionary (tier, role, ver) or None if the user is unknown
     """
-    from config import get_config
+    if token_claims is None and has_request_context():
+        try:
+            if user_id is None or user_id == get_jwt_identity():
+                user_id = get_jwt_identity()
+                token_claims = get_jwt()
+        except Exception:
+            token_claims = None
+    
+    if user_id is None:
+        return None
+    
+    if token_claims is not None and 'ver' not in token_claims:
+        token_claims = None  # Token minted before claims were embedded
+    
+    cached = user_claims_cache.get(user_id)
+    if cached is not None:
+        if token_claims is not None and token_claims['ver'] > cached['ver']:
+            return _claims_from_token(token_claims)
+        return cached
+    
+    if token_claims is not None:
+        token_age = time.time() - token_claims.get('iat', 0)
+        if token_age < get_config().USER_CLAIMS_CACHE_TTL:
+            return _claims_from_token(token_claims)
     
     connection = get_db_connection()
-    user_model = User(connection)
-    user = user_model.get_by_id(user_id)
-    connection.close()
-    
-    if not user:
-        return False
-    
-    # Get tier limits from config
-    config = get_config()
-    tier = user['subscription_tier']
-    limits = config.TIER_LIMITS.get(tier, config.TIER_LIMITS['free'])
-    
-    # Check specific feature limit
-    if feature_type == 'ai_generations':
-        limit = limits['ai_generations']
-        if limit == -1:  # Unlimited
-            return True
-        return user['ai_generations_used'] < limit
-    
-    elif feature_type == 'projects':
-        limit = limits['projects']
-        if limit == -1:  # Unlimited
-            return True
-        
-        # Count user's projects
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as count FROM projects WHERE user_id = %s", (user_id,))
-            count = cursor.fetchone()['count']
+    try:
+        return User(connection).get_claims(user_id)
+    finally:
         connection.close()
-        
-        return count < limit
-    
-    # Default to allowing
-    return True
+
+
+def _claims_from_token(token_claims):
+    """Extract the authorization claims from a decoded JWT"""
+    return {key: token_claims[key] for key in ('tier', 'role', 'ver')}
 
 
 def require_subscription_tier(required_tier):
     """
     Decorator to require specific subscription tier for a route
     
+    The tier is read from the token claims (see get_user_claims), so the
+    check normally costs no database round trip.
+    
     Args:
         required_tier: Minimum required tier ('pro' or 'agency')
     
@@ -121,21 +134,19 @@ def require_subscription_tier(required_tier):
     def decorator(f):
         @wraps(f)
         def decorated(*args, **kwargs):
-            user = get_current_user()
+            claims = get_user_claims()
             
-            if not user:
+            if not claims:
                 return jsonify({'error': 'Authentication required'}), 401
             
-            # Define tier hierarchy
-            tiers = {'free': 0, 'pro': 1, 'agency': 2}
-            user_tier_level = tiers.get(user['subscription_tier'], 0)
-            required_tier_level = tiers.get(required_tier, 2)
+            user_tier_level = TIER_LEVELS.get(claims['tier'], 0)
+            required_tier_level = TIER_LEVELS.get(required_tier, 2)
             
             if user_tier_level < required_tier_level:
                 return jsonify({
                     'error': 'Subscription upgrade required',
                     'message': f'This feature requires {required_tier.capitalize()} subscription',
-                    'current_tier': user['subscription_tier'],
+                    'current_tier': claims['tier'],
                     'required_tier': required_tier
                 }), 403
             
@@ -143,3 +154,37 @@ def require_subscription_tier(required_tier):
         return decorated
     return decorator
 
+
+def require_role(required_role):
+    """
+    Decorator to restrict a route to users with a given role
+    
+    The role is read from the token claims (see get_user_claims).
+    
+    Args:
+        required_role: Role the user must have (e.g. 'admin')
+    
+    Usage:
+        @app.route('/admin-only')
+        @jwt_required()
+        @require_role('admin')
+        def admin_only():
+            return 'Admins only'
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            claims = get_user_claims()
+            
+            if not claims:
+                return jsonify({'error': 'Authentication required'}), 401
+            
+            if claims['role'] != required_role:
+                return jsonify({
+                    'error': 'Forbidden',
+                    'message': f'This endpoint requires the {required_role} role'
+                }), 403
+            
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
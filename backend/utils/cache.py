@@ -0,0 +1,88 @@
+# Cache utilities
+# Small in-process TTL caches for data that is read on every request
+
+import threading
+import time
+from config import get_config
+from utils.metrics import record_cache_access
+
+
+class TTLCache:
+    """Thread-safe dictionary cache whose entries expire after a fixed time"""
+    
+    def __init__(self, ttl_seconds=60, max_entries=10000, name=None):
+        """
+        Args:
+            ttl_seconds: Seconds an entry stays valid
+            max_entries: Entries kept before expired ones are purged
+            name: Cache name for hit/miss metrics (unnamed caches are not counted)
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """
+        Return a cached value
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+        
+        if self.name:
+            record_cache_access(self.name, entry is not None)
+        return entry[0] if entry is not None else None
+    
+    def set(self, key, value):
+        """
+        Store a value for ttl_seconds
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge()
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+    
+    def delete(self, key):
+        """
+        Remove a cached value
+        
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """Remove every cached value"""
+        with self._lock:
+            self._entries.clear()
+    
+    def _purge(self):
+        """Drop expired entries, or the oldest half if none have expired"""
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at < now]
+        for key in expired:
+            del self._entries[key]
+        
+        if len(self._entries) >= self.max_entries:
+            oldest = sorted(self._entries, key=lambda key: self._entries[key][1])
+            for key in oldest[:len(oldest) // 2]:
+                del self._entries[key]
+
+
+# Authorization snapshots (tier, role, version) keyed by user ID
+user_claims_cache = TTLCache(ttl_seconds=get_config().USER_CLAIMS_CACHE_TTL, name='user_claims')
@@ -1,24 +1,306 @@
 # Database utility functions
 # Handles database connection and initialization
 
-import sqlite3
+import re
+import time
+import weakref
+from functools import lru_cache
+from flask import g, has_request_context
 from config import get_config
+from utils.instrumentation import record_query
+from utils.metrics import DB_CONNECTIONS_OPEN, DB_CONNECTIONS_OPENED
+from utils.sqlite_tuning import connect, is_write, writer_queue_for
+
+
+# Interval units of MySQL DATE_ADD/DATE_SUB as SQLite date modifiers
+_INTERVAL_UNITS = {'MINUTE': 'minutes', 'HOUR': 'hours', 'DAY': 'days', 'MONTH': 'months', 'YEAR': 'years'}
+
+_INTERVAL_PATTERN = re.compile(
+    r'DATE_(SUB|ADD)\(\s*NOW\(\)\s*,\s*INTERVAL\s+(%s|\d+)\s+(MINUTE|HOUR|DAY|MONTH|YEAR)\s*\)',
+    re.IGNORECASE
+)
+_DATE_FORMAT_PATTERN = re.compile(r"DATE_FORMAT\(\s*([\w.]+)\s*,\s*'([^']*)'\s*\)", re.IGNORECASE)
+
+
+def _rewrite_interval(match):
+    """DATE_SUB(NOW(), INTERVAL n DAY) -> datetime('now', '-n days')"""
+    sign = '-' if match.group(1).upper() == 'SUB' else '+'
+    amount, unit = match.group(2), _INTERVAL_UNITS[match.group(3).upper()]
+    if amount == '%s':
+        return f"datetime('now', '{sign}' || ? || ' {unit}')"
+    return f"datetime('now', '{sign}{amount} {unit}')"
+
+
+@lru_cache(maxsize=2048)
+def adapt_sql(sql):
+    """
+    Translate the MySQL dialect used by the models to SQLite
+    
+    Handles %s placeholders, NOW(), CURDATE(), DATE_FORMAT() and
+    DATE_ADD/DATE_SUB(NOW(), INTERVAL n UNIT). Results are cached, so each
+    distinct statement is only translated once per process.
+    
+    Args:
+        sql: SQL text as written in the models
+    
+    Returns:
+        SQL text SQLite accepts
+    """
+    sql = _INTERVAL_PATTERN.sub(_rewrite_interval, sql)
+    sql = _DATE_FORMAT_PATTERN.sub(lambda match: f"strftime('{match.group(2)}', {match.group(1)})", sql)
+    sql = re.sub(r'\bNOW\(\)', "datetime('now')", sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bCURDATE\(\)', "date('now')", sql, flags=re.IGNORECASE)
+    return sql.replace('%s', '?')
+
+
+def _dict_row(cursor, row):
+    """Row factory returning plain dictionaries (JSON-serializable, support .get())"""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class CountingCursor:
+    """
+    Cursor wrapper that counts and times executed statements
+    
+    Each statement is timed from execute() through its fetches and reported
+    to utils.instrumentation once the next statement starts or the cursor
+    closes, so slow fetches of large result sets are attributed correctly.
+    """
+    
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+        self._sql = None
+        self._elapsed = 0.0
+        self._rows = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self.fetchall())
+    
+    def _finish_statement(self):
+        """Report the statement in progress, if any"""
+        if self._sql is not None:
+            record_query(self._sql, self._elapsed * 1000, self._rows)
+            self._sql = None
+    
+    def _timed(self, sql, func, *args):
+        """Start a new statement and time its execution"""
+        self._finish_statement()
+        self._connection._before_statement(sql)
+        self._connection.query_count += 1
+        self._sql = sql
+        self._elapsed = 0.0
+        self._rows = 0
+        
+        started = time.perf_counter()
+        try:
+            return func(adapt_sql(sql), *args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+    
+    def _fetch(self, func, *args):
+        """Time a fetch and count the rows it returns"""
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+        
+        if isinstance(result, list):
+            self._rows += len(result)
+        elif result is not None:
+            self._rows += 1
+        return result
+    
+    def execute(self, sql, params=()):
+        self._timed(sql, self._cursor.execute, params)
+        return self
+    
+    def executemany(self, sql, seq_of_params):
+        self._timed(sql, self._cursor.executemany, seq_of_params)
+        return self
+    
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+    
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._fetch(self._cursor.fetchmany)
+        return self._fetch(self._cursor.fetchmany, size)
+    
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+    
+    def close(self):
+        self._finish_statement()
+        self._cursor.close()
+
+
+class WriterTurn:
+    """A connection's turn in the writer queue, if it holds one"""
+    
+    def __init__(self, writer_queue):
+        self.writer_queue = writer_queue
+        self.held = False
+    
+    def acquire(self):
+        """Wait for the turn to write (no-op without a queue or if already held)"""
+        if self.writer_queue is not None and not self.held:
+            self.writer_queue.acquire()
+            self.held = True
+    
+    def release(self):
+        """Give up the turn, if held"""
+        if self.held:
+            self.held = False
+            self.writer_queue.release()
+
+
+def _discard_connection(connection, turn):
+    """Close a connection that was dropped without close() and free its turn"""
+    try:
+        connection.close()
+    finally:
+        turn.release()
+
+
+class CountingConnection:
+    """
+    Connection wrapper that hands out counting cursors
+    
+    With a writer queue (see utils.sqlite_tuning), the first write statement
+    of a transaction waits for this connection's turn to write, and the turn
+    ends on commit, rollback or close. A connection dropped without any of
+    them is closed and gives its turn back as soon as it is freed, and connections
+    opened during a request are closed at request teardown
+    (see init_connection_cleanup).
+    """
+    
+    def __init__(self, connection, writer_queue=None):
+        self._connection = connection
+        # Weak, so a dropped connection is freed (and its turn given back) at once
+        self._cursors = weakref.WeakSet()
+        self._closed = False
+        self._turn = WriterTurn(writer_queue)
+        self.query_count = 0
+        weakref.finalize(self, _discard_connection, connection, self._turn)
+        DB_CONNECTIONS_OPENED.inc()
+        DB_CONNECTIONS_OPEN.inc()
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+    
+    def _before_statement(self, sql):
+        """Join the writer queue before the first write of a transaction"""
+        if not self._turn.held and is_write(sql):
+            self._turn.acquire()
+    
+    def _end_transaction(self):
+        """Give up the turn to write, if held"""
+        self._turn.release()
+    
+    def begin_write(self):
+        """
+        Start a write transaction before its first write statement
+        
+        Reads made after this call and the writes that follow them are atomic:
+        the writer-queue turn and SQLite's write lock (BEGIN IMMEDIATE) are
+        taken now, so no other writer can change the rows in between. The
+        transaction ends with commit() or rollback().
+        """
+        self._turn.acquire()
+        try:
+            if not self._connection.in_transaction:
+                self._connection.execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._end_transaction()
+            raise
+    
+    def cursor(self, *args, **kwargs):
+        cursor = CountingCursor(self._connection.cursor(*args, **kwargs), self)
+        self._cursors.add(cursor)
+        return cursor
+    
+    def commit(self):
+        try:
+            self._connection.commit()
+        finally:
+            self._end_transaction()
+    
+    def rollback(self):
+        try:
+            self._connection.rollback()
+        finally:
+            self._end_transaction()
+    
+    def close(self):
+        # Report statements on cursors that were never closed explicitly
+        for cursor in list(self._cursors):
+            cursor._finish_statement()
+        self._cursors.clear()
+        try:
+            self._connection.close()
+        finally:
+            self._end_transaction()
+        if not self._closed:
+            self._closed = True
+            DB_CONNECTIONS_OPEN.dec()
+
+
+def wrap_connection(connection, writer_queue=None):
+    """
+    Give a raw sqlite3 connection the behaviour of get_db_connection
+    
+    Connections opened while handling a request are closed at its teardown
+    if the route did not close them (see init_connection_cleanup).
+    
+    Args:
+        connection: sqlite3 connection
+        writer_queue: Optional WriterQueue serializing this process's writers
+    
+    Returns:
+        CountingConnection returning rows as dictionaries
+    """
+    connection.row_factory = _dict_row
+    wrapped = CountingConnection(connection, writer_queue)
+    if has_request_context():
+        g.setdefault('db_connections', []).append(wrapped)
+    return wrapped
+
 
 def get_db_connection():
     """
     Create and return a SQLite database connection
     
+    Every statement run through the connection is counted on the connection
+    itself (query_count) and timed for the request metrics and slow-query log
+    (see utils.instrumentation).
+    
+    Statements are written in the MySQL dialect used throughout the models
+    and translated for SQLite by adapt_sql.
+    
+    Pragmas, WAL mode and write serialization follow the SQLITE_* settings
+    (see utils.sqlite_tuning).
+    
     Returns:
-        Database connection object with row factory for dict-like access
+        Database connection object returning rows as dictionaries
     """
     config = get_config()
     
     try:
         # Extract database path from SQLAlchemy URI
         db_path = config.SQLALCHEMY_DATABASE_URI.replace('sqlite:///', '')
-        connection = sqlite3.connect(db_path)
-        connection.row_factory = sqlite3.Row  # Enable dict-like access to rows
-        return connection
+        return wrap_connection(connect(db_path, config), writer_queue_for(db_path, config))
     except Exception as e:
         print(f"Error connecting to database: {e}")
         raise
@@ -44,6 +326,23 @@ def init_db():
         return False
 
 
+def init_connection_cleanup(app):
+    """
+    Close the connections a request left open when the request ends
+    
+    Routes that return early or fail without close_db_connection would
+    otherwise keep an uncommitted write, and with it the writer-queue turn
+    every later write of the worker waits for.
+    
+    Args:
+        app: Flask application
+    """
+    @app.teardown_request
+    def close_request_connections(exception=None):
+        for connection in g.pop('db_connections', []):
+            close_db_connection(connection)
+
+
 def close_db_connection(connection):
     """
     Safely close database connection
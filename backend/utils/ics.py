@@ -0,0 +1,113 @@
+# iCalendar utilities - RFC 5545 serialization of calendar events
+# Produces CRLF-terminated, folded content lines; no external dependencies
+
+from datetime import datetime, timezone
+
+from utils.recurrence import parse_exceptions
+
+PRODUCT_ID = '-//AI Studio//Calendar Feed//EN'
+
+# Content lines longer than this many octets are folded
+_LINE_OCTETS = 75
+
+
+def escape_text(value):
+    """Escape a TEXT property value"""
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def format_datetime(value):
+    """
+    UTC DATE-TIME value (20240215T100000Z)
+    
+    Args:
+        value: datetime or ISO 8601 string (naive values are taken as UTC)
+    """
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip())
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line):
+    """
+    Fold a content line into CRLF-terminated octet-limited lines
+    
+    Args:
+        line: Unfolded content line
+    
+    Returns:
+        Encoded bytes
+    """
+    data = line.encode('utf-8')
+    if len(data) <= _LINE_OCTETS:
+        return data + b'\r\n'
+    
+    parts = []
+    limit = _LINE_OCTETS
+    while data:
+        cut = min(limit, len(data))
+        # Never split a multi-byte character
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        limit = _LINE_OCTETS - 1
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def calendar_header(name):
+    """Opening lines of a VCALENDAR"""
+    return b''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODUCT_ID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        'X-PUBLISHED-TTL:PT15M'
+    ))
+
+
+def calendar_footer():
+    """Closing line of a VCALENDAR"""
+    return fold('END:VCALENDAR')
+
+
+def serialize_event(event, domain='aistudio.design'):
+    """
+    One calendar event as a VEVENT
+    
+    Recurring series are written once with their RRULE and cancelled
+    occurrences as EXDATE, so the output does not grow with series length.
+    
+    Args:
+        event: calendar_events row
+        domain: Domain part of the UID
+    
+    Returns:
+        Encoded bytes of the VEVENT
+    """
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:event-{event['id']}@{domain}",
+        f"DTSTAMP:{format_datetime(event.get('created_at') or event['start_time'])}",
+        f"DTSTART:{format_datetime(event['start_time'])}"
+    ]
+    if event.get('end_time'):
+        lines.append(f"DTEND:{format_datetime(event['end_time'])}")
+    lines.append(f"SUMMARY:{escape_text(event['title'])}")
+    if event.get('description'):
+        lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+    if event.get('location'):
+        lines.append(f"LOCATION:{escape_text(event['location'])}")
+    if event.get('event_type'):
+        lines.append(f"CATEGORIES:{escape_text(event['event_type'].upper())}")
+    if event.get('recurrence_rule'):
+        lines.append(f"RRULE:{event['recurrence_rule']}")
+        exceptions = sorted(parse_exceptions(event.get('recurrence_exceptions')))
+        if exceptions:
+            lines.append('EXDATE:' + ','.join(format_datetime(value) for value in exceptions))
+    lines.append('END:VEVENT')
+    return b''.join(fold(line) for line in lines)
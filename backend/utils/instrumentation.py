@@ -0,0 +1,262 @@
+# Performance instrumentation utilities
+# Per-request timings (DB, AI, JSON), Server-Timing headers, structured logs and a slow-query log
+
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from config import get_config
+
+perf_logger = logging.getLogger('ai_studio.perf')
+slow_query_logger = logging.getLogger('ai_studio.slow_query')
+
+# Normalization rules turning SQL into a fingerprint shared by all its variants
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                      # String literals
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                   # Numbers
+    (re.compile(r'%s|\?'), '?'),                               # Placeholders
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),       # IN lists of any length
+    (re.compile(r'\s+'), ' ')                                  # Whitespace
+]
+
+# Aggregated slow-query statistics per fingerprint
+_slow_queries = {}
+_slow_queries_lock = threading.Lock()
+
+
+def fingerprint_sql(sql):
+    """
+    Normalize a SQL statement so queries differing only in values group together
+    
+    Args:
+        sql: SQL text
+    
+    Returns:
+        Normalized, lower-cased SQL
+    """
+    for pattern, replacement in _FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip().lower()
+
+
+def _request_metrics():
+    """Return the metrics dictionary of the current request (or None)"""
+    if not has_request_context():
+        return None
+    if 'perf' not in g:
+        g.perf = {'db_ms': 0.0, 'queries': 0, 'rows': 0, 'ai_ms': 0.0, 'ai_calls': 0, 'json_ms': 0.0}
+    return g.perf
+
+
+def record_query(sql, duration_ms, rows):
+    """
+    Account one finished SQL statement
+    
+    Adds it to the request totals and to the slow-query log when it took
+    longer than SLOW_QUERY_MS.
+    
+    Args:
+        sql: SQL text
+        duration_ms: Execution plus fetch time in milliseconds
+        rows: Rows fetched
+    """
+    metrics = _request_metrics()
+    if metrics is not None:
+        metrics['db_ms'] += duration_ms
+        metrics['queries'] += 1
+        metrics['rows'] += rows
+    
+    threshold = get_config().SLOW_QUERY_MS
+    if threshold is None or duration_ms < threshold:
+        return
+    
+    fingerprint = fingerprint_sql(sql)
+    with _slow_queries_lock:
+        stats = _slow_queries.setdefault(fingerprint, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stats['count'] += 1
+        stats['total_ms'] += duration_ms
+        stats['max_ms'] = max(stats['max_ms'], duration_ms)
+    
+    slow_query_logger.warning(json.dumps({
+        'event': 'slow_query',
+        'duration_ms': round(duration_ms, 2),
+        'rows': rows,
+        'endpoint': request.endpoint if has_request_context() else None,
+        'fingerprint': fingerprint
+    }))
+
+
+def get_slow_queries(limit=20):
+    """
+    Slowest query fingerprints seen by this process
+    
+    Args:
+        limit: Maximum number of fingerprints
+    
+    Returns:
+        List of dictionaries sorted by total time, slowest first
+    """
+    with _slow_queries_lock:
+        items = [dict(stats, fingerprint=fingerprint) for fingerprint, stats in _slow_queries.items()]
+    
+    items.sort(key=lambda item: item['total_ms'], reverse=True)
+    for item in items:
+        item['total_ms'] = round(item['total_ms'], 2)
+        item['max_ms'] = round(item['max_ms'], 2)
+    return items[:limit]
+
+
+@contextmanager
+def timed(metric):
+    """
+    Add the duration of a block to a request metric
+    
+    Usage:
+        with timed('ai'):
+            response = client.chat.completions.create(...)
+    
+    Args:
+        metric: Metric name ('ai' or 'json')
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _request_metrics()
+        if metrics is not None:
+            metrics[f'{metric}_ms'] += (time.perf_counter() - started) * 1000
+            if metric == 'ai':
+                metrics['ai_calls'] += 1
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that records how long responses take to encode"""
+    
+    def dumps(self, obj, **kwargs):
+        with timed('json'):
+            return super().dumps(obj, **kwargs)
+
+
+def init_instrumentation(app):
+    """
+    Record per-request timings and expose them
+    
+    Each /api response gets a Server-Timing header (total, db, ai, json) and
+    an X-Query-Count header, and one structured JSON log line is written to
+    the 'ai_studio.perf' logger.
+    
+    Args:
+        app: Flask application
+    """
+    config = get_config()
+    if not config.PERF_INSTRUMENTATION_ENABLED:
+        return
+    
+    app.json = TimedJSONProvider(app)
+    
+    for logger in (perf_logger, slow_query_logger):
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        _request_metrics()
+    
+    @app.after_request
+    def add_timing_headers(response):
+        started = g.get('request_started')
+        metrics = g.get('perf')
+        if started is None or metrics is None:
+            return response
+        
+        total_ms = (time.perf_counter() - started) * 1000
+        response.headers['X-Query-Count'] = str(metrics['queries'])
+        response.headers['Server-Timing'] = ', '.join([
+            f"total;dur={total_ms:.1f}",
+            f"db;dur={metrics['db_ms']:.1f};desc=\"{metrics['queries']} queries\"",
+            f"ai;dur={metrics['ai_ms']:.1f}",
+            f"json;dur={metrics['json_ms']:.1f}"
+        ])
+        
+        if config.PERF_LOG_REQUESTS and request.path.startswith('/api/'):
+            perf_logger.info(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'db_ms': round(metrics['db_ms'], 2),
+                'queries': metrics['queries'],
+                'rows': metrics['rows'],
+                'ai_ms': round(metrics['ai_ms'], 2),
+                'ai_calls': metrics['ai_calls'],
+                'json_ms': round(metrics['json_ms'], 2)
+            }))
+        return response
+
+
+def init_request_profiling(app):
+    """
+    Profile single requests with cProfile when an admin asks for it
+    
+    An admin sending 'X-Profile: 1' gets the request run under cProfile; the
+    response carries X-Profile-Id (fetch the report from
+    /api/admin/profiles/<id>) and X-Profile-Time. Requests without the header
+    only pay for one header lookup.
+    
+    Args:
+        app: Flask application
+    """
+    config = get_config()
+    if not config.PROFILING_ENABLED:
+        return
+    
+    @app.before_request
+    def start_request_profile():
+        if not request.headers.get(config.PROFILE_HEADER):
+            return
+        
+        # Imported here: utils.auth depends on utils.db, which depends on this module
+        from flask_jwt_extended import verify_jwt_in_request
+        from utils.auth import get_user_claims
+        from services.profiler import request_profiler
+        
+        try:
+            verify_jwt_in_request(optional=True)
+            claims = get_user_claims()
+        except Exception:
+            return
+        if not claims or claims.get('role') != 'admin':
+            return
+        
+        g.request_profile = request_profiler.start()
+    
+    @app.after_request
+    def attach_request_profile(response):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return response
+        
+        from services.profiler import request_profiler
+        
+        report = request_profiler.finish(profile, f'{request.method} {request.full_path.rstrip("?")}')
+        response.headers['X-Profile-Id'] = report['id']
+        response.headers['X-Profile-Time'] = f"{report['total_time']:.6f}"
+        return response
+    
+    @app.teardown_request
+    def stop_request_profile(exception=None):
+        # Requests that failed before after_request ran
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.disable()
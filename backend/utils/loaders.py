@@ -0,0 +1,124 @@
+# Batch loading utilities
+# Resolves related rows for a whole result set with one IN (...) query per table
+
+from flask import g, has_request_context
+
+# Tables the loaders may read and the columns they fetch
+LOADER_COLUMNS = {
+    'clients': ['id', 'name', 'email'],
+    'projects': ['id', 'title', 'status']
+}
+
+
+def get_identity_map():
+    """
+    Return the identity map for the current request
+    
+    Rows are cached per table and ID for the lifetime of the request, so the
+    same client or project is only ever fetched once. Outside of a request
+    a fresh map is returned and nothing is cached between calls.
+    
+    Returns:
+        Dictionary mapping table name -> {id: row or None}
+    """
+    if not has_request_context():
+        return {}
+    if 'identity_map' not in g:
+        g.identity_map = {}
+    return g.identity_map
+
+
+class BatchLoader:
+    """Loads rows of one table by ID, batching and caching lookups"""
+    
+    def __init__(self, connection, table, identity_map=None):
+        """
+        Args:
+            connection: Database connection
+            table: Table to load from (must be listed in LOADER_COLUMNS)
+            identity_map: Optional map to share cached rows with other loaders
+        """
+        if table not in LOADER_COLUMNS:
+            raise ValueError(f"No loader configured for table '{table}'")
+        
+        self.connection = connection
+        self.table = table
+        if identity_map is None:
+            identity_map = get_identity_map()
+        self.rows = identity_map.setdefault(table, {})
+    
+    def load_many(self, ids):
+        """
+        Fetch rows for the given IDs, querying only the ones not cached yet
+        
+        Args:
+            ids: Iterable of IDs (None values are ignored)
+        
+        Returns:
+            Dictionary mapping ID -> row (None for IDs that do not exist)
+        """
+        wanted = {row_id for row_id in ids if row_id is not None}
+        missing = [row_id for row_id in wanted if row_id not in self.rows]
+        
+        if missing:
+            placeholders = ', '.join(['%s'] * len(missing))
+            columns = ', '.join(LOADER_COLUMNS[self.table])
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {columns} FROM {self.table} WHERE id IN ({placeholders})",
+                    missing
+                )
+                for row in cursor.fetchall():
+                    self.rows[row['id']] = row
+            
+            # Remember misses too so they are not queried again
+            for row_id in missing:
+                self.rows.setdefault(row_id, None)
+        
+        return {row_id: self.rows[row_id] for row_id in wanted}
+    
+    def load(self, row_id):
+        """
+        Fetch a single row by ID
+        
+        Args:
+            row_id: The row's ID
+        
+        Returns:
+            Row dictionary or None
+        """
+        return self.load_many([row_id]).get(row_id)
+
+
+def attach_related(connection, rows, key, table, column, alias):
+    """
+    Copy a column of a related row onto every row of a result set
+    
+    Args:
+        connection: Database connection
+        rows: List of row dictionaries (modified in place)
+        key: Foreign key column on the rows (e.g. 'client_id')
+        table: Related table (e.g. 'clients')
+        column: Column to copy from the related row (e.g. 'name')
+        alias: Name of the attached field (e.g. 'client_name')
+    
+    Returns:
+        The same list of rows
+    """
+    related = BatchLoader(connection, table).load_many(row.get(key) for row in rows)
+    
+    for row in rows:
+        match = related.get(row.get(key))
+        row[alias] = match[column] if match else None
+    
+    return rows
+
+
+def attach_client_names(connection, rows):
+    """Add client_name to rows that carry a client_id"""
+    return attach_related(connection, rows, 'client_id', 'clients', 'name', 'client_name')
+
+
+def attach_project_titles(connection, rows):
+    """Add project_title to rows that carry a project_id"""
+    return attach_related(connection, rows, 'project_id', 'projects', 'title', 'project_title')
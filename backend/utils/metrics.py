@@ -0,0 +1,182 @@
+# Prometheus metrics
+# Request, database, AI, cache and job queue metrics exported at /metrics
+
+import os
+import time
+from contextlib import contextmanager
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+from config import get_config
+from utils.instrumentation import timed
+
+# Request latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# AI calls are much slower than ordinary requests
+AI_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', 'Database time spent per HTTP request',
+    ['blueprint', 'endpoint'], buckets=LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database statements executed per HTTP request',
+    ['blueprint', 'endpoint'], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250)
+)
+
+DB_CONNECTIONS_OPENED = Counter('db_connections_opened_total', 'Database connections opened')
+DB_CONNECTIONS_OPEN = Gauge('db_connections_open', 'Database connections currently open',
+                            multiprocess_mode='livesum')
+
+AI_LATENCY = Histogram(
+    'ai_request_duration_seconds', 'OpenAI API call latency by AIService method',
+    ['method'], buckets=AI_LATENCY_BUCKETS
+)
+AI_ERRORS = Counter('ai_request_errors_total', 'Failed OpenAI API calls by AIService method',
+                    ['method'])
+
+CACHE_REQUESTS = Counter('cache_requests_total', 'In-process cache lookups', ['cache', 'result'])
+
+JOB_QUEUE_DEPTH = Gauge('job_queue_depth', 'Jobs waiting or running in background queues',
+                        ['queue'], multiprocess_mode='livesum')
+
+# Named apart from the single-process collector's process_resident_memory_bytes
+PROCESS_MEMORY = Gauge('worker_resident_memory_bytes', 'Resident memory of each worker process',
+                       multiprocess_mode='all')
+
+# Seconds between resident memory samples (read on the request path)
+MEMORY_SAMPLE_INTERVAL = 5.0
+_last_memory_sample = 0.0
+
+
+def multiprocess_enabled():
+    """Whether metrics are shared between worker processes through PROMETHEUS_MULTIPROC_DIR"""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def record_cache_access(cache, hit):
+    """
+    Count one cache lookup
+    
+    Args:
+        cache: Cache name
+        hit: Whether the value was found
+    """
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+@contextmanager
+def ai_call(method):
+    """
+    Time an OpenAI API call for the request metrics and the AI histograms
+    
+    Usage:
+        with ai_call('generate_design_image'):
+            response = self.client.images.generate(...)
+    
+    Args:
+        method: AIService method making the call
+    """
+    started = time.perf_counter()
+    try:
+        with timed('ai'):
+            yield
+    except Exception:
+        AI_ERRORS.labels(method).inc()
+        raise
+    finally:
+        AI_LATENCY.labels(method).observe(time.perf_counter() - started)
+
+
+def _resident_memory_bytes():
+    """Read this process's resident set size"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is the peak in kilobytes on Linux, the best available elsewhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _sample_memory():
+    """Refresh the memory gauge at most every MEMORY_SAMPLE_INTERVAL seconds"""
+    global _last_memory_sample
+    now = time.monotonic()
+    if now - _last_memory_sample >= MEMORY_SAMPLE_INTERVAL:
+        _last_memory_sample = now
+        PROCESS_MEMORY.set(_resident_memory_bytes())
+
+
+def generate_metrics():
+    """
+    Render all metrics in the Prometheus text format
+    
+    With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) the values of
+    every worker process are aggregated, otherwise this process's are used.
+    
+    Returns:
+        Tuple of (payload bytes, content type)
+    """
+    _sample_memory()
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def init_metrics(app):
+    """
+    Record request metrics and serve them at /metrics
+    
+    Requests are labelled by blueprint and endpoint (never by raw path) to
+    keep label cardinality bounded. Set METRICS_TOKEN to require
+    'Authorization: Bearer <token>' on the endpoint.
+    
+    Args:
+        app: Flask application
+    """
+    config = get_config()
+    if not config.METRICS_ENABLED:
+        return
+    
+    @app.before_request
+    def start_metrics_timer():
+        g.metrics_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('metrics_started')
+        if started is None or request.endpoint == 'metrics':
+            return response
+        
+        blueprint = request.blueprint or 'app'
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method,
+                               str(response.status_code)).observe(time.perf_counter() - started)
+        
+        perf = g.get('perf')
+        if perf is not None:
+            REQUEST_DB_TIME.labels(blueprint, endpoint).observe(perf['db_ms'] / 1000)
+            REQUEST_QUERIES.labels(blueprint, endpoint).observe(perf['queries'])
+        
+        _sample_memory()
+        return response
+    
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus scrape endpoint"""
+        if config.METRICS_TOKEN and \
+                request.headers.get('Authorization') != f'Bearer {config.METRICS_TOKEN}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        
+        payload, content_type = generate_metrics()
+        return Response(payload, content_type=content_type)
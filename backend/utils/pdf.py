@@ -0,0 +1,213 @@
+# PDF Writer - minimal PDF 1.4 output for generated documents
+# Text in the standard Helvetica fonts, filled rectangles, lines and JPEG images; no external dependencies
+
+import zlib
+
+# A4 in points (1/72 inch)
+A4 = (595.28, 841.89)
+
+# Approximate Helvetica glyph widths (per 1000 units of font size)
+_NARROW = set("il.,:;|!'`ijtfI[]()")
+_WIDE = set('mwMW@%')
+
+
+def text_width(text, size, bold=False):
+    """
+    Approximate width of a line of text in points
+    
+    Args:
+        text: Text to measure
+        size: Font size in points
+        bold: Whether the bold font is used
+    
+    Returns:
+        Width in points
+    """
+    units = 0
+    for char in text:
+        if char == ' ':
+            units += 278
+        elif char in _NARROW:
+            units += 278
+        elif char in _WIDE:
+            units += 889
+        elif char.isdigit() or char in '$#_-+=?':
+            units += 556
+        elif char.isupper():
+            units += 667
+        else:
+            units += 530
+    return units * size / 1000 * (1.05 if bold else 1.0)
+
+
+def wrap_text(text, size, width, bold=False):
+    """
+    Break text into lines that fit a width
+    
+    Args:
+        text: Text to wrap (newlines start new paragraphs)
+        size: Font size in points
+        width: Available width in points
+        bold: Whether the bold font is used
+    
+    Returns:
+        List of lines
+    """
+    lines = []
+    for paragraph in str(text or '').splitlines() or ['']:
+        line = ''
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and text_width(candidate, size, bold) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _escape(text):
+    """Encode text as a PDF string literal (WinAnsi)"""
+    data = str(text).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _color(rgb):
+    """Format an (r, g, b) tuple of 0-255 values as PDF operands"""
+    return ' '.join(f"{channel / 255:.3f}" for channel in rgb)
+
+
+class PdfPage:
+    """One page; coordinates are points from the bottom-left corner"""
+    
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._ops = []
+        self.images = []
+    
+    def text(self, x, y, text, size=10, bold=False, color=(0, 0, 0)):
+        """Draw a single line of text with its baseline at y"""
+        font = b'/F2' if bold else b'/F1'
+        self._ops.append(b'BT ' + font + f" {size} Tf {_color(color)} rg {x:.2f} {y:.2f} Td ".encode()
+                         + _escape(text) + b' Tj ET')
+    
+    def text_right(self, x, y, text, size=10, bold=False, color=(0, 0, 0)):
+        """Draw a line of text ending at x"""
+        self.text(x - text_width(str(text), size, bold), y, text, size, bold, color)
+    
+    def rect(self, x, y, width, height, fill=(0, 0, 0)):
+        """Draw a filled rectangle with its bottom-left corner at (x, y)"""
+        self._ops.append(f"{_color(fill)} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f".encode())
+    
+    def line(self, x1, y1, x2, y2, color=(0, 0, 0), width=0.5):
+        """Draw a straight line"""
+        self._ops.append(f"{_color(color)} RG {width:.2f} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S".encode())
+    
+    def image(self, jpeg, pixel_width, pixel_height, x, y, width, height):
+        """
+        Draw a JPEG image
+        
+        Args:
+            jpeg: JPEG file contents (RGB)
+            pixel_width: Image width in pixels
+            pixel_height: Image height in pixels
+            x, y: Bottom-left corner in points
+            width, height: Size on the page in points
+        """
+        name = f"Im{len(self.images) + 1}"
+        self.images.append((name, jpeg, pixel_width, pixel_height))
+        self._ops.append(f"q {width:.2f} 0 0 {height:.2f} {x:.2f} {y:.2f} cm /{name} Do Q".encode())
+    
+    def content(self):
+        """Page content stream (uncompressed)"""
+        return b'\n'.join(self._ops)
+
+
+class PdfDocument:
+    """A PDF built page by page and written out in one pass"""
+    
+    def __init__(self, page_size=A4, title=None):
+        """
+        Args:
+            page_size: (width, height) in points
+            title: Document title shown by PDF viewers
+        """
+        self.page_size = page_size
+        self.title = title
+        self.pages = []
+    
+    def add_page(self):
+        """Append a blank page and return it"""
+        page = PdfPage(*self.page_size)
+        self.pages.append(page)
+        return page
+    
+    def write(self, fp):
+        """
+        Serialize the document
+        
+        Args:
+            fp: Binary file object to write to
+        
+        Returns:
+            Number of bytes written
+        """
+        offsets = {}
+        written = 0
+        
+        def emit(data):
+            nonlocal written
+            fp.write(data)
+            written += len(data)
+        
+        def emit_object(number, body, stream=None):
+            offsets[number] = written
+            if stream is not None:
+                body = body[:-2] + f" /Length {len(stream)} >>".encode()
+                emit(f"{number} 0 obj\n".encode() + body + b'\nstream\n' + stream + b'\nendstream\nendobj\n')
+            else:
+                emit(f"{number} 0 obj\n".encode() + body + b'\nendobj\n')
+        
+        # 1 catalog, 2 page tree, 3-4 fonts, 5 info, then per page: images, content, page
+        page_numbers = []
+        number = 6
+        for page in self.pages:
+            page_numbers.append(number + len(page.images) + 1)
+            number += len(page.images) + 2
+        total = number
+        
+        emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        emit_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        kids = ' '.join(f"{n} 0 R" for n in page_numbers)
+        emit_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode())
+        emit_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        emit_object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+        emit_object(5, b'<< /Title ' + _escape(self.title or '') + b' /Producer (AI Studio) >>')
+        
+        number = 6
+        width, height = self.page_size
+        for page in self.pages:
+            images = []
+            for name, jpeg, pixel_width, pixel_height in page.images:
+                emit_object(number, (f"<< /Type /XObject /Subtype /Image /Width {pixel_width} "
+                                     f"/Height {pixel_height} /ColorSpace /DeviceRGB /BitsPerComponent 8 "
+                                     f"/Filter /DCTDecode >>").encode(), jpeg)
+                images.append(f"/{name} {number} 0 R")
+                number += 1
+            
+            emit_object(number, b'<< /Filter /FlateDecode >>', zlib.compress(page.content(), 6))
+            resources = f"/Font << /F1 3 0 R /F2 4 0 R >>"
+            if images:
+                resources += f" /XObject << {' '.join(images)} >>"
+            emit_object(number + 1, (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] "
+                                     f"/Resources << {resources} >> /Contents {number} 0 R >>").encode())
+            number += 2
+        
+        xref = written
+        emit(f"xref\n0 {total}\n0000000000 65535 f \n".encode())
+        for n in range(1, total):
+            emit(f"{offsets[n]:010d} 00000 n \n".encode())
+        emit(f"trailer\n<< /Size {total} /Root 1 0 R /Info 5 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+        return written
@@ -0,0 +1,298 @@
+# Rate limiting utilities
+# Per-user, per-tier API rate limits using the generic cell rate algorithm (GCRA)
+
+import hashlib
+import math
+import threading
+import time
+from flask import g, jsonify, request
+from flask_jwt_extended import decode_token
+from config import get_config
+from utils.auth import get_user_claims
+from utils.cache import TTLCache
+
+# Units accepted in limit strings such as '120/minute'
+PERIOD_SECONDS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+
+
+def parse_limit(limit):
+    """
+    Parse a limit string
+    
+    Args:
+        limit: String like '120/minute' or '10/second'
+    
+    Returns:
+        Tuple of (requests, period_seconds)
+    """
+    count, _, period = limit.partition('/')
+    period = period.strip().rstrip('s')
+    if period not in PERIOD_SECONDS:
+        raise ValueError(f"Invalid rate limit period in '{limit}'")
+    return int(count), PERIOD_SECONDS[period]
+
+
+class RateLimitResult:
+    """Outcome of one rate limit check, with the values for the response headers"""
+    
+    __slots__ = ('allowed', 'limit', 'remaining', 'reset_after', 'retry_after')
+    
+    def __init__(self, allowed, limit, remaining, reset_after, retry_after):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+
+
+class MemoryBackend:
+    """In-process storage of theoretical arrival times (one per key)"""
+    
+    def __init__(self, max_keys=100000):
+        """
+        Args:
+            max_keys: Keys kept before idle ones are purged
+        """
+        self.max_keys = max_keys
+        self._tats = {}
+        self._lock = threading.Lock()
+    
+    def update(self, key, now, emission_interval, burst_window):
+        """
+        Apply one GCRA step atomically
+        
+        Args:
+            key: Bucket key
+            now: Current time in seconds
+            emission_interval: Seconds each request "costs"
+            burst_window: Seconds of cost a bucket may run ahead of now
+        
+        Returns:
+            Tuple of (allowed, theoretical arrival time after the step)
+        """
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + emission_interval
+            if new_tat - now > burst_window + 1e-9:
+                return False, tat
+            
+            if len(self._tats) >= self.max_keys and key not in self._tats:
+                self._purge(now)
+            self._tats[key] = new_tat
+            return True, new_tat
+    
+    def _purge(self, now):
+        """Drop buckets that have fully drained"""
+        for stale_key in [k for k, tat in self._tats.items() if tat <= now]:
+            del self._tats[stale_key]
+
+
+class RedisBackend:
+    """Shared storage for multi-worker deployments (requires the redis package)"""
+    
+    # KEYS[1] = bucket key; ARGV = now, emission interval, burst window
+    SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local interval = tonumber(ARGV[2])
+        local burst = tonumber(ARGV[3])
+        local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+        if tat < now then tat = now end
+        local new_tat = tat + interval
+        if new_tat - now > burst + 1e-9 then
+            return {0, tostring(tat)}
+        end
+        redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+        return {1, tostring(new_tat)}
+    """
+    
+    def __init__(self, url, prefix='ratelimit:'):
+        """
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379/0
+            prefix: Prefix for bucket keys
+        """
+        import redis
+        
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+    
+    def update(self, key, now, emission_interval, burst_window):
+        """Apply one GCRA step atomically on the Redis server (see MemoryBackend.update)"""
+        allowed, tat = self.script(keys=[self.prefix + key],
+                                   args=[now, emission_interval, burst_window])
+        return bool(allowed), float(tat)
+
+
+class RateLimiter:
+    """GCRA rate limiter: smooth sliding-window limits with O(1) state per key"""
+    
+    def __init__(self, backend=None, clock=time.time):
+        """
+        Args:
+            backend: MemoryBackend (default) or RedisBackend
+            clock: Time source returning seconds
+        """
+        self.backend = backend or MemoryBackend()
+        self.clock = clock
+    
+    def hit(self, key, limit, period):
+        """
+        Count one request against a bucket
+        
+        Args:
+            key: Bucket key (e.g. 'user:7:dashboard')
+            limit: Requests allowed per period
+            period: Period length in seconds
+        
+        Returns:
+            RateLimitResult
+        """
+        now = self.clock()
+        emission_interval = period / limit
+        allowed, tat = self.backend.update(key, now, emission_interval, period)
+        
+        # Requests that still fit before the bucket is full
+        remaining = int((period - (tat - now)) / emission_interval) if allowed else 0
+        reset_after = max(tat - now, 0.0)
+        retry_after = 0.0 if allowed else max(tat + emission_interval - period - now, 0.0)
+        
+        return RateLimitResult(allowed, limit, max(remaining, 0), reset_after, retry_after)
+
+
+def _build_limiter():
+    """Create the shared limiter from configuration"""
+    config = get_config()
+    if config.RATE_LIMIT_STORAGE_URL:
+        return RateLimiter(RedisBackend(config.RATE_LIMIT_STORAGE_URL))
+    return RateLimiter(MemoryBackend())
+
+
+def _resolve_limit(config, endpoint, tier):
+    """
+    Find the limit that applies to an endpoint for a tier
+    
+    Returns:
+        Tuple of (bucket name, limit string)
+    """
+    route_limits = config.RATE_LIMIT_ROUTES.get(endpoint)
+    if route_limits and tier in route_limits:
+        return endpoint, route_limits[tier]
+    return 'default', config.RATE_LIMITS.get(tier, config.RATE_LIMITS['anonymous'])
+
+
+# Decoded access tokens (raw token -> (identity, claims, expires_at)) so the
+# middleware verifies each token's signature once rather than on every request
+_token_cache = TTLCache(ttl_seconds=300, max_entries=20000, name='access_tokens')
+
+
+def _identify(authorization):
+    """
+    Work out who is making a request from its Authorization header
+    
+    The tier comes from get_user_claims rather than the token alone, so a
+    subscription change applies before the user's token expires.
+    
+    Args:
+        authorization: Authorization header value
+    
+    Returns:
+        Tuple of (user identity or None, tier)
+    """
+    if not authorization.startswith('Bearer '):
+        return None, 'anonymous'
+    
+    token = authorization[7:]
+    cached = _token_cache.get(token)
+    if cached is None:
+        try:
+            claims = decode_token(token)
+            cached = (claims.get('sub'), claims, claims.get('exp', 0))
+        except Exception:
+            # Invalid or expired tokens are rejected by the route itself
+            cached = (None, None, float('inf'))
+        _token_cache.set(token, cached)
+    
+    identity, claims, expires_at = cached
+    if identity is None or expires_at < time.time():
+        return None, 'anonymous'
+    
+    current = get_user_claims(identity, token_claims=claims)
+    if current is None:
+        return identity, claims.get('tier', 'free')
+    return identity, current['tier']
+
+
+def init_rate_limiting(app, limiter=None):
+    """
+    Enforce per-user API rate limits on every /api request
+    
+    Authenticated requests are limited per user at their current tier
+    (get_user_claims: token claims or the claims cache, rarely the
+    database). Anonymous requests are limited per client IP (the
+    X-Forwarded-For address when PROXY_FIX_X_FOR trusts a proxy), and endpoints authorized by a URL token
+    (RATE_LIMIT_URL_TOKENS) per token. Every response carries RateLimit-Limit,
+    RateLimit-Remaining and RateLimit-Reset headers, and rejected
+    requests get 429 with Retry-After.
+    
+    Args:
+        app: Flask application
+        limiter: Optional RateLimiter (built from configuration by default)
+    """
+    config = get_config()
+    if not config.RATE_LIMIT_ENABLED:
+        return
+    
+    limiter = limiter or _build_limiter()
+    parsed = {}
+    
+    def parsed_limit(limit):
+        if limit not in parsed:
+            parsed[limit] = parse_limit(limit)
+        return parsed[limit]
+    
+    @app.before_request
+    def check_rate_limit():
+        if not request.path.startswith('/api/') or request.method == 'OPTIONS':
+            return None
+        if request.endpoint in config.RATE_LIMIT_EXEMPT:
+            return None
+        
+        identity, tier = _identify(request.headers.get('Authorization', ''))
+        
+        url_token = (request.view_args or {}).get(config.RATE_LIMIT_URL_TOKENS.get(request.endpoint))
+        if url_token:
+            # Stored hashed, so bucket keys never contain the secret
+            subject = f"url:{hashlib.sha256(url_token.encode('utf-8')).hexdigest()[:32]}"
+        elif identity is not None:
+            subject = f'user:{identity}'
+        else:
+            subject = f'ip:{request.remote_addr}'
+        bucket, limit = _resolve_limit(config, request.endpoint, tier)
+        count, period = parsed_limit(limit)
+        result = limiter.hit(f'{subject}:{bucket}', count, period)
+        g.rate_limit = result
+        
+        if not result.allowed:
+            response = jsonify({
+                'error': 'Rate limit exceeded',
+                'message': f'Limit is {limit}. Retry in {math.ceil(result.retry_after)} seconds.'
+            })
+            response.status_code = 429
+            response.headers['Retry-After'] = str(math.ceil(result.retry_after))
+            return response
+        return None
+    
+    @app.after_request
+    def add_rate_limit_headers(response):
+        result = g.get('rate_limit')
+        if result is not None:
+            response.headers['RateLimit-Limit'] = str(result.limit)
+            response.headers['RateLimit-Remaining'] = str(result.remaining)
+            response.headers['RateLimit-Reset'] = str(math.ceil(result.reset_after))
+        return response
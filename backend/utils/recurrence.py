@@ -0,0 +1,251 @@
+# Recurrence utilities - RRULE parsing and lazy occurrence expansion for calendar series
+# A series is stored once (first occurrence + rule + exceptions); occurrences are computed per query window
+
+import json
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from dateutil.parser import parse as parse_datetime
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rrulestr
+
+# Designers schedule in days at the finest; sub-daily rules would explode windows
+SUPPORTED_FREQUENCIES = {'DAILY': DAILY, 'WEEKLY': WEEKLY, 'MONTHLY': MONTHLY, 'YEARLY': YEARLY}
+
+# Lengths of the periods that are not calendar months or years
+_FIXED_PERIODS = {DAILY: timedelta(days=1), WEEKLY: timedelta(weeks=1)}
+
+# Most occurrences of one series returned for a single window
+MAX_OCCURRENCES_PER_WINDOW = 1000
+
+# COUNT-limited series are walked from their start, so their length is capped
+MAX_COUNT = 5000
+
+
+def normalize_rule(text):
+    """
+    Validate an RRULE and return it in stored form
+    
+    Args:
+        text: Rule such as 'FREQ=WEEKLY;BYDAY=MO;COUNT=10' (an 'RRULE:' prefix is allowed)
+    
+    Returns:
+        Upper-cased rule without prefix, or None for an empty rule
+    
+    Raises:
+        ValueError: If the rule is invalid or uses an unsupported frequency
+    """
+    if text is None or not str(text).strip():
+        return None
+    
+    rule = str(text).strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[6:]
+    rule = rule.upper()
+    
+    params = rule_params(rule)
+    if params.get('FREQ') not in SUPPORTED_FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(SUPPORTED_FREQUENCIES)}")
+    if 'COUNT' in params and 'UNTIL' in params:
+        raise ValueError('COUNT and UNTIL cannot be combined')
+    if 'COUNT' in params and not (params['COUNT'].isdigit() and 0 < int(params['COUNT']) <= MAX_COUNT):
+        raise ValueError(f"COUNT must be between 1 and {MAX_COUNT}")
+    if any(key in params for key in ('DTSTART', 'EXDATE', 'RDATE')):
+        raise ValueError('Only RRULE parts are supported; exceptions are stored separately')
+    
+    # Let dateutil reject anything else it cannot parse
+    build_rule(rule, datetime(2000, 1, 1))
+    return rule
+
+
+def rule_params(rule):
+    """Parts of an RRULE as a dictionary ('FREQ=WEEKLY;COUNT=3' -> {'FREQ': 'WEEKLY', 'COUNT': '3'})"""
+    params = {}
+    for part in rule.split(';'):
+        if '=' not in part:
+            raise ValueError(f"Invalid RRULE part: {part}")
+        key, value = part.split('=', 1)
+        params[key.strip().upper()] = value.strip()
+    return params
+
+
+def build_rule(rule, dtstart):
+    """dateutil rrule for a stored rule and a naive first occurrence"""
+    parsed = rrulestr(rule, dtstart=dtstart, ignoretz=True)
+    if not isinstance(parsed, rrule):
+        raise ValueError('Only a single RRULE is supported')
+    return parsed
+
+
+def parse_exceptions(value):
+    """Stored exceptions (JSON list of occurrence starts) as a frozenset of ISO strings"""
+    if not value:
+        return frozenset()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = value
+    else:
+        items = json.loads(value)
+    return frozenset(datetime.fromisoformat(str(item)).isoformat() for item in items)
+
+
+def series_end(rule, dtstart, duration):
+    """
+    End of the last occurrence of a series
+    
+    Args:
+        rule: Stored rule
+        dtstart: First occurrence start (naive)
+        duration: Occurrence duration (timedelta)
+    
+    Returns:
+        Naive datetime (for UNTIL rules an upper bound), or None for open-ended series
+    """
+    params = rule_params(rule)
+    if 'UNTIL' in params:
+        return max(parse_datetime(params['UNTIL'], ignoretz=True), dtstart) + duration
+    if 'COUNT' not in params:
+        return None
+    
+    last = None
+    for last in build_rule(rule, dtstart):
+        pass
+    return (last or dtstart) + duration
+
+
+def _rebased(parsed, rule, dtstart, not_before):
+    """
+    Same rule starting from the last whole period before not_before
+    
+    Iterating from the series start would make queries slower the longer a
+    series runs; without COUNT the rule can start near the window instead
+    (UNTIL still applies). Monthly and yearly rules restart on the first of
+    a period, so the day (and month) rrule would take from the original
+    start are passed explicitly.
+    """
+    params = rule_params(rule)
+    if 'COUNT' in params or not_before <= dtstart:
+        return parsed
+    
+    freq = SUPPORTED_FREQUENCIES[params['FREQ']]
+    interval = int(params.get('INTERVAL', 1))
+    if freq in _FIXED_PERIODS:
+        step = _FIXED_PERIODS[freq] * interval
+        periods = (not_before - dtstart) // step - 1
+        if periods <= 0:
+            return parsed
+        return parsed.replace(dtstart=dtstart + step * periods)
+    
+    if freq == YEARLY:
+        periods = (not_before.year - dtstart.year) // interval - 1
+        if periods <= 0:
+            return parsed
+        anchor = dtstart.replace(year=dtstart.year + periods * interval, month=1, day=1)
+    else:
+        periods = ((not_before.year - dtstart.year) * 12 + not_before.month - dtstart.month) // interval - 1
+        if periods <= 0:
+            return parsed
+        index = dtstart.year * 12 + dtstart.month - 1 + periods * interval
+        anchor = dtstart.replace(year=index // 12, month=index % 12 + 1, day=1)
+    
+    defaults = {}
+    if not any(key in params for key in ('BYWEEKNO', 'BYYEARDAY', 'BYMONTHDAY', 'BYDAY')):
+        defaults['bymonthday'] = dtstart.day
+        if freq == YEARLY and 'BYMONTH' not in params:
+            defaults['bymonth'] = dtstart.month
+    return parsed.replace(dtstart=anchor, **defaults)
+
+
+@lru_cache(maxsize=4096)
+def _occurrence_starts(rule, dtstart, duration, exceptions, window_start, window_end, busy_only):
+    """Memoized occurrence starts of a series within a window (all arguments hashable)"""
+    parsed = _rebased(build_rule(rule, dtstart), rule, dtstart, window_start - duration)
+    
+    starts = []
+    for start in parsed.xafter(window_start - duration, inc=True):
+        if start > window_end or len(starts) >= MAX_OCCURRENCES_PER_WINDOW:
+            break
+        end = start + duration
+        if busy_only:
+            if not (start < window_end and end > window_start and duration > timedelta(0)):
+                continue
+        elif end < window_start:
+            continue
+        if start.isoformat() not in exceptions:
+            starts.append(start)
+    return tuple(starts)
+
+
+def occurrences(rule, dtstart, duration, window_start, window_end, exceptions=frozenset(), busy_only=False):
+    """
+    Occurrences of a series overlapping a window
+    
+    Args:
+        rule: Stored rule
+        dtstart: First occurrence start (naive)
+        duration: Occurrence duration (timedelta)
+        window_start: Window start (naive)
+        window_end: Window end (naive)
+        exceptions: ISO starts of cancelled occurrences
+        busy_only: Only occurrences that take up time inside the open window
+    
+    Returns:
+        Tuple of occurrence starts
+    """
+    return _occurrence_starts(rule, dtstart, duration, frozenset(exceptions),
+                              window_start, window_end, busy_only)
+
+
+def next_occurrences(rule, dtstart, after, count, exceptions=frozenset()):
+    """
+    The next occurrences of a series starting at or after a moment
+    
+    Args:
+        rule: Stored rule
+        dtstart: First occurrence start (naive)
+        after: Moment to start from (naive)
+        count: Maximum number of occurrences
+        exceptions: ISO starts of cancelled occurrences
+    
+    Returns:
+        List of occurrence starts
+    """
+    parsed = _rebased(build_rule(rule, dtstart), rule, dtstart, after)
+    starts = []
+    for start in parsed.xafter(after, inc=True):
+        if len(starts) >= count:
+            break
+        if start.isoformat() not in exceptions:
+            starts.append(start)
+    return starts
+
+
+def occurrences_between(rule, dtstart, after, until, exceptions=frozenset()):
+    """
+    Occurrence starts after one moment and up to another
+    
+    Not memoized: callers such as the reminder dispatcher use a window that
+    moves on every call.
+    
+    Args:
+        rule: Stored rule
+        dtstart: First occurrence start (naive)
+        after: Window start (naive, exclusive)
+        until: Window end (naive, inclusive)
+        exceptions: ISO starts of cancelled occurrences
+    
+    Returns:
+        List of occurrence starts
+    """
+    parsed = _rebased(build_rule(rule, dtstart), rule, dtstart, after)
+    starts = []
+    for start in parsed.xafter(after, inc=False):
+        if start > until or len(starts) >= MAX_OCCURRENCES_PER_WINDOW:
+            break
+        if start.isoformat() not in exceptions:
+            starts.append(start)
+    return starts
+
+
+def expansion_cache_info():
+    """Hit/miss counters of the occurrence memo"""
+    info = _occurrence_starts.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
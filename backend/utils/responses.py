@@ -0,0 +1,23 @@
+# Response helpers
+# JSON error responses shared by several blueprints
+
+from flask import jsonify
+
+
+def busy_response(message, retry_after):
+    """
+    503 response for when a bounded worker pool's queue is full
+    
+    Args:
+        message: Explanation shown to the user
+        retry_after: Seconds the client should wait before retrying
+    
+    Returns:
+        (response, 503) tuple with a Retry-After header
+    """
+    response = jsonify({
+        'error': 'Service busy',
+        'message': message
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
@@ -0,0 +1,351 @@
+# SQLite tuning
+# Connection pragmas, in-process writer serialization and background WAL checkpoints
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from config import get_config
+from utils.metrics import JOB_QUEUE_DEPTH
+
+logger = logging.getLogger('ai_studio.sqlite')
+
+# Statements that take SQLite's write lock
+_WRITE_PATTERN = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+_TEMP_STORE_MODES = ('DEFAULT', 'FILE', 'MEMORY')
+
+# Database files already switched to WAL by this process (journal_mode persists in the file)
+_wal_enabled = set()
+_wal_lock = threading.Lock()
+
+
+def is_write(sql):
+    """Whether a statement needs SQLite's write lock"""
+    return bool(_WRITE_PATTERN.match(sql))
+
+
+def tuning_enabled(config):
+    """Whether the production profile is selected (SQLITE_PROFILE)"""
+    return config.SQLITE_PROFILE == 'production'
+
+
+def connect(db_path, config=None):
+    """
+    Open a SQLite connection with the configured performance profile
+    
+    The 'production' profile puts the database in WAL mode (readers no longer
+    block the writer), waits up to SQLITE_BUSY_TIMEOUT_MS for locks instead of
+    failing with 'database is locked', and starts write transactions with
+    BEGIN IMMEDIATE so a transaction never has to upgrade a read lock (an
+    upgrade that fails immediately in WAL mode, without waiting). The
+    'default' profile leaves SQLite's own settings untouched.
+    
+    Args:
+        db_path: Database file path
+        config: Configuration object (defaults to the active configuration)
+    
+    Returns:
+        sqlite3 connection
+    """
+    config = config or get_config()
+    if not tuning_enabled(config):
+        return sqlite3.connect(db_path)
+    
+    connection = sqlite3.connect(db_path, timeout=config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                                 isolation_level='IMMEDIATE')
+    
+    if db_path != ':memory:' and db_path not in _wal_enabled:
+        with _wal_lock:
+            if db_path not in _wal_enabled:
+                connection.execute('PRAGMA journal_mode = WAL')
+                connection.execute(f'PRAGMA journal_size_limit = {int(config.SQLITE_WAL_SIZE_LIMIT)}')
+                _wal_enabled.add(db_path)
+    
+    synchronous = config.SQLITE_SYNCHRONOUS.upper()
+    temp_store = config.SQLITE_TEMP_STORE.upper()
+    if synchronous not in _SYNCHRONOUS_MODES or temp_store not in _TEMP_STORE_MODES:
+        connection.close()
+        raise ValueError(f'Invalid SQLite settings: synchronous={synchronous}, temp_store={temp_store}')
+    
+    # Per-connection settings (not stored in the database file)
+    connection.execute(f'PRAGMA synchronous = {synchronous}')
+    connection.execute(f'PRAGMA cache_size = {-int(config.SQLITE_CACHE_SIZE_KB)}')
+    connection.execute(f'PRAGMA mmap_size = {int(config.SQLITE_MMAP_SIZE)}')
+    connection.execute(f'PRAGMA temp_store = {temp_store}')
+    connection.execute(f'PRAGMA wal_autocheckpoint = {int(config.SQLITE_WAL_AUTOCHECKPOINT)}')
+    return connection
+
+
+class WriterQueue:
+    """
+    First-come, first-served queue of writers for one database file
+    
+    SQLite allows a single writer at a time. Without this queue every thread
+    of a worker races for the lock inside SQLite's busy handler, which polls
+    with growing sleeps and lets late arrivals overtake threads that have
+    waited longest. Here writers wait on a condition variable instead and
+    are woken in arrival order as soon as the previous transaction ends.
+    Other worker processes still coordinate through busy_timeout.
+    """
+    
+    def __init__(self, timeout=5.0):
+        """
+        Args:
+            timeout: Seconds a writer waits for its turn before failing
+        """
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._waiting = deque()
+        self._busy = False
+        
+        self._counters = {'acquired': 0, 'waited': 0, 'timeouts': 0}
+        self._wait_seconds = 0.0
+        self._max_wait_ms = 0.0
+    
+    def acquire(self):
+        """
+        Wait for this thread's turn to write
+        
+        Raises:
+            sqlite3.OperationalError: If the turn does not come within the timeout
+        """
+        ticket = object()
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        
+        with self._condition:
+            self._waiting.append(ticket)
+            JOB_QUEUE_DEPTH.labels('sqlite_writers').inc()
+            while self._busy or self._waiting[0] is not ticket:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._counters['timeouts'] += 1
+                    JOB_QUEUE_DEPTH.labels('sqlite_writers').dec()
+                    self._condition.notify_all()
+                    raise sqlite3.OperationalError('database is locked (writer queue timeout)')
+                self._condition.wait(remaining)
+            
+            self._waiting.popleft()
+            self._busy = True
+            
+            waited = time.perf_counter() - started
+            self._counters['acquired'] += 1
+            if waited > 0.001:
+                self._counters['waited'] += 1
+            self._wait_seconds += waited
+            self._max_wait_ms = max(self._max_wait_ms, waited * 1000)
+    
+    def release(self):
+        """End the current writer's turn"""
+        with self._condition:
+            if not self._busy:
+                return
+            self._busy = False
+            JOB_QUEUE_DEPTH.labels('sqlite_writers').dec()
+            self._condition.notify_all()
+    
+    def stats(self):
+        """
+        Queueing metrics for health checks
+        
+        Returns:
+            Dictionary of queue depth, wait times and counters
+        """
+        with self._condition:
+            acquired = self._counters['acquired']
+            return {
+                'waiting': len(self._waiting),
+                'busy': self._busy,
+                'avg_wait_ms': round(self._wait_seconds * 1000 / acquired, 2) if acquired else 0.0,
+                'max_wait_ms': round(self._max_wait_ms, 2),
+                **self._counters
+            }
+
+
+_writer_queues = {}
+_writer_queues_lock = threading.Lock()
+
+
+def writer_queue_for(db_path, config=None):
+    """
+    Shared writer queue of a database file
+    
+    Args:
+        db_path: Database file path
+        config: Configuration object (defaults to the active configuration)
+    
+    Returns:
+        WriterQueue, or None when write serialization is disabled
+    """
+    config = config or get_config()
+    if not (tuning_enabled(config) and config.SQLITE_SERIALIZE_WRITES):
+        return None
+    
+    with _writer_queues_lock:
+        queue = _writer_queues.get(db_path)
+        if queue is None:
+            queue = _writer_queues[db_path] = WriterQueue(config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+        return queue
+
+
+class WalCheckpointer:
+    """
+    Background thread that checkpoints the WAL off the request path
+    
+    Every interval it runs a PASSIVE checkpoint, which copies committed pages
+    back into the database without waiting for readers or writers. When the
+    WAL file has nevertheless grown past size_limit (long-running readers
+    can hold checkpoints back), it takes a turn in the writer queue and runs
+    a TRUNCATE checkpoint to reset the file.
+    """
+    
+    def __init__(self, db_path, interval=30.0, size_limit=64 * 1024 * 1024, config=None):
+        """
+        Args:
+            db_path: Database file path
+            interval: Seconds between checkpoints
+            size_limit: WAL size in bytes that triggers a TRUNCATE checkpoint
+            config: Configuration object used to open the checkpoint connection
+        """
+        self.db_path = db_path
+        self.interval = interval
+        self.size_limit = size_limit
+        self._config = config
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        
+        self._counters = {'passive': 0, 'truncate': 0, 'busy': 0, 'errors': 0}
+        self._last = None
+    
+    @property
+    def wal_path(self):
+        return self.db_path + '-wal'
+    
+    def wal_size(self):
+        """Current WAL file size in bytes"""
+        try:
+            return os.path.getsize(self.wal_path)
+        except OSError:
+            return 0
+    
+    def start(self):
+        """Start the checkpoint thread (once per process)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._stop.clear()
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='sqlite-checkpointer', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the checkpoint thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception as e:
+                self._counters['errors'] += 1
+                logger.warning('WAL checkpoint failed: %s', e)
+    
+    def checkpoint(self, mode=None):
+        """
+        Run one checkpoint
+        
+        Args:
+            mode: 'PASSIVE' or 'TRUNCATE' (default: TRUNCATE if the WAL is over its size limit)
+        
+        Returns:
+            Dictionary with the mode, SQLite's (busy, log pages, checkpointed pages) and timing
+        """
+        if mode is None:
+            mode = 'TRUNCATE' if self.wal_size() > self.size_limit else 'PASSIVE'
+        
+        queue = writer_queue_for(self.db_path, self._config) if mode == 'TRUNCATE' else None
+        if queue is not None:
+            queue.acquire()
+        
+        started = time.perf_counter()
+        connection = connect(self.db_path, self._config)
+        try:
+            busy, log_pages, checkpointed = connection.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+        finally:
+            connection.close()
+            if queue is not None:
+                queue.release()
+        
+        self._counters[mode.lower()] += 1
+        if busy:
+            self._counters['busy'] += 1
+        self._last = {
+            'mode': mode,
+            'busy': bool(busy),
+            'log_pages': log_pages,
+            'checkpointed_pages': checkpointed,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'at': time.time()
+        }
+        return self._last
+    
+    def stats(self):
+        """
+        Checkpoint counters and the last result
+        
+        Returns:
+            Dictionary of counters, WAL size and the last checkpoint
+        """
+        return {
+            'interval': self.interval,
+            'wal_bytes': self.wal_size(),
+            'last': self._last,
+            **self._counters
+        }
+
+
+_checkpointer = None
+
+
+def init_sqlite_tuning(app):
+    """
+    Start background WAL checkpoints for the app's database
+    
+    Args:
+        app: Flask application
+    """
+    global _checkpointer
+    config = get_config()
+    db_path = config.SQLALCHEMY_DATABASE_URI.replace('sqlite:///', '')
+    
+    if not tuning_enabled(config) or db_path == ':memory:' or config.SQLITE_CHECKPOINT_INTERVAL <= 0:
+        return
+    
+    _checkpointer = WalCheckpointer(db_path, interval=config.SQLITE_CHECKPOINT_INTERVAL,
+                                    size_limit=config.SQLITE_WAL_SIZE_LIMIT, config=config)
+    _checkpointer.start()
+
+
+def sqlite_stats():
+    """
+    SQLite tuning status for the health check
+    
+    Returns:
+        Dictionary with the active profile, writer queues and checkpointer
+    """
+    config = get_config()
+    with _writer_queues_lock:
+        queues = dict(_writer_queues)
+    return {
+        'profile': config.SQLITE_PROFILE,
+        'writer_queues': {os.path.basename(path): queue.stats() for path, queue in queues.items()},
+        'checkpointer': _checkpointer.stats() if _checkpointer else None
+    }
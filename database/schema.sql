@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS users (
     subscription_tier ENUM('free', 'pro', 'agency') DEFAULT 'free',
     ai_generations_used INT DEFAULT 0,
     ai_generations_limit INT DEFAULT 5,
+    claims_version INT DEFAULT 0,  -- Bumped when tier/role change so cached JWT claims go stale
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_email (email),
@@ -136,7 +137,14 @@ CREATE TABLE IF NOT EXISTS products (
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE SET NULL,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     INDEX idx_project_id (project_id),
-    INDEX idx_category (category)
+    INDEX idx_category (category),
+    -- Composite indexes for faceted product search
+    INDEX idx_user_created (user_id, created_at),
+    INDEX idx_user_category (user_id, category),
+    INDEX idx_user_style (user_id, style),
+    INDEX idx_user_color (user_id, color),
+    INDEX idx_user_vendor (user_id, vendor),
+    INDEX idx_user_price (user_id, price)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Invoices table: financial tracking
@@ -160,6 +168,7 @@ CREATE TABLE IF NOT EXISTS invoices (
     FOREIGN KEY (client_id) REFERENCES clients(id) ON DELETE SET NULL,
     INDEX idx_user_id (user_id),
     INDEX idx_status (status),
+    INDEX idx_status_due_date (status, due_date),
     INDEX idx_invoice_number (invoice_number)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -172,14 +181,21 @@ CREATE TABLE IF NOT EXISTS marketing_content (
     platform VARCHAR(50),
     title VARCHAR(255),
     content TEXT NOT NULL,
-    scheduled_date TIMESTAMP NULL,
+    scheduled_date TIMESTAMP NULL, -- UTC
     posted_date TIMESTAMP NULL,
-    status ENUM('draft', 'scheduled', 'posted') DEFAULT 'draft',
+    status ENUM('draft', 'scheduled', 'posted', 'failed') DEFAULT 'draft',
+    attempts INT NOT NULL DEFAULT 0, -- Publish attempts of the current schedule
+    claimed_by VARCHAR(64), -- Dispatcher run publishing the post
+    claimed_until TIMESTAMP NULL, -- Claim lease, or earliest retry after a failed attempt
+    last_error VARCHAR(500),
+    external_id VARCHAR(255), -- Post ID on the platform
+    post_url VARCHAR(500),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE SET NULL,
     INDEX idx_user_id (user_id),
-    INDEX idx_status (status)
+    INDEX idx_status (status),
+    INDEX idx_status_scheduled (status, scheduled_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Calendar events table: scheduling and automations
@@ -196,12 +212,19 @@ CREATE TABLE IF NOT EXISTS calendar_events (
     location VARCHAR(255),
     is_automated BOOLEAN DEFAULT FALSE,
     reminder_sent BOOLEAN DEFAULT FALSE,
+    recurrence_rule VARCHAR(500), -- RRULE of a recurring series (start/end_time are its first occurrence)
+    recurrence_exceptions JSON, -- Cancelled occurrence starts
+    recurrence_until TIMESTAMP NULL, -- End of the last occurrence, NULL for open-ended series
+    reminded_until TIMESTAMP NULL, -- Start of the latest occurrence of a series whose reminder was sent
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE,
     FOREIGN KEY (client_id) REFERENCES clients(id) ON DELETE SET NULL,
     INDEX idx_user_id (user_id),
-    INDEX idx_start_time (start_time)
+    INDEX idx_start_time (start_time),
+    INDEX idx_user_start_end (user_id, start_time, end_time),
+    INDEX idx_user_series (user_id, recurrence_until),
+    INDEX idx_reminder_start (reminder_sent, start_time)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Activity log table: tracks user actions for AI insights
@@ -218,6 +241,69 @@ CREATE TABLE IF NOT EXISTS activity_log (
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Embeddings table: style vectors for similarity search
+CREATE TABLE IF NOT EXISTS embeddings (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    entity_type VARCHAR(20) NOT NULL,
+    entity_id INT NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    dim INT NOT NULL,
+    content_hash CHAR(40) NOT NULL,
+    vector BLOB NOT NULL, -- float32 array
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    UNIQUE KEY uniq_entity (entity_type, entity_id),
+    INDEX idx_user_entity (user_id, entity_type, model)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Usage counters table: per-feature AI usage per billing period
+CREATE TABLE IF NOT EXISTS usage_counters (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    feature VARCHAR(50) NOT NULL,
+    period_start DATE NOT NULL,
+    used INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    UNIQUE KEY uniq_usage_period (user_id, feature, period_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Invoice sequences table: next invoice number per designer (no COUNT(*) per invoice)
+CREATE TABLE IF NOT EXISTS invoice_sequences (
+    user_id INT NOT NULL,
+    name VARCHAR(20) NOT NULL DEFAULT 'invoice',
+    next_value INT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, name),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Invoice totals table: monthly finance aggregates per designer, kept up to date on every invoice write
+-- basis 'issued' and 'paid' use YYYY-MM periods, basis 'due' (unpaid invoices) uses YYYY-MM-DD
+CREATE TABLE IF NOT EXISTS invoice_totals (
+    user_id INT NOT NULL,
+    basis ENUM('issued', 'paid', 'due') NOT NULL,
+    period VARCHAR(10) NOT NULL,
+    type VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    invoice_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, basis, period, type, status),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Calendar feeds table: tokenized ICS subscription per designer; version changes on every event write
+CREATE TABLE IF NOT EXISTS calendar_feeds (
+    user_id INT PRIMARY KEY,
+    token_hash CHAR(64) NOT NULL UNIQUE, -- SHA-256 of the feed token
+    version INT NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Insert default admin user (password: admin123 - CHANGE IN PRODUCTION)
 -- Password hash is bcrypt hash of 'admin123'
 INSERT INTO users (name, email, password_hash, role, subscription_tier, ai_generations_limit) 
@@ -1,5 +1,7 @@
 -- AI Studio for Interior Designers - SQLite Database Schema
 -- This schema defines all tables needed for the MVP using SQLite
+-- Columns added to existing tables must also be listed in ADDED_COLUMNS in
+-- backend/init_db.py, which adds them to older databases before this script runs
 
 -- Users table: stores designer accounts
 CREATE TABLE IF NOT EXISTS users (
@@ -11,6 +13,7 @@ CREATE TABLE IF NOT EXISTS users (
     subscription_tier TEXT DEFAULT 'free' CHECK (subscription_tier IN ('free', 'pro', 'agency')),
     ai_generations_used INTEGER DEFAULT 0,
     ai_generations_limit INTEGER DEFAULT 5,
+    claims_version INTEGER DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -120,6 +123,14 @@ CREATE TABLE IF NOT EXISTS products (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Composite indexes for faceted product search
+CREATE INDEX IF NOT EXISTS idx_products_user_created ON products (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_products_user_category ON products (user_id, category);
+CREATE INDEX IF NOT EXISTS idx_products_user_style ON products (user_id, style);
+CREATE INDEX IF NOT EXISTS idx_products_user_color ON products (user_id, color);
+CREATE INDEX IF NOT EXISTS idx_products_user_vendor ON products (user_id, vendor);
+CREATE INDEX IF NOT EXISTS idx_products_user_price ON products (user_id, price);
+
 -- Invoices table: financial tracking
 CREATE TABLE IF NOT EXISTS invoices (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -141,6 +152,9 @@ CREATE TABLE IF NOT EXISTS invoices (
     FOREIGN KEY (client_id) REFERENCES clients(id) ON DELETE SET NULL
 );
 
+-- Overdue sweeps walk 'sent' invoices by due date across all designers
+CREATE INDEX IF NOT EXISTS idx_invoices_status_due_date ON invoices (status, due_date);
+
 -- Marketing content table: generated marketing materials
 CREATE TABLE IF NOT EXISTS marketing_content (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -150,14 +164,23 @@ CREATE TABLE IF NOT EXISTS marketing_content (
     platform TEXT,
     title TEXT,
     content TEXT NOT NULL,
-    scheduled_date TIMESTAMP NULL,
+    scheduled_date TIMESTAMP NULL, -- UTC, 'YYYY-MM-DD HH:MM:SS'
     posted_date TIMESTAMP NULL,
-    status TEXT DEFAULT 'draft' CHECK (status IN ('draft', 'scheduled', 'posted')),
+    status TEXT DEFAULT 'draft' CHECK (status IN ('draft', 'scheduled', 'posted', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0, -- Publish attempts of the current schedule
+    claimed_by TEXT, -- Dispatcher run publishing the post
+    claimed_until TIMESTAMP NULL, -- Claim lease, or earliest retry after a failed attempt
+    last_error TEXT,
+    external_id TEXT, -- Post ID on the platform
+    post_url TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE SET NULL
 );
 
+-- The post dispatcher claims due posts of all designers in schedule order
+CREATE INDEX IF NOT EXISTS idx_marketing_content_due ON marketing_content (status, scheduled_date);
+
 -- Calendar events table: scheduling and automations
 CREATE TABLE IF NOT EXISTS calendar_events (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -172,12 +195,80 @@ CREATE TABLE IF NOT EXISTS calendar_events (
     location TEXT,
     is_automated BOOLEAN DEFAULT 0,
     reminder_sent BOOLEAN DEFAULT 0,
+    recurrence_rule TEXT, -- RRULE of a recurring series (start/end_time are its first occurrence)
+    recurrence_exceptions TEXT, -- JSON list of cancelled occurrence starts
+    recurrence_until TIMESTAMP, -- End of the last occurrence, NULL for open-ended series
+    reminded_until TIMESTAMP, -- Start of the latest occurrence of a series whose reminder was sent
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE,
     FOREIGN KEY (client_id) REFERENCES clients(id) ON DELETE SET NULL
 );
 
+-- Upcoming events walk a designer's events in start order
+CREATE INDEX IF NOT EXISTS idx_calendar_events_user_start ON calendar_events (user_id, start_time);
+
+-- The reminder dispatcher reads unsent reminders of all designers in start order
+CREATE INDEX IF NOT EXISTS idx_calendar_events_reminder ON calendar_events (reminder_sent, start_time);
+
+-- Recurring series of a designer (few rows, expanded per query window)
+CREATE INDEX IF NOT EXISTS idx_calendar_events_user_series ON calendar_events (user_id)
+WHERE recurrence_rule IS NOT NULL;
+
+-- Interval index over calendar events for range, conflict and free/busy queries.
+-- One box per event: the designer on one axis, [start, end] in minutes since the
+-- epoch (UTC) on the other; events without (or with an earlier) end time are
+-- points, recurring series span from their first occurrence to recurrence_until
+-- (open-ended series to the end of the axis). Coordinates are rounded outwards,
+-- so queries refine the candidates on calendar_events.
+CREATE VIRTUAL TABLE IF NOT EXISTS calendar_event_intervals USING rtree_i32(
+    id,
+    user_min, user_max,
+    start_minute, end_minute
+);
+
+CREATE TRIGGER IF NOT EXISTS calendar_events_interval_insert
+AFTER INSERT ON calendar_events
+BEGIN
+    INSERT INTO calendar_event_intervals (id, user_min, user_max, start_minute, end_minute)
+    VALUES (NEW.id, NEW.user_id, NEW.user_id,
+            COALESCE(CAST(strftime('%s', NEW.start_time) AS INTEGER), 0) / 60,
+            MAX(COALESCE(CAST(strftime('%s', NEW.start_time) AS INTEGER), 0) / 60,
+                CASE WHEN NEW.recurrence_rule IS NULL
+                     THEN (COALESCE(CAST(strftime('%s', NEW.end_time) AS INTEGER), 0) + 59) / 60
+                     ELSE COALESCE((CAST(strftime('%s', NEW.recurrence_until) AS INTEGER) + 59) / 60, 2147483647) END));
+END;
+
+CREATE TRIGGER IF NOT EXISTS calendar_events_interval_update
+AFTER UPDATE OF user_id, start_time, end_time, recurrence_rule, recurrence_until ON calendar_events
+BEGIN
+    UPDATE calendar_event_intervals
+    SET user_min = NEW.user_id, user_max = NEW.user_id,
+        start_minute = COALESCE(CAST(strftime('%s', NEW.start_time) AS INTEGER), 0) / 60,
+        end_minute = MAX(COALESCE(CAST(strftime('%s', NEW.start_time) AS INTEGER), 0) / 60,
+                         CASE WHEN NEW.recurrence_rule IS NULL
+                              THEN (COALESCE(CAST(strftime('%s', NEW.end_time) AS INTEGER), 0) + 59) / 60
+                              ELSE COALESCE((CAST(strftime('%s', NEW.recurrence_until) AS INTEGER) + 59) / 60, 2147483647) END)
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS calendar_events_interval_delete
+AFTER DELETE ON calendar_events
+BEGIN
+    DELETE FROM calendar_event_intervals WHERE id = OLD.id;
+END;
+
+-- Index events that existed before the interval index was added
+INSERT INTO calendar_event_intervals (id, user_min, user_max, start_minute, end_minute)
+SELECT id, user_id, user_id,
+       COALESCE(CAST(strftime('%s', start_time) AS INTEGER), 0) / 60,
+       MAX(COALESCE(CAST(strftime('%s', start_time) AS INTEGER), 0) / 60,
+           CASE WHEN recurrence_rule IS NULL
+                THEN (COALESCE(CAST(strftime('%s', end_time) AS INTEGER), 0) + 59) / 60
+                ELSE COALESCE((CAST(strftime('%s', recurrence_until) AS INTEGER) + 59) / 60, 2147483647) END)
+FROM calendar_events
+WHERE id NOT IN (SELECT id FROM calendar_event_intervals);
+
 -- Activity log table: tracks user actions for AI insights
 CREATE TABLE IF NOT EXISTS activity_log (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -190,6 +281,70 @@ CREATE TABLE IF NOT EXISTS activity_log (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Embeddings table: style vectors for similarity search
+CREATE TABLE IF NOT EXISTS embeddings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    vector BLOB NOT NULL, -- float32 array
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (entity_type, entity_id),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_embeddings_user_entity ON embeddings (user_id, entity_type, model);
+
+-- Usage counters table: per-feature AI usage per billing period
+CREATE TABLE IF NOT EXISTS usage_counters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    feature TEXT NOT NULL,
+    period_start DATE NOT NULL,
+    used INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, feature, period_start),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Invoice sequences table: next invoice number per designer (no COUNT(*) per invoice)
+CREATE TABLE IF NOT EXISTS invoice_sequences (
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL DEFAULT 'invoice',
+    next_value INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, name),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Invoice totals table: monthly finance aggregates per designer, kept up to date on every invoice write
+-- basis 'issued' and 'paid' use YYYY-MM periods, basis 'due' (unpaid invoices) uses YYYY-MM-DD
+CREATE TABLE IF NOT EXISTS invoice_totals (
+    user_id INTEGER NOT NULL,
+    basis TEXT NOT NULL CHECK (basis IN ('issued', 'paid', 'due')),
+    period TEXT NOT NULL,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    amount REAL NOT NULL DEFAULT 0,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, basis, period, type, status),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Calendar feeds table: tokenized ICS subscription per designer; version changes on every event write
+CREATE TABLE IF NOT EXISTS calendar_feeds (
+    user_id INTEGER PRIMARY KEY,
+    token_hash TEXT NOT NULL UNIQUE, -- SHA-256 of the feed token
+    version INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 -- Insert default admin user (password: admin123 - CHANGE IN PRODUCTION)
 -- Password hash is bcrypt hash of 'admin123'
 INSERT OR IGNORE INTO users (name, email, password_hash, role, subscription_tier, ai_generations_limit) 
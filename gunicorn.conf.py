@@ -0,0 +1,29 @@
+# Gunicorn configuration
+# Worker settings and the shared directory Prometheus metrics are aggregated through
+
+import os
+import shutil
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:' + os.getenv('PORT', '5000'))
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))  # AI generation requests are slow
+
+# Every worker writes its metric samples to files here and /metrics merges them.
+# Must be set before the app (and prometheus_client) is imported by the workers.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                      os.path.join(tempfile.gettempdir(), 'ai_studio_metrics'))
+
+
+def on_starting(server):
+    """Start every run with an empty metrics directory"""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop live gauges (open connections, queue depths) of a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)